@@ -0,0 +1,5 @@
+"""grpc-accesslog benchmarks.
+
+Each module is runnable with ``python -m benchmarks.<module>`` from the
+repository root and prints one result line per configuration.
+"""
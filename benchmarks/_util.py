@@ -0,0 +1,80 @@
+"""Shared benchmark helpers."""
+
+import logging
+import time
+from concurrent import futures
+from contextlib import contextmanager
+from typing import Callable
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Sequence
+
+import grpc
+
+from grpc_accesslog._context import Metadatum
+from tests._server import Servicer
+from tests.proto import test_service_pb2_grpc
+
+
+class FakeContext:
+    """Servicer context stand-in for calling ``AccessLogger.log`` directly."""
+
+    def __init__(self, metadata: Sequence[tuple] = (("user-agent", "bench"),)) -> None:
+        """Create a fake context."""
+        self._metadata = tuple(Metadatum(key, value) for key, value in metadata)
+
+    def peer(self) -> str:
+        """Return a fixed peer."""
+        return "ipv4:127.0.0.1:50000"
+
+    def code(self) -> Optional[grpc.StatusCode]:
+        """Return no explicit status."""
+        return None
+
+    def invocation_metadata(self) -> Sequence[Metadatum]:
+        """Return the fixed metadata."""
+        return self._metadata
+
+
+def null_logger(name: str = "benchmark") -> logging.Logger:
+    """Return a logger that discards records after formatting."""
+    logger = logging.getLogger(name)
+    logger.propagate = False
+    logger.handlers = [logging.NullHandler()]
+    logger.setLevel(logging.INFO)
+    return logger
+
+
+@contextmanager
+def serve(
+    interceptors: Optional[Sequence[grpc.ServerInterceptor]] = None,
+) -> Iterator[str]:
+    """Run the test servicer and yield its address."""
+    server = grpc.server(
+        futures.ThreadPoolExecutor(max_workers=4), interceptors=interceptors
+    )
+    test_service_pb2_grpc.add_TestServiceServicer_to_server(Servicer(), server)
+    port = server.add_insecure_port("localhost:0")
+    server.start()
+    try:
+        yield f"localhost:{port}"
+    finally:
+        server.stop(grace=0)
+
+
+def timeit(fn: Callable[[], object], number: int, repeat: int = 5) -> float:
+    """Return the best mean time per call in microseconds."""
+    results: List[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        results.append((time.perf_counter() - start) / number * 1e6)
+
+    return min(results)
+
+
+def report(name: str, value: float, unit: str = "us/op") -> None:
+    """Print a benchmark result line."""
+    print(f"{name:<48} {value:>12.2f} {unit}")
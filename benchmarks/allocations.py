@@ -0,0 +1,69 @@
+"""Measure the cost of sampled allocation tracing per RPC."""
+
+import argparse
+from typing import Any
+from typing import Dict
+from typing import NamedTuple
+from typing import Optional
+
+import grpc
+
+from grpc_accesslog import AccessLogInterceptor
+from grpc_accesslog import AllocationSampler
+from grpc_accesslog import handlers
+from tests.proto import test_service_pb2
+
+from ._util import FakeContext
+from ._util import null_logger
+from ._util import report
+from ._util import timeit
+
+
+class CallDetails(NamedTuple):
+    """Handler call details stand-in."""
+
+    method: str
+    invocation_metadata: tuple = ()
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--number", type=int, default=50000)
+    parser.add_argument("--allocate", type=int, default=4096)
+    args = parser.parse_args()
+
+    context = FakeContext()
+    request = test_service_pb2.Request(data="data")
+    response = test_service_pb2.Response(data="data")
+    details = CallDetails("/TestService/UnaryUnary")
+
+    def unary(request: Any, context: Any) -> Any:
+        bytearray(args.allocate)
+        return response
+
+    handler = grpc.unary_unary_rpc_method_handler(unary)
+    samplers: Dict[str, Optional[AllocationSampler]] = {
+        "off": None,
+        "miss": AllocationSampler(sample_every=1 << 62, interval=0),
+        "hit": AllocationSampler(sample_every=1, interval=0),
+    }
+    for name, sampler in samplers.items():
+        interceptor = AccessLogInterceptor(
+            handlers=[handlers.request, handlers.status, handlers.alloc_bytes],
+            logger=null_logger(),
+            allocations=sampler,
+        )
+        # The miss counter starts past its first, sampled RPC.
+        if sampler is not None:
+            sampler.sampled(details.method)
+
+        def call(interceptor: AccessLogInterceptor = interceptor) -> None:
+            intercepted = interceptor.intercept_service(lambda _: handler, details)
+            intercepted.unary_unary(request, context)  # type: ignore
+
+        report(f"allocations/{name}", timeit(call, args.number))
+
+
+if __name__ == "__main__":
+    main()
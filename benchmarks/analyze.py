@@ -0,0 +1,46 @@
+"""Measure access log analysis throughput with one and several processes."""
+
+import argparse
+import os
+import tempfile
+import time
+
+from grpc_accesslog._analyze import DEFAULT_FORMAT
+from grpc_accesslog._analyze import analyze
+
+from ._util import report
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--number", type=int, default=1000000)
+    parser.add_argument("-j", "--processes", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "access.log")
+        with open(path, "w") as file:
+            for index in range(args.number):
+                file.write(
+                    f"10.0.{index % 7}.{index % 251} "
+                    f"[03/Apr/2021:00:00:{index % 60:02d} +0000] "
+                    f"/TestService/Method{index % 5} "
+                    f"{'OK' if index % 13 else 'NOT_FOUND'} {index % 97} "
+                    "grpc-python/1.62.1 grpc-c/39.0.0 (linux; chttp2)\n"
+                )
+        report("size", os.path.getsize(path) / 2**20, "MiB")
+
+        for processes in sorted({1, args.processes}):
+            start = time.perf_counter()
+            analyze([path], DEFAULT_FORMAT, processes)
+            elapsed = time.perf_counter() - start
+            report(
+                f"analyze/processes={processes}",
+                elapsed / args.number * 1e6,
+                "us/line",
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Compare annotating the access record with logging an extra line per RPC."""
+
+import argparse
+import logging
+from typing import Any
+
+from grpc_accesslog import AccessLogInterceptor
+from grpc_accesslog import annotate
+from grpc_accesslog import handlers
+from tests.proto import test_service_pb2
+
+from ._util import FakeContext
+from ._util import null_logger
+from ._util import report
+from ._util import timeit
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--number", type=int, default=50000)
+    args = parser.parse_args()
+
+    context = FakeContext()
+    request = test_service_pb2.Request(data="data")
+    response = test_service_pb2.Response(data="data")
+    extra = null_logger("benchmark.extra")
+
+    def plain(request: Any, context: Any) -> Any:
+        return response
+
+    def annotating(request: Any, context: Any) -> Any:
+        annotate(tenant="acme", cache="hit", shard=3)
+        return response
+
+    def logging_extra(request: Any, context: Any) -> Any:
+        extra.info("tenant=%s cache=%s shard=%d", "acme", "hit", 3)
+        return response
+
+    behaviors = {"none": plain, "annotate": annotating, "extra_line": logging_extra}
+    for name, behavior in behaviors.items():
+        interceptor = AccessLogInterceptor(
+            handlers=[handlers.request, handlers.status, handlers.annotations],
+            logger=null_logger(),
+            level=logging.INFO,
+        )
+        wrapped = interceptor._logging_wrapper(
+            behavior, "/TestService/UnaryUnary", False
+        )
+
+        def call(wrapped: Any = wrapped) -> None:
+            wrapped(request, context)
+
+        report(f"annotations/{name}", timeit(call, args.number))
+
+
+if __name__ == "__main__":
+    main()
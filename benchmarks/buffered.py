@@ -0,0 +1,106 @@
+"""Measure file sink contention from 1 to 128 writing threads."""
+
+import argparse
+import os
+import tempfile
+import threading
+import time
+from typing import Callable
+from typing import Dict
+from typing import Union
+
+from grpc_accesslog import sinks
+from grpc_accesslog._deferred import DeferredWriter
+
+from ._util import report
+
+
+THREADS = (1, 2, 4, 8, 16, 32, 64, 128)
+LINE = "127.0.0.1 [03/Apr/2021:00:00:00 +0000] /TestService/UnaryUnary OK 4 bench"
+
+
+class LockedFileSink:
+    """Write each line to a shared file under one lock."""
+
+    def __init__(self, path: str) -> None:
+        """Open the file."""
+        self._file = open(path, "a")
+        self._lock = threading.Lock()
+
+    def write(self, line: str) -> None:
+        """Write a line under the lock."""
+        with self._lock:
+            self._file.write(line + "\n")
+
+    def close(self) -> None:
+        """Close the file."""
+        self._file.close()
+
+
+class QueuedFileSink:
+    """Queue each line to a single writer thread."""
+
+    def __init__(self, path: str) -> None:
+        """Open the file and start the writer thread."""
+        self._file = open(path, "a")
+        self._writer: DeferredWriter[str] = DeferredWriter(self._write, "queued-writer")
+
+    def write(self, line: str) -> None:
+        """Queue a line."""
+        self._writer.submit(line)
+
+    def close(self) -> None:
+        """Drain the queue and close the file."""
+        self._writer.close()
+        self._file.close()
+
+    def _write(self, line: str) -> None:
+        self._file.write(line + "\n")
+
+
+Sink = Union[LockedFileSink, QueuedFileSink, sinks.ThreadBufferedSink]
+SINKS: Dict[str, Callable[[str], Sink]] = {
+    "locked": LockedFileSink,
+    "queued": QueuedFileSink,
+    "thread_buffered": lambda path: sinks.ThreadBufferedSink(path, sequence=False),
+    "thread_buffered/sequence": sinks.ThreadBufferedSink,
+}
+
+
+def run(sink: Sink, threads: int, number: int) -> float:
+    """Return the wall time per record until all lines are written."""
+    barrier = threading.Barrier(threads + 1)
+
+    def worker() -> None:
+        barrier.wait()
+        for _ in range(number // threads):
+            sink.write(LINE)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in workers:
+        thread.join()
+    sink.close()
+
+    return (time.perf_counter() - start) / (number // threads * threads) * 1e6
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--number", type=int, default=128000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        for threads in THREADS:
+            for name, factory in SINKS.items():
+                path = os.path.join(directory, f"{name.replace('/', '-')}.log")
+                result = run(factory(path), threads, args.number)
+                report(f"{name}/threads={threads}", result, "us/record")
+
+
+if __name__ == "__main__":
+    main()
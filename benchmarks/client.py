@@ -0,0 +1,54 @@
+"""Compare client and server interceptor overhead per unary RPC."""
+
+import argparse
+
+import grpc
+
+from grpc_accesslog import AccessLogClientInterceptor
+from grpc_accesslog import AccessLogInterceptor
+from tests.proto import test_service_pb2
+from tests.proto import test_service_pb2_grpc
+
+from ._util import null_logger
+from ._util import report
+from ._util import serve
+from ._util import timeit
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--number", type=int, default=2000)
+    args = parser.parse_args()
+
+    request = test_service_pb2.Request(data="data")
+    logger = null_logger()
+
+    with serve() as address, grpc.insecure_channel(address) as channel:
+        stub = test_service_pb2_grpc.TestServiceStub(channel)
+        report(
+            "unary/no interceptor",
+            timeit(lambda: stub.UnaryUnary(request), args.number),
+        )
+
+        intercepted = grpc.intercept_channel(
+            channel, AccessLogClientInterceptor(logger=logger, target=address)
+        )
+        stub = test_service_pb2_grpc.TestServiceStub(intercepted)
+        report(
+            "unary/client interceptor",
+            timeit(lambda: stub.UnaryUnary(request), args.number),
+        )
+
+    with serve([AccessLogInterceptor(logger=logger)]) as address, grpc.insecure_channel(
+        address
+    ) as channel:
+        stub = test_service_pb2_grpc.TestServiceStub(channel)
+        report(
+            "unary/server interceptor",
+            timeit(lambda: stub.UnaryUnary(request), args.number),
+        )
+
+
+if __name__ == "__main__":
+    main()
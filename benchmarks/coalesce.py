@@ -0,0 +1,77 @@
+"""Compare writing every access line with coalescing repeated lines."""
+
+import argparse
+import itertools
+import logging
+import os
+from datetime import datetime
+from datetime import timezone
+from typing import Callable
+
+import grpc
+
+from grpc_accesslog import Coalescer
+from grpc_accesslog import handlers
+from grpc_accesslog._server import AccessLogger
+
+from ._util import FakeContext
+from ._util import report
+from ._util import timeit
+
+
+class FailedContext(FakeContext):
+    """Servicer context of a failed RPC."""
+
+    def code(self) -> grpc.StatusCode:
+        """Return an error status."""
+        return grpc.StatusCode.UNAVAILABLE
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--number", type=int, default=50000)
+    parser.add_argument("--keys", type=int, default=4096)
+    args = parser.parse_args()
+
+    devnull = open(os.devnull, "w")
+    context = FailedContext()
+    start = datetime(2021, 4, 3, tzinfo=timezone.utc)
+    methods = [f"/svc/Method{index}" for index in range(args.keys)]
+    floods = {
+        "flood": itertools.repeat("/svc/Method").__next__,
+        "distinct": itertools.cycle(methods).__next__,
+    }
+
+    for flood, next_method in floods.items():
+        for name, coalesce in (("off", None), ("on", Coalescer(max_keys=1024))):
+            logger = logging.getLogger(f"benchmark.coalesce.{flood}.{name}")
+            logger.propagate = False
+            logger.setLevel(logging.INFO)
+            logger.handlers = [logging.StreamHandler(devnull)]
+            access_logger = AccessLogger(
+                handlers=[
+                    handlers.time_received(),
+                    handlers.peer,
+                    handlers.request,
+                    handlers.status,
+                    handlers.rtt_ms,
+                ],
+                logger=logger,
+                coalesce=coalesce,
+            )
+
+            def call(
+                access_logger: AccessLogger = access_logger,
+                next_method: Callable[[], str] = next_method,
+            ) -> None:
+                access_logger.log(context, next_method(), None, None, start, start)
+
+            report(f"coalesce/{flood}/{name}", timeit(call, args.number))
+            access_logger.close()
+
+    devnull.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""Measure compressed file sink CPU and size per record at each level."""
+
+import argparse
+import os
+import tempfile
+import time
+
+from grpc_accesslog import sinks
+
+from ._util import report
+
+
+LEVELS = (("gzip", (1, 6, 9)), ("zstd", (1, 3, 10, 19)))
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--number", type=int, default=50000)
+    args = parser.parse_args()
+
+    lines = [
+        f"10.0.{index % 7}.{index % 251} [03/Apr/2021:00:00:{index % 60:02d} +0000] "
+        f"/TestService/UnaryUnary {'OK' if index % 13 else 'NOT_FOUND'} "
+        f"{index % 97} bench/{index % 3}"
+        for index in range(args.number)
+    ]
+    raw = sum(len(line) + 1 for line in lines)
+    report("uncompressed", raw / args.number, "bytes/record")
+
+    with tempfile.TemporaryDirectory() as directory:
+        for codec, levels in LEVELS:
+            for level in levels:
+                path = os.path.join(directory, f"{codec}-{level}.log")
+                sink = sinks.CompressedFileSink(path, codec=codec, level=level)
+                # CPU time of all threads, so it includes the writer thread.
+                start = time.process_time()
+                for line in lines:
+                    sink.write(line)
+                sink.close()
+                cpu = time.process_time() - start
+
+                size = sum(os.path.getsize(segment) for segment in sink.segments())
+                report(f"{codec}/level={level}", cpu / args.number * 1e6, "us/record")
+                report(
+                    f"{codec}/level={level}/size", size / args.number, "bytes/record"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Measure the cost of per-RPC CPU time accounting."""
+
+import argparse
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Tuple
+
+from grpc_accesslog import AccessLogInterceptor
+from grpc_accesslog import handlers
+from grpc_accesslog._cpu import cpu_timed
+from grpc_accesslog.handlers import THandler
+from tests.proto import test_service_pb2
+
+from ._util import FakeContext
+from ._util import null_logger
+from ._util import report
+from ._util import timeit
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--number", type=int, default=50000)
+    parser.add_argument("--messages", type=int, default=10)
+    args = parser.parse_args()
+
+    context = FakeContext()
+    request = test_service_pb2.Request(data="data")
+    response = test_service_pb2.Response(data="data")
+
+    def unary(request: Any, context: Any) -> Any:
+        return response
+
+    def stream(request: Any, context: Any) -> Iterator[Any]:
+        for _ in range(args.messages):
+            yield response
+
+    handler_sets: Dict[str, List[THandler]] = {
+        "off": [handlers.request, handlers.status],
+        "cpu_us": [handlers.request, handlers.status, handlers.cpu_us],
+    }
+    for name, handler_set in handler_sets.items():
+        interceptor = AccessLogInterceptor(handlers=handler_set, logger=null_logger())
+        behaviors: List[Tuple[str, Callable[[Any, Any], Any], bool]] = [
+            ("unary", unary, False),
+            ("stream", stream, True),
+        ]
+        for shape, behavior, streaming in behaviors:
+            if interceptor._inputs.cpu:
+                behavior = cpu_timed(behavior, streaming)
+            wrapped = interceptor._logging_wrapper(
+                behavior, "/TestService/UnaryUnary", streaming
+            )
+
+            def call(wrapped: Any = wrapped, streaming: bool = streaming) -> None:
+                result = wrapped(request, context)
+                if streaming:
+                    for _ in result:
+                        pass
+
+            report(f"cpu/{shape}/{name}", timeit(call, args.number))
+
+
+if __name__ == "__main__":
+    main()
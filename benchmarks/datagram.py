@@ -0,0 +1,52 @@
+"""Measure UDP syslog throughput with one datagram per record and packed."""
+
+import argparse
+import socket
+
+from grpc_accesslog import sinks
+from grpc_accesslog.sinks._datagram import DEFAULT_MTU
+
+from ._util import report
+from ._util import timeit
+
+
+REPEAT = 5
+LINE = "127.0.0.1 [03/Apr/2021:00:00:00 +0000] /TestService/UnaryUnary OK 6 bench"
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--number", type=int, default=20000)
+    args = parser.parse_args()
+
+    receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    receiver.bind(("127.0.0.1", 0))
+    port = receiver.getsockname()[1]
+
+    for name, mtu, unbatched in (
+        ("unbatched", DEFAULT_MTU, True),
+        ("mtu=512", 512, False),
+        ("mtu=1472", 1472, False),
+        ("mtu=8192", 8192, False),
+    ):
+        sink = sinks.SyslogSink(port=port, mtu=mtu, flush_interval=0)
+
+        def write(sink: sinks.SyslogSink = sink, unbatched: bool = unbatched) -> None:
+            sink.write(LINE)
+            if unbatched:
+                sink.flush()
+
+        report(f"syslog/{name}", timeit(write, args.number, REPEAT))
+        report(
+            f"syslog/{name}/datagrams per 1k records",
+            sink.sent / (args.number * REPEAT) * 1000,
+            "",
+        )
+        sink.close()
+
+    receiver.close()
+
+
+if __name__ == "__main__":
+    main()
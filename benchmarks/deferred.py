@@ -0,0 +1,43 @@
+"""Measure RPC thread cost of inline and deferred handler evaluation."""
+
+import argparse
+from datetime import datetime
+from datetime import timezone
+
+from grpc_accesslog._server import AccessLogger
+from tests.proto import test_service_pb2
+
+from ._util import FakeContext
+from ._util import null_logger
+from ._util import report
+from ._util import timeit
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--number", type=int, default=20000)
+    args = parser.parse_args()
+
+    context = FakeContext()
+    request = test_service_pb2.Request(data="data")
+    response = test_service_pb2.Response(data="data")
+    start = end = datetime.now(timezone.utc)
+
+    for deferred in (False, True):
+        access_logger = AccessLogger(logger=null_logger(), deferred=deferred)
+
+        def log(access_logger: AccessLogger = access_logger) -> None:
+            access_logger.log(
+                context, "/TestService/UnaryUnary", request, response, start, end
+            )
+
+        report(
+            f"log/default handlers/{'deferred' if deferred else 'inline'}",
+            timeit(log, args.number),
+        )
+        access_logger.close()
+
+
+if __name__ == "__main__":
+    main()
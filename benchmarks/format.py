@@ -0,0 +1,72 @@
+"""Measure a handler list against the equivalent compiled log format."""
+
+import argparse
+from datetime import datetime
+from datetime import timezone
+
+from grpc_accesslog import LogContext
+from grpc_accesslog import compile_format
+from grpc_accesslog import handlers
+from grpc_accesslog._server import AccessLogger
+from tests.proto import test_service_pb2
+
+from ._util import FakeContext
+from ._util import null_logger
+from ._util import report
+from ._util import timeit
+
+
+LOG_FORMAT = (
+    '$peer [$time_local] "$method" $status $response_bytes $rtt_ms "$http_user_agent"'
+)
+HANDLERS = [
+    handlers.peer,
+    handlers.time_received(),
+    handlers.request,
+    handlers.status,
+    handlers.response_size,
+    handlers.rtt_ms,
+    handlers.user_agent,
+]
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--number", type=int, default=20000)
+    args = parser.parse_args()
+
+    context = FakeContext()
+    request = test_service_pb2.Request(data="data")
+    response = test_service_pb2.Response(data="data")
+    start = end = datetime.now(timezone.utc)
+    log_context = LogContext(
+        context, "/TestService/UnaryUnary", request, response, start, end
+    )
+    compiled = compile_format(LOG_FORMAT)
+
+    def render_handlers() -> str:
+        return " ".join([handler(log_context) for handler in HANDLERS])
+
+    def render_format() -> str:
+        return compiled(log_context)
+
+    report("render/handlers", timeit(render_handlers, args.number))
+    report("render/log_format", timeit(render_format, args.number))
+
+    for name, kwargs in (
+        ("handlers", {"handlers": HANDLERS}),
+        ("log_format", {"log_format": LOG_FORMAT}),
+    ):
+        access_logger = AccessLogger(logger=null_logger(), **kwargs)  # type: ignore
+
+        def log(access_logger: AccessLogger = access_logger) -> None:
+            access_logger.log(
+                context, "/TestService/UnaryUnary", request, response, start, end
+            )
+
+        report(f"log/{name}", timeit(log, args.number))
+
+
+if __name__ == "__main__":
+    main()
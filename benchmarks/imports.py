@@ -0,0 +1,59 @@
+"""Measure import times in fresh interpreters, grpc_accesslog apart from grpc."""
+
+import argparse
+import subprocess  # nosec
+import sys
+from typing import List
+
+from ._util import report
+
+
+#: Statements timed after importing grpc, except for the grpc import itself.
+STATEMENTS = {
+    "grpc": "import grpc",
+    "package": "import grpc_accesslog",
+    "server": "from grpc_accesslog import AccessLogInterceptor",
+    "async_server": "from grpc_accesslog import AsyncAccessLogInterceptor",
+    "client": "from grpc_accesslog import AccessLogClientInterceptor",
+    "sinks": "from grpc_accesslog.sinks import ThreadBufferedSink",
+    "everything": "from grpc_accesslog import *",
+}
+
+_SCRIPT = """
+import time
+{setup}
+start = time.perf_counter()
+{statement}
+print(time.perf_counter() - start)
+"""
+
+
+def import_ms(statement: str, repeat: int) -> float:
+    """Return the best time of a statement in fresh interpreters."""
+    setup = "" if statement == STATEMENTS["grpc"] else "import grpc"
+    script = _SCRIPT.format(setup=setup, statement=statement)
+    results: List[float] = []
+    for _ in range(repeat):
+        output = subprocess.run(  # nosec
+            [sys.executable, "-c", script],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        results.append(float(output) * 1000)
+
+    return min(results)
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-r", "--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for name, statement in STATEMENTS.items():
+        report(f"import/{name}", import_ms(statement, args.repeat), "ms")
+
+
+if __name__ == "__main__":
+    main()
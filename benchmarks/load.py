@@ -0,0 +1,419 @@
+"""Generate RPC load against the test servicer to measure interceptor cost.
+
+The servicer runs in process or in a subprocess, over localhost TCP or a Unix
+socket, with one of the ``CONFIGS`` access log configurations. Client threads
+send a weighted mix of the four RPC shapes, either closed loop at a fixed
+concurrency or open loop at a fixed rate. Each configuration reports
+throughput, latency percentiles and CPU per RPC, optionally as JSON lines for
+regression tracking.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import random
+import socket
+import subprocess  # nosec
+import sys
+import tempfile
+import threading
+import time
+from concurrent import futures
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Tuple
+
+import grpc
+
+from grpc_accesslog import AccessLogInterceptor
+from grpc_accesslog import AsyncAccessLogInterceptor
+from grpc_accesslog import sinks
+from grpc_accesslog._analyze import Histogram
+from tests._server import AsyncServicer
+from tests._server import Servicer
+from tests.proto import test_service_pb2
+from tests.proto import test_service_pb2_grpc
+
+from ._util import report
+
+
+SHAPES = ("unary_unary", "unary_stream", "stream_unary", "stream_stream")
+CONFIGS = ("none", "default", "deferred", "buffered", "gzip", "syslog", "async_file")
+PERCENTILES = (50.0, 90.0, 99.0)
+
+
+def file_logger(path: str) -> logging.Logger:
+    """Return a logger appending records to a file."""
+    logger = logging.getLogger(f"load.{path}")
+    logger.propagate = False
+    logger.handlers = [logging.FileHandler(path)]
+    logger.setLevel(logging.INFO)
+    return logger
+
+
+def interceptors(config: str, directory: str, aio: bool) -> Tuple[List[Any], Any]:
+    """Create the server interceptors of a configuration.
+
+    Args:
+        config (str): One of ``CONFIGS``.
+        directory (str): Directory of written log files.
+        aio (bool): Create asyncio interceptors.
+
+    Returns:
+        Tuple[List[Any], Any]: Interceptors and the access logger or sink to
+        close after the server stopped, if any
+
+    Raises:
+        ValueError: Unknown configuration, or async_file without asyncio.
+    """
+    if config == "none":
+        return [], None
+
+    interceptor = AsyncAccessLogInterceptor if aio else AccessLogInterceptor
+    logger = file_logger(os.path.join(directory, f"{config}.log"))
+    sink: Any = None
+    if config in ("default", "deferred"):
+        access_logger = interceptor(logger=logger, deferred=config == "deferred")
+        return [access_logger], access_logger
+    if config == "buffered":
+        sink = sinks.ThreadBufferedSink(os.path.join(directory, "buffered.log"))
+    elif config == "gzip":
+        sink = sinks.CompressedFileSink(
+            os.path.join(directory, "access.log"), codec="gzip"
+        )
+    elif config == "syslog":
+        sink = sinks.SyslogSink(port=_free_udp_port())
+    elif config == "async_file" and aio:
+        sink = sinks.AsyncFileSink(os.path.join(directory, "async.log"))
+    else:
+        raise ValueError(f"unknown configuration: {config}")
+
+    return [interceptor(logger=logger, sink=sink)], sink
+
+
+def _free_udp_port() -> int:
+    """Return a local UDP port nobody listens on."""
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as udp:
+        udp.bind(("127.0.0.1", 0))
+        return int(udp.getsockname()[1])
+
+
+def _address(transport: str, directory: str) -> str:
+    if transport == "unix":
+        return f"unix:{os.path.join(directory, 'grpc.sock')}"
+
+    return "localhost:0"
+
+
+@contextlib.contextmanager
+def serve_sync(
+    config: str, transport: str, directory: str, workers: int
+) -> Iterator[str]:
+    """Run the servicer on a thread pool server and yield its address."""
+    interceptor_list, closeable = interceptors(config, directory, False)
+    server = grpc.server(
+        futures.ThreadPoolExecutor(max_workers=workers),
+        interceptors=interceptor_list,
+    )
+    test_service_pb2_grpc.add_TestServiceServicer_to_server(Servicer(0), server)
+    address = _address(transport, directory)
+    port = server.add_insecure_port(address)
+    server.start()
+    try:
+        yield address if transport == "unix" else f"localhost:{port}"
+    finally:
+        server.stop(grace=1).wait()
+        if closeable is not None:
+            closeable.close()
+
+
+@contextlib.contextmanager
+def serve_aio(config: str, transport: str, directory: str) -> Iterator[str]:
+    """Run the servicer on an asyncio server thread and yield its address."""
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+
+    def run(coroutine: Any) -> Any:
+        return asyncio.run_coroutine_threadsafe(coroutine, loop).result()
+
+    async def start() -> Tuple[grpc.aio.Server, str, Any]:
+        interceptor_list, closeable = interceptors(config, directory, True)
+        if isinstance(closeable, sinks.AsyncSink):
+            await closeable.start()
+        server = grpc.aio.server(interceptors=interceptor_list)
+        test_service_pb2_grpc.add_TestServiceServicer_to_server(
+            AsyncServicer(0), server
+        )
+        address = _address(transport, directory)
+        port = server.add_insecure_port(address)
+        await server.start()
+        if transport != "unix":
+            address = f"localhost:{port}"
+        return server, address, closeable
+
+    async def stop(server: grpc.aio.Server, closeable: Any) -> None:
+        await server.stop(grace=1)
+        if isinstance(closeable, sinks.AsyncSink):
+            await closeable.close()
+        elif closeable is not None:
+            closeable.close()
+
+    server, address, closeable = run(start())
+    try:
+        yield address
+    finally:
+        run(stop(server, closeable))
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+
+@contextlib.contextmanager
+def in_process(
+    args: argparse.Namespace, config: str, directory: str
+) -> Iterator[Tuple[str, Callable[[], float]]]:
+    """Serve in this process, measuring the CPU time of client and server."""
+    if args.aio:
+        server = serve_aio(config, args.transport, directory)
+    else:
+        server = serve_sync(config, args.transport, directory, args.workers)
+    with server as address:
+        yield address, time.process_time
+
+
+@contextlib.contextmanager
+def in_subprocess(
+    args: argparse.Namespace, config: str, directory: str
+) -> Iterator[Tuple[str, Callable[[], float]]]:
+    """Serve in a subprocess, measuring the CPU time of the server only."""
+    command = [sys.executable, "-m", "benchmarks.load", "--serve", config]
+    command += ["--transport", args.transport, "--directory", directory]
+    command += ["--workers", str(args.workers)] + (["--aio"] if args.aio else [])
+    process = subprocess.Popen(  # nosec
+        command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True
+    )
+    stdin, stdout = process.stdin, process.stdout
+    assert stdin is not None and stdout is not None  # nosec
+
+    def cpu() -> float:
+        stdin.write("cpu\n")
+        stdin.flush()
+        return float(stdout.readline())
+
+    try:
+        yield stdout.readline().strip(), cpu
+    finally:
+        stdin.close()
+        process.wait()
+
+
+def serve_forever(args: argparse.Namespace) -> None:
+    """Serve until stdin closes, answering each line with the CPU time."""
+    if args.aio:
+        server = serve_aio(args.serve, args.transport, args.directory)
+    else:
+        server = serve_sync(args.serve, args.transport, args.directory, args.workers)
+    with server as address:
+        print(address, flush=True)
+        for _ in sys.stdin:
+            print(time.process_time(), flush=True)
+
+
+def rpcs(
+    stub: test_service_pb2_grpc.TestServiceStub, messages: int, payload: int
+) -> Dict[str, Callable[[], Any]]:
+    """Return a callable per RPC shape."""
+    request = test_service_pb2.Request(data="x" * payload)
+    streamed = test_service_pb2.Request(data="x" * messages)
+    return {
+        "unary_unary": lambda: stub.UnaryUnary(request),
+        "unary_stream": lambda: list(stub.UnaryStream(streamed)),
+        "stream_unary": lambda: stub.StreamUnary(iter([request] * messages)),
+        "stream_stream": lambda: list(stub.StreamStream(iter([request] * messages))),
+    }
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    """Parse ``shape=weight`` pairs separated by commas."""
+    weights = {}
+    for item in mix.split(","):
+        shape, _, weight = item.partition("=")
+        if shape not in SHAPES:
+            raise argparse.ArgumentTypeError(f"unknown RPC shape: {shape}")
+        weights[shape] = float(weight or 1)
+
+    return weights
+
+
+class Result:
+    """RPC outcomes of one load run."""
+
+    def __init__(self) -> None:
+        """Create an empty result."""
+        self.errors = 0
+        self.latency = Histogram()
+
+    def merge(self, other: "Result") -> None:
+        """Add the outcomes of another result."""
+        self.errors += other.errors
+        self.latency.merge(other.latency)
+
+
+def _call(fn: Callable[[], Any], start: float, result: Result) -> None:
+    """Call an RPC, recording its latency since ``start`` in milliseconds."""
+    try:
+        fn()
+    except grpc.RpcError:
+        result.errors += 1
+    result.latency.add((time.perf_counter() - start) * 1000)
+
+
+def run_load(
+    address: str, args: argparse.Namespace, duration: float, seed: int = 0
+) -> Result:
+    """Send RPCs for ``duration`` seconds.
+
+    Without a rate every client thread sends its next RPC once the previous
+    one completed. With a rate RPCs are scheduled at fixed intervals and the
+    latency is measured from the scheduled time, so a stalled server is not
+    hidden by fewer requests.
+    """
+    weights = parse_mix(args.mix)
+    shapes = list(weights)
+    cumulative = [sum(list(weights.values())[: i + 1]) for i in range(len(shapes))]
+    result = Result()
+    with grpc.insecure_channel(address) as channel:
+        calls = rpcs(
+            test_service_pb2_grpc.TestServiceStub(channel), args.messages, args.payload
+        )
+        rng = random.Random(seed)
+        chosen = [
+            calls[shape]
+            for shape in rng.choices(shapes, cum_weights=cumulative, k=65536)
+        ]
+        end = time.perf_counter() + duration
+
+        if args.rate:
+            # One result per executor thread, so results are not shared.
+            thread_state = threading.local()
+            results: List[Result] = []
+
+            def scheduled_call(fn: Callable[[], Any], scheduled: float) -> None:
+                if not hasattr(thread_state, "result"):
+                    thread_state.result = Result()
+                    results.append(thread_state.result)
+                _call(fn, scheduled, thread_state.result)
+
+            with futures.ThreadPoolExecutor(args.concurrency) as executor:
+                start = time.perf_counter()
+                for index in range(int(duration * args.rate)):
+                    scheduled = start + index / args.rate
+                    time.sleep(max(0.0, scheduled - time.perf_counter()))
+                    executor.submit(
+                        scheduled_call, chosen[index % len(chosen)], scheduled
+                    )
+            for local_result in results:
+                result.merge(local_result)
+            return result
+
+        def client(offset: int) -> Result:
+            local = Result()
+            index = offset
+            while time.perf_counter() < end:
+                _call(chosen[index % len(chosen)], time.perf_counter(), local)
+                index += args.concurrency
+            return local
+
+        with futures.ThreadPoolExecutor(args.concurrency) as executor:
+            for local in executor.map(client, range(args.concurrency)):
+                result.merge(local)
+
+    return result
+
+
+def measure(args: argparse.Namespace, config: str) -> Dict[str, Any]:
+    """Run a warmup and a measured load against one configuration."""
+    server = in_subprocess if args.server == "subprocess" else in_process
+    with tempfile.TemporaryDirectory() as directory:
+        with server(args, config, directory) as (address, cpu):
+            run_load(address, args, args.warmup)
+            cpu_start = cpu()
+            start = time.perf_counter()
+            result = run_load(address, args, args.duration)
+            elapsed = time.perf_counter() - start
+            cpu_used = cpu() - cpu_start
+
+    latency = result.latency
+    return {
+        "config": config,
+        "server": args.server,
+        "aio": args.aio,
+        "transport": args.transport,
+        "mix": parse_mix(args.mix),
+        "concurrency": args.concurrency,
+        "rate": args.rate,
+        "rpcs": latency.count,
+        "errors": result.errors,
+        "rps": latency.count / elapsed,
+        "latency_ms": {
+            **{f"p{p:g}": latency.percentile(p) for p in PERCENTILES},
+            "max": latency.max,
+        },
+        # The subprocess server measures the server only, in process the
+        # client threads are included.
+        "cpu_us_per_rpc": cpu_used / max(1, latency.count) * 1e6,
+    }
+
+
+def main() -> None:
+    """Run the load generator."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--configs", default=",".join(CONFIGS[:-1]))
+    parser.add_argument(
+        "--mix",
+        default="unary_unary=7,unary_stream=1,stream_unary=1,stream_stream=1",
+        help="comma separated shape=weight pairs",
+    )
+    parser.add_argument(
+        "--server", choices=("inprocess", "subprocess"), default="subprocess"
+    )
+    parser.add_argument("--transport", choices=("tcp", "unix"), default="tcp")
+    parser.add_argument("--aio", action="store_true", help="asyncio server")
+    parser.add_argument("-c", "--concurrency", type=int, default=8)
+    parser.add_argument("-r", "--rate", type=float, help="RPCs per second")
+    parser.add_argument("-d", "--duration", type=float, default=5.0)
+    parser.add_argument("--warmup", type=float, default=1.0)
+    parser.add_argument("--workers", type=int, default=8, help="server threads")
+    parser.add_argument("--messages", type=int, default=4)
+    parser.add_argument("--payload", type=int, default=64)
+    parser.add_argument("--json", help="append results as JSON lines to a file")
+    parser.add_argument("--serve", help=argparse.SUPPRESS)
+    parser.add_argument("--directory", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve_forever(args)
+        return
+
+    for config in args.configs.split(","):
+        measured = measure(args, config)
+        for name, value, unit in (
+            ("rps", measured["rps"], "rpc/s"),
+            *((name, value, "ms") for name, value in measured["latency_ms"].items()),
+            ("cpu", measured["cpu_us_per_rpc"], "us/rpc"),
+        ):
+            report(f"{config}/{name}", value, unit)
+        if args.json:
+            with open(args.json, "a") as file:
+                file.write(json.dumps(measured) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Measure OTLP record encoding and batched export throughput."""
+
+import argparse
+import tempfile
+import time
+from concurrent import futures
+from contextlib import contextmanager
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Iterator
+
+import grpc
+
+from grpc_accesslog import LogContext
+from grpc_accesslog import OtlpFileTarget
+from grpc_accesslog import OtlpGrpcTarget
+from grpc_accesslog import OtlpLogExporter
+from grpc_accesslog import OtlpTarget
+from grpc_accesslog._otlp import EXPORT_METHOD
+
+from ._util import FakeContext
+from ._util import report
+from ._util import timeit
+
+
+class NullTarget:
+    """Target discarding batches, so only encoding is measured."""
+
+    def export(self, batch: bytes) -> None:
+        """Discard a batch."""
+
+    def close(self) -> None:
+        """Do nothing."""
+
+
+@contextmanager
+def collector() -> Iterator[str]:
+    """Run a collector accepting raw export requests and yield its address."""
+    service, _, method = EXPORT_METHOD[1:].rpartition("/")
+    handler = grpc.method_handlers_generic_handler(
+        service,
+        {method: grpc.unary_unary_rpc_method_handler(lambda request, context: b"")},
+    )
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=1))
+    server.add_generic_rpc_handlers((handler,))
+    port = server.add_insecure_port("localhost:0")
+    server.start()
+    try:
+        yield f"localhost:{port}"
+    finally:
+        server.stop(grace=0)
+
+
+def throughput(
+    target: OtlpTarget, context: LogContext, records: int, max_records: int
+) -> float:
+    """Return the records per second encoded and exported on the RPC thread."""
+    exporter = OtlpLogExporter(target, max_records=max_records, interval=0)
+    start = time.perf_counter()
+    for _ in range(records):
+        exporter.on_end(None, context)
+    exporter.close()
+    return records / (time.perf_counter() - start)
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--number", type=int, default=20000)
+    parser.add_argument(
+        "-b", "--batch", type=int, action="append", help="records per batch"
+    )
+    args = parser.parse_args()
+
+    start = datetime.now(timezone.utc)
+    context = LogContext(
+        FakeContext(
+            (
+                ("user-agent", "bench"),
+                (
+                    "traceparent",
+                    "00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01",
+                ),
+            )
+        ),
+        "/TestService/UnaryUnary",
+        None,
+        None,
+        start,
+        start + timedelta(milliseconds=3),
+    )
+
+    exporter = OtlpLogExporter(NullTarget(), interval=0)
+
+    def encode(exporter: Any = exporter) -> None:
+        exporter.on_end(None, context)
+
+    report("otlp/encode", timeit(encode, args.number))
+
+    with tempfile.TemporaryDirectory() as directory, collector() as address:
+        targets: Dict[str, Callable[[], OtlpTarget]] = {
+            "file": lambda: OtlpFileTarget(f"{directory}/logs.otlp"),
+            "grpc": lambda: OtlpGrpcTarget(address),
+        }
+        for name, factory in targets.items():
+            for batch in args.batch or [1, 16, 128, 512, 2048]:
+                rate = throughput(factory(), context, args.number, batch)
+                report(f"otlp/{name}/batch={batch}", rate, "records/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Measure payload masking and rendering cost for deeply nested messages."""
+
+import argparse
+from typing import Collection
+
+from google.protobuf.message import Message
+
+from grpc_accesslog import payload
+from tests.proto.payload_pb2 import Card
+from tests.proto.payload_pb2 import Item
+from tests.proto.payload_pb2 import Order
+
+from ._util import report
+from ._util import timeit
+
+
+def nested_order(depth: int, items: int) -> Order:
+    """Return an order with ``depth`` nested parents."""
+    order = Order()
+    current = order
+    for level in range(depth):
+        current.id = str(level)
+        current.password = "secret"
+        current.card.CopyFrom(Card(number="4111111111111111", holder="Holder"))
+        current.items.extend(
+            Item(name=f"item{i}", blob=b"x" * 64, tags=["a", "b"]) for i in range(items)
+        )
+        current.labels["key"] = "value"
+        current.amount = level
+        current = current.parent
+
+    return order
+
+
+def naive_mask(message: Message, paths: Collection[str]) -> None:
+    """Mask fields by resolving each dotted path with reflection per call."""
+    for path in paths:
+        name, _, rest = path.partition(".")
+        field = message.DESCRIPTOR.fields_by_name.get(name)
+        if field is None:
+            continue
+        if not rest:
+            message.ClearField(name)
+        elif field.message_type is not None and message.HasField(name):
+            naive_mask(getattr(message, name), [rest])
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--number", type=int, default=2000)
+    args = parser.parse_args()
+
+    for depth in (1, 8, 32):
+        order = nested_order(depth, items=4)
+        paths = ["password", "card.number"]
+        paths += ["parent." * level + "password" for level in range(1, depth)]
+        policy = payload.PayloadPolicy(
+            mask=tuple(paths), truncate=(("items", 2),), max_bytes=4096
+        )
+        plan = payload.cached_plan(Order.DESCRIPTOR, policy)  # type: ignore[arg-type]
+
+        def copy(order: Order = order) -> Order:
+            message = Order()
+            message.CopyFrom(order)
+            return message
+
+        def compiled(plan: payload.TPlan = plan) -> None:
+            payload.apply_plan(copy(), plan)
+
+        def naive(paths: Collection[str] = paths) -> None:
+            naive_mask(copy(), paths)
+
+        def formatted(
+            policy: payload.PayloadPolicy = policy, order: Order = order
+        ) -> None:
+            payload.format_message(order, policy)
+
+        report(f"mask/depth={depth}/naive paths", timeit(naive, args.number))
+        report(f"mask/depth={depth}/compiled plan", timeit(compiled, args.number))
+        report(f"format/depth={depth}/plan+json", timeit(formatted, args.number))
+
+
+if __name__ == "__main__":
+    main()
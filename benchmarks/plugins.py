@@ -0,0 +1,215 @@
+"""Compare stacked observer interceptors with one interceptor and plugins."""
+
+import argparse
+from datetime import datetime
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import NamedTuple
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
+
+import grpc
+
+from grpc_accesslog import AccessLogInterceptor
+from grpc_accesslog import LogContext
+from grpc_accesslog import Plugin
+from grpc_accesslog._server import _wrap_rpc_behavior
+from tests.proto import test_service_pb2
+
+from ._util import FakeContext
+from ._util import null_logger
+from ._util import report
+from ._util import timeit
+
+
+class CallDetails(NamedTuple):
+    """Handler call details stand-in."""
+
+    method: str
+    invocation_metadata: Sequence[Tuple[str, str]]
+
+
+class Metrics(Plugin):
+    """Count RPCs and sum latencies per method and status."""
+
+    fields = frozenset(("time", "status"))
+
+    def __init__(self) -> None:
+        """Create empty totals."""
+        self.totals: Dict[Tuple[str, Any], List[float]] = {}
+
+    def on_end(self, state: Any, log_context: LogContext) -> None:
+        """Count an RPC."""
+        key = (log_context.method_name, log_context.server_context.code())
+        totals = self.totals.get(key)
+        if totals is None:
+            totals = self.totals[key] = [0, 0.0]
+        totals[0] += 1
+        totals[1] += (log_context.end - log_context.start).total_seconds()
+
+
+class Tracing(Plugin):
+    """Read the trace parent of every RPC."""
+
+    fields = frozenset()
+
+    def on_start(self, method_name: str, context: grpc.ServicerContext) -> Any:
+        """Return the trace parent header."""
+        for key, value in context.invocation_metadata():
+            if key == "traceparent":
+                return value
+        return None
+
+
+class MessageCounter(Plugin):
+    """Count streamed messages."""
+
+    fields = frozenset()
+
+    def __init__(self) -> None:
+        """Create empty totals."""
+        self.messages = 0
+
+    def on_message(self, state: Any, message: Any, received: bool) -> None:
+        """Count a message."""
+        self.messages += 1
+
+
+class ObserverInterceptor(grpc.ServerInterceptor):
+    """Standalone interceptor with its own wrapper, timing and context."""
+
+    def __init__(self, plugin: Plugin) -> None:
+        """Wrap a plugin."""
+        self._plugin = plugin
+
+    def intercept_service(
+        self,
+        continuation: Callable[[grpc.HandlerCallDetails], grpc.RpcMethodHandler],
+        handler_call_details: grpc.HandlerCallDetails,
+    ) -> grpc.RpcMethodHandler:
+        """Wrap the RPC behavior."""
+        plugin = self._plugin
+        method_name = handler_call_details.method
+
+        def wrapper(
+            behavior: Callable[[Any, Any], Any],
+            request_streaming: bool,
+            response_streaming: bool,
+        ) -> Callable[[Any, Any], Any]:
+            def observer(request: Any, context: Any) -> Any:
+                start = datetime.now()
+                state = plugin.on_start(method_name, context)
+                plugin.on_message(state, request, True)
+                response = behavior(request, context)
+                plugin.on_message(state, response, False)
+                plugin.on_end(
+                    state,
+                    LogContext(context, method_name, None, None, start, datetime.now()),
+                )
+                return response
+
+            def observer_stream(request: Any, context: Any) -> Iterator[Any]:
+                start = datetime.now()
+                state = plugin.on_start(method_name, context)
+                plugin.on_message(state, request, True)
+                for response in behavior(request, context):
+                    plugin.on_message(state, response, False)
+                    yield response
+                plugin.on_end(
+                    state,
+                    LogContext(context, method_name, None, None, start, datetime.now()),
+                )
+
+            return observer_stream if response_streaming else observer
+
+        return _wrap_rpc_behavior(continuation(handler_call_details), wrapper)
+
+
+def intercept(
+    interceptors: Sequence[grpc.ServerInterceptor],
+    handler: grpc.RpcMethodHandler,
+    details: CallDetails,
+) -> Optional[grpc.RpcMethodHandler]:
+    """Chain interceptors the way the gRPC server does for every RPC."""
+
+    def continuation(
+        index: int,
+    ) -> Callable[[grpc.HandlerCallDetails], Optional[grpc.RpcMethodHandler]]:
+        if index == len(interceptors):
+            return lambda details: handler
+        return lambda details: interceptors[index].intercept_service(
+            continuation(index + 1), details
+        )
+
+    return continuation(0)(details)
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--number", type=int, default=5000)
+    parser.add_argument("-m", "--messages", type=int, default=10)
+    args = parser.parse_args()
+
+    context = FakeContext()
+    request = test_service_pb2.Request(data="data")
+    response = test_service_pb2.Response(data="data")
+    stream = [response] * args.messages
+
+    def unary(request: Any, context: Any) -> Any:
+        return response
+
+    def server_stream(request: Any, context: Any) -> Iterator[Any]:
+        return iter(stream)
+
+    shapes = {
+        "unary": (
+            grpc.unary_unary_rpc_method_handler(unary),
+            CallDetails("/TestService/UnaryUnary", ()),
+        ),
+        "stream": (
+            grpc.unary_stream_rpc_method_handler(server_stream),
+            CallDetails("/TestService/UnaryStream", ()),
+        ),
+    }
+
+    def plugins() -> List[Plugin]:
+        return [Metrics(), Tracing(), MessageCounter()]
+
+    setups = {
+        "access_log": lambda: [AccessLogInterceptor(logger=null_logger())],
+        "stacked": lambda: [
+            AccessLogInterceptor(logger=null_logger()),
+            *(ObserverInterceptor(plugin) for plugin in plugins()),
+        ],
+        "plugins": lambda: [
+            AccessLogInterceptor(logger=null_logger(), plugins=plugins())
+        ],
+    }
+
+    for shape, (handler, details) in shapes.items():
+        for name, setup in setups.items():
+            interceptors = setup()
+
+            def call(
+                interceptors: Any = interceptors,
+                handler: Any = handler,
+                details: Any = details,
+            ) -> None:
+                wrapped = intercept(interceptors, handler, details)
+                assert wrapped is not None
+                if wrapped.response_streaming:
+                    for _ in wrapped.unary_stream(request, context):
+                        pass
+                else:
+                    wrapped.unary_unary(request, context)
+
+            report(f"plugins/{shape}/{name}", timeit(call, args.number))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Measure the cost of runtime per-method settings on the logging path."""
+
+import argparse
+from typing import Any
+from typing import Dict
+from typing import Optional
+
+from grpc_accesslog import AccessLogInterceptor
+from grpc_accesslog import MethodSettings
+from grpc_accesslog import RuntimeConfig
+from grpc_accesslog import compile_format
+from grpc_accesslog import handlers
+from tests.proto import test_service_pb2
+
+from ._util import FakeContext
+from ._util import null_logger
+from ._util import report
+from ._util import timeit
+
+
+METHOD = "/TestService/UnaryUnary"
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--number", type=int, default=50000)
+    args = parser.parse_args()
+
+    context = FakeContext()
+    request = test_service_pb2.Request(data="data")
+    response = test_service_pb2.Response(data="data")
+
+    def behavior(request: Any, context: Any) -> Any:
+        return response
+
+    configs: Dict[str, Optional[RuntimeConfig]] = {
+        "none": None,
+        "other_method": RuntimeConfig({"/svc/Other": MethodSettings()}),
+        "sampled_out": RuntimeConfig({METHOD: MethodSettings(sample_every=0)}),
+        "override": RuntimeConfig(
+            {METHOD: MethodSettings([compile_format("$method $status $peer")])}
+        ),
+    }
+    for name, config in configs.items():
+        interceptor = AccessLogInterceptor(
+            handlers=[handlers.request, handlers.status],
+            logger=null_logger(),
+            config=config,
+        )
+        wrapped = interceptor._logging_wrapper(behavior, METHOD, False)
+
+        def call(wrapped: Any = wrapped) -> None:
+            wrapped(request, context)
+
+        report(f"runtime/{name}", timeit(call, args.number))
+
+
+if __name__ == "__main__":
+    main()
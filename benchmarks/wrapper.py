@@ -0,0 +1,57 @@
+"""Measure the interceptor wrapper cost with lean and full captured inputs."""
+
+import argparse
+from typing import Any
+
+from grpc_accesslog import AccessLogInterceptor
+from grpc_accesslog import LogContext
+from grpc_accesslog import handlers
+from tests.proto import test_service_pb2
+
+from ._util import FakeContext
+from ._util import null_logger
+from ._util import report
+from ._util import timeit
+
+
+def undeclared(context: LogContext) -> str:
+    """Return the method name without declaring the handler inputs."""
+    return context.method_name
+
+
+class NullSink:
+    """Sink discarding lines, so logging does not dominate the measurement."""
+
+    def write(self, line: str) -> None:
+        """Discard a line."""
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--number", type=int, default=50000)
+    args = parser.parse_args()
+
+    context = FakeContext()
+    request = test_service_pb2.Request(data="data")
+    response = test_service_pb2.Response(data="data")
+
+    def behavior(request: Any, context: Any) -> Any:
+        return response
+
+    for name, handler in (("lean", handlers.request), ("full", undeclared)):
+        interceptor = AccessLogInterceptor(
+            handlers=[handler], logger=null_logger(), sink=NullSink()
+        )
+        wrapped = interceptor._logging_wrapper(
+            behavior, "/TestService/UnaryUnary", False
+        )
+
+        def call(wrapped: Any = wrapped) -> None:
+            wrapped(request, context)
+
+        report(f"wrapper/{name}", timeit(call, args.number))
+
+
+if __name__ == "__main__":
+    main()
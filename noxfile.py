@@ -141,7 +141,7 @@ def mypy(session: Session) -> None:
     """Type-check using mypy."""
     args = session.posargs or ["src", "tests", "docs/conf.py"]
     session.install(".")
-    session.install("mypy", "pytest", "types-protobuf")
+    session.install("mypy", "pytest", "types-protobuf", "zstandard")
     session.run("mypy", *args)
     if not session.posargs:
         session.run("mypy", f"--python-executable={sys.executable}", "noxfile.py")
@@ -152,7 +152,12 @@ def tests(session: Session) -> None:
     """Run the test suite."""
     session.install(".")
     session.install(
-        "coverage[toml]", "pytest", "pytest-asyncio", "pygments", "protobuf"
+        "coverage[toml]",
+        "pytest",
+        "pytest-asyncio",
+        "pygments",
+        "protobuf",
+        "zstandard",
     )
     try:
         session.run("coverage", "run", "--parallel", "-m", "pytest", *session.posargs)
@@ -161,6 +166,20 @@ def tests(session: Session) -> None:
             session.notify("coverage", posargs=[])
 
 
+@session(python=python_versions[0])
+def benchmarks(session: Session) -> None:
+    """Run the benchmarks."""
+    modules = session.posargs or [
+        path.stem
+        for path in sorted(Path("benchmarks").glob("*.py"))
+        if not path.stem.startswith("_")
+    ]
+    session.install(".")
+    session.install("protobuf", "zstandard")
+    for module in modules:
+        session.run("python", "-m", f"benchmarks.{module}")
+
+
 @session(python=python_versions[0])
 def coverage(session: Session) -> None:
     """Produce the coverage report."""
@@ -1,14 +1,124 @@
-"""gRPC access log interceptor."""
+"""gRPC access log interceptor.
 
-from . import handlers
-from ._async_server import AsyncAccessLogInterceptor
-from ._context import LogContext
-from ._server import AccessLogInterceptor
+Public names are imported from their modules on first access, so importing
+the package stays cheap for tools using only part of it.
+"""
 
+from typing import TYPE_CHECKING
+
+from ._lazy import attach
+
+
+if TYPE_CHECKING:  # pragma: no cover
+    from . import handlers
+    from ._allocations import AllocationSampler
+    from ._allocations import MethodAllocations
+    from ._annotations import annotate
+    from ._async_client import AsyncAccessLogClientInterceptor
+    from ._async_server import AsyncAccessLogInterceptor
+    from ._cardinality import CardinalityTracker
+    from ._cardinality import HyperLogLog
+    from ._cardinality import MethodCardinality
+    from ._client import AccessLogClientInterceptor
+    from ._coalesce import Coalescer
+    from ._context import Allocation
+    from ._context import ClientContext
+    from ._context import LogContext
+    from ._correlation import Correlation
+    from ._cpu import CpuTracker
+    from ._cpu import MethodCpu
+    from ._detail import AdaptiveThreshold
+    from ._detail import StaticThreshold
+    from ._format import compile_format
+    from ._heavy_hitters import HeavyHitter
+    from ._heavy_hitters import HeavyHitterTracker
+    from ._heavy_hitters import SpaceSaving
+    from ._otlp import OtlpFileTarget
+    from ._otlp import OtlpGrpcTarget
+    from ._otlp import OtlpLogExporter
+    from ._otlp import OtlpTarget
+    from ._overload import OverloadController
+    from ._overload import OverloadMode
+    from ._plugins import Plugin
+    from ._runtime import MethodSettings
+    from ._runtime import RuntimeConfig
+    from ._server import AccessLogInterceptor
+    from ._statsd import StatsdReporter
+
+
+#: Module of every public name. Submodules map to themselves.
+_EXPORTS = {
+    "AccessLogClientInterceptor": "._client",
+    "AccessLogInterceptor": "._server",
+    "AdaptiveThreshold": "._detail",
+    "Allocation": "._context",
+    "AllocationSampler": "._allocations",
+    "AsyncAccessLogClientInterceptor": "._async_client",
+    "AsyncAccessLogInterceptor": "._async_server",
+    "CardinalityTracker": "._cardinality",
+    "ClientContext": "._context",
+    "Coalescer": "._coalesce",
+    "Correlation": "._correlation",
+    "CpuTracker": "._cpu",
+    "HeavyHitter": "._heavy_hitters",
+    "HeavyHitterTracker": "._heavy_hitters",
+    "HyperLogLog": "._cardinality",
+    "LogContext": "._context",
+    "MethodAllocations": "._allocations",
+    "MethodCardinality": "._cardinality",
+    "MethodCpu": "._cpu",
+    "MethodSettings": "._runtime",
+    "OtlpFileTarget": "._otlp",
+    "OtlpGrpcTarget": "._otlp",
+    "OtlpLogExporter": "._otlp",
+    "OtlpTarget": "._otlp",
+    "OverloadController": "._overload",
+    "OverloadMode": "._overload",
+    "Plugin": "._plugins",
+    "RuntimeConfig": "._runtime",
+    "SpaceSaving": "._heavy_hitters",
+    "StaticThreshold": "._detail",
+    "StatsdReporter": "._statsd",
+    "annotate": "._annotations",
+    "compile_format": "._format",
+    "handlers": ".handlers",
+}
 
 __all__ = [
+    "AccessLogClientInterceptor",
     "AccessLogInterceptor",
+    "AdaptiveThreshold",
+    "Allocation",
+    "AllocationSampler",
+    "AsyncAccessLogClientInterceptor",
     "AsyncAccessLogInterceptor",
+    "CardinalityTracker",
+    "ClientContext",
+    "Coalescer",
+    "Correlation",
+    "CpuTracker",
+    "HeavyHitter",
+    "HeavyHitterTracker",
+    "HyperLogLog",
     "LogContext",
+    "MethodAllocations",
+    "MethodCardinality",
+    "MethodCpu",
+    "MethodSettings",
+    "OtlpFileTarget",
+    "OtlpGrpcTarget",
+    "OtlpLogExporter",
+    "OtlpTarget",
+    "OverloadController",
+    "OverloadMode",
+    "Plugin",
+    "RuntimeConfig",
+    "SpaceSaving",
+    "StaticThreshold",
+    "StatsdReporter",
+    "annotate",
+    "compile_format",
     "handlers",
 ]
+
+__getattr__, __dir__ = attach(__name__, _EXPORTS, globals())
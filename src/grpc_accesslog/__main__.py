@@ -0,0 +1,62 @@
+"""Command line interface: ``python -m grpc_accesslog``."""
+
+import argparse
+import json
+import sys
+from typing import List
+from typing import Optional
+
+from ._analyze import DEFAULT_FORMAT
+from ._analyze import analyze
+from ._analyze import report
+from ._analyze import summary
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Run the command line interface.
+
+    Args:
+        argv (List[str]): Arguments. Optional, defaults to None
+            (``sys.argv``).
+    """
+    parser = argparse.ArgumentParser(prog="grpc_accesslog", description=__doc__)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    analyze_parser = commands.add_parser(
+        "analyze",
+        help="summarize access log files per method",
+        description="Print per-method request and error counts, statuses, "
+        "byte totals and latency percentiles of access log files.",
+    )
+    analyze_parser.add_argument(
+        "paths", nargs="+", help="log files or compressed segments"
+    )
+    analyze_parser.add_argument(
+        "-f",
+        "--format",
+        default=DEFAULT_FORMAT,
+        help="nginx style log format of the lines "
+        "(default: the DEFAULT_HANDLERS format)",
+    )
+    analyze_parser.add_argument(
+        "-j", "--processes", type=int, default=1, help="worker processes"
+    )
+    analyze_parser.add_argument(
+        "--json", action="store_true", help="print JSON instead of a table"
+    )
+
+    args = parser.parse_args(argv)
+    analysis = analyze(args.paths, args.format, args.processes)
+    if args.json:
+        json.dump(
+            {"methods": summary(analysis), "skipped": analysis.skipped},
+            sys.stdout,
+            indent=2,
+        )
+        print()
+    else:
+        print(report(analysis))
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
@@ -0,0 +1,238 @@
+"""Sampled per-RPC memory allocation tracing with tracemalloc."""
+
+import logging
+import threading
+import tracemalloc
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Iterator
+from typing import Optional
+
+import grpc
+
+from ._context import Allocation
+from ._reporter import WindowReporter
+
+
+_logger = logging.getLogger(__name__)
+
+#: Allocation of the last sampled RPC run by each thread.
+_result = threading.local()
+#: Held while an RPC is traced, tracemalloc is process wide.
+_tracing = threading.Lock()
+
+
+def take_allocation() -> Optional[Allocation]:
+    """Return and clear the allocation traced on the current thread.
+
+    Returns:
+        Allocation: Traced allocation, or None if the RPC was not sampled
+    """
+    allocation: Optional[Allocation] = getattr(_result, "allocation", None)
+    if allocation is not None:
+        _result.allocation = None
+    return allocation
+
+
+class _Trace:
+    """Tracing of one sampled RPC, ended once by whoever comes first."""
+
+    __slots__ = ("_before", "_baseline", "_owner", "_ended")
+
+    def __init__(self, before: int, baseline: int, owner: bool) -> None:
+        self._before = before
+        self._baseline = baseline
+        self._owner = owner
+        self._ended = threading.Lock()
+
+    @classmethod
+    def start(cls) -> "Optional[_Trace]":
+        """Start tracing unless another RPC is traced."""
+        if not _tracing.acquire(blocking=False):
+            return None
+
+        owner = not tracemalloc.is_tracing()
+        if owner:
+            tracemalloc.start()
+        # The peak of tracing started by the application is left alone.
+        current, peak = tracemalloc.get_traced_memory()
+        return cls(current, peak, owner)
+
+    def end(self) -> Optional[Allocation]:
+        """Stop tracing, returning the allocation unless already ended."""
+        if not self._ended.acquire(blocking=False):
+            return None
+
+        current, peak = tracemalloc.get_traced_memory()
+        if self._owner:
+            tracemalloc.stop()
+        _tracing.release()
+
+        net_bytes = max(current - self._before, 0)
+        if peak <= self._baseline:
+            # The peak predates the RPC, only the live bytes are known.
+            return Allocation(net_bytes, net_bytes)
+        return Allocation(net_bytes, peak - self._before)
+
+
+class MethodAllocations:
+    """Allocation totals of the sampled RPCs of a method."""
+
+    __slots__ = ("samples", "net_bytes", "max_net_bytes", "max_peak_bytes")
+
+    def __init__(self) -> None:
+        """Create empty totals."""
+        #: Traced RPCs.
+        self.samples = 0
+        #: Sum of the live bytes allocated by the traced RPCs.
+        self.net_bytes = 0
+        #: Largest live bytes allocated by a traced RPC.
+        self.max_net_bytes = 0
+        #: Largest allocation peak of a traced RPC.
+        self.max_peak_bytes = 0
+
+
+class AllocationSampler(WindowReporter[MethodAllocations]):
+    """Trace the memory allocations of one of every ``sample_every`` RPCs.
+
+    Sampled RPCs of the synchronous ``AccessLogInterceptor`` run with
+    ``tracemalloc`` tracing, which is started for the RPC unless it already
+    runs. The bytes still allocated when the RPC ends and the allocation
+    peak above its start are added to the ``LogContext`` (see the
+    ``alloc_bytes`` and ``alloc_peak`` handlers) and to per-method totals.
+    The peak of tracing started by the application is not reset, so an RPC
+    staying below it reports its live bytes as its peak.
+
+    Every RPC of a method counts towards its next sample, and RPCs that miss
+    cost a dictionary update. Only one RPC of the process is traced at a
+    time; a sampled RPC starting while another one is traced is skipped.
+    ``tracemalloc`` traces every thread, so allocations of concurrent RPCs
+    are included and the numbers are exact only for RPCs running alone.
+    Tracing slows allocations down several times while it runs.
+
+    Each window is logged as one line per method by the
+    ``grpc_accesslog._allocations`` logger.
+    """
+
+    def __init__(
+        self,
+        sample_every: int = 10000,
+        interval: float = 60.0,
+        logger: Optional[logging.Logger] = None,
+    ) -> None:
+        """Create a sampler.
+
+        Args:
+            sample_every (int): RPCs per method between traced RPCs.
+                Defaults to 10000.
+            interval (float): Seconds between emitted windows, 0 to only emit
+                on demand. Defaults to 60.0.
+            logger (logging.Logger): Logger of the emitted windows. Optional,
+                defaults to None (module logger).
+
+        Raises:
+            ValueError: Invalid sampling rate.
+        """
+        if sample_every <= 0:
+            raise ValueError("sample_every must be positive")
+
+        self._sample_every = sample_every
+        self._counts: Dict[str, int] = {}
+        super().__init__(interval, logger or _logger, "allocations")
+
+    def sampled(self, method: str) -> bool:
+        """Count an RPC and return whether to trace it.
+
+        The first RPC of a method is sampled. Counts are not locked, a
+        racing update may skip or repeat a sample.
+
+        Args:
+            method (str): Full method name.
+
+        Returns:
+            bool: Whether the RPC is sampled
+        """
+        seen = self._counts.get(method, 0)
+        self._counts[method] = seen + 1
+        return not seen % self._sample_every
+
+    def traced(
+        self,
+        behavior: Callable[[Any, grpc.ServicerContext], Any],
+        method: str,
+        response_streaming: bool,
+    ) -> Callable[[Any, grpc.ServicerContext], Any]:
+        """Wrap an RPC behavior tracing its allocations.
+
+        For streamed responses the allocations are traced until the response
+        generator finishes or is closed. Tracing of a stream abandoned by
+        gRPC, e.g. on cancellation, ends with the RPC without a sample.
+
+        Args:
+            behavior (Callable[[Any, grpc.ServicerContext], Any]): RPC behavior.
+            method (str): Full method name.
+            response_streaming (bool): Whether the behavior returns an iterator.
+
+        Returns:
+            Callable[[Any, grpc.ServicerContext], Any]: Traced behavior
+        """
+
+        def traced(request_or_iterator: Any, context: grpc.ServicerContext) -> Any:
+            trace = _Trace.start()
+            try:
+                return behavior(request_or_iterator, context)
+            finally:
+                if trace is not None:
+                    self._end(method, trace)
+
+        def traced_stream(
+            request_or_iterator: Any, context: grpc.ServicerContext
+        ) -> Iterator[Any]:
+            trace = _Trace.start()
+            try:
+                if trace is not None:
+                    # Abandoned streams are never resumed nor closed.
+                    context.add_callback(trace.end)
+                yield from behavior(request_or_iterator, context)
+            finally:
+                if trace is not None:
+                    self._end(method, trace)
+
+        return traced_stream if response_streaming else traced
+
+    def _end(self, method: str, trace: _Trace) -> None:
+        """End tracing and record the allocation of an RPC."""
+        allocation = trace.end()
+        if allocation is not None:
+            _result.allocation = allocation
+            self.record(method, allocation)
+
+    def record(self, method: str, allocation: Allocation) -> None:
+        """Add the allocation of a traced RPC.
+
+        Args:
+            method (str): Full method name.
+            allocation (Allocation): Traced allocation.
+        """
+        with self._lock:
+            totals = self._window.get(method)
+            if totals is None:
+                totals = self._window[method] = MethodAllocations()
+            totals.samples += 1
+            totals.net_bytes += allocation.net_bytes
+            totals.max_net_bytes = max(totals.max_net_bytes, allocation.net_bytes)
+            totals.max_peak_bytes = max(totals.max_peak_bytes, allocation.peak_bytes)
+
+    def _log(self, window: Dict[str, MethodAllocations]) -> None:
+        """Log the totals of every method."""
+        for method, totals in sorted(window.items()):
+            self._logger.info(
+                "allocations %s samples=%d mean_bytes=%d max_bytes=%d"
+                " max_peak_bytes=%d",
+                method,
+                totals.samples,
+                totals.net_bytes // totals.samples,
+                totals.max_net_bytes,
+                totals.max_peak_bytes,
+            )
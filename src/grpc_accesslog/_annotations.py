@@ -0,0 +1,48 @@
+"""Request scoped fields added to the access log record by servicers."""
+
+from contextvars import ContextVar
+from typing import Any
+from typing import Dict
+from typing import Optional
+
+
+_annotations: ContextVar[Optional[Dict[str, Any]]] = ContextVar(
+    "grpc_accesslog_annotations", default=None
+)
+
+
+def annotate(**fields: Any) -> None:
+    """Add fields to the access log record of the current RPC.
+
+    Servicers call this instead of logging extra lines, e.g.
+    ``annotate(tenant="acme", cache="hit")``. The fields are rendered by the
+    ``handlers.annotations`` and ``handlers.annotation`` handlers, or the
+    ``$annotations`` and ``$annotation_<key>`` format variables. Later
+    values replace earlier ones of the same key.
+
+    Fields are kept in a context variable, allocated by the first call of
+    an RPC, so RPCs that never annotate pay nothing. Call it on the thread,
+    or in the task, running the servicer method. Threads started by the
+    servicer do not share the annotations, and asyncio child tasks only
+    share them after a first call in the RPC task.
+
+    Args:
+        **fields (Any): Field values, rendered with ``str``.
+    """
+    annotations = _annotations.get()
+    if annotations is None:
+        _annotations.set(fields)
+    else:
+        annotations.update(fields)
+
+
+def take_annotations() -> Optional[Dict[str, Any]]:
+    """Return and clear the annotations of the current RPC.
+
+    Returns:
+        Dict[str, Any]: Annotated fields, or None if there are none
+    """
+    annotations = _annotations.get()
+    if annotations is not None:
+        _annotations.set(None)
+    return annotations
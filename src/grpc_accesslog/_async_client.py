@@ -0,0 +1,222 @@
+"""Asynchronous gRPC access log client interceptor."""
+
+from datetime import datetime
+from datetime import timezone
+from typing import Any
+from typing import AsyncIterator
+from typing import Awaitable
+from typing import Callable
+from typing import List
+from typing import Optional
+
+import grpc
+import grpc.aio
+
+from ._client import _method_name
+from ._context import ClientContext
+from ._server import AccessLogger
+
+
+class AsyncAccessLogClientInterceptor(AccessLogger):
+    """Generate a log line for each outbound asyncio RPC invocation.
+
+    ``grpc.aio`` channels register each interceptor for a single RPC shape
+    only, so this logger is installed through the per-shape interceptors
+    returned by ``interceptors()``::
+
+        interceptor = AsyncAccessLogClientInterceptor(target=target)
+        channel = grpc.aio.insecure_channel(
+            target, interceptors=interceptor.interceptors()
+        )
+    """
+
+    def __init__(self, *args: Any, target: str = "-", **kwargs: Any) -> None:
+        """Create an asyncio client access logging interceptor.
+
+        Args:
+            *args (Any): ``AccessLogger`` positional arguments.
+            target (str): Channel target reported as the RPC peer.
+                Defaults to "-".
+            **kwargs (Any): ``AccessLogger`` keyword arguments.
+
+        Raises:
+            ValueError: ``echo_request_id`` is not supported by clients.
+        """
+        if kwargs.get("echo_request_id"):
+            raise ValueError("echo_request_id is only supported by servers")
+
+        super().__init__(*args, **kwargs)
+        self._target = target
+
+    def interceptors(self) -> List[grpc.aio.ClientInterceptor]:
+        """Return interceptors for all four RPC shapes sharing this logger.
+
+        Returns:
+            List[grpc.aio.ClientInterceptor]: Channel interceptors
+        """
+        return [
+            _UnaryUnaryInterceptor(self),
+            _UnaryStreamInterceptor(self),
+            _StreamUnaryInterceptor(self),
+            _StreamStreamInterceptor(self),
+        ]
+
+    def _log_call(
+        self,
+        client_call_details: grpc.aio.ClientCallDetails,
+        request_or_iterator: Any,
+        response: Any,
+        code: Optional[grpc.StatusCode],
+        details: Optional[str],
+        start: datetime,
+    ) -> None:
+        """Log a terminated outbound RPC."""
+        end = datetime.now(timezone.utc)
+        self.log(
+            ClientContext(
+                self._target,
+                code,
+                details,
+                client_call_details.metadata,
+            ),
+            _method_name(client_call_details),
+            request_or_iterator,
+            response,
+            start,
+            end,
+        )
+
+    async def _intercept_unary_response(
+        self,
+        continuation: Callable[[grpc.aio.ClientCallDetails, Any], Awaitable[Any]],
+        client_call_details: grpc.aio.ClientCallDetails,
+        request_or_iterator: Any,
+    ) -> Any:
+        """Invoke a unary response RPC and log it once it terminates."""
+        start = datetime.now(timezone.utc)
+        call = await continuation(client_call_details, request_or_iterator)
+        response = None
+        code: Optional[grpc.StatusCode] = grpc.StatusCode.CANCELLED
+        details = None
+        try:
+            response = await call
+            code = grpc.StatusCode.OK
+        except grpc.aio.AioRpcError as error:
+            code = error.code()
+            details = error.details()
+        finally:
+            self._log_call(
+                client_call_details,
+                request_or_iterator,
+                response,
+                code,
+                details,
+                start,
+            )
+
+        return call
+
+    async def _intercept_stream_response(
+        self,
+        continuation: Callable[[grpc.aio.ClientCallDetails, Any], Awaitable[Any]],
+        client_call_details: grpc.aio.ClientCallDetails,
+        request_or_iterator: Any,
+    ) -> AsyncIterator[Any]:
+        """Invoke a streaming response RPC and log it once it terminates."""
+        start = datetime.now(timezone.utc)
+        call = await continuation(client_call_details, request_or_iterator)
+
+        async def logging_stream() -> AsyncIterator[Any]:
+            code: Optional[grpc.StatusCode] = grpc.StatusCode.CANCELLED
+            details = None
+            try:
+                async for response in call:
+                    yield response
+                code = grpc.StatusCode.OK
+            except grpc.aio.AioRpcError as error:
+                code = error.code()
+                details = error.details()
+                raise
+            finally:
+                self._log_call(
+                    client_call_details,
+                    request_or_iterator,
+                    None,
+                    code,
+                    details,
+                    start,
+                )
+
+        return logging_stream()
+
+
+class _UnaryUnaryInterceptor(grpc.aio.UnaryUnaryClientInterceptor):
+    """Unary-unary adapter for ``AsyncAccessLogClientInterceptor``."""
+
+    def __init__(self, logger: AsyncAccessLogClientInterceptor) -> None:
+        self._access_logger = logger
+
+    async def intercept_unary_unary(
+        self,
+        continuation: Callable[[grpc.aio.ClientCallDetails, Any], Awaitable[Any]],
+        client_call_details: grpc.aio.ClientCallDetails,
+        request: Any,
+    ) -> Any:
+        """Intercept a unary-unary RPC."""
+        return await self._access_logger._intercept_unary_response(
+            continuation, client_call_details, request
+        )
+
+
+class _UnaryStreamInterceptor(grpc.aio.UnaryStreamClientInterceptor):
+    """Unary-stream adapter for ``AsyncAccessLogClientInterceptor``."""
+
+    def __init__(self, logger: AsyncAccessLogClientInterceptor) -> None:
+        self._access_logger = logger
+
+    async def intercept_unary_stream(
+        self,
+        continuation: Callable[[grpc.aio.ClientCallDetails, Any], Awaitable[Any]],
+        client_call_details: grpc.aio.ClientCallDetails,
+        request: Any,
+    ) -> Any:
+        """Intercept a unary-stream RPC."""
+        return await self._access_logger._intercept_stream_response(
+            continuation, client_call_details, request
+        )
+
+
+class _StreamUnaryInterceptor(grpc.aio.StreamUnaryClientInterceptor):
+    """Stream-unary adapter for ``AsyncAccessLogClientInterceptor``."""
+
+    def __init__(self, logger: AsyncAccessLogClientInterceptor) -> None:
+        self._access_logger = logger
+
+    async def intercept_stream_unary(
+        self,
+        continuation: Callable[[grpc.aio.ClientCallDetails, Any], Awaitable[Any]],
+        client_call_details: grpc.aio.ClientCallDetails,
+        request_iterator: Any,
+    ) -> Any:
+        """Intercept a stream-unary RPC."""
+        return await self._access_logger._intercept_unary_response(
+            continuation, client_call_details, request_iterator
+        )
+
+
+class _StreamStreamInterceptor(grpc.aio.StreamStreamClientInterceptor):
+    """Stream-stream adapter for ``AsyncAccessLogClientInterceptor``."""
+
+    def __init__(self, logger: AsyncAccessLogClientInterceptor) -> None:
+        self._access_logger = logger
+
+    async def intercept_stream_stream(
+        self,
+        continuation: Callable[[grpc.aio.ClientCallDetails, Any], Awaitable[Any]],
+        client_call_details: grpc.aio.ClientCallDetails,
+        request_iterator: Any,
+    ) -> Any:
+        """Intercept a stream-stream RPC."""
+        return await self._access_logger._intercept_stream_response(
+            continuation, client_call_details, request_iterator
+        )
@@ -1,21 +1,45 @@
 """Asynchronous gRPC access log server interceptor."""
 
-from datetime import datetime
-from datetime import timezone
 from typing import Any
+from typing import AsyncIterator
 from typing import Awaitable
 from typing import Callable
 
 import grpc
 import grpc.aio
 
+from ._annotations import take_annotations
+from ._context import LogContext
+from ._plugins import AsyncObservingIterator
+from ._plugins import message_observers
+from ._plugins import notify
 from ._server import AccessLogger
 from ._server import _wrap_rpc_behavior
 
 
+class _AsyncCountingIterator:
+    """Asynchronous request iterator wrapper counting the messages read."""
+
+    __slots__ = ("_iterator", "count")
+
+    def __init__(self, iterator: AsyncIterator[Any]) -> None:
+        self._iterator = iterator
+        self.count = 0
+
+    def __aiter__(self) -> "_AsyncCountingIterator":
+        return self
+
+    async def __anext__(self) -> Any:
+        item = await self._iterator.__anext__()
+        self.count += 1
+        return item
+
+
 class AsyncAccessLogInterceptor(grpc.aio.ServerInterceptor, AccessLogger):
     """Generate a log line for each RPC invocation."""
 
+    _annotated = True
+
     async def intercept_service(
         self,
         continuation: Callable[
@@ -24,53 +48,244 @@ class AsyncAccessLogInterceptor(grpc.aio.ServerInterceptor, AccessLogger):
         handler_call_details: grpc.HandlerCallDetails,
     ) -> grpc.RpcMethodHandler:
         """Intercept an RPC."""
+        if self._config is not None and self._config.version != self._config_version:
+            self._reconfigure(self._config)
 
         def logging_wrapper(
             behavior: Callable[[Any, grpc.ServicerContext], Any],
             request_streaming: bool,
             response_streaming: bool,
         ) -> Callable[[Any, grpc.ServicerContext], Any]:
-            async def logging_interceptor(
-                request_or_iterator: Any, context: grpc.ServicerContext
-            ) -> Any:
-                start = datetime.now(timezone.utc)
-                response = None
-                try:
-                    response = await behavior(request_or_iterator, context)
-                    return response
-                finally:
-                    end = datetime.now(timezone.utc)
-                    self.log(
+            if self._plugins:
+                return self._plugin_wrapper(
+                    behavior,
+                    handler_call_details.method,
+                    request_streaming,
+                    response_streaming,
+                )
+            if self._inputs.counts:
+                return self._counting_wrapper(
+                    behavior,
+                    handler_call_details.method,
+                    request_streaming,
+                    response_streaming,
+                )
+
+            return self._logging_wrapper(
+                behavior, handler_call_details.method, response_streaming
+            )
+
+        next_handler = await continuation(handler_call_details)
+        return _wrap_rpc_behavior(next_handler, logging_wrapper)  # type: ignore
+
+    def _logging_wrapper(
+        self,
+        behavior: Callable[[Any, grpc.ServicerContext], Any],
+        method_name: str,
+        response_streaming: bool,
+    ) -> Callable[[Any, grpc.ServicerContext], Any]:
+        """Wrap an RPC behavior passing only the inputs read by the handlers."""
+        clock = self._inputs.clock
+        keep_request = self._inputs.request
+
+        async def logging_interceptor(
+            request_or_iterator: Any, context: grpc.ServicerContext
+        ) -> Any:
+            start = clock()
+            response = None
+            try:
+                response = await behavior(request_or_iterator, context)
+                return response
+            finally:
+                self.log(
+                    context,
+                    method_name,
+                    request_or_iterator if keep_request else None,
+                    response,
+                    start,
+                    clock(),
+                )
+
+        async def logging_interceptor_lean(
+            request_or_iterator: Any, context: grpc.ServicerContext
+        ) -> Any:
+            start = clock()
+            try:
+                return await behavior(request_or_iterator, context)
+            finally:
+                self.log(
+                    context,
+                    method_name,
+                    request_or_iterator if keep_request else None,
+                    None,
+                    start,
+                    clock(),
+                )
+
+        async def logging_interceptor_stream(
+            request_or_iterator: Any, context: grpc.ServicerContext
+        ) -> Any:
+            start = clock()
+            try:
+                async for response in behavior(request_or_iterator, context):
+                    yield response
+            finally:
+                self.log(
+                    context,
+                    method_name,
+                    request_or_iterator if keep_request else None,
+                    None,
+                    start,
+                    clock(),
+                )
+
+        if response_streaming:
+            return logging_interceptor_stream
+        if not self._inputs.response:
+            return logging_interceptor_lean
+
+        return logging_interceptor
+
+    def _counting_wrapper(
+        self,
+        behavior: Callable[[Any, grpc.ServicerContext], Any],
+        method_name: str,
+        request_streaming: bool,
+        response_streaming: bool,
+    ) -> Callable[[Any, grpc.ServicerContext], Any]:
+        """Wrap an RPC behavior counting streamed messages."""
+        clock = self._inputs.clock
+        keep_request = self._inputs.request
+        keep_response = self._inputs.response
+
+        async def counting_interceptor(
+            request_or_iterator: Any, context: grpc.ServicerContext
+        ) -> Any:
+            start = clock()
+            requests = request_or_iterator
+            if request_streaming:
+                requests = _AsyncCountingIterator(request_or_iterator)
+            response = None
+            try:
+                response = await behavior(requests, context)
+                return response
+            finally:
+                self.log(
+                    context,
+                    method_name,
+                    request_or_iterator if keep_request else None,
+                    response if keep_response else None,
+                    start,
+                    clock(),
+                    requests.count if request_streaming else 1,
+                    int(response is not None),
+                )
+
+        async def counting_interceptor_stream(
+            request_or_iterator: Any, context: grpc.ServicerContext
+        ) -> Any:
+            start = clock()
+            requests = request_or_iterator
+            if request_streaming:
+                requests = _AsyncCountingIterator(request_or_iterator)
+            responses = 0
+            try:
+                async for response in behavior(requests, context):
+                    responses += 1
+                    yield response
+            finally:
+                self.log(
+                    context,
+                    method_name,
+                    request_or_iterator if keep_request else None,
+                    None,
+                    start,
+                    clock(),
+                    requests.count if request_streaming else 1,
+                    responses,
+                )
+
+        if response_streaming:
+            return counting_interceptor_stream
+
+        return counting_interceptor
+
+    def _plugin_wrapper(
+        self,
+        behavior: Callable[[Any, grpc.ServicerContext], Any],
+        method_name: str,
+        request_streaming: bool,
+        response_streaming: bool,
+    ) -> Callable[[Any, grpc.ServicerContext], Any]:
+        """Wrap an RPC behavior calling the plugin hooks around it."""
+        clock = self._inputs.clock
+        keep_request = self._inputs.request
+        keep_response = self._inputs.response
+        counts = self._inputs.counts
+        observe = bool(message_observers(self._plugins))
+        wrap_requests = request_streaming and (counts or observe)
+        begin = self._plugin_start(
+            method_name, request_streaming, AsyncObservingIterator
+        )
+
+        async def plugin_interceptor(
+            request_or_iterator: Any, context: grpc.ServicerContext
+        ) -> Any:
+            start = clock()
+            started, observed, requests = begin(request_or_iterator, context)
+            response = None
+            try:
+                response = await behavior(requests, context)
+                if observe and response is not None:
+                    notify(observed, response, False)
+                return response
+            finally:
+                self._finish(
+                    started,
+                    LogContext(
                         context,
-                        handler_call_details.method,
-                        request_or_iterator,
-                        response,
+                        method_name,
+                        request_or_iterator if keep_request else None,
+                        response if keep_response else None,
                         start,
-                        end,
-                    )
-
-            async def logging_interceptor_stream(
-                request_or_iterator: Any, context: grpc.ServicerContext
-            ) -> Any:
-                start = datetime.now(timezone.utc)
-                try:
-                    async for response in behavior(request_or_iterator, context):
-                        yield response
-                finally:
-                    end = datetime.now(timezone.utc)
-                    self.log(
+                        clock(),
+                        (requests.count if wrap_requests else 1) if counts else None,
+                        int(response is not None) if counts else None,
+                        None,
+                        take_annotations(),
+                    ),
+                )
+
+        async def plugin_interceptor_stream(
+            request_or_iterator: Any, context: grpc.ServicerContext
+        ) -> Any:
+            start = clock()
+            started, observed, requests = begin(request_or_iterator, context)
+            responses = 0
+            try:
+                async for response in behavior(requests, context):
+                    responses += 1
+                    if observe:
+                        notify(observed, response, False)
+                    yield response
+            finally:
+                self._finish(
+                    started,
+                    LogContext(
                         context,
-                        handler_call_details.method,
-                        request_or_iterator,
+                        method_name,
+                        request_or_iterator if keep_request else None,
                         None,
                         start,
-                        end,
-                    )
-
-            if response_streaming:
-                return logging_interceptor_stream
+                        clock(),
+                        (requests.count if wrap_requests else 1) if counts else None,
+                        responses if counts else None,
+                        None,
+                        take_annotations(),
+                    ),
+                )
 
-            return logging_interceptor
+        if response_streaming:
+            return plugin_interceptor_stream
 
-        next_handler = await continuation(handler_call_details)
-        return _wrap_rpc_behavior(next_handler, logging_wrapper)  # type: ignore
+        return plugin_interceptor
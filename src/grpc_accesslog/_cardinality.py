@@ -0,0 +1,223 @@
+"""HyperLogLog estimates of distinct clients per method and window."""
+
+import hashlib
+import logging
+import math
+from typing import Any
+from typing import Dict
+from typing import NamedTuple
+from typing import Optional
+
+from ._context import LogContext
+from ._plugins import Plugin
+from ._reporter import WindowReporter
+from .handlers import peer
+from .handlers import user_agent
+
+
+_logger = logging.getLogger(__name__)
+
+
+class HyperLogLog:
+    """Mergeable estimator of the number of distinct strings.
+
+    Values are hashed with 64 bit BLAKE2b, which is stable across processes,
+    into ``2 ** precision`` one byte registers. The relative standard error
+    is about ``1.04 / sqrt(2 ** precision)``, 1.6% for the default precision
+    of 12 in 4 KiB. Small cardinalities are estimated by linear counting.
+
+    Estimators of equal precision merge by taking the register maximum, so
+    windows, threads and processes can be summed up without double counting.
+    ``to_bytes`` and ``from_bytes`` move registers between processes.
+    """
+
+    __slots__ = ("precision", "_registers", "_shift", "_mask")
+
+    def __init__(self, precision: int = 12) -> None:
+        """Create an empty estimator.
+
+        Args:
+            precision (int): Index bits, between 4 and 16. Defaults to 12.
+
+        Raises:
+            ValueError: Invalid precision.
+        """
+        if not 4 <= precision <= 16:
+            raise ValueError("precision must be between 4 and 16")
+
+        self.precision = precision
+        self._registers = bytearray(1 << precision)
+        self._shift = 64 - precision
+        self._mask = (1 << self._shift) - 1
+
+    def add(self, value: str) -> None:
+        """Count a value.
+
+        Args:
+            value (str): Observed value.
+        """
+        hashed = int.from_bytes(
+            hashlib.blake2b(value.encode(), digest_size=8).digest(), "big"
+        )
+        index = hashed >> self._shift
+        rank = self._shift - (hashed & self._mask).bit_length() + 1
+        if rank > self._registers[index]:
+            self._registers[index] = rank
+
+    def estimate(self) -> float:
+        """Return the estimated number of distinct values.
+
+        Returns:
+            float: Estimated cardinality
+        """
+        registers = self._registers
+        size = len(registers)
+        alpha = {16: 0.673, 32: 0.697, 64: 0.709}.get(size, 0.7213 / (1 + 1.079 / size))
+        estimate = alpha * size * size / sum(2.0**-rank for rank in registers)
+        zeros = registers.count(0)
+        if estimate <= 2.5 * size and zeros:
+            return size * math.log(size / zeros)
+
+        return estimate
+
+    def merge(self, other: "HyperLogLog") -> None:
+        """Add the values counted by another estimator.
+
+        Args:
+            other (HyperLogLog): Estimator of the same precision.
+
+        Raises:
+            ValueError: Different precision.
+        """
+        if other.precision != self.precision:
+            raise ValueError("cannot merge estimators of different precision")
+
+        self._registers = bytearray(map(max, self._registers, other._registers))
+
+    def copy(self) -> "HyperLogLog":
+        """Return an independent copy.
+
+        Returns:
+            HyperLogLog: Estimator with the same registers
+        """
+        copy = HyperLogLog(self.precision)
+        copy._registers[:] = self._registers
+        return copy
+
+    def to_bytes(self) -> bytes:
+        """Serialize the registers.
+
+        Returns:
+            bytes: Precision byte followed by the registers
+        """
+        return bytes((self.precision,)) + bytes(self._registers)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "HyperLogLog":
+        """Deserialize an estimator written by ``to_bytes``.
+
+        Args:
+            data (bytes): Serialized estimator.
+
+        Returns:
+            HyperLogLog: Deserialized estimator
+
+        Raises:
+            ValueError: Invalid data.
+        """
+        if not data or len(data) != 1 + (1 << data[0]):
+            raise ValueError("invalid HyperLogLog data length")
+
+        estimator = cls(data[0])
+        estimator._registers[:] = data[1:]
+        return estimator
+
+
+class MethodCardinality(NamedTuple):
+    """Distinct client estimators of one method."""
+
+    #: Distinct peer addresses.
+    peers: HyperLogLog
+    #: Distinct user agents.
+    user_agents: HyperLogLog
+
+
+class CardinalityTracker(WindowReporter[MethodCardinality], Plugin):
+    """Estimate distinct peers and user agents per method and window.
+
+    Every method gets a pair of ``HyperLogLog`` estimators, so memory grows
+    with the number of methods, not clients. The tracker is a ``Plugin`` of
+    the server interceptors, so it records every RPC, whatever the
+    configured handlers, runtime settings or overload mode.
+
+    Every ``interval`` seconds a background thread logs one line per method
+    by the ``grpc_accesslog._cardinality`` logger and starts a new window.
+    ``snapshot`` returns copies of the current window, which can be merged
+    with other windows, trackers or processes.
+    """
+
+    fields = frozenset(("peer", "metadata"))
+
+    def __init__(
+        self,
+        precision: int = 12,
+        interval: float = 60.0,
+        logger: Optional[logging.Logger] = None,
+    ) -> None:
+        """Create a tracker.
+
+        Args:
+            precision (int): HyperLogLog precision. Defaults to 12.
+            interval (float): Seconds between emitted windows, 0 to only emit
+                on demand. Defaults to 60.0.
+            logger (logging.Logger): Logger of the emitted windows. Optional,
+                defaults to None (module logger).
+
+        Raises:
+            ValueError: Invalid precision.
+        """
+        if not 4 <= precision <= 16:
+            raise ValueError("precision must be between 4 and 16")
+
+        self._precision = precision
+        super().__init__(interval, logger or _logger, "cardinality")
+
+    def on_end(self, state: Any, log_context: LogContext) -> None:
+        """Record the client of a finished RPC.
+
+        Args:
+            state (Any): Value returned by ``on_start``.
+            log_context (LogContext): Context of the finished RPC.
+        """
+        self.record(log_context.method_name, peer(log_context), user_agent(log_context))
+
+    def record(self, method: str, peer: str, user_agent: str) -> None:
+        """Count the client of an RPC.
+
+        Args:
+            method (str): Full method name.
+            peer (str): Client address.
+            user_agent (str): Client user agent.
+        """
+        with self._lock:
+            estimators = self._window.get(method)
+            if estimators is None:
+                estimators = self._window[method] = MethodCardinality(
+                    HyperLogLog(self._precision), HyperLogLog(self._precision)
+                )
+            estimators.peers.add(peer)
+            estimators.user_agents.add(user_agent)
+
+    @staticmethod
+    def _copy(totals: MethodCardinality) -> MethodCardinality:
+        return MethodCardinality(totals.peers.copy(), totals.user_agents.copy())
+
+    def _log(self, window: Dict[str, MethodCardinality]) -> None:
+        """Log the estimates of every method."""
+        for method, estimators in sorted(window.items()):
+            self._logger.info(
+                "distinct %s peers=%d user_agents=%d",
+                method,
+                round(estimators.peers.estimate()),
+                round(estimators.user_agents.estimate()),
+            )
@@ -0,0 +1,128 @@
+"""gRPC access log client interceptor."""
+
+from datetime import datetime
+from datetime import timezone
+from typing import Any
+from typing import Callable
+from typing import Optional
+
+import grpc
+
+from ._context import ClientContext
+from ._server import AccessLogger
+
+
+def _method_name(client_call_details: grpc.ClientCallDetails) -> str:
+    """Return the RPC method of the call details as a string."""
+    method = client_call_details.method
+    if isinstance(method, bytes):
+        return method.decode()
+
+    return str(method)
+
+
+class AccessLogClientInterceptor(
+    grpc.UnaryUnaryClientInterceptor,
+    grpc.UnaryStreamClientInterceptor,
+    grpc.StreamUnaryClientInterceptor,
+    grpc.StreamStreamClientInterceptor,
+    AccessLogger,
+):
+    """Generate a log line for each outbound RPC invocation."""
+
+    def __init__(self, *args: Any, target: str = "-", **kwargs: Any) -> None:
+        """Create a client access logging interceptor.
+
+        Accepts the same arguments as ``AccessLogger``. Channel objects do not
+        expose their target to interceptors, so it can be provided here to be
+        reported by the ``peer`` handler.
+
+        Args:
+            *args (Any): ``AccessLogger`` positional arguments.
+            target (str): Channel target reported as the RPC peer.
+                Defaults to "-".
+            **kwargs (Any): ``AccessLogger`` keyword arguments.
+
+        Raises:
+            ValueError: ``echo_request_id`` is not supported by clients.
+        """
+        if kwargs.get("echo_request_id"):
+            raise ValueError("echo_request_id is only supported by servers")
+
+        super().__init__(*args, **kwargs)
+        self._target = target
+
+    def _intercept(
+        self,
+        continuation: Callable[[grpc.ClientCallDetails, Any], Any],
+        client_call_details: grpc.ClientCallDetails,
+        request_or_iterator: Any,
+        response_streaming: bool,
+    ) -> Any:
+        """Invoke the RPC and log it once it terminates."""
+        start = datetime.now(timezone.utc)
+        call = continuation(client_call_details, request_or_iterator)
+
+        def done(call: Any) -> None:
+            end = datetime.now(timezone.utc)
+            code: Optional[grpc.StatusCode] = call.code()
+            response = None
+            if not response_streaming and code is grpc.StatusCode.OK:
+                response = call.result()
+
+            self.log(
+                ClientContext(
+                    self._target,
+                    code,
+                    call.details(),
+                    client_call_details.metadata,
+                ),
+                _method_name(client_call_details),
+                request_or_iterator,
+                response,
+                start,
+                end,
+            )
+
+        call.add_done_callback(done)
+        return call
+
+    def intercept_unary_unary(
+        self,
+        continuation: Callable[[grpc.ClientCallDetails, Any], Any],
+        client_call_details: grpc.ClientCallDetails,
+        request: Any,
+    ) -> Any:
+        """Intercept a unary-unary RPC."""
+        return self._intercept(continuation, client_call_details, request, False)
+
+    def intercept_unary_stream(
+        self,
+        continuation: Callable[[grpc.ClientCallDetails, Any], Any],
+        client_call_details: grpc.ClientCallDetails,
+        request: Any,
+    ) -> Any:
+        """Intercept a unary-stream RPC."""
+        return self._intercept(continuation, client_call_details, request, True)
+
+    def intercept_stream_unary(
+        self,
+        continuation: Callable[[grpc.ClientCallDetails, Any], Any],
+        client_call_details: grpc.ClientCallDetails,
+        request_iterator: Any,
+    ) -> Any:
+        """Intercept a stream-unary RPC."""
+        return self._intercept(
+            continuation, client_call_details, request_iterator, False
+        )
+
+    def intercept_stream_stream(
+        self,
+        continuation: Callable[[grpc.ClientCallDetails, Any], Any],
+        client_call_details: grpc.ClientCallDetails,
+        request_iterator: Any,
+    ) -> Any:
+        """Intercept a stream-stream RPC."""
+        return self._intercept(
+            continuation, client_call_details, request_iterator, True
+        )
@@ -0,0 +1,212 @@
+"""Coalescing of repeated access log lines within a time window."""
+
+import heapq
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from datetime import timezone
+from typing import Dict
+from typing import List
+from typing import Sequence
+from typing import Tuple
+
+from .handlers import THandler
+from .handlers import handler_fields
+
+
+#: Fields of handlers whose output only depends on the RPC timestamps.
+_TEMPORAL = frozenset(("time",))
+#: Handler lists whose key positions are cached, e.g. across config reloads.
+_MAX_HANDLER_LISTS = 64
+
+
+def _timestamp(seconds: float) -> str:
+    """Format a Unix time as an ISO 8601 UTC timestamp."""
+    return datetime.fromtimestamp(seconds, timezone.utc).isoformat(
+        timespec="milliseconds"
+    )
+
+
+class _Entry:
+    """First occurrence of a line and its repeats in the current window."""
+
+    __slots__ = ("log_args", "first", "last", "repeats", "sequence")
+
+    def __init__(self, log_args: List[str], now: float, sequence: int) -> None:
+        self.log_args = log_args
+        self.first = now
+        self.last = now
+        self.repeats = 0
+        self.sequence = sequence
+
+
+class Coalescer:
+    """Collapse access log lines identical except for their timestamps.
+
+    Lines are keyed by the output of every handler except those declaring
+    only the ``time`` field (see ``handlers.requires``), such as the
+    timestamps and ``rtt_ms``. The first line of a key is written at once.
+    Further lines with the same key within ``window`` seconds of it are
+    only counted, and when the window closes the first line is written
+    again followed by ``repeated N times between T1 and T2``, the UTC times
+    of the first and the last occurrence.
+
+    At most ``max_keys`` keys are tracked. Beyond that the least recently
+    repeated key is evicted, writing its summary early, so memory stays
+    bounded during floods of distinct lines. Windows are closed when the
+    next line is written, by a background thread of the access logger
+    every ``window`` seconds and on ``AccessLogger.close``. A log format is
+    compiled into a single handler, so a format containing a timestamp
+    never coalesces; use separate handlers instead.
+    """
+
+    def __init__(
+        self,
+        window: float = 1.0,
+        max_keys: int = 1024,
+    ) -> None:
+        """Create a coalescer.
+
+        Args:
+            window (float): Seconds repeats are counted after the first
+                occurrence of a line. Defaults to 1.0.
+            max_keys (int): Maximum distinct lines tracked. Defaults to 1024.
+
+        Raises:
+            ValueError: Invalid window or table size.
+        """
+        if window <= 0 or max_keys <= 0:
+            raise ValueError("window and max_keys must be positive")
+
+        self._window = window
+        self._max_keys = max_keys
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, ...], _Entry]" = OrderedDict()
+        self._deadlines: List[Tuple[float, int, Tuple[str, ...]]] = []
+        self._sequence = 0
+        self._keyed: Dict[Tuple[THandler, ...], Tuple[int, ...]] = {}
+        #: Lines counted instead of written.
+        self.coalesced = 0
+
+    @property
+    def window(self) -> float:
+        """Seconds repeats are counted after the first occurrence of a line."""
+        return self._window
+
+    def _key_indexes(self, handlers: Sequence[THandler]) -> Tuple[int, ...]:
+        """Return the positions of the handlers forming the key."""
+        listed = tuple(handlers)
+        indexes = self._keyed.get(listed)
+        if indexes is None:
+            if len(self._keyed) >= _MAX_HANDLER_LISTS:
+                self._keyed.clear()
+            indexes = self._keyed[listed] = tuple(
+                index
+                for index, handler in enumerate(handlers)
+                if handler_fields(handler) != _TEMPORAL
+            )
+        return indexes
+
+    def admit(
+        self, handlers: Sequence[THandler], log_args: List[str]
+    ) -> List[List[str]]:
+        """Count a line and return the lines to write in order.
+
+        Args:
+            handlers (Sequence[THandler]): Handlers producing the leading
+                ``log_args``. Trailing detail handler output is always part
+                of the key.
+            log_args (List[str]): Handler output of the line.
+
+        Returns:
+            List[List[str]]: Summaries of closed windows and evicted keys,
+            followed by the line itself unless it repeats an earlier one
+        """
+        indexes = self._key_indexes(handlers)
+        key = (
+            *(log_args[index] for index in indexes),
+            *log_args[len(handlers) :],
+        )
+        now = time.time()
+
+        with self._lock:
+            lines = self._expire(now)
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.repeats += 1
+                entry.last = now
+                self._entries.move_to_end(key)
+                self.coalesced += 1
+                return lines
+
+            if len(self._entries) >= self._max_keys:
+                _, evicted = self._entries.popitem(last=False)
+                self._summarize(evicted, lines)
+
+            deadline = now + self._window
+            self._sequence += 1
+            self._entries[key] = _Entry(log_args, now, self._sequence)
+            heapq.heappush(self._deadlines, (deadline, self._sequence, key))
+            if len(self._deadlines) > 2 * self._max_keys:
+                self._compact()
+
+        lines.append(log_args)
+        return lines
+
+    def drain(self) -> List[List[str]]:
+        """Close every window, in order of first occurrence.
+
+        Returns:
+            List[List[str]]: Summaries of windows with repeats
+        """
+        with self._lock:
+            entries = sorted(self._entries.values(), key=lambda entry: entry.sequence)
+            self._entries.clear()
+            self._deadlines = []
+            lines: List[List[str]] = []
+            for entry in entries:
+                self._summarize(entry, lines)
+            return lines
+
+    def expire(self) -> List[List[str]]:
+        """Close the windows which have ended.
+
+        Returns:
+            List[List[str]]: Summaries of the closed windows with repeats
+        """
+        with self._lock:
+            return self._expire(time.time())
+
+    def _expire(self, now: float) -> List[List[str]]:
+        """Close the windows ended by ``now`` while holding the lock."""
+        lines: List[List[str]] = []
+        deadlines = self._deadlines
+        while deadlines and deadlines[0][0] <= now:
+            _, sequence, key = heapq.heappop(deadlines)
+            entry = self._entries.get(key)
+            # Evicted keys leave stale deadlines behind.
+            if entry is not None and entry.sequence == sequence:
+                del self._entries[key]
+                self._summarize(entry, lines)
+        return lines
+
+    def _compact(self) -> None:
+        """Drop the deadlines of evicted keys while holding the lock."""
+        self._deadlines = [
+            (entry.first + self._window, entry.sequence, key)
+            for key, entry in self._entries.items()
+        ]
+        heapq.heapify(self._deadlines)
+
+    @staticmethod
+    def _summarize(entry: _Entry, lines: List[List[str]]) -> None:
+        """Append the summary of an entry with repeats."""
+        if entry.repeats:
+            lines.append(
+                [
+                    *entry.log_args,
+                    f"repeated {entry.repeats} times between"
+                    f" {_timestamp(entry.first)} and {_timestamp(entry.last)}",
+                ]
+            )
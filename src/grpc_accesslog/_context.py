@@ -2,10 +2,25 @@
 
 from datetime import datetime
 from typing import Any
+from typing import Mapping
 from typing import NamedTuple
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
 
 import grpc
 
+from ._correlation import Correlation
+
+
+class Allocation(NamedTuple):
+    """Memory allocated by the servicer code of a sampled RPC."""
+
+    #: Bytes allocated and still live when the RPC ended.
+    net_bytes: int
+    #: Peak of the bytes allocated during the RPC.
+    peak_bytes: int
+
 
 class LogContext(NamedTuple):
     """Data available to gRPC log handlers."""
@@ -16,3 +31,68 @@ class LogContext(NamedTuple):
     response: Any
     start: datetime
     end: datetime
+    request_count: Optional[int] = None
+    response_count: Optional[int] = None
+    correlation: Optional[Correlation] = None
+    annotations: Optional[Mapping[str, Any]] = None
+    cpu_ns: Optional[int] = None
+    allocation: Optional[Allocation] = None
+
+
+class Metadatum(NamedTuple):
+    """Invocation metadata key/value pair."""
+
+    key: str
+    value: Any
+
+
+class ClientContext:
+    """Client flavour of the servicer context exposed to log handlers.
+
+    Client interceptors store an instance of this class in
+    ``LogContext.server_context`` so that handlers written for the server
+    interceptors (``peer``, ``status``, ``user_agent``, ...) work unchanged
+    for outbound RPCs. ``peer()`` reports the channel target.
+    """
+
+    __slots__ = ("_target", "_code", "_details", "_metadata")
+
+    def __init__(
+        self,
+        target: str,
+        code: Optional[grpc.StatusCode],
+        details: Optional[str] = None,
+        metadata: Optional[Sequence[Tuple[str, Any]]] = None,
+    ) -> None:
+        """Create a client call context.
+
+        Args:
+            target (str): Channel target the RPC was sent to.
+            code (grpc.StatusCode): Final status code of the call.
+            details (str): Status details. Optional, defaults to None.
+            metadata (Sequence[Tuple[str, Any]]): Outbound request metadata.
+                Optional, defaults to None.
+        """
+        self._target = target
+        self._code = code
+        self._details = details
+        self._metadata = metadata
+
+    def peer(self) -> str:
+        """Return the channel target."""
+        return self._target
+
+    def code(self) -> Optional[grpc.StatusCode]:
+        """Return the status code of the call."""
+        return self._code
+
+    def details(self) -> Optional[str]:
+        """Return the status details of the call."""
+        return self._details
+
+    def invocation_metadata(self) -> Tuple[Metadatum, ...]:
+        """Return the outbound request metadata."""
+        if not self._metadata:
+            return ()
+
+        return tuple(Metadatum(key, value) for key, value in self._metadata)
@@ -0,0 +1,141 @@
+"""Trace context and request ID correlation."""
+
+import random
+from typing import Any
+from typing import Iterable
+from typing import NamedTuple
+from typing import Optional
+from typing import Tuple
+
+import grpc
+
+
+TRACEPARENT = "traceparent"
+REQUEST_ID = "x-request-id"
+
+_HEX = "0123456789abcdef"
+_ZERO_TRACE_ID = "0" * 32
+_ZERO_SPAN_ID = "0" * 16
+
+
+class Correlation(NamedTuple):
+    """Identifiers joining an access log record with traces and requests."""
+
+    trace_id: Optional[str]
+    span_id: Optional[str]
+    sampled: Optional[bool]
+    request_id: str
+    generated: bool = False
+
+
+def parse_traceparent(value: str) -> Optional[Tuple[str, str, bool]]:
+    """Parse a W3C ``traceparent`` header value.
+
+    Validation follows the W3C Trace Context specification: lowercase hex
+    fields, no all-zero trace or parent ID, version ``ff`` is invalid and
+    version ``00`` values have exactly four fields. Future versions may
+    append fields after another dash.
+
+    Args:
+        value (str): Header value, e.g.
+            "00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01".
+
+    Returns:
+        Tuple[str, str, bool]: Trace ID, parent span ID and sampled flag, or
+            None for invalid values
+    """
+    if (
+        len(value) < 55
+        or value[2] != "-"
+        or value[35] != "-"
+        or value[52] != "-"
+        or (len(value) > 55 and (value[55] != "-" or value.startswith("00")))
+    ):
+        return None
+
+    version = value[:2]
+    trace_id = value[3:35]
+    span_id = value[36:52]
+    flags = value[53:55]
+    # str.strip removes every hex digit, leaving a remainder on invalid input.
+    if (
+        version.strip(_HEX)
+        or trace_id.strip(_HEX)
+        or span_id.strip(_HEX)
+        or flags.strip(_HEX)
+        or version == "ff"
+        or trace_id == _ZERO_TRACE_ID
+        or span_id == _ZERO_SPAN_ID
+    ):
+        return None
+
+    return trace_id, span_id, bool(int(flags, 16) & 1)
+
+
+def new_request_id() -> str:
+    """Return a random 128-bit request ID as 32 hex digits.
+
+    Returns:
+        str: Request ID
+    """
+    return f"{random.getrandbits(128):032x}"
+
+
+def correlate(metadata: Optional[Iterable[Any]]) -> Correlation:
+    """Extract correlation identifiers from invocation metadata.
+
+    The metadata is scanned once. A request ID is generated when no
+    ``x-request-id`` entry is present.
+
+    Args:
+        metadata (Iterable[Any]): Invocation metadata key/value pairs.
+
+    Returns:
+        Correlation: Parsed identifiers
+    """
+    traceparent = None
+    request_id = None
+    for key, value in metadata or ():
+        if key == TRACEPARENT:
+            traceparent = value
+        elif key == REQUEST_ID:
+            request_id = value
+        else:
+            continue
+
+        if traceparent is not None and request_id is not None:
+            break
+
+    trace = None
+    if isinstance(traceparent, str):
+        trace = parse_traceparent(traceparent)
+
+    generated = False
+    if not isinstance(request_id, str) or not request_id:
+        request_id = new_request_id()
+        generated = True
+
+    if trace is None:
+        return Correlation(None, None, None, request_id, generated)
+
+    return Correlation(*trace, request_id, generated)
+
+
+def echo_request_id(context: grpc.ServicerContext) -> Correlation:
+    """Correlate an RPC and echo a generated request ID in trailing metadata.
+
+    Trailing metadata set by the servicer is kept.
+
+    Args:
+        context (grpc.ServicerContext): Servicer context of the RPC.
+
+    Returns:
+        Correlation: Identifiers of the RPC
+    """
+    correlation = correlate(context.invocation_metadata())
+    if correlation.generated:
+        context.set_trailing_metadata(
+            (*(context.trailing_metadata() or ()), (REQUEST_ID, correlation.request_id))
+        )
+
+    return correlation
@@ -0,0 +1,157 @@
+"""Per-RPC CPU time of servicer threads and per-method CPU aggregates."""
+
+import logging
+import threading
+import time
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Iterator
+from typing import Optional
+
+import grpc
+
+from ._context import LogContext
+from ._reporter import WindowReporter
+from .handlers import cpu_us
+from .handlers import requires
+
+
+_logger = logging.getLogger(__name__)
+
+#: CPU nanoseconds of the servicer behavior run by each thread.
+_account = threading.local()
+
+
+def cpu_timed(
+    behavior: Callable[[Any, grpc.ServicerContext], Any], response_streaming: bool
+) -> Callable[[Any, grpc.ServicerContext], Any]:
+    """Wrap an RPC behavior adding its thread CPU time to the thread account.
+
+    The account is reset when the behavior is called. For streamed
+    responses only the resumptions of the servicer generator are timed,
+    not the gRPC work done on the same thread between them, so the account
+    holds the CPU time spent in servicer code when the RPC is logged.
+
+    Args:
+        behavior (Callable[[Any, grpc.ServicerContext], Any]): RPC behavior.
+        response_streaming (bool): Whether the behavior returns an iterator.
+
+    Returns:
+        Callable[[Any, grpc.ServicerContext], Any]: Timed behavior
+    """
+    thread_time_ns = time.thread_time_ns
+
+    def timed(request_or_iterator: Any, context: grpc.ServicerContext) -> Any:
+        started = thread_time_ns()
+        try:
+            return behavior(request_or_iterator, context)
+        finally:
+            _account.ns = thread_time_ns() - started
+
+    def timed_stream(
+        request_or_iterator: Any, context: grpc.ServicerContext
+    ) -> Iterator[Any]:
+        started = thread_time_ns()
+        try:
+            responses = iter(behavior(request_or_iterator, context))
+        finally:
+            _account.ns = thread_time_ns() - started
+        while True:
+            started = thread_time_ns()
+            try:
+                response = next(responses)
+            except StopIteration:
+                return
+            finally:
+                _account.ns += thread_time_ns() - started
+            yield response
+
+    return timed_stream if response_streaming else timed
+
+
+def take_cpu_ns() -> Optional[int]:
+    """Return and clear the CPU account of the current thread.
+
+    Returns:
+        int: CPU nanoseconds, or None if no timed behavior ran
+    """
+    cpu_ns: Optional[int] = getattr(_account, "ns", None)
+    _account.ns = None
+    return cpu_ns
+
+
+class MethodCpu:
+    """CPU totals of a method in the current window."""
+
+    __slots__ = ("count", "total_ns", "max_ns")
+
+    def __init__(self) -> None:
+        """Create empty totals."""
+        #: Timed RPCs.
+        self.count = 0
+        #: Sum of the RPC CPU times in nanoseconds.
+        self.total_ns = 0
+        #: Largest RPC CPU time in nanoseconds.
+        self.max_ns = 0
+
+
+class CpuTracker(WindowReporter[MethodCpu]):
+    """Aggregate the CPU time of RPCs per method.
+
+    The tracker's ``cpu_us`` handler records the RPC and returns the same
+    output as ``handlers.cpu_us``, so it can replace it in a handler list.
+    CPU time is only measured by the synchronous ``AccessLogInterceptor``.
+
+    Each window is logged as one line per method by the
+    ``grpc_accesslog._cpu`` logger.
+    """
+
+    def __init__(
+        self, interval: float = 60.0, logger: Optional[logging.Logger] = None
+    ) -> None:
+        """Create a tracker.
+
+        Args:
+            interval (float): Seconds between emitted windows, 0 to only emit
+                on demand. Defaults to 60.0.
+            logger (logging.Logger): Logger of the emitted windows. Optional,
+                defaults to None (module logger).
+        """
+        super().__init__(interval, logger or _logger, "cpu")
+
+        @requires("cpu")
+        def cpu_us_handler(context: LogContext) -> str:
+            if context.cpu_ns is not None:
+                self.record(context.method_name, context.cpu_ns)
+            return cpu_us(context)
+
+        self.cpu_us = cpu_us_handler
+
+    def record(self, method: str, cpu_ns: int) -> None:
+        """Add the CPU time of an RPC.
+
+        Args:
+            method (str): Full method name.
+            cpu_ns (int): CPU time in nanoseconds.
+        """
+        with self._lock:
+            totals = self._window.get(method)
+            if totals is None:
+                totals = self._window[method] = MethodCpu()
+            totals.count += 1
+            totals.total_ns += cpu_ns
+            if cpu_ns > totals.max_ns:
+                totals.max_ns = cpu_ns
+
+    def _log(self, window: Dict[str, MethodCpu]) -> None:
+        """Log the totals of every method."""
+        for method, totals in sorted(window.items()):
+            self._logger.info(
+                "cpu %s count=%d total_ms=%.3f mean_us=%d max_us=%d",
+                method,
+                totals.count,
+                totals.total_ns / 1e6,
+                totals.total_ns // totals.count // 1000,
+                totals.max_ns // 1000,
+            )
@@ -0,0 +1,392 @@
+"""Deferred access log formatting."""
+
+import logging
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import FrozenSet
+from typing import Generic
+from typing import List
+from typing import Mapping
+from typing import Optional
+from typing import Protocol
+from typing import Sequence
+from typing import Tuple
+from typing import TypeVar
+from typing import Union
+from typing import cast
+
+import grpc
+
+from ._context import Allocation
+from ._context import LogContext
+from ._correlation import Correlation
+
+
+_logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class _Sized:
+    """Stand-in for a message of which only the serialized size was kept."""
+
+    __slots__ = ("_size",)
+
+    def __init__(self, size: int) -> None:
+        self._size = size
+
+    def ByteSize(self) -> int:  # noqa: N802
+        return self._size
+
+
+class _RecordContext:
+    """Stand-in for the servicer context holding captured values only."""
+
+    __slots__ = ("_peer", "_code", "_metadata")
+
+    def __init__(
+        self,
+        peer: Optional[str],
+        code: Optional[grpc.StatusCode],
+        metadata: Tuple[Any, ...],
+    ) -> None:
+        self._peer = peer
+        self._code = code
+        self._metadata = metadata
+
+    def peer(self) -> Optional[str]:
+        return self._peer
+
+    def code(self) -> Optional[grpc.StatusCode]:
+        return self._code
+
+    def invocation_metadata(self) -> Tuple[Any, ...]:
+        return self._metadata
+
+
+class Record:
+    """Snapshot of the RPC values read by the configured handlers.
+
+    Records are captured on the RPC thread and turned back into a
+    ``LogContext`` on the writer thread. Only the fields declared by the
+    handlers are copied, so a record never references the servicer context
+    and only references messages when a handler reads them.
+    """
+
+    __slots__ = (
+        "method_name",
+        "start",
+        "end",
+        "peer",
+        "code",
+        "metadata",
+        "request",
+        "response",
+        "request_count",
+        "response_count",
+        "correlation",
+        "annotations",
+        "cpu_ns",
+        "allocation",
+        "reduced",
+        "detailed",
+        "captured",
+    )
+
+    def __init__(self, method_name: str, start: datetime, end: datetime) -> None:
+        """Create an empty record for an RPC.
+
+        Args:
+            method_name (str): Full RPC method name.
+            start (datetime): RPC start time.
+            end (datetime): RPC end time.
+        """
+        self.method_name = method_name
+        self.start = start
+        self.end = end
+        self.peer: Optional[str] = None
+        self.code: Optional[grpc.StatusCode] = None
+        self.metadata: Tuple[Any, ...] = ()
+        self.request: Any = None
+        self.response: Any = None
+        self.request_count: Optional[int] = None
+        self.response_count: Optional[int] = None
+        self.correlation: Optional[Correlation] = None
+        self.annotations: Optional[Mapping[str, Any]] = None
+        self.cpu_ns: Optional[int] = None
+        self.allocation: Optional[Allocation] = None
+        self.reduced = False
+        self.detailed: Optional[bool] = None
+        self.captured: Optional[Dict[int, Callable[[], str]]] = None
+
+    def log_context(self) -> LogContext:
+        """Rebuild the handler input from the captured values."""
+        return LogContext(
+            _RecordContext(self.peer, self.code, self.metadata),
+            self.method_name,
+            self.request,
+            self.response,
+            self.start,
+            self.end,
+            self.request_count,
+            self.response_count,
+            self.correlation,
+            self.annotations,
+            self.cpu_ns,
+            self.allocation,
+        )
+
+
+def _size(message: Any) -> Any:
+    """Return a size stand-in for a message, if it can be sized."""
+    if hasattr(message, "ByteSize"):
+        return _Sized(message.ByteSize())
+
+    return None
+
+
+class CapturingHandler(Protocol):
+    """Handler doing its own RPC thread work in deferred mode."""
+
+    def __call__(self, context: LogContext) -> str:
+        """Return the handler output for an RPC."""
+
+    def capture(self, context: LogContext) -> Callable[[], str]:
+        """Capture RPC values and return a callable producing the output."""
+
+
+def _hooks(
+    handlers: Sequence[Callable[[LogContext], str]],
+) -> List[Tuple[int, Callable[[LogContext], Callable[[], str]]]]:
+    """Return the capture methods of handlers keyed by handler identity."""
+    return [
+        (id(handler), cast(CapturingHandler, handler).capture)
+        for handler in handlers
+        if hasattr(handler, "capture")
+    ]
+
+
+class Capture:
+    """Copy the values declared by a handler set into a ``Record``.
+
+    Handlers providing a ``capture`` method do their own RPC thread work:
+    ``capture`` is called with the live ``LogContext`` and returns a
+    callable producing the handler output on the writer thread. Detail
+    handler captures only run for RPCs selected for details.
+    """
+
+    def __init__(
+        self,
+        fields: FrozenSet[str],
+        handlers: Sequence[Callable[[LogContext], str]] = (),
+        detail_handlers: Sequence[Callable[[LogContext], str]] = (),
+    ) -> None:
+        """Create a capture for the given handler fields.
+
+        Args:
+            fields (FrozenSet[str]): Union of the handler declared fields.
+            handlers (Sequence[THandler]): Access log handlers. Defaults
+                to ().
+            detail_handlers (Sequence[THandler]): Detail handlers. Defaults
+                to ().
+        """
+        self._hooks = _hooks(handlers)
+        self._detail_hooks = _hooks(detail_handlers)
+        self._peer = "peer" in fields
+        self._status = "status" in fields
+        self._metadata = "metadata" in fields
+        self._request = "request" in fields
+        self._response = "response" in fields
+        self._request_size = "request_size" in fields and not self._request
+        self._response_size = "response_size" in fields and not self._response
+        self._any_message = bool(
+            fields & {"request", "response", "request_size", "response_size"}
+        )
+        self._counts = "counts" in fields
+        self._annotations = "annotations" in fields
+        self._cpu = "cpu" in fields
+        self._allocation = "allocation" in fields
+
+    def __call__(
+        self,
+        context: grpc.ServicerContext,
+        method_name: str,
+        request: Any,
+        response: Any,
+        start: datetime,
+        end: datetime,
+        request_count: Optional[int],
+        response_count: Optional[int],
+        correlation: Optional[Correlation] = None,
+        annotations: Optional[Mapping[str, Any]] = None,
+        cpu_ns: Optional[int] = None,
+        allocation: Optional[Allocation] = None,
+    ) -> Record:
+        """Capture a record on the RPC thread."""
+        record = Record(method_name, start, end)
+        if self._peer:
+            record.peer = context.peer()
+        if self._status:
+            record.code = context.code()
+        if self._metadata:
+            record.metadata = tuple(context.invocation_metadata() or ())
+        if self._any_message:
+            self._messages(record, request, response)
+        if self._counts:
+            record.request_count = request_count
+            record.response_count = response_count
+        record.correlation = correlation
+        if self._annotations:
+            record.annotations = annotations
+        if self._cpu:
+            record.cpu_ns = cpu_ns
+        if self._allocation:
+            record.allocation = allocation
+
+        return record
+
+    def _messages(self, record: Record, request: Any, response: Any) -> None:
+        """Copy the messages, or their sizes, read by the handlers."""
+        if self._request:
+            record.request = request
+        elif self._request_size:
+            record.request = _size(request)
+        if self._response:
+            record.response = response
+        elif self._response_size:
+            record.response = _size(response)
+
+    def run_hooks(self, record: Record, log_context: LogContext) -> None:
+        """Run handler captures for a record on the RPC thread."""
+        if not self._hooks and not (self._detail_hooks and record.detailed):
+            return
+
+        captured = {key: capture(log_context) for key, capture in self._hooks}
+        if record.detailed:
+            for key, capture in self._detail_hooks:
+                captured[key] = capture(log_context)
+
+        record.captured = captured
+
+
+class DeferredWriter(Generic[T]):
+    """Background thread writing captured records.
+
+    At most ``max_pending`` records wait to be written. Records submitted
+    while the queue is full or after ``close`` are dropped and counted in
+    ``dropped``, so a stalled writer never grows memory without bound.
+    """
+
+    def __init__(
+        self,
+        write: Callable[[T], None],
+        name: str,
+        idle: Optional[Callable[[], None]] = None,
+        idle_interval: Optional[float] = None,
+        max_pending: int = 100000,
+    ) -> None:
+        """Start a writer thread.
+
+        Args:
+            write (Callable[[T], None]): Called on the writer thread for
+                each submitted record.
+            name (str): Writer thread name.
+            idle (Callable[[], None]): Called on the writer thread after
+                ``idle_interval`` seconds without records. Optional,
+                defaults to None.
+            idle_interval (float): Seconds without records before calling
+                ``idle``. Optional, defaults to None (never).
+            max_pending (int): Maximum records waiting to be written.
+                Defaults to 100000.
+
+        Raises:
+            ValueError: Invalid queue bound.
+        """
+        if max_pending < 1:
+            raise ValueError("max_pending must be positive")
+
+        self._write = write
+        self._idle = idle
+        self._idle_interval = idle_interval if idle is not None else None
+        self._queue: "queue.Queue[Union[T, threading.Event, None]]" = queue.Queue(
+            max_pending
+        )
+        self._closed = False
+        self._lock = threading.Lock()
+        #: Records dropped by a full queue or submitted after ``close``.
+        self.dropped = 0
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, record: T) -> None:
+        """Queue a record for writing, or drop it if the queue is full."""
+        try:
+            if self._closed:
+                raise queue.Full
+            self._queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+
+    def depth(self) -> int:
+        """Return the approximate number of queued records."""
+        return self._queue.qsize()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until all records submitted so far are written.
+
+        Args:
+            timeout (float): Maximum seconds to wait. Optional, defaults to
+                None (wait forever).
+
+        Returns:
+            bool: Whether the queue was drained before the timeout
+        """
+        if not self._thread.is_alive():
+            return True
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        event = threading.Event()
+        try:
+            self._queue.put(event, timeout=timeout)
+        except queue.Full:
+            return False
+
+        if deadline is not None:
+            timeout = max(deadline - time.monotonic(), 0.0)
+        return event.wait(timeout)
+
+    def close(self) -> None:
+        """Write all queued records and stop the writer thread."""
+        self._closed = True
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+    def _run(self) -> None:
+        while True:
+            try:
+                item = self._queue.get(timeout=self._idle_interval)
+            except queue.Empty:
+                try:
+                    cast(Callable[[], None], self._idle)()
+                except Exception:
+                    _logger.exception("Failed to run the idle deferred writer task")
+                continue
+
+            if item is None:
+                return
+
+            if isinstance(item, threading.Event):
+                item.set()
+                continue
+
+            try:
+                self._write(item)
+            except Exception:
+                _logger.exception("Failed to write deferred access log record")
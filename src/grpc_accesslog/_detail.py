@@ -0,0 +1,142 @@
+"""Latency thresholds selecting RPCs for detailed access logs."""
+
+import math
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Mapping
+from typing import Optional
+
+
+TThreshold = Callable[[str, float], bool]
+
+
+class StaticThreshold:
+    """Fixed latency threshold, optionally overridden per method."""
+
+    def __init__(
+        self,
+        default_ms: Optional[float] = None,
+        methods: Optional[Mapping[str, float]] = None,
+    ) -> None:
+        """Create a static threshold.
+
+        Args:
+            default_ms (float): Threshold in milliseconds for methods without
+                an override. Optional, defaults to None (never reached).
+            methods (Mapping[str, float]): Per-method thresholds in
+                milliseconds keyed by full method name. Optional, defaults
+                to None.
+        """
+        self._default = default_ms
+        self._methods = dict(methods or {})
+
+    def __call__(self, method_name: str, duration_ms: float) -> bool:
+        """Return True when the RPC duration reaches the method threshold.
+
+        A duration equal to the threshold is escalated, so a threshold of 0
+        details every RPC.
+        """
+        threshold = self._methods.get(method_name, self._default)
+        return threshold is not None and duration_ms >= threshold
+
+
+class _Window:
+    """Ring buffer of recent durations for a single method."""
+
+    __slots__ = ("samples", "index", "count", "threshold")
+
+    def __init__(self, size: int) -> None:
+        self.samples: List[float] = [0.0] * size
+        self.index = 0
+        self.count = 0
+        self.threshold = math.inf
+
+
+class AdaptiveThreshold:
+    """Per-method latency threshold derived from a running percentile.
+
+    Each method keeps a ring buffer of its most recent durations. The
+    threshold is recomputed from the buffer every ``update_every`` samples,
+    so the cost per RPC is a list store and a comparison. Updates are not
+    locked; a racing update may drop a sample, which only makes the
+    estimate marginally noisier.
+    """
+
+    def __init__(
+        self,
+        percentile: float = 0.99,
+        window: int = 1000,
+        min_samples: int = 100,
+        update_every: int = 100,
+        floor_ms: float = 0.0,
+    ) -> None:
+        """Create an adaptive threshold.
+
+        Args:
+            percentile (float): Percentile of recent durations, between 0 and
+                1, above which an RPC is considered slow. Defaults to 0.99.
+            window (int): Number of recent durations kept per method.
+                Defaults to 1000.
+            min_samples (int): Samples required before any RPC of a method is
+                considered slow. Defaults to 100.
+            update_every (int): Number of samples between threshold
+                recomputations. Defaults to 100.
+            floor_ms (float): Lower bound for the threshold in milliseconds.
+                Defaults to 0.0.
+
+        Raises:
+            ValueError: Invalid percentile or window size.
+        """
+        if not 0.0 < percentile <= 1.0:
+            raise ValueError("percentile must be in (0, 1]")
+        if window < 1 or update_every < 1:
+            raise ValueError("window and update_every must be positive")
+
+        self._percentile = percentile
+        self._size = window
+        self._min_samples = min(min_samples, window)
+        self._update_every = update_every
+        self._floor = floor_ms
+        self._windows: Dict[str, _Window] = {}
+
+    def threshold(self, method_name: str) -> float:
+        """Return the current threshold of a method in milliseconds.
+
+        Args:
+            method_name (str): Full RPC method name.
+
+        Returns:
+            float: Threshold, or infinity until enough samples were seen.
+        """
+        window = self._windows.get(method_name)
+        if window is None:
+            return math.inf
+
+        return window.threshold
+
+    def __call__(self, method_name: str, duration_ms: float) -> bool:
+        """Record an RPC duration and return True when it reaches the threshold.
+
+        As with ``StaticThreshold``, a duration equal to the threshold is
+        escalated.
+        """
+        window = self._windows.get(method_name)
+        if window is None:
+            window = self._windows.setdefault(method_name, _Window(self._size))
+
+        window.samples[window.index] = duration_ms
+        window.index = (window.index + 1) % self._size
+        window.count += 1
+        if window.count >= self._min_samples and (
+            window.count % self._update_every == 0 or window.threshold == math.inf
+        ):
+            self._update(window)
+
+        return duration_ms >= window.threshold
+
+    def _update(self, window: _Window) -> None:
+        """Recompute the threshold of a window."""
+        samples = sorted(window.samples[: min(window.count, self._size)])
+        rank = min(len(samples) - 1, math.ceil(self._percentile * len(samples)) - 1)
+        window.threshold = max(samples[rank], self._floor)
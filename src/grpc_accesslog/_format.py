@@ -0,0 +1,148 @@
+"""nginx style log format strings compiled into a single handler."""
+
+import re
+from datetime import timedelta
+from typing import Any
+from typing import Dict
+from typing import FrozenSet
+from typing import List
+from typing import Mapping
+from typing import Optional
+from typing import Tuple
+
+from . import handlers
+from .handlers import FIELDS
+from .handlers import THandler
+from .handlers import handler_fields
+from .handlers import requires
+
+
+_VARIABLE = re.compile(r"\$(?:\{(\w+)\}|(\w+)|\$)")
+
+#: Variables rendered by an inline expression of ``context``, with their
+#: declared fields.
+_INLINE: Dict[str, Tuple[str, FrozenSet[str]]] = {
+    "method": ("context.method_name", frozenset()),
+    "time_local": (
+        "context.start.strftime('%d/%b/%Y:%H:%M:%S %z')",
+        frozenset(("time",)),
+    ),
+    "time_iso8601": ("context.start.isoformat()", frozenset(("time",))),
+    "rtt_us": ("str((context.end - context.start) // _US)", frozenset(("time",))),
+    "rtt_ms": (
+        "str(round((context.end - context.start) / _US / 1000))",
+        frozenset(("time",)),
+    ),
+}
+
+#: Variables rendered by built-in handlers.
+VARIABLES: Dict[str, THandler] = {
+    "peer": handlers.peer,
+    "remote_addr": handlers.peer,
+    "status": handlers.status,
+    "request_bytes": handlers.request_size,
+    "response_bytes": handlers.response_size,
+    "http_user_agent": handlers.user_agent,
+    "message_counts": handlers.message_counts,
+    "trace_id": handlers.trace_id,
+    "span_id": handlers.span_id,
+    "trace_sampled": handlers.trace_sampled,
+    "request_id": handlers.request_id,
+    "annotations": handlers.annotations,
+    "cpu_us": handlers.cpu_us,
+    "alloc_bytes": handlers.alloc_bytes,
+    "alloc_peak": handlers.alloc_peak,
+}
+
+
+def _resolve(
+    name: str, variables: Mapping[str, THandler], namespace: Dict[str, Any]
+) -> Optional[Tuple[str, FrozenSet[str]]]:
+    """Return the expression and fields rendering a variable, if known."""
+    if name in _INLINE and name not in variables:
+        return _INLINE[name]
+
+    handler = variables.get(name)
+    if handler is None and name.startswith("http_"):
+        # Other $http_<name> variables render a single metadata value.
+        handler = handlers.metadata_value(name[5:].replace("_", "-"))
+    if handler is None and name.startswith("annotation_"):
+        handler = handlers.annotation(name[11:])
+    if handler is None:
+        return None
+
+    key = f"_h{len(namespace)}"
+    namespace[key] = handler
+    return f"{key}(context)", handler_fields(handler)
+
+
+def _literal(text: str) -> str:
+    """Escape literal text for a double quoted f-string."""
+    escaped = text.encode("unicode_escape").decode("ascii")
+    return escaped.replace('"', '\\"').replace("{", "{{").replace("}", "}}")
+
+
+def compile_format(
+    log_format: str, variables: Optional[Mapping[str, THandler]] = None
+) -> THandler:
+    """Compile an nginx style log format into a single handler.
+
+    ``$name`` and ``${name}`` are replaced by the output of the named
+    variable, ``$$`` by a dollar sign. The format is parsed once into the
+    source of one function building the line with a single f-string:
+    literal text is folded into it, cheap variables are inlined and the
+    others call their built-in handler. The handler declares the union of
+    the variable fields, so it can be used in deferred mode.
+
+    Variables: ``peer``, ``remote_addr``, ``method``, ``status``,
+    ``time_local``, ``time_iso8601``, ``rtt_ms``, ``rtt_us``,
+    ``request_bytes``, ``response_bytes``, ``http_user_agent``,
+    ``http_<key>`` (metadata value, underscores for dashes),
+    ``message_counts``, ``trace_id``, ``span_id``, ``trace_sampled``,
+    ``request_id``, ``annotations``, ``annotation_<key>`` (a field added
+    by ``annotate``), ``cpu_us``, ``alloc_bytes`` and ``alloc_peak``.
+
+    Args:
+        log_format (str): Format string, e.g.
+            ``'$peer [$time_local] "$method" $status $rtt_us'``.
+        variables (Mapping[str, THandler]): Additional or overriding
+            variables. Optional, defaults to None.
+
+    Returns:
+        THandler: LogContext handler rendering the whole line
+
+    Raises:
+        ValueError: Unknown variable.
+    """
+    known = {**VARIABLES, **(variables or {})}
+    namespace: Dict[str, Any] = {"_US": timedelta(microseconds=1)}
+    parts: List[str] = []
+    fields: FrozenSet[str] = frozenset()
+    literal = ""
+    position = 0
+    for match in _VARIABLE.finditer(log_format):
+        literal += log_format[position : match.start()]
+        position = match.end()
+        name = match.group(1) or match.group(2)
+        if name is None:
+            literal += "$"
+            continue
+
+        resolved = _resolve(name, known, namespace)
+        if resolved is None:
+            raise ValueError(f"Unknown log format variable: ${name}")
+
+        expression, declared = resolved
+        parts.append(_literal(literal))
+        parts.append(f"{{{expression}}}")
+        fields |= declared
+        literal = ""
+    parts.append(_literal(literal + log_format[position:]))
+
+    body = "".join(parts)
+    source = 'def render(context):\n    return f"' + body + '"\n'
+    # The source only contains escaped literals and expressions of the
+    # fixed variable tables.
+    exec(compile(source, f"<log_format {log_format!r}>", "exec"), namespace)  # nosec
+    render: THandler = namespace["render"]
+    return requires(*(fields & FIELDS))(render)
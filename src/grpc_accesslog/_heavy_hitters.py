@@ -0,0 +1,279 @@
+"""Bounded memory heavy hitter tracking of peers, methods and user agents."""
+
+import copy
+import heapq
+import logging
+from datetime import timedelta
+from typing import Any
+from typing import Dict
+from typing import Generic
+from typing import Hashable
+from typing import List
+from typing import NamedTuple
+from typing import Optional
+from typing import Tuple
+from typing import TypeVar
+
+import grpc
+
+from ._context import LogContext
+from ._plugins import Plugin
+from ._reporter import WindowReporter
+from .handlers import peer
+from .handlers import user_agent
+
+
+_logger = logging.getLogger(__name__)
+
+K = TypeVar("K", bound=Hashable)
+
+
+class HeavyHitter(NamedTuple):
+    """Estimated totals of a tracked key."""
+
+    #: Tracked key.
+    key: Hashable
+    #: Estimated request count, at most ``overestimate`` above the true count.
+    requests: int
+    #: Upper bound of the count error.
+    overestimate: int
+    #: Errors since the key was last admitted to the summary.
+    errors: int
+    #: Latency in milliseconds since the key was last admitted to the summary.
+    latency_ms: float
+
+
+class _Counter:
+    """Totals of one monitored key."""
+
+    __slots__ = ("count", "overestimate", "errors", "latency_ms")
+
+    def __init__(self, count: int, overestimate: int) -> None:
+        self.count = count
+        self.overestimate = overestimate
+        self.errors = 0
+        self.latency_ms = 0.0
+
+
+class SpaceSaving(Generic[K]):
+    """Space-Saving summary of the most frequent keys in a stream.
+
+    At most ``capacity`` keys are monitored. A new key replaces the key with
+    the lowest count and inherits that count as its overestimate, so every
+    count is at most ``total / capacity`` above the true count and every key
+    seen more than ``total / capacity`` times is monitored. Error counts and
+    latency are only accumulated while a key is monitored, so they are lower
+    bounds.
+
+    The minimum is found through a heap of possibly stale counts, which is
+    corrected on eviction, so adding a key costs O(log capacity).
+    """
+
+    def __init__(self, capacity: int) -> None:
+        """Create an empty summary.
+
+        Args:
+            capacity (int): Maximum number of monitored keys.
+
+        Raises:
+            ValueError: Invalid capacity.
+        """
+        if capacity < 1:
+            raise ValueError("capacity must be positive")
+
+        self.capacity = capacity
+        #: Number of added observations.
+        self.total = 0
+        self._counters: Dict[K, _Counter] = {}
+        self._heap: List[Tuple[int, int, K]] = []
+        self._pushed = 0
+
+    def add(self, key: K, error: bool = False, latency_ms: float = 0.0) -> None:
+        """Count an observation of a key.
+
+        Args:
+            key (K): Observed key.
+            error (bool): Whether the observation was an error. Defaults to
+                False.
+            latency_ms (float): Observed latency in milliseconds. Defaults to
+                0.0.
+        """
+        self.total += 1
+        counter = self._counters.get(key)
+        if counter is not None:
+            counter.count += 1
+        elif len(self._counters) < self.capacity:
+            counter = self._counters[key] = _Counter(1, 0)
+            self._push(1, key)
+        else:
+            minimum = self._pop_minimum()
+            counter = self._counters[key] = _Counter(minimum + 1, minimum)
+            self._push(minimum + 1, key)
+
+        counter.errors += error
+        counter.latency_ms += latency_ms
+
+    def top(self, k: Optional[int] = None) -> List[HeavyHitter]:
+        """Return the monitored keys with the highest counts.
+
+        Args:
+            k (int): Number of keys. Optional, defaults to None (all).
+
+        Returns:
+            List[HeavyHitter]: Keys by descending count
+        """
+        hitters = sorted(
+            (
+                HeavyHitter(
+                    key,
+                    counter.count,
+                    counter.overestimate,
+                    counter.errors,
+                    counter.latency_ms,
+                )
+                for key, counter in self._counters.items()
+            ),
+            key=lambda hitter: hitter.requests,
+            reverse=True,
+        )
+        return hitters if k is None else hitters[:k]
+
+    def _push(self, count: int, key: K) -> None:
+        # The push order breaks ties, so keys are never compared.
+        self._pushed += 1
+        heapq.heappush(self._heap, (count, self._pushed, key))
+
+    def _pop_minimum(self) -> int:
+        """Evict the key with the lowest count and return its count."""
+        while True:
+            count, _, key = heapq.heappop(self._heap)
+            current = self._counters[key].count
+            if current == count:
+                del self._counters[key]
+                return count
+
+            # Counts only grow, so a stale entry is pushed back once.
+            self._push(current, key)
+
+
+class HeavyHitterTracker(WindowReporter[SpaceSaving], Plugin):
+    """Track the top peers, (peer, method) pairs and user agents.
+
+    Each dimension is summarized by a ``SpaceSaving`` summary of
+    ``capacity`` keys, so memory stays fixed however many distinct clients
+    call. The tracker is a ``Plugin`` of the server interceptors, so it
+    records every RPC, whatever the configured handlers, runtime settings
+    or overload mode.
+
+    Every ``interval`` seconds a background thread logs the ``top`` keys of
+    each dimension by the ``grpc_accesslog._heavy_hitters`` logger and
+    starts a new window, so the summaries show who is calling right now.
+    ``snapshot`` returns copies of the current summaries by dimension.
+    """
+
+    #: Tracked dimensions.
+    DIMENSIONS = ("peer", "peer_method", "user_agent")
+
+    fields = frozenset(("time", "peer", "status", "metadata"))
+
+    def __init__(
+        self,
+        capacity: int = 100,
+        top: int = 10,
+        interval: float = 60.0,
+        logger: Optional[logging.Logger] = None,
+    ) -> None:
+        """Create a tracker.
+
+        Args:
+            capacity (int): Keys monitored per dimension. Defaults to 100.
+            top (int): Keys logged per dimension and window. Defaults to 10.
+            interval (float): Seconds between emitted windows, 0 to only emit
+                on demand. Defaults to 60.0.
+            logger (logging.Logger): Logger of the emitted windows. Optional,
+                defaults to None (module logger).
+
+        Raises:
+            ValueError: Invalid capacity.
+        """
+        if capacity < 1:
+            raise ValueError("capacity must be positive")
+
+        self._capacity = capacity
+        self._top = top
+        super().__init__(interval, logger or _logger, "heavy-hitters")
+
+    def _new_window(self) -> Dict[str, SpaceSaving]:
+        return {dimension: SpaceSaving(self._capacity) for dimension in self.DIMENSIONS}
+
+    @staticmethod
+    def _copy(totals: SpaceSaving) -> SpaceSaving:
+        return copy.deepcopy(totals)
+
+    def on_end(self, state: Any, log_context: LogContext) -> None:
+        """Record a finished RPC.
+
+        Args:
+            state (Any): Value returned by ``on_start``.
+            log_context (LogContext): Context of the finished RPC.
+        """
+        self.record(
+            peer(log_context),
+            log_context.method_name,
+            user_agent(log_context),
+            (log_context.server_context.code() or grpc.StatusCode.OK)
+            is not grpc.StatusCode.OK,
+            (log_context.end - log_context.start) / timedelta(milliseconds=1),
+        )
+
+    def record(
+        self, peer: str, method: str, user_agent: str, error: bool, latency_ms: float
+    ) -> None:
+        """Count an RPC.
+
+        Args:
+            peer (str): Client address.
+            method (str): Full method name.
+            user_agent (str): Client user agent.
+            error (bool): Whether the RPC failed.
+            latency_ms (float): RPC latency in milliseconds.
+        """
+        with self._lock:
+            summaries = self._window
+            summaries["peer"].add(peer, error, latency_ms)
+            summaries["peer_method"].add((peer, method), error, latency_ms)
+            summaries["user_agent"].add(user_agent, error, latency_ms)
+
+    def top(self, dimension: str, k: Optional[int] = None) -> List[HeavyHitter]:
+        """Return the current top keys of a dimension.
+
+        Args:
+            dimension (str): One of ``DIMENSIONS``.
+            k (int): Number of keys. Optional, defaults to None (the
+                configured ``top``).
+
+        Returns:
+            List[HeavyHitter]: Keys by descending count
+        """
+        with self._lock:
+            return self._window[dimension].top(self._top if k is None else k)
+
+    def _log(self, window: Dict[str, SpaceSaving]) -> None:
+        """Log the top keys of every dimension."""
+        for dimension, summary in window.items():
+            for rank, hitter in enumerate(summary.top(self._top), 1):
+                key = hitter.key
+                if isinstance(key, tuple):
+                    key = " ".join(key)
+                self._logger.info(
+                    "top %s #%d %s requests=%d (+%d) errors=%d latency_ms=%.1f "
+                    "total=%d",
+                    dimension,
+                    rank,
+                    key,
+                    hitter.requests,
+                    hitter.overestimate,
+                    hitter.errors,
+                    hitter.latency_ms,
+                    summary.total,
+                )
@@ -0,0 +1,44 @@
+"""Module level lazy attribute loading."""
+
+import importlib
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Mapping
+from typing import Tuple
+
+
+def attach(
+    package: str, exports: Mapping[str, str], namespace: Dict[str, Any]
+) -> Tuple[Callable[[str], Any], Callable[[], List[str]]]:
+    """Return module ``__getattr__`` and ``__dir__`` functions of a package.
+
+    Exported names are imported from their module on first access and
+    stored in the package namespace, so later accesses cost nothing.
+
+    Args:
+        package (str): Package name.
+        exports (Mapping[str, str]): Module of every exported name, relative
+            to the package. Submodules map to themselves, e.g. ``.handlers``.
+        namespace (Dict[str, Any]): Package globals.
+
+    Returns:
+        Tuple[Callable[[str], Any], Callable[[], List[str]]]: ``__getattr__``
+            and ``__dir__``
+    """
+
+    def __getattr__(name: str) -> Any:  # noqa: N807
+        module_name = exports.get(name)
+        if module_name is None:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+
+        module = importlib.import_module(module_name, package)
+        value = module if module_name == f".{name}" else getattr(module, name)
+        namespace[name] = value
+        return value
+
+    def __dir__() -> List[str]:  # noqa: N807
+        return sorted({*namespace, *exports})
+
+    return __getattr__, __dir__
@@ -0,0 +1,234 @@
+"""Adaptive overload control degrading access log detail under load."""
+
+import enum
+import logging
+import threading
+import time
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+import grpc
+
+from .handlers import THandler
+from .handlers import request
+from .handlers import rtt_ms
+from .handlers import status
+
+
+_logger = logging.getLogger(__name__)
+
+#: Handlers used in reduced mode unless configured otherwise.
+REDUCED_HANDLERS: List[THandler] = [request, status, rtt_ms]
+
+
+class OverloadMode(enum.IntEnum):
+    """Access log detail levels, from most to least expensive."""
+
+    #: Configured handlers and detail handlers.
+    FULL = 0
+    #: Reduced handler set, no detail handlers.
+    REDUCED = 1
+    #: Reduced handler set for one of every ``sample_every`` RPCs, the rest
+    #: counted per method and status.
+    SAMPLED = 2
+    #: RPCs counted per method and status only.
+    AGGREGATE = 3
+
+
+class OverloadController:
+    """Step access logging down under load and back up as it falls.
+
+    The controller watches three signals over windows of ``interval``
+    seconds: the deferred writer queue depth, the records logged per second
+    and the seconds spent in ``AccessLogger.log`` per second, summed over
+    all threads. Each signal is compared with its limit, ``None`` disabling
+    it. When any signal reaches its limit the mode steps down one level.
+    It only steps back up after ``recover_windows`` consecutive windows
+    with every signal below ``recover_ratio`` times its limit, so the mode
+    does not flap around a limit.
+
+    Windows are closed by the RPC that logs after the window ended, so no
+    thread is needed. Counters are not locked; a racing update may drop a
+    sample. Counts of RPCs not logged in sampled and aggregate mode are
+    returned as one line per method and status at the end of each window,
+    and the access logger writes them like access log lines, on the
+    deferred writer thread and through the coalescer if configured.
+    Every mode change is logged by the ``grpc_accesslog._overload`` logger.
+    """
+
+    def __init__(
+        self,
+        max_queue: Optional[int] = 10000,
+        max_rate: Optional[float] = None,
+        max_busy: Optional[float] = 0.25,
+        recover_ratio: float = 0.5,
+        recover_windows: int = 3,
+        interval: float = 1.0,
+        handlers: Optional[List[THandler]] = None,
+        sample_every: int = 10,
+    ) -> None:
+        """Create an overload controller.
+
+        Args:
+            max_queue (int): Deferred records waiting to be written.
+                Optional, defaults to 10000.
+            max_rate (float): Records per second. Optional, defaults to None
+                (unlimited).
+            max_busy (float): Seconds spent logging per second. Optional,
+                defaults to 0.25.
+            recover_ratio (float): Fraction of every limit the signals must
+                stay below to step back up. Defaults to 0.5.
+            recover_windows (int): Consecutive calm windows required to step
+                back up. Defaults to 3.
+            interval (float): Window length in seconds. Defaults to 1.0.
+            handlers (List[THandler]): Handlers of reduced and sampled mode.
+                Optional, defaults to None (method, status and round trip
+                time).
+            sample_every (int): Log one of this many RPCs in sampled mode.
+                Defaults to 10.
+
+        Raises:
+            ValueError: Invalid recovery ratio, window count, interval or
+                sampling rate.
+        """
+        if not 0.0 < recover_ratio < 1.0:
+            raise ValueError("recover_ratio must be in (0, 1)")
+        if recover_windows < 1 or sample_every < 1:
+            raise ValueError("recover_windows and sample_every must be positive")
+        if interval <= 0:
+            raise ValueError("interval must be positive")
+
+        self._limits = (max_queue, max_rate, max_busy)
+        self._recover_ratio = recover_ratio
+        self._recover_windows = recover_windows
+        self._interval = interval
+        self.handlers = REDUCED_HANDLERS if handlers is None else handlers
+        self._sample_every = sample_every
+        self._mode = OverloadMode.FULL
+        self._calm = 0
+        self._window_start = time.monotonic()
+        self._count = 0
+        self._busy = 0.0
+        self._skipped = 0
+        self._counts: Dict[Tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def mode(self) -> OverloadMode:
+        """Current access log detail level."""
+        return self._mode
+
+    def admit(self) -> bool:
+        """Return whether an RPC is logged as a line in the current mode.
+
+        Returns:
+            bool: False when the RPC should only be counted
+        """
+        mode = self._mode
+        if mode is OverloadMode.AGGREGATE:
+            return False
+
+        if mode is OverloadMode.SAMPLED:
+            self._skipped += 1
+            return self._skipped % self._sample_every == 0
+
+        return True
+
+    def aggregate(self, method_name: str, code: Optional[grpc.StatusCode]) -> None:
+        """Count an RPC which was not logged.
+
+        Args:
+            method_name (str): Full RPC method name.
+            code (grpc.StatusCode): RPC status, None for OK.
+        """
+        key = (method_name, (code or grpc.StatusCode.OK).name)
+        with self._lock:
+            self._counts[key] = self._counts.get(key, 0) + 1
+
+    def observe(self, elapsed: float, queue_depth: int) -> List[List[str]]:
+        """Record the time spent logging an RPC, closing the window when due.
+
+        Args:
+            elapsed (float): Seconds spent in ``AccessLogger.log``.
+            queue_depth (int): Deferred records waiting to be written.
+
+        Returns:
+            List[List[str]]: Aggregate lines to write when a window closed
+        """
+        self._count += 1
+        self._busy += elapsed
+        now = time.monotonic()
+        if now - self._window_start < self._interval:
+            return []
+
+        if not self._lock.acquire(blocking=False):
+            return []
+
+        try:
+            if now - self._window_start < self._interval:
+                return []
+
+            self._evaluate(now, queue_depth)
+            return self._drain()
+        finally:
+            self._lock.release()
+
+    def drain(self) -> List[List[str]]:
+        """Return and reset the aggregate lines of the current window.
+
+        Returns:
+            List[List[str]]: Method, status and count of each aggregate
+        """
+        with self._lock:
+            return self._drain()
+
+    def _drain(self) -> List[List[str]]:
+        """Return and reset the aggregates while holding the lock."""
+        counts = self._counts
+        self._counts = {}
+        return [
+            [method_name, code, f"count={count}"]
+            for (method_name, code), count in counts.items()
+        ]
+
+    def _evaluate(self, now: float, queue_depth: int) -> None:
+        """Close a window and step the mode according to its signals."""
+        elapsed = now - self._window_start
+        signals = (queue_depth, self._count / elapsed, self._busy / elapsed)
+        self._window_start = now
+        self._count = 0
+        self._busy = 0.0
+
+        load = max(
+            (
+                signals[index] / limit
+                for index, limit in enumerate(self._limits)
+                if limit
+            ),
+            default=0.0,
+        )
+        if load >= 1.0:
+            self._calm = 0
+            if self._mode < OverloadMode.AGGREGATE:
+                self._change(OverloadMode(self._mode + 1), signals)
+        elif load < self._recover_ratio:
+            self._calm += 1
+            if self._calm >= self._recover_windows and self._mode > OverloadMode.FULL:
+                self._calm = 0
+                self._change(OverloadMode(self._mode - 1), signals)
+        else:
+            self._calm = 0
+
+    def _change(self, mode: OverloadMode, signals: Tuple[int, float, float]) -> None:
+        """Switch to a new mode and log the change."""
+        _logger.log(
+            logging.WARNING if mode > self._mode else logging.INFO,
+            "Access log mode %s -> %s (queue depth %d, %.0f records/s, "
+            "%.3f s/s logging)",
+            self._mode.name,
+            mode.name,
+            *signals,
+        )
+        self._mode = mode
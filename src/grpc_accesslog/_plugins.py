@@ -0,0 +1,184 @@
+"""RPC observers sharing the access log interceptor wrapper."""
+
+import logging
+from typing import Any
+from typing import AsyncIterator
+from typing import FrozenSet
+from typing import Iterator
+from typing import List
+from typing import Sequence
+from typing import Tuple
+
+import grpc
+
+from ._context import LogContext
+from .handlers import DEFAULT_FIELDS
+
+
+_logger = logging.getLogger(__name__)
+
+
+class Plugin:
+    """Base class of RPC observers called by the server interceptors.
+
+    Plugins let metrics, tracing and similar observers share the access log
+    interceptor instead of stacking interceptors, each wrapping every RPC
+    with its own closures and timing. All plugins of an interceptor share
+    one wrapper, one pair of timestamps and one ``LogContext`` per RPC.
+
+    Hooks are called on the RPC thread, or the event loop for asyncio
+    servers, so they should be cheap. Exceptions raised by a hook are
+    logged by the ``grpc_accesslog._plugins`` logger and never reach the
+    RPC; a plugin whose ``on_start`` failed is skipped for the rest of the
+    RPC. ``on_message`` is only called for
+    plugins overriding it, and streamed messages are only wrapped when a
+    plugin does.
+
+    Like handlers, plugins declare the ``LogContext`` inputs read in
+    ``on_end`` by ``fields`` (see ``handlers.requires``), the inputs of
+    undeclared handlers unless overridden.
+    """
+
+    #: LogContext inputs read by ``on_end``.
+    fields: FrozenSet[str] = DEFAULT_FIELDS
+
+    def on_start(self, method_name: str, context: grpc.ServicerContext) -> Any:
+        """Observe the start of an RPC.
+
+        Args:
+            method_name (str): Full method name.
+            context (grpc.ServicerContext): Servicer context of the RPC.
+
+        Returns:
+            Any: State passed to the other hooks of this RPC
+        """
+        return None
+
+    def on_message(self, state: Any, message: Any, received: bool) -> None:
+        """Observe a request or response message.
+
+        Args:
+            state (Any): Value returned by ``on_start``.
+            message (Any): Request or response message.
+            received (bool): Whether the message is a request.
+        """
+
+    def on_end(self, state: Any, log_context: LogContext) -> None:
+        """Observe the end of an RPC.
+
+        Args:
+            state (Any): Value returned by ``on_start``.
+            log_context (LogContext): Context passed to the access log
+                handlers.
+        """
+
+
+#: Plugins paired with the state their ``on_start`` returned.
+TStarted = List[Tuple[Plugin, Any]]
+
+#: State of a plugin whose ``on_start`` raised.
+_FAILED = object()
+
+
+def start_plugins(
+    plugins: Sequence[Plugin], method_name: str, context: grpc.ServicerContext
+) -> TStarted:
+    """Call the ``on_start`` hook of every plugin."""
+    started = []
+    for plugin in plugins:
+        try:
+            state = plugin.on_start(method_name, context)
+        except Exception:
+            _logger.exception("Plugin %r failed to start %s", plugin, method_name)
+            state = _FAILED
+        started.append((plugin, state))
+    return started
+
+
+def end_plugins(started: TStarted, log_context: LogContext) -> None:
+    """Call the ``on_end`` hook of every started plugin."""
+    for plugin, state in started:
+        if state is _FAILED:
+            continue
+        try:
+            plugin.on_end(state, log_context)
+        except Exception:
+            _logger.exception(
+                "Plugin %r failed to end %s", plugin, log_context.method_name
+            )
+
+
+def message_observers(plugins: Sequence[Plugin]) -> List[int]:
+    """Return the indexes of the plugins overriding ``on_message``."""
+    return [
+        index
+        for index, plugin in enumerate(plugins)
+        if type(plugin).on_message is not Plugin.on_message
+    ]
+
+
+def notify(started: TStarted, message: Any, received: bool) -> None:
+    """Pass a message to the ``on_message`` hook of every plugin."""
+    for plugin, state in started:
+        if state is _FAILED:
+            continue
+        try:
+            plugin.on_message(state, message, received)
+        except Exception:
+            _logger.exception("Plugin %r failed to observe a message", plugin)
+
+
+class ObservingIterator:
+    """Request iterator wrapper counting messages and passing them to plugins."""
+
+    __slots__ = ("_iterator", "_started", "count")
+
+    def __init__(self, iterator: Iterator[Any], started: TStarted) -> None:
+        """Wrap a request iterator.
+
+        Args:
+            iterator (Iterator[Any]): Request iterator.
+            started (TStarted): Plugins passed each request.
+        """
+        self._iterator = iterator
+        self._started = started
+        self.count = 0
+
+    def __iter__(self) -> "ObservingIterator":
+        """Return the iterator."""
+        return self
+
+    def __next__(self) -> Any:
+        """Return the next request."""
+        item = next(self._iterator)
+        self.count += 1
+        notify(self._started, item, True)
+        return item
+
+
+class AsyncObservingIterator:
+    """Async request iterator wrapper counting and observing messages."""
+
+    __slots__ = ("_iterator", "_started", "count")
+
+    def __init__(self, iterator: AsyncIterator[Any], started: TStarted) -> None:
+        """Wrap a request iterator.
+
+        Args:
+            iterator (AsyncIterator[Any]): Request iterator.
+            started (TStarted): Plugins passed each request.
+        """
+        self._iterator = iterator
+        self._started = started
+        self.count = 0
+
+    def __aiter__(self) -> "AsyncObservingIterator":
+        """Return the iterator."""
+        return self
+
+    async def __anext__(self) -> Any:
+        """Return the next request."""
+        item = await self._iterator.__anext__()
+        self.count += 1
+        notify(self._started, item, True)
+        return item
@@ -0,0 +1,89 @@
+"""Base of trackers logging windows of totals from a background thread."""
+
+import abc
+import copy
+import logging
+import threading
+from typing import Dict
+from typing import Generic
+from typing import Optional
+from typing import TypeVar
+
+
+T = TypeVar("T")
+
+
+class WindowReporter(abc.ABC, Generic[T]):
+    """Totals of the current window, logged and reset periodically.
+
+    Subclasses update ``_window`` while holding ``_lock``. Every
+    ``interval`` seconds a background thread logs the window and starts a
+    new one; ``close`` stops the thread and logs the last window.
+    """
+
+    def __init__(
+        self, interval: float, logger: logging.Logger, thread_name: str
+    ) -> None:
+        """Create a reporter and start its thread.
+
+        Args:
+            interval (float): Seconds between emitted windows, 0 to only emit
+                on demand.
+            logger (logging.Logger): Logger of the emitted windows.
+            thread_name (str): Name of the background thread.
+        """
+        self._logger = logger
+        self._lock = threading.Lock()
+        self._window = self._new_window()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        if interval > 0:
+            self._thread = threading.Thread(
+                target=self._run,
+                args=(interval,),
+                name=thread_name,
+                daemon=True,
+            )
+            self._thread.start()
+
+    def _new_window(self) -> Dict[str, T]:
+        """Return the totals of an empty window."""
+        return {}
+
+    @staticmethod
+    def _copy(totals: T) -> T:
+        """Return an independent copy of totals."""
+        return copy.copy(totals)
+
+    @abc.abstractmethod
+    def _log(self, window: Dict[str, T]) -> None:
+        """Log the totals of an ended window."""
+
+    def snapshot(self) -> Dict[str, T]:
+        """Return copies of the totals of the current window.
+
+        Returns:
+            Dict[str, T]: Totals by key
+        """
+        with self._lock:
+            return {key: self._copy(totals) for key, totals in self._window.items()}
+
+    def emit(self) -> None:
+        """Log the totals of the current window and start a new window."""
+        with self._lock:
+            window = self._window
+            self._window = self._new_window()
+
+        self._log(window)
+
+    def close(self) -> None:
+        """Stop the background thread and emit the last window."""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.emit()
+
+    def _run(self, interval: float) -> None:
+        while not self._stopped.wait(interval):
+            self.emit()
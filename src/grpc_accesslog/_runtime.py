@@ -0,0 +1,269 @@
+"""Per-method access log settings switchable at runtime."""
+
+import json
+import logging
+import os
+import signal
+import threading
+import types
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import FrozenSet
+from typing import List
+from typing import Mapping
+from typing import NamedTuple
+from typing import Optional
+
+import grpc
+
+from ._context import LogContext
+from ._format import compile_format
+from .handlers import THandler
+from .handlers import handler_fields
+from .handlers import requires
+
+
+_logger = logging.getLogger(__name__)
+
+TFilter = Callable[[LogContext], bool]
+
+
+class MethodSettings(NamedTuple):
+    """Access log settings of a single method."""
+
+    #: Handlers replacing the configured ones, None to keep them.
+    handlers: Optional[List[THandler]] = None
+    #: Log one of every ``sample_every`` RPCs, 0 to log none.
+    sample_every: int = 1
+    #: Only log RPCs for which the filter returns True.
+    filter: Optional[TFilter] = None
+
+    def fields(self) -> FrozenSet[str]:
+        """Return the LogContext inputs read by the handlers and the filter.
+
+        Returns:
+            FrozenSet[str]: Declared fields
+        """
+        return frozenset().union(
+            *(handler_fields(handler) for handler in self.handlers or ()),
+            handler_fields(self.filter) if self.filter is not None else (),
+        )
+
+
+def status_filter(codes: List[str]) -> TFilter:
+    """Return a filter accepting RPCs finishing with one of the status codes.
+
+    Args:
+        codes (List[str]): Status code names, e.g. ``["INTERNAL"]``.
+
+    Returns:
+        TFilter: LogContext filter
+    """
+    accepted = frozenset(grpc.StatusCode[code] for code in codes)
+
+    @requires("status")
+    def inner(context: LogContext) -> bool:
+        return (context.server_context.code() or grpc.StatusCode.OK) in accepted
+
+    return inner
+
+
+def parse_settings(data: Mapping[str, Any]) -> Dict[str, MethodSettings]:
+    """Build method settings from decoded JSON.
+
+    Each method maps to an object with the optional keys ``log_format``
+    (see ``compile_format``), ``sample_every`` and ``status``, a list of
+    status code names to log.
+
+    Args:
+        data (Mapping[str, Any]): Settings keyed by full method name.
+
+    Returns:
+        Dict[str, MethodSettings]: Settings keyed by full method name
+
+    Raises:
+        ValueError: Invalid settings.
+    """
+    methods = {}
+    for method_name, options in data.items():
+        unknown = set(options) - {"log_format", "sample_every", "status"}
+        if unknown:
+            raise ValueError(f"Unknown settings of {method_name}: {sorted(unknown)}")
+        try:
+            methods[method_name] = MethodSettings(
+                (
+                    [compile_format(options["log_format"])]
+                    if "log_format" in options
+                    else None
+                ),
+                int(options.get("sample_every", 1)),
+                status_filter(options["status"]) if "status" in options else None,
+            )
+        except KeyError as error:
+            raise ValueError(
+                f"Unknown status code of {method_name}: {error}"
+            ) from error
+    return methods
+
+
+class RuntimeConfig:
+    """Per-method access log settings replaced atomically at runtime.
+
+    The settings are an immutable mapping swapped as a whole by ``update``
+    and ``replace``, followed by an increment of ``version``. Loggers read
+    the mapping without locking and cache what they derive from it, such
+    as the RPC inputs to capture and the sampling counters, until the
+    version changes.
+
+    ``watch`` reloads the settings from a JSON file (see ``parse_settings``)
+    when it changes, or at once on a signal. Removing the file clears them.
+    """
+
+    def __init__(self, methods: Optional[Mapping[str, MethodSettings]] = None) -> None:
+        """Create a runtime configuration.
+
+        Args:
+            methods (Mapping[str, MethodSettings]): Initial settings keyed by
+                full method name. Optional, defaults to None.
+        """
+        #: Current settings keyed by full method name.
+        self.methods: Mapping[str, MethodSettings] = types.MappingProxyType(
+            dict(methods or {})
+        )
+        #: Incremented by every change of ``methods``.
+        self.version = 0
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._signal: Optional[int] = None
+        self._previous_handler: Any = None
+
+    def update(self, methods: Mapping[str, Optional[MethodSettings]]) -> None:
+        """Change the settings of some methods.
+
+        Args:
+            methods (Mapping[str, Optional[MethodSettings]]): Settings keyed
+                by full method name, None to remove a method.
+        """
+        with self._lock:
+            merged = dict(self.methods)
+            for method_name, settings in methods.items():
+                if settings is None:
+                    merged.pop(method_name, None)
+                else:
+                    merged[method_name] = settings
+            self._swap(merged)
+
+    def replace(self, methods: Mapping[str, MethodSettings]) -> None:
+        """Replace the settings of all methods.
+
+        Args:
+            methods (Mapping[str, MethodSettings]): Settings keyed by full
+                method name.
+        """
+        with self._lock:
+            self._swap(dict(methods))
+
+    def _swap(self, methods: Dict[str, MethodSettings]) -> None:
+        """Publish new settings while holding the lock."""
+        self.methods = types.MappingProxyType(methods)
+        self.version += 1
+
+    def load(self, path: str) -> None:
+        """Replace the settings with those of a JSON file.
+
+        A missing file clears the settings.
+
+        Args:
+            path (str): JSON file path.
+        """
+        try:
+            with open(path) as file:
+                data = json.load(file)
+        except FileNotFoundError:
+            data = {}
+        self.replace(parse_settings(data))
+
+    def fields(self) -> FrozenSet[str]:
+        """Return the LogContext inputs read by any method settings.
+
+        Returns:
+            FrozenSet[str]: Declared fields
+        """
+        return frozenset().union(
+            *(settings.fields() for settings in self.methods.values())
+        )
+
+    def watch(
+        self, path: str, interval: float = 1.0, signum: Optional[int] = None
+    ) -> None:
+        """Load a JSON file now and whenever it changes.
+
+        The file is checked every ``interval`` seconds by a background
+        thread. With a signal number, e.g. ``signal.SIGHUP``, the signal
+        reloads the file at once; the handler must be installed from the
+        main thread.
+
+        Args:
+            path (str): JSON file path.
+            interval (float): Seconds between checks. Defaults to 1.0.
+            signum (int): Signal reloading the file. Optional, defaults to
+                None.
+
+        Raises:
+            RuntimeError: Already watching a file.
+        """
+        if self._thread is not None:
+            raise RuntimeError("Already watching a file")
+
+        if signum is not None:
+            self._previous_handler = signal.signal(
+                signum, lambda signum, frame: self._wake.set()
+            )
+            self._signal = signum
+        self._stopped.clear()
+        self._thread = threading.Thread(
+            target=self._run,
+            args=(path, interval),
+            name="runtime-config",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def close(self) -> None:
+        """Stop watching and restore the previous signal handler."""
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._signal is not None:
+            signal.signal(self._signal, self._previous_handler)
+            self._signal = None
+
+    def _reload(self, path: str, loaded: Optional[int]) -> Optional[int]:
+        """Load the file if it changed since ``loaded``, returning its mtime."""
+        try:
+            modified: Optional[int] = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            modified = None
+        if modified == loaded and not self._wake.is_set():
+            return loaded
+
+        self._wake.clear()
+        try:
+            self.load(path)
+        except Exception:
+            _logger.exception("Loading access log settings from %s failed", path)
+        return modified
+
+    def _run(self, path: str, interval: float) -> None:
+        # Force the first load, the file may be missing.
+        loaded = self._reload(path, -1)
+        while True:
+            self._wake.wait(interval)
+            if self._stopped.is_set():
+                return
+            loaded = self._reload(path, loaded)
@@ -1,25 +1,97 @@
 """gRPC access log server interceptor."""
 
 import logging
+import threading
+import time
 from datetime import datetime
+from datetime import timedelta
 from datetime import timezone
+from functools import partial
+from typing import TYPE_CHECKING
 from typing import Any
 from typing import Callable
+from typing import Collection
+from typing import Dict
+from typing import FrozenSet
+from typing import Iterator
 from typing import List
+from typing import Mapping
+from typing import NamedTuple
 from typing import Optional
+from typing import Sequence
+from typing import Tuple
 from typing import TypeVar
 from typing import Union
 
 import grpc
 
+from ._annotations import take_annotations
+from ._context import Allocation
 from ._context import LogContext
+from ._correlation import correlate
+from ._correlation import echo_request_id
+from ._deferred import Capture
+from ._deferred import DeferredWriter
+from ._deferred import Record
+from ._detail import StaticThreshold
+from ._detail import TThreshold
+from ._format import compile_format
+from ._overload import OverloadController
+from ._overload import OverloadMode
+from ._plugins import ObservingIterator
+from ._plugins import Plugin
+from ._plugins import TStarted
+from ._plugins import end_plugins
+from ._plugins import message_observers
+from ._plugins import notify
+from ._plugins import start_plugins
 from .handlers import DEFAULT_HANDLERS
 from .handlers import THandler
+from .handlers import handler_fields
+from .sinks._base import Sink
 
 
+if TYPE_CHECKING:  # pragma: no cover
+    from ._allocations import AllocationSampler
+    from ._coalesce import Coalescer
+    from ._runtime import MethodSettings
+    from ._runtime import RuntimeConfig
+
 TRequest = TypeVar("TRequest")
 TResponse = TypeVar("TResponse")
 
+#: Start and end time of RPCs when no handler reads them.
+_UNTIMED = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def _now() -> datetime:
+    """Return the current UTC time."""
+    return datetime.now(timezone.utc)
+
+
+def _untimed() -> datetime:
+    """Return the placeholder time of untimed RPCs."""
+    return _UNTIMED
+
+
+class _Inputs(NamedTuple):
+    """RPC inputs the interceptor wrappers capture for the handlers."""
+
+    #: Returns RPC start and end times.
+    clock: Callable[[], datetime]
+    #: Whether the request or request iterator is passed to the handlers.
+    request: bool
+    #: Whether the unary response is passed to the handlers.
+    response: bool
+    #: Whether streamed messages are counted.
+    counts: bool
+    #: Takes the CPU time of the servicer thread, None when not measured.
+    cpu: Optional[Callable[[], Optional[int]]] = None
+    #: Takes the traced allocation, None when RPCs are not sampled.
+    alloc: Optional[Callable[[], Optional[Allocation]]] = None
+    #: Whether the correlation identifiers are parsed once per record.
+    correlation: bool = False
+
 
 def _wrap_rpc_behavior(
     handler: Union[grpc.RpcMethodHandler, None],
@@ -63,9 +135,35 @@ def _wrap_rpc_behavior(
     )
 
 
+class _CountingIterator:
+    """Request iterator wrapper counting the messages read."""
+
+    __slots__ = ("_iterator", "count")
+
+    def __init__(self, iterator: Iterator[Any]) -> None:
+        self._iterator = iterator
+        self.count = 0
+
+    def __iter__(self) -> "_CountingIterator":
+        return self
+
+    def __next__(self) -> Any:
+        item = next(self._iterator)
+        self.count += 1
+        return item
+
+
 class AccessLogger:
     """Access log writer."""
 
+    #: Whether records include the fields of ``annotate``, which only server
+    #: interceptors collect.
+    _annotated = False
+    #: Whether each RPC runs on its own thread, so that its CPU time and
+    #: allocations can be measured, which only the synchronous server
+    #: interceptor does.
+    _per_thread = False
+
     def __init__(
         self,
         level: int = logging.INFO,
@@ -74,12 +172,66 @@ class AccessLogger:
         separator: str = " ",
         propagate: bool = False,
         logger: Optional[logging.Logger] = None,
+        detail_handlers: Optional[List[THandler]] = None,
+        detail_threshold: Union[float, Mapping[str, float], TThreshold, None] = None,
+        detail_status: Collection[grpc.StatusCode] = (),
+        deferred: bool = False,
+        echo_request_id: bool = False,
+        sink: Optional[Sink] = None,
+        overload: Optional[OverloadController] = None,
+        log_format: Optional[str] = None,
+        plugins: Sequence[Plugin] = (),
+        coalesce: "Optional[Coalescer]" = None,
+        config: "Optional[RuntimeConfig]" = None,
+        allocations: "Optional[AllocationSampler]" = None,
     ) -> None:
         """Create an access logging writer.
 
         Each provided handler will be called in order with a LogContext as
         the single positional argument. The resulting strings are joined
-        using the provided separator to form the access log message.
+        using the provided separator to form the access log message. A log
+        format string (see ``compile_format``) replaces the handlers with a
+        single compiled handler.
+
+        Detail handlers are only called for RPCs at least as slow as the detail
+        threshold or finishing with a status in the detail status set. Their
+        output is appended to the access log message.
+
+        The interceptors only capture the inputs declared by the configured
+        handlers (see ``handlers.requires``): timestamps, the request and the
+        unary response are only kept when a handler reads them, and streamed
+        messages are only counted when a handler reads the counts.
+
+        In deferred mode the RPC thread only copies the values declared by
+        the handlers (see ``handlers.requires``) and all handlers are called
+        on a background writer thread. Use ``flush`` and ``close`` to wait for
+        queued records.
+
+        With an overload controller the logger degrades to the controller
+        handlers, sampling and aggregate counts while the controller
+        detects overload. Aggregate lines take the same path as access log
+        lines: the writer thread in deferred mode, then the coalescer.
+
+        Plugins observe every RPC through the same interceptor wrapper, see
+        ``Plugin``. They are called for every RPC, also while overload
+        control samples or aggregates the access log.
+
+        With a coalescer, lines identical except for their timestamps are
+        written once per window followed by a repeat count, see
+        ``Coalescer``. A background thread closes ended windows every
+        window length, so summaries are written also when no further line
+        follows.
+
+        A runtime configuration overrides the handlers, sampling and
+        filtering of single methods while the server runs, see
+        ``RuntimeConfig``. Methods with overridden handlers are formatted
+        on the RPC thread also in deferred mode, and bypass overload
+        control. Without a configuration the cost is a single check per
+        RPC.
+
+        With an allocation sampler the synchronous server interceptor
+        traces the memory allocations of sampled RPCs, see
+        ``AllocationSampler``.
 
         Args:
             level (int): Log level. Defaults to logging.INFO.
@@ -90,6 +242,35 @@ class AccessLogger:
             propagate (bool): Enable propagation to parent loggers. Defaults to False.
             logger (logging.Logger): The logger instance to use for access
                 logs. Optional, defaults to None.
+            detail_handlers (List[THandler]): LogContext handlers appended
+                for slow or failed RPCs. Optional, defaults to None.
+            detail_threshold (Union[float, Mapping[str, float], TThreshold]):
+                Duration in milliseconds, per-method durations or a callable
+                accepting the method name and duration in milliseconds and
+                returning whether the RPC is slow. Optional, defaults to None.
+            detail_status (Collection[grpc.StatusCode]): Status codes always
+                logged with details. Defaults to ().
+            deferred (bool): Call handlers on a background thread. Defaults to
+                False.
+            echo_request_id (bool): Generate a request ID for RPCs without
+                ``x-request-id`` metadata and send it back in the trailing
+                metadata. Server interceptors only. Defaults to False.
+            sink (Sink): Write the access log lines to this sink instead of
+                the logger. Optional, defaults to None.
+            overload (OverloadController): Controller degrading the access
+                log detail under load. Optional, defaults to None.
+            log_format (str): nginx style log format replacing the handlers,
+                e.g. ``'$peer "$method" $status $rtt_ms'``. Optional,
+                defaults to None.
+            plugins (Sequence[Plugin]): RPC observers sharing the interceptor
+                wrapper. Server interceptors only. Defaults to ().
+            coalesce (Coalescer): Coalescer of repeated lines. Optional,
+                defaults to None.
+            config (RuntimeConfig): Per-method settings switchable at
+                runtime. Optional, defaults to None.
+            allocations (AllocationSampler): Sampler tracing the allocations
+                of RPCs. Synchronous server interceptor only. Optional,
+                defaults to None.
         """
         if logger is None:
             self._logger = logging.getLogger(name)
@@ -98,9 +279,159 @@ class AccessLogger:
         else:
             self._logger = logger
 
+        if isinstance(detail_threshold, (int, float)):
+            detail_threshold = StaticThreshold(detail_threshold)
+        elif isinstance(detail_threshold, Mapping):
+            detail_threshold = StaticThreshold(methods=detail_threshold)
+
+        if log_format is not None:
+            handlers = [compile_format(log_format)]
+
         self._level = level
         self._handlers = handlers
         self._separator = separator
+        self._detail_handlers = detail_handlers or []
+        self._detail_threshold: Optional[TThreshold] = detail_threshold
+        self._detail_status = frozenset(detail_status)
+        self._echo_request_id = echo_request_id
+        self._sink = sink
+        self._overload = overload
+        self._coalesce = coalesce
+        self._config = config
+        self._config_version = -1 if config is None else config.version
+        self._samples: Dict[str, int] = {}
+        self._allocations = allocations
+        self._plugins = list(plugins)
+        self._reduced_handlers = self._handlers
+        if overload is not None:
+            self._reduced_handlers = overload.handlers
+        self._inputs = self._required_inputs()
+        self._capture: Optional[Capture] = None
+        self._writer: Optional[DeferredWriter[Union[Record, Callable[[], None]]]] = None
+        if deferred:
+            self._capture = Capture(
+                self._captured_fields(),
+                self._all_handlers(),
+                self._detail_handlers,
+            )
+            self._writer = DeferredWriter(self._write_record, f"{name}-writer")
+        self._stopped = threading.Event()
+        self._expirer: Optional[threading.Thread] = None
+        if coalesce is not None:
+            self._expirer = threading.Thread(
+                target=self._expire_windows,
+                args=(coalesce,),
+                name=f"{name}-coalescer",
+                daemon=True,
+            )
+            self._expirer.start()
+
+    def _all_handlers(self) -> List[THandler]:
+        """Return the full and reduced handlers without duplicates."""
+        if self._overload is None:
+            return list(self._handlers)
+
+        return [*self._handlers] + [
+            handler
+            for handler in self._reduced_handlers
+            if not any(handler is other for other in self._handlers)
+        ]
+
+    def _required_inputs(self) -> _Inputs:
+        """Return the RPC inputs read by any configured handler."""
+        fields = frozenset().union(
+            *(
+                handler_fields(handler)
+                for handler in (*self._all_handlers(), *self._detail_handlers)
+            ),
+            *(plugin.fields for plugin in self._plugins),
+            self._config.fields() if self._config is not None else (),
+        )
+        timed = "time" in fields or self._detail_threshold is not None
+        # Measurements are imported only when enabled, e.g. tracemalloc.
+        cpu: Optional[Callable[[], Optional[int]]] = None
+        if "cpu" in fields and self._per_thread:
+            from ._cpu import take_cpu_ns
+
+            cpu = take_cpu_ns
+        alloc: Optional[Callable[[], Optional[Allocation]]] = None
+        if self._allocations is not None and self._per_thread:
+            from ._allocations import take_allocation
+
+            alloc = take_allocation
+        return _Inputs(
+            _now if timed else _untimed,
+            bool(fields & {"request", "request_size"}),
+            bool(fields & {"response", "response_size"}),
+            "counts" in fields,
+            cpu,
+            alloc,
+            "correlation" in fields,
+        )
+
+    def _captured_fields(self) -> FrozenSet[str]:
+        """Return the LogContext inputs read by the configured handlers."""
+        fields = frozenset().union(
+            *(
+                handler_fields(handler)
+                for handler in (*self._all_handlers(), *self._detail_handlers)
+                if not hasattr(handler, "capture")
+            )
+        )
+        if self._detail_status:
+            fields |= {"status"}
+
+        return fields
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until deferred records submitted so far are written.
+
+        Args:
+            timeout (float): Maximum seconds to wait. Optional, defaults to
+                None (wait forever).
+
+        Returns:
+            bool: Whether all records were written before the timeout
+        """
+        if self._writer is None:
+            return True
+
+        return self._writer.flush(timeout)
+
+    @property
+    def dropped(self) -> int:
+        """Deferred records dropped by a full writer queue."""
+        if self._writer is None:
+            return 0
+
+        return self._writer.dropped
+
+    def close(self) -> None:
+        """Write queued deferred records and stop the background threads."""
+        self._stopped.set()
+        if self._expirer is not None:
+            self._expirer.join()
+            self._expirer = None
+        if self._writer is not None:
+            self._writer.close()
+        if self._overload is not None:
+            self._write_lines(self._overload.drain())
+        if self._coalesce is not None:
+            for log_args in self._coalesce.drain():
+                self._write(log_args)
+
+    def _is_detailed(self, log_context: LogContext) -> bool:
+        """Return whether detail handlers apply to an RPC."""
+        detailed = False
+        if self._detail_threshold is not None:
+            duration = (log_context.end - log_context.start) / timedelta(milliseconds=1)
+            detailed = self._detail_threshold(log_context.method_name, duration)
+
+        if self._detail_status and not detailed:
+            code = log_context.server_context.code() or grpc.StatusCode.OK
+            detailed = code in self._detail_status
+
+        return detailed
 
     def log(
         self,
@@ -110,21 +441,262 @@ class AccessLogger:
         response: Optional[Any],
         start: datetime,
         end: datetime,
+        request_count: Optional[int] = None,
+        response_count: Optional[int] = None,
     ) -> None:
         """Write a log line to stdout."""
-        log_context = LogContext(
-            context,
-            method_name,
-            request,
-            response,
-            start,
-            end,
+        self._log_rpc(
+            LogContext(
+                context,
+                method_name,
+                request,
+                response,
+                start,
+                end,
+                request_count,
+                response_count,
+                None,
+                take_annotations() if self._annotated else None,
+                self._inputs.cpu() if self._inputs.cpu else None,
+                self._inputs.alloc() if self._inputs.alloc else None,
+            )
+        )
+
+    def _reconfigure(self, config: "RuntimeConfig") -> None:
+        """Adopt a changed runtime configuration."""
+        self._config_version = config.version
+        self._inputs = self._required_inputs()
+        self._samples = {}
+
+    def _log_rpc(self, log_context: LogContext) -> None:
+        """Log an RPC, degrading the detail while overloaded."""
+        if self._echo_request_id:
+            # The echoed ID is a response header, sent whether or not the
+            # RPC is logged.
+            log_context = self._correlated(log_context)
+
+        if self._config is not None:
+            settings = self._config.methods.get(log_context.method_name)
+            if settings is not None:
+                self._log_configured(settings, log_context)
+                return
+
+        overload = self._overload
+        if overload is None:
+            self._log(log_context, False)
+            return
+
+        started = time.perf_counter()
+        if overload.admit():
+            self._log(log_context, overload.mode >= OverloadMode.REDUCED)
+        else:
+            overload.aggregate(
+                log_context.method_name, log_context.server_context.code()
+            )
+
+        aggregates = overload.observe(
+            time.perf_counter() - started,
+            0 if self._writer is None else self._writer.depth(),
         )
+        if aggregates:
+            self._on_writer(partial(self._write_lines, aggregates))
 
-        if not self._handlers:
+    def _log_configured(
+        self, settings: "MethodSettings", log_context: LogContext
+    ) -> None:
+        """Log an RPC of a method with runtime settings."""
+        if settings.filter is not None and not settings.filter(log_context):
             return
 
-        log_args = [handler(log_context) for handler in self._handlers]
+        if settings.sample_every != 1:
+            if settings.sample_every <= 0:
+                return
+            seen = self._samples.get(log_context.method_name, 0)
+            self._samples[log_context.method_name] = seen + 1
+            if seen % settings.sample_every:
+                return
+
+        if settings.handlers is None:
+            self._log(log_context, False)
+        else:
+            self._log(log_context, False, settings.handlers)
+
+    def _plugin_start(
+        self,
+        method_name: str,
+        request_streaming: bool,
+        iterator: Callable[[Any, TStarted], Any],
+    ) -> Callable[[Any, grpc.ServicerContext], Tuple[TStarted, TStarted, Any]]:
+        """Return a function starting the plugins of an RPC.
+
+        The function returns the started plugins, those of them observing
+        messages and the requests passed to the RPC behavior, a request
+        iterator wrapped to count or observe the requests if needed.
+        """
+        plugins = self._plugins
+        observers = message_observers(plugins)
+        everyone = len(observers) == len(plugins)
+        wrap_requests = request_streaming and (self._inputs.counts or bool(observers))
+
+        def begin(
+            request_or_iterator: Any, context: grpc.ServicerContext
+        ) -> Tuple[TStarted, TStarted, Any]:
+            started = start_plugins(plugins, method_name, context)
+            observed = started if everyone else [started[i] for i in observers]
+            if wrap_requests:
+                return started, observed, iterator(request_or_iterator, observed)
+            if observed and not request_streaming:
+                notify(observed, request_or_iterator, True)
+            return started, observed, request_or_iterator
+
+        return begin
+
+    def _finish(self, started: TStarted, log_context: LogContext) -> None:
+        """Pass a finished RPC to the plugins and log it."""
+        log_context = self._correlated(log_context)
+        end_plugins(started, log_context)
+        self._log_rpc(log_context)
+
+    def _log(
+        self,
+        log_context: LogContext,
+        reduced: bool,
+        handlers: Optional[List[THandler]] = None,
+    ) -> None:
+        """Write or queue the access log line of an RPC."""
+        if handlers is not None:
+            self._emit(log_context, handlers=handlers)
+            return
+
+        if self._writer is not None and self._capture is not None:
+            if self._handlers:
+                self._submit(self._capture, self._writer, reduced, log_context)
+            return
+
+        self._emit(log_context, reduced=reduced)
+
+    def _submit(
+        self,
+        capture: Capture,
+        writer: DeferredWriter[Union[Record, Callable[[], None]]],
+        reduced: bool,
+        log_context: LogContext,
+    ) -> None:
+        """Capture a deferred record on the RPC thread and queue it."""
+        record = capture(*log_context)
+        record.reduced = reduced
+        if self._detail_handlers and not reduced:
+            record.detailed = self._is_detailed(log_context)
+
+        capture.run_hooks(record, log_context)
+        writer.submit(record)
+
+    def _write_record(self, record: Union[Record, Callable[[], None]]) -> None:
+        """Write a deferred record, or run a queued task, on the writer thread."""
+        if not isinstance(record, Record):
+            record()
+            return
+
+        self._emit(
+            record.log_context(), record.detailed, record.captured, record.reduced
+        )
+
+    def _on_writer(self, task: Callable[[], None]) -> None:
+        """Run a task after the queued records, on the writer thread if any."""
+        if self._writer is None:
+            task()
+        else:
+            self._writer.submit(task)
+
+    def _expire_windows(self, coalesce: "Coalescer") -> None:
+        """Close ended coalescer windows until the logger is closed."""
+        while not self._stopped.wait(coalesce.window):
+            self._on_writer(partial(self._write_expired, coalesce))
+
+    def _write_expired(self, coalesce: "Coalescer") -> None:
+        """Write the summaries of ended coalescer windows."""
+        for log_args in coalesce.expire():
+            self._write(log_args)
+
+    def _write_lines(self, lines: List[List[str]]) -> None:
+        """Write lines not produced by handlers, such as aggregates."""
+        for log_args in lines:
+            if self._coalesce is None:
+                self._write(log_args)
+                continue
+            for line in self._coalesce.admit((), log_args):
+                self._write(line)
+
+    def _emit(
+        self,
+        log_context: LogContext,
+        detailed: Optional[bool] = None,
+        captured: Optional[Mapping[int, Callable[[], str]]] = None,
+        reduced: bool = False,
+        handlers: Optional[List[THandler]] = None,
+    ) -> None:
+        """Call the handlers and write the access log message."""
+        if handlers is None:
+            if not self._handlers:
+                return
+            handlers = self._reduced_handlers if reduced else self._handlers
+
+        log_context = self._correlated(log_context)
+
+        if captured:
+            log_args = [
+                (
+                    captured[id(handler)]()
+                    if id(handler) in captured
+                    else handler(log_context)
+                )
+                for handler in handlers
+            ]
+        else:
+            log_args = [handler(log_context) for handler in handlers]
+
+        if self._detail_handlers and not reduced:
+            if detailed is None:
+                detailed = self._is_detailed(log_context)
+            if detailed:
+                log_args.extend(
+                    (
+                        captured[id(handler)]()
+                        if captured and id(handler) in captured
+                        else handler(log_context)
+                    )
+                    for handler in self._detail_handlers
+                )
+
+        if self._coalesce is not None:
+            for line in self._coalesce.admit(handlers, log_args):
+                self._write(line)
+            return
+
+        self._write(log_args)
+
+    def _correlated(self, log_context: LogContext) -> LogContext:
+        """Add the correlation identifiers of an RPC when they are needed.
+
+        Generated request IDs are echoed with ``echo_request_id``.
+        """
+        if log_context.correlation is not None:
+            return log_context
+
+        if self._echo_request_id:
+            correlation = echo_request_id(log_context.server_context)
+        elif self._inputs.correlation:
+            correlation = correlate(log_context.server_context.invocation_metadata())
+        else:
+            return log_context
+
+        return log_context._replace(correlation=correlation)
+
+    def _write(self, log_args: List[str]) -> None:
+        """Write an access log message to the sink or the logger."""
+        if self._sink is not None:
+            self._sink.write(self._separator.join(log_args))
+            return
 
         self._logger.log(
             self._level,
@@ -136,6 +708,9 @@ class AccessLogger:
 class AccessLogInterceptor(grpc.ServerInterceptor, AccessLogger):
     """Generate a log line for each RPC invocation."""
 
+    _annotated = True
+    _per_thread = True
+
     def intercept_service(
         self,
         continuation: Callable[
@@ -145,51 +720,259 @@ class AccessLogInterceptor(grpc.ServerInterceptor, AccessLogger):
         handler_call_details: grpc.HandlerCallDetails,
     ) -> Union[grpc.RpcMethodHandler, None]:
         """Intercept an RPC."""
+        if self._config is not None and self._config.version != self._config_version:
+            self._reconfigure(self._config)
 
         def logging_wrapper(
             behavior: Callable[[Any, grpc.ServicerContext], Any],
             request_streaming: bool,
             response_streaming: bool,
         ) -> Callable[[Any, grpc.ServicerContext], Any]:
-            def logging_interceptor(
-                request_or_iterator: Any, context: grpc.ServicerContext
-            ) -> Any:
-                start = datetime.now(timezone.utc)
-                response = None
-                try:
-                    response = behavior(request_or_iterator, context)
-                    return response
-                finally:
-                    end = datetime.now(timezone.utc)
-                    self.log(
+            if self._inputs.cpu:
+                from ._cpu import cpu_timed
+
+                behavior = cpu_timed(behavior, response_streaming)
+            sampler = self._allocations
+            if (
+                self._inputs.alloc
+                and sampler is not None
+                and sampler.sampled(handler_call_details.method)
+            ):
+                behavior = sampler.traced(
+                    behavior, handler_call_details.method, response_streaming
+                )
+            if self._plugins:
+                return self._plugin_wrapper(
+                    behavior,
+                    handler_call_details.method,
+                    request_streaming,
+                    response_streaming,
+                )
+            if self._inputs.counts:
+                return self._counting_wrapper(
+                    behavior,
+                    handler_call_details.method,
+                    request_streaming,
+                    response_streaming,
+                )
+
+            return self._logging_wrapper(
+                behavior, handler_call_details.method, response_streaming
+            )
+
+        return _wrap_rpc_behavior(continuation(handler_call_details), logging_wrapper)
+
+    def _logging_wrapper(
+        self,
+        behavior: Callable[[Any, grpc.ServicerContext], Any],
+        method_name: str,
+        response_streaming: bool,
+    ) -> Callable[[Any, grpc.ServicerContext], Any]:
+        """Wrap an RPC behavior passing only the inputs read by the handlers."""
+        clock = self._inputs.clock
+        keep_request = self._inputs.request
+
+        def logging_interceptor(
+            request_or_iterator: Any, context: grpc.ServicerContext
+        ) -> Any:
+            start = clock()
+            response = None
+            try:
+                response = behavior(request_or_iterator, context)
+                return response
+            finally:
+                self.log(
+                    context,
+                    method_name,
+                    request_or_iterator if keep_request else None,
+                    response,
+                    start,
+                    clock(),
+                )
+
+        def logging_interceptor_lean(
+            request_or_iterator: Any, context: grpc.ServicerContext
+        ) -> Any:
+            start = clock()
+            try:
+                return behavior(request_or_iterator, context)
+            finally:
+                self.log(
+                    context,
+                    method_name,
+                    request_or_iterator if keep_request else None,
+                    None,
+                    start,
+                    clock(),
+                )
+
+        def logging_interceptor_stream(
+            request_or_iterator: Any, context: grpc.ServicerContext
+        ) -> Any:
+            start = clock()
+            try:
+                yield from behavior(request_or_iterator, context)
+            finally:
+                self.log(
+                    context,
+                    method_name,
+                    request_or_iterator if keep_request else None,
+                    None,
+                    start,
+                    clock(),
+                )
+
+        if response_streaming:
+            return logging_interceptor_stream
+        if not self._inputs.response:
+            return logging_interceptor_lean
+
+        return logging_interceptor
+
+    def _counting_wrapper(
+        self,
+        behavior: Callable[[Any, grpc.ServicerContext], Any],
+        method_name: str,
+        request_streaming: bool,
+        response_streaming: bool,
+    ) -> Callable[[Any, grpc.ServicerContext], Any]:
+        """Wrap an RPC behavior counting streamed messages."""
+        clock = self._inputs.clock
+        keep_request = self._inputs.request
+        keep_response = self._inputs.response
+
+        def counting_interceptor(
+            request_or_iterator: Any, context: grpc.ServicerContext
+        ) -> Any:
+            start = clock()
+            requests = request_or_iterator
+            if request_streaming:
+                requests = _CountingIterator(request_or_iterator)
+            response = None
+            try:
+                response = behavior(requests, context)
+                return response
+            finally:
+                self.log(
+                    context,
+                    method_name,
+                    request_or_iterator if keep_request else None,
+                    response if keep_response else None,
+                    start,
+                    clock(),
+                    requests.count if request_streaming else 1,
+                    int(response is not None),
+                )
+
+        def counting_interceptor_stream(
+            request_or_iterator: Any, context: grpc.ServicerContext
+        ) -> Any:
+            start = clock()
+            requests = request_or_iterator
+            if request_streaming:
+                requests = _CountingIterator(request_or_iterator)
+            responses = 0
+            try:
+                for response in behavior(requests, context):
+                    responses += 1
+                    yield response
+            finally:
+                self.log(
+                    context,
+                    method_name,
+                    request_or_iterator if keep_request else None,
+                    None,
+                    start,
+                    clock(),
+                    requests.count if request_streaming else 1,
+                    responses,
+                )
+
+        if response_streaming:
+            return counting_interceptor_stream
+
+        return counting_interceptor
+
+    def _plugin_wrapper(
+        self,
+        behavior: Callable[[Any, grpc.ServicerContext], Any],
+        method_name: str,
+        request_streaming: bool,
+        response_streaming: bool,
+    ) -> Callable[[Any, grpc.ServicerContext], Any]:
+        """Wrap an RPC behavior calling the plugin hooks around it."""
+        clock = self._inputs.clock
+        keep_request = self._inputs.request
+        keep_response = self._inputs.response
+        counts = self._inputs.counts
+        cpu = self._inputs.cpu
+        alloc = self._inputs.alloc
+        observe = bool(message_observers(self._plugins))
+        wrap_requests = request_streaming and (counts or observe)
+        begin = self._plugin_start(method_name, request_streaming, ObservingIterator)
+
+        def plugin_interceptor(
+            request_or_iterator: Any, context: grpc.ServicerContext
+        ) -> Any:
+            start = clock()
+            started, observed, requests = begin(request_or_iterator, context)
+            response = None
+            try:
+                response = behavior(requests, context)
+                if observe and response is not None:
+                    notify(observed, response, False)
+                return response
+            finally:
+                self._finish(
+                    started,
+                    LogContext(
                         context,
-                        handler_call_details.method,
-                        request_or_iterator,
-                        response,
+                        method_name,
+                        request_or_iterator if keep_request else None,
+                        response if keep_response else None,
                         start,
-                        end,
-                    )
+                        clock(),
+                        (requests.count if wrap_requests else 1) if counts else None,
+                        int(response is not None) if counts else None,
+                        None,
+                        take_annotations(),
+                        cpu() if cpu else None,
+                        alloc() if alloc else None,
+                    ),
+                )
 
-            def logging_interceptor_stream(
-                request_or_iterator: Any, context: grpc.ServicerContext
-            ) -> Any:
-                start = datetime.now(timezone.utc)
-                try:
-                    yield from behavior(request_or_iterator, context)
-                finally:
-                    end = datetime.now(timezone.utc)
-                    self.log(
+        def plugin_interceptor_stream(
+            request_or_iterator: Any, context: grpc.ServicerContext
+        ) -> Any:
+            start = clock()
+            started, observed, requests = begin(request_or_iterator, context)
+            responses = 0
+            try:
+                for response in behavior(requests, context):
+                    responses += 1
+                    if observe:
+                        notify(observed, response, False)
+                    yield response
+            finally:
+                self._finish(
+                    started,
+                    LogContext(
                         context,
-                        handler_call_details.method,
-                        request_or_iterator,
+                        method_name,
+                        request_or_iterator if keep_request else None,
                         None,
                         start,
-                        end,
-                    )
-
-            if response_streaming:
-                return logging_interceptor_stream
+                        clock(),
+                        (requests.count if wrap_requests else 1) if counts else None,
+                        responses if counts else None,
+                        None,
+                        take_annotations(),
+                        cpu() if cpu else None,
+                        alloc() if alloc else None,
+                    ),
+                )
 
-            return logging_interceptor
+        if response_streaming:
+            return plugin_interceptor_stream
 
-        return _wrap_rpc_behavior(continuation(handler_call_details), logging_wrapper)
+        return plugin_interceptor
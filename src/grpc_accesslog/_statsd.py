@@ -0,0 +1,144 @@
+"""Statsd metrics of the RPCs seen by the server interceptors."""
+
+import random
+from datetime import timedelta
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Tuple
+
+import grpc
+
+from ._context import LogContext
+from ._plugins import Plugin
+from .sinks._datagram import DEFAULT_MTU
+from .sinks._datagram import _DatagramSender
+from .sinks._datagram import pack
+
+
+class _Timer:
+    """Reservoir of timer samples for one metric."""
+
+    __slots__ = ("count", "samples")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.samples: List[float] = []
+
+
+class StatsdReporter(_DatagramSender, Plugin):
+    """Aggregate counters and timers in process and send them to statsd.
+
+    Counters are summed between flushes and sent once. Timers keep a
+    uniform reservoir of at most ``max_samples`` samples per metric, sent
+    with the matching ``@rate`` so statsd scales the counts back. Metric
+    lines are packed into datagrams up to the MTU.
+
+    The reporter is a ``Plugin`` of the server interceptors, so it records
+    the count and duration of every RPC, whatever the configured handlers,
+    runtime settings or overload mode.
+    """
+
+    fields = frozenset(("time", "status"))
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 8125,
+        prefix: str = "grpc",
+        max_samples: int = 100,
+        mtu: int = DEFAULT_MTU,
+        flush_interval: float = 10.0,
+    ) -> None:
+        """Create a statsd reporter.
+
+        Args:
+            host (str): Statsd daemon host. Defaults to "127.0.0.1".
+            port (int): Statsd daemon port. Defaults to 8125.
+            prefix (str): Metric name prefix. Defaults to "grpc".
+            max_samples (int): Timer samples kept per metric and flush.
+                Defaults to 100.
+            mtu (int): Maximum datagram size in bytes. Defaults to 1472.
+            flush_interval (float): Seconds between background flushes, 0 to
+                only flush on demand. Defaults to 10.0.
+        """
+        super().__init__(host, port, mtu)
+        self._prefix = prefix
+        self._max_samples = max_samples
+        self._counters: Dict[str, int] = {}
+        self._timers: Dict[str, _Timer] = {}
+        self._names: Dict[Tuple[str, str], str] = {}
+        self._start_flusher(flush_interval, "statsd-flusher")
+
+    def on_end(self, state: Any, log_context: LogContext) -> None:
+        """Record the count and duration of a finished RPC.
+
+        Args:
+            state (Any): Value returned by ``on_start``.
+            log_context (LogContext): Context of the finished RPC.
+        """
+        duration = (log_context.end - log_context.start) / timedelta(milliseconds=1)
+        code = log_context.server_context.code() or grpc.StatusCode.OK
+        name = self._metric(log_context.method_name, code.name)
+        self.increment(name)
+        self.timing(name, duration)
+
+    def _metric(self, method_name: str, status: str) -> str:
+        """Return the metric name of a method and status."""
+        key = (method_name, status)
+        name = self._names.get(key)
+        if name is None:
+            service, _, method = method_name.strip("/").rpartition("/")
+            name = self._names[key] = (
+                f"{self._prefix}.{service.replace('.', '_')}.{method}.{status}"
+            )
+
+        return name
+
+    def increment(self, name: str, value: int = 1) -> None:
+        """Add to a counter.
+
+        Args:
+            name (str): Metric name.
+            value (int): Increment. Defaults to 1.
+        """
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def timing(self, name: str, value_ms: float) -> None:
+        """Record a timer sample.
+
+        Args:
+            name (str): Metric name.
+            value_ms (float): Duration in milliseconds.
+        """
+        with self._lock:
+            timer = self._timers.get(name)
+            if timer is None:
+                timer = self._timers[name] = _Timer()
+            timer.count += 1
+            if len(timer.samples) < self._max_samples:
+                timer.samples.append(value_ms)
+            else:
+                index = random.randrange(timer.count)
+                if index < self._max_samples:
+                    timer.samples[index] = value_ms
+
+    def flush(self) -> None:
+        """Send the aggregated metrics and reset them."""
+        with self._lock:
+            counters = self._counters
+            timers = self._timers
+            self._counters = {}
+            self._timers = {}
+
+        lines = [f"{name}:{value}|c".encode() for name, value in counters.items()]
+        for name, timer in timers.items():
+            rate = ""
+            if timer.count > len(timer.samples):
+                rate = f"|@{len(timer.samples) / timer.count:.6g}"
+            lines.extend(
+                f"{name}:{sample:.3f}|ms{rate}".encode() for sample in timer.samples
+            )
+
+        self._send(pack(lines, self._mtu))
@@ -1,15 +1,97 @@
 """gRPC access log handlers."""
 
 from datetime import timedelta
+from typing import Any
 from typing import Callable
+from typing import Collection
+from typing import FrozenSet
 from typing import List
+from typing import Optional
+from typing import TypeVar
 
 import grpc
 
 from ._context import LogContext
+from ._correlation import Correlation
+from ._correlation import correlate
 
 
 THandler = Callable[[LogContext], str]
+THandlerT = TypeVar("THandlerT", bound=Callable[[LogContext], Any])
+
+#: LogContext inputs a handler may declare with ``requires``.
+FIELDS: FrozenSet[str] = frozenset(
+    (
+        "time",
+        "peer",
+        "status",
+        "metadata",
+        "correlation",
+        "request",
+        "response",
+        "request_size",
+        "response_size",
+        "counts",
+        "annotations",
+        "cpu",
+        "allocation",
+    )
+)
+#: Inputs costing work on every RPC, only provided when declared.
+EXPLICIT_FIELDS: FrozenSet[str] = frozenset(("correlation", "cpu"))
+#: Inputs assumed for handlers without a declaration.
+DEFAULT_FIELDS: FrozenSet[str] = FIELDS - EXPLICIT_FIELDS
+
+
+def requires(*fields: str) -> Callable[[THandlerT], THandlerT]:
+    """Declare the LogContext inputs read by a handler.
+
+    Handlers without a declaration are assumed to read every input except
+    ``EXPLICIT_FIELDS``, which are only provided when declared. The method
+    name is always available.
+
+    * time -- ``start`` and ``end``
+    * peer -- ``server_context.peer()``
+    * status -- ``server_context.code()``
+    * metadata -- ``server_context.invocation_metadata()``
+    * correlation -- ``correlation``, parsed from the metadata once per record
+    * request, response -- The request and response messages
+    * request_size, response_size -- ``ByteSize()`` of the messages only
+    * counts -- ``request_count`` and ``response_count``
+    * annotations -- Fields added by ``grpc_accesslog.annotate``
+    * cpu -- ``cpu_ns``, measured by the synchronous server interceptor
+    * allocation -- ``allocation``, traced by an ``AllocationSampler``
+
+    Args:
+        *fields (str): Names of the inputs read by the handler.
+
+    Returns:
+        Callable[[THandlerT], THandlerT]: Decorator recording the fields
+
+    Raises:
+        ValueError: Unknown field name.
+    """
+    unknown = set(fields) - FIELDS
+    if unknown:
+        raise ValueError(f"Unknown handler fields: {', '.join(sorted(unknown))}")
+
+    def decorator(handler: THandlerT) -> THandlerT:
+        handler.fields = frozenset(fields)  # type: ignore[attr-defined]
+        return handler
+
+    return decorator
+
+
+def handler_fields(handler: Callable[[LogContext], Any]) -> FrozenSet[str]:
+    """Return the LogContext inputs declared by a handler.
+
+    Args:
+        handler (Callable[[LogContext], Any]): LogContext handler or filter
+
+    Returns:
+        FrozenSet[str]: Declared fields, or ``DEFAULT_FIELDS`` when undeclared
+    """
+    return getattr(handler, "fields", DEFAULT_FIELDS)
 
 
 def time_received(
@@ -24,6 +106,7 @@ def time_received(
         THandler: LogContext handler
     """
 
+    @requires("time")
     def inner(context: LogContext) -> str:
         return context.start.strftime(format)
 
@@ -42,12 +125,14 @@ def time_complete(
         THandler: LogContext handler
     """
 
+    @requires("time")
     def inner(context: LogContext) -> str:
         return context.end.strftime(format)
 
     return inner
 
 
+@requires("time")
 def rtt_ms(context: LogContext) -> str:
     """Return RPC round trip time in milliseconds.
 
@@ -61,6 +146,7 @@ def rtt_ms(context: LogContext) -> str:
     return str(rtt)
 
 
+@requires()
 def request(context: LogContext) -> str:
     """Return fully qualified RPC name.
 
@@ -73,6 +159,7 @@ def request(context: LogContext) -> str:
     return context.method_name
 
 
+@requires("status")
 def status(context: LogContext) -> str:
     """Return gRPC status code from server call.
 
@@ -89,6 +176,7 @@ def status(context: LogContext) -> str:
     return str(code)
 
 
+@requires("peer")
 def peer(context: LogContext) -> str:
     """Return parsed client IP when available.
 
@@ -106,6 +194,25 @@ def peer(context: LogContext) -> str:
     return peer
 
 
+@requires("request_size")
+def request_size(context: LogContext) -> str:
+    """Return expected size of serialized request protobuf in bytes.
+
+    Args:
+        context (LogContext): RPC context data
+
+    Returns:
+        str: String representation of request size in bytes
+    """
+    size = 0
+    # Streaming request iterators are not sized.
+    if hasattr(context.request, "ByteSize"):
+        size = context.request.ByteSize()
+
+    return f"{size}"
+
+
+@requires("response_size")
 def response_size(context: LogContext) -> str:
     """Return expected size of serialized response protobuf in bytes.
 
@@ -124,6 +231,7 @@ def response_size(context: LogContext) -> str:
     return f"{size}"
 
 
+@requires("metadata")
 def user_agent(context: LogContext) -> str:
     """Return reported gRPC client user agent if available.
 
@@ -140,6 +248,270 @@ def user_agent(context: LogContext) -> str:
     return "-"
 
 
+def request_excerpt(limit: int = 256) -> THandler:
+    """Render the start of a unary request message on a single line.
+
+    Args:
+        limit (int): Maximum excerpt length in characters. Defaults to 256.
+
+    Returns:
+        THandler: LogContext handler
+    """
+
+    @requires("request")
+    def inner(context: LogContext) -> str:
+        if not hasattr(context.request, "ByteSize"):
+            return "-"
+
+        excerpt = " ".join(str(context.request).split("\n")).strip()
+        if len(excerpt) > limit:
+            excerpt = excerpt[:limit] + "..."
+
+        return f"{{{excerpt}}}"
+
+    return inner
+
+
+def metadata(keys: Optional[Collection[str]] = None) -> THandler:
+    """Render invocation metadata as comma separated key=value pairs.
+
+    Binary (``-bin``) values are replaced by their length in bytes.
+
+    Args:
+        keys (Collection[str]): Metadata keys to include. Optional, defaults to
+            None (all keys).
+
+    Returns:
+        THandler: LogContext handler
+    """
+    wanted = None if keys is None else frozenset(key.lower() for key in keys)
+
+    @requires("metadata")
+    def inner(context: LogContext) -> str:
+        pairs = []
+        for item in context.server_context.invocation_metadata() or ():
+            key = item.key.lower()
+            if wanted is not None and key not in wanted:
+                continue
+
+            value = item.value
+            if key.endswith("-bin"):
+                value = f"<{len(value)} bytes>"
+
+            pairs.append(f"{key}={value}")
+
+        return ",".join(pairs) or "-"
+
+    return inner
+
+
+def metadata_value(key: str) -> THandler:
+    """Render the value of a single invocation metadata key.
+
+    Binary (``-bin``) values are replaced by their length in bytes.
+
+    Args:
+        key (str): Metadata key.
+
+    Returns:
+        THandler: LogContext handler
+    """
+    wanted = key.lower()
+
+    @requires("metadata")
+    def inner(context: LogContext) -> str:
+        for item in context.server_context.invocation_metadata() or ():
+            if item.key.lower() == wanted:
+                if wanted.endswith("-bin"):
+                    return f"<{len(item.value)} bytes>"
+                return str(item.value)
+
+        return "-"
+
+    return inner
+
+
+@requires("annotations")
+def annotations(context: LogContext) -> str:
+    """Return the fields added by ``grpc_accesslog.annotate``.
+
+    Args:
+        context (LogContext): RPC context data
+
+    Returns:
+        str: Comma separated key=value pairs
+    """
+    if not context.annotations:
+        return "-"
+
+    return ",".join(f"{key}={value}" for key, value in context.annotations.items())
+
+
+def annotation(key: str) -> THandler:
+    """Render a single field added by ``grpc_accesslog.annotate``.
+
+    Args:
+        key (str): Field name.
+
+    Returns:
+        THandler: LogContext handler
+    """
+
+    @requires("annotations")
+    def inner(context: LogContext) -> str:
+        if context.annotations is None or key not in context.annotations:
+            return "-"
+
+        return str(context.annotations[key])
+
+    return inner
+
+
+@requires("counts")
+def message_counts(context: LogContext) -> str:
+    """Return counts of request and response messages.
+
+    Messages are only counted while a configured handler reads the counts,
+    e.g. this one.
+
+    Args:
+        context (LogContext): RPC context data
+
+    Returns:
+        str: Request and response counts as "requests/responses"
+    """
+    if context.request_count is None or context.response_count is None:
+        return "-"
+
+    return f"{context.request_count}/{context.response_count}"
+
+
+def _correlation(context: LogContext) -> Correlation:
+    """Return the correlation identifiers of an RPC.
+
+    Loggers parse the metadata once per record for handlers declaring the
+    ``correlation`` field, so that they share one generated request ID.
+    Without them the metadata is parsed on every call.
+    """
+    if context.correlation is not None:
+        return context.correlation
+
+    return correlate(context.server_context.invocation_metadata())
+
+
+@requires("metadata", "correlation")
+def trace_id(context: LogContext) -> str:
+    """Return the trace ID of a valid W3C ``traceparent`` header.
+
+    Args:
+        context (LogContext): RPC context data
+
+    Returns:
+        str: 32 hex digit trace ID
+    """
+    return _correlation(context).trace_id or "-"
+
+
+@requires("metadata", "correlation")
+def span_id(context: LogContext) -> str:
+    """Return the parent span ID of a valid W3C ``traceparent`` header.
+
+    Args:
+        context (LogContext): RPC context data
+
+    Returns:
+        str: 16 hex digit span ID
+    """
+    return _correlation(context).span_id or "-"
+
+
+@requires("metadata", "correlation")
+def trace_sampled(context: LogContext) -> str:
+    """Return the sampled flag of a valid W3C ``traceparent`` header.
+
+    Args:
+        context (LogContext): RPC context data
+
+    Returns:
+        str: "1" when sampled, "0" otherwise
+    """
+    sampled = _correlation(context).sampled
+    if sampled is None:
+        return "-"
+
+    return "1" if sampled else "0"
+
+
+@requires("metadata", "correlation")
+def request_id(context: LogContext) -> str:
+    """Return the ``x-request-id`` metadata value or a generated request ID.
+
+    Generated IDs are only sent back to the client when the interceptor is
+    created with ``echo_request_id=True``.
+
+    Args:
+        context (LogContext): RPC context data
+
+    Returns:
+        str: Request ID
+    """
+    return _correlation(context).request_id
+
+
+@requires("cpu")
+def cpu_us(context: LogContext) -> str:
+    """Return the CPU time of the servicer thread in microseconds.
+
+    Only the synchronous ``AccessLogInterceptor`` measures CPU time, as the
+    ``time.thread_time_ns`` difference around the servicer code.
+
+    Args:
+        context (LogContext): RPC context data
+
+    Returns:
+        str: CPU time in microseconds, or "-" when not measured
+    """
+    if context.cpu_ns is None:
+        return "-"
+
+    return str(context.cpu_ns // 1000)
+
+
+@requires("allocation")
+def alloc_bytes(context: LogContext) -> str:
+    """Return the bytes allocated by a sampled RPC and still live at its end.
+
+    Only RPCs sampled by the ``AllocationSampler`` of the synchronous
+    ``AccessLogInterceptor`` are traced.
+
+    Args:
+        context (LogContext): RPC context data
+
+    Returns:
+        str: Allocated bytes, or "-" when not traced
+    """
+    if context.allocation is None:
+        return "-"
+
+    return str(context.allocation.net_bytes)
+
+
+@requires("allocation")
+def alloc_peak(context: LogContext) -> str:
+    """Return the peak of the bytes allocated during a sampled RPC.
+
+    Args:
+        context (LogContext): RPC context data
+
+    Returns:
+        str: Peak allocated bytes, or "-" when not traced
+    """
+    if context.allocation is None:
+        return "-"
+
+    return str(context.allocation.peak_bytes)
+
+
 DEFAULT_HANDLERS: List[THandler] = [
     peer,
     time_received(),
@@ -0,0 +1,535 @@
+"""Protobuf payload handlers with compiled field masking and truncation.
+
+Requires the ``protobuf`` package.
+"""
+
+import importlib
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import Executor
+from concurrent.futures import Future
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any
+from typing import Callable
+from typing import Collection
+from typing import Dict
+from typing import FrozenSet
+from typing import List
+from typing import Mapping
+from typing import NamedTuple
+from typing import Optional
+from typing import Tuple
+from typing import cast
+
+from google.protobuf import descriptor_pool
+from google.protobuf import json_format
+from google.protobuf import message_factory
+from google.protobuf.descriptor import Descriptor
+from google.protobuf.descriptor import FieldDescriptor
+from google.protobuf.message import Message
+
+from ._context import LogContext
+from .handlers import THandler
+from .handlers import requires
+
+
+_logger = logging.getLogger(__name__)
+
+MASK = "***"
+#: Suffix of truncated renderings, counted within the byte budget.
+ELLIPSIS = "..."
+
+DROP = 0
+MASK_FIELD = 1
+TRUNCATE = 2
+NESTED = 3
+
+#: Compiled plan: (field, action, limit, nested plan) steps applied in order.
+TPlan = Tuple[Tuple[FieldDescriptor, int, int, Optional["TPlan"]], ...]
+
+
+class PayloadPolicy(NamedTuple):
+    """Field paths to mask, drop or truncate and the rendering byte budget."""
+
+    mask: Tuple[str, ...] = ()
+    drop: Tuple[str, ...] = ()
+    truncate: Tuple[Tuple[str, int], ...] = ()
+    max_bytes: int = 1024
+
+
+_plans: Dict[Tuple[str, PayloadPolicy], TPlan] = {}
+
+
+def _is_repeated(field: FieldDescriptor) -> bool:
+    """Return whether a field is repeated on all protobuf versions."""
+    is_repeated = getattr(field, "is_repeated", None)
+    if is_repeated is not None:
+        return bool(is_repeated)
+
+    # Older protobuf releases only provide the label.
+    label = field.label  # type: ignore[attr-defined]  # pragma: no cover
+    return bool(label == FieldDescriptor.LABEL_REPEATED)  # pragma: no cover
+
+
+def _is_map_entry(descriptor: Optional[Descriptor]) -> bool:
+    """Return whether a message type is a map entry."""
+    return descriptor is not None and bool(descriptor.GetOptions().map_entry)
+
+
+class _Rules(NamedTuple):
+    """Field path remainders grouped by action for one field name."""
+
+    mask: List[str]
+    drop: List[str]
+    truncate: List[Tuple[str, int]]
+
+
+def _group(
+    mask: Collection[str],
+    drop: Collection[str],
+    truncate: Collection[Tuple[str, int]],
+) -> Dict[str, _Rules]:
+    """Group field paths by their first component."""
+    rules: Dict[str, _Rules] = {}
+    for path in mask:
+        name, _, rest = path.partition(".")
+        rules.setdefault(name, _Rules([], [], [])).mask.append(rest)
+    for path in drop:
+        name, _, rest = path.partition(".")
+        rules.setdefault(name, _Rules([], [], [])).drop.append(rest)
+    for path, limit in truncate:
+        name, _, rest = path.partition(".")
+        rules.setdefault(name, _Rules([], [], [])).truncate.append((rest, limit))
+
+    return rules
+
+
+def _field_plan(
+    field: FieldDescriptor, rule: _Rules
+) -> List[Tuple[FieldDescriptor, int, int, Optional[TPlan]]]:
+    """Return the plan steps of a single field."""
+    if "" in rule.drop:
+        return [(field, DROP, 0, None)]
+    if "" in rule.mask:
+        return [(field, MASK_FIELD, 0, None)]
+
+    nested_type = field.message_type
+    if _is_map_entry(nested_type):
+        return []
+
+    steps: List[Tuple[FieldDescriptor, int, int, Optional[TPlan]]] = []
+    limits = [limit for rest, limit in rule.truncate if not rest]
+    if limits and (_is_repeated(field) or nested_type is None):
+        steps.append((field, TRUNCATE, min(limits), None))
+
+    if nested_type is not None:
+        nested = compile_plan(
+            nested_type,
+            [rest for rest in rule.mask if rest],
+            [rest for rest in rule.drop if rest],
+            [(rest, limit) for rest, limit in rule.truncate if rest],
+        )
+        if nested:
+            steps.append((field, NESTED, 0, nested))
+
+    return steps
+
+
+def compile_plan(
+    descriptor: Descriptor,
+    mask: Collection[str] = (),
+    drop: Collection[str] = (),
+    truncate: Collection[Tuple[str, int]] = (),
+) -> TPlan:
+    """Compile dotted field paths into a plan for a message type.
+
+    Dropped fields are cleared. Masked string fields are replaced by
+    ``MASK``, other masked fields are cleared. Truncated repeated fields keep
+    their first ``limit`` items, truncated string and bytes fields their
+    first ``limit`` characters or bytes. Paths not matching a field of the
+    message type are ignored and map fields can only be dropped or masked
+    as a whole.
+
+    Args:
+        descriptor (Descriptor): Message type descriptor.
+        mask (Collection[str]): Paths to mask, e.g. "card.number".
+            Defaults to ().
+        drop (Collection[str]): Paths to drop. Defaults to ().
+        truncate (Collection[Tuple[str, int]]): Paths and limits to
+            truncate to. Defaults to ().
+
+    Returns:
+        TPlan: Compiled plan
+    """
+    rules = _group(mask, drop, truncate)
+    plan: List[Tuple[FieldDescriptor, int, int, Optional[TPlan]]] = []
+    for name in sorted(rules):
+        field = descriptor.fields_by_name.get(name)
+        if field is not None:
+            plan.extend(_field_plan(field, rules[name]))
+
+    return tuple(plan)
+
+
+def cached_plan(descriptor: Descriptor, policy: PayloadPolicy) -> TPlan:
+    """Return the plan of a message type for a policy, compiling it once.
+
+    Args:
+        descriptor (Descriptor): Message type descriptor.
+        policy (PayloadPolicy): Payload policy.
+
+    Returns:
+        TPlan: Compiled plan
+    """
+    key = (descriptor.full_name, policy)
+    plan = _plans.get(key)
+    if plan is None:
+        plan = _plans[key] = compile_plan(
+            descriptor, policy.mask, policy.drop, policy.truncate
+        )
+
+    return plan
+
+
+def apply_plan(message: Message, plan: TPlan) -> None:
+    """Apply a compiled plan to a message in place.
+
+    Args:
+        message (Message): Message to modify.
+        plan (TPlan): Compiled plan of the message type.
+    """
+    for field, action, limit, nested in plan:
+        name = field.name
+        if action == DROP:
+            message.ClearField(name)
+        elif action == MASK_FIELD:
+            _mask(message, field)
+        elif action == TRUNCATE:
+            _truncate(message, field, limit)
+        elif nested is not None:
+            if _is_repeated(field):
+                for item in getattr(message, name):
+                    apply_plan(item, nested)
+            elif message.HasField(name):
+                apply_plan(getattr(message, name), nested)
+
+
+def _mask(message: Message, field: FieldDescriptor) -> None:
+    """Replace a set string field by ``MASK`` or clear any other field."""
+    name = field.name
+    if _is_repeated(field) or field.type != FieldDescriptor.TYPE_STRING:
+        message.ClearField(name)
+    elif getattr(message, name):
+        setattr(message, name, MASK)
+
+
+def _truncate(message: Message, field: FieldDescriptor, limit: int) -> None:
+    """Keep the first ``limit`` items, characters or bytes of a field."""
+    name = field.name
+    value = getattr(message, name)
+    if _is_repeated(field):
+        del value[limit:]
+    elif len(value) > limit:
+        setattr(message, name, value[:limit])
+
+
+def fit(text: str, max_bytes: int) -> str:
+    """Truncate text to a UTF-8 byte budget.
+
+    Text over budget is cut at a character boundary and suffixed with
+    ``ELLIPSIS`` within the budget, or emptied when the budget cannot hold
+    the suffix.
+
+    Args:
+        text (str): Text to truncate.
+        max_bytes (int): Byte budget.
+
+    Returns:
+        str: Text of at most ``max_bytes`` UTF-8 bytes
+    """
+    if len(text) <= max_bytes // 4:
+        return text
+
+    data = text.encode()
+    if len(data) <= max_bytes:
+        return text
+    if max_bytes < len(ELLIPSIS):
+        return ""
+
+    cut = max_bytes - len(ELLIPSIS)
+    # Back up over UTF-8 continuation bytes to the start of a character.
+    while cut and data[cut] & 0xC0 == 0x80:
+        cut -= 1
+    return data[:cut].decode() + ELLIPSIS
+
+
+def _to_json(message: Message) -> str:
+    """Render a message as single line JSON."""
+    return json_format.MessageToJson(
+        message, preserving_proto_field_name=True, indent=None
+    )
+
+
+def format_message(message: Message, policy: PayloadPolicy) -> str:
+    """Apply a policy to a copy of a message and render it as JSON.
+
+    Args:
+        message (Message): Message to render. It is not modified.
+        policy (PayloadPolicy): Payload policy.
+
+    Returns:
+        str: Single line JSON rendering within the policy byte budget
+    """
+    plan = cached_plan(cast(Descriptor, message.DESCRIPTOR), policy)
+    if plan:
+        copy = type(message)()
+        copy.CopyFrom(message)
+        apply_plan(copy, plan)
+        message = copy
+
+    return fit(_to_json(message), policy.max_bytes)
+
+
+def render(module: str, type_name: str, data: bytes, policy: PayloadPolicy) -> str:
+    """Render a serialized message as single line JSON.
+
+    Runs in pool worker processes. The module defining the message type is
+    imported so its descriptors are registered in the worker.
+
+    Args:
+        module (str): Module defining the message class.
+        type_name (str): Full message type name.
+        data (bytes): Serialized message.
+        policy (PayloadPolicy): Payload policy.
+
+    Returns:
+        str: JSON rendering of the message
+    """
+    importlib.import_module(module)
+    descriptor = descriptor_pool.Default().FindMessageTypeByName(type_name)
+    message = message_factory.GetMessageClass(descriptor).FromString(data)
+    apply_plan(message, cached_plan(descriptor, policy))
+
+    return fit(_to_json(message), policy.max_bytes)
+
+
+def _combine(request: str, response: str, max_bytes: int) -> str:
+    """Join request and response renderings within one byte budget.
+
+    The request leaves room for the separator and a truncated response.
+    """
+    request = fit(request, max_bytes - 1 - len(ELLIPSIS))
+    return f"{request} {fit(response, max_bytes - 1 - len(request.encode()))}"
+
+
+class PayloadFormatter:
+    """Render request and response messages as JSON on the calling thread.
+
+    Masking, dropping and truncation are compiled once per message type
+    into a plan, so each RPC only copies the message and applies the plan.
+    The ``payloads`` handler renders both messages within a single byte
+    budget for the record.
+    """
+
+    def __init__(
+        self,
+        mask: Collection[str] = (),
+        drop: Collection[str] = (),
+        truncate: Optional[Mapping[str, int]] = None,
+        max_bytes: int = 1024,
+    ) -> None:
+        """Create a payload formatter.
+
+        Args:
+            mask (Collection[str]): Dotted field paths to mask, e.g.
+                "password" or "card.number". Defaults to ().
+            drop (Collection[str]): Dotted field paths to drop. Defaults
+                to ().
+            truncate (Mapping[str, int]): Dotted field paths of repeated,
+                string or bytes fields and the number of items, characters
+                or bytes to keep. Optional, defaults to None.
+            max_bytes (int): Byte budget of each handler output. Defaults
+                to 1024.
+        """
+        self.policy = PayloadPolicy(
+            tuple(sorted(mask)),
+            tuple(sorted(drop)),
+            tuple(sorted((truncate or {}).items())),
+            max_bytes,
+        )
+
+        @requires("request")
+        def request(context: LogContext) -> str:
+            return self.format(context.request)
+
+        @requires("response")
+        def response(context: LogContext) -> str:
+            return self.format(context.response)
+
+        @requires("request", "response")
+        def payloads(context: LogContext) -> str:
+            return _combine(
+                self.format(context.request),
+                self.format(context.response),
+                self.policy.max_bytes,
+            )
+
+        self.request: THandler = request
+        self.response: THandler = response
+        self.payloads: THandler = payloads
+
+    def format(self, message: Any) -> str:
+        """Render a message according to the policy.
+
+        Args:
+            message (Any): Message to render.
+
+        Returns:
+            str: JSON rendering, or "-" for non protobuf values
+        """
+        if not isinstance(message, Message):
+            return "-"
+
+        return format_message(message, self.policy)
+
+
+class PayloadRenderer(PayloadFormatter):
+    """Render request and response messages as JSON in a process pool.
+
+    Messages are serialized on the RPC thread, which is fast native code,
+    and rendered, masked and truncated in worker processes so that JSON
+    rendering never holds the server's GIL. Use the handlers with a
+    deferred access logger: the writer thread then writes the rendered
+    payloads in order with their access records while the pool renders
+    them concurrently. Without deferral the handlers wait for the rendered
+    payload on the RPC thread.
+
+    The owned pool starts its workers with ``spawn``, as gRPC does not
+    support forking a process running a server. Payloads not rendered
+    within ``timeout`` seconds or failing to render are logged as "-", and
+    the first failure is logged by the ``grpc_accesslog.payload`` logger.
+    """
+
+    def __init__(
+        self,
+        mask: Collection[str] = (),
+        drop: Collection[str] = (),
+        truncate: Optional[Mapping[str, int]] = None,
+        max_bytes: int = 1024,
+        max_workers: Optional[int] = None,
+        executor: Optional[Executor] = None,
+        timeout: float = 10.0,
+    ) -> None:
+        """Create a payload renderer.
+
+        Args:
+            mask (Collection[str]): Dotted field paths to mask. Defaults
+                to ().
+            drop (Collection[str]): Dotted field paths to drop. Defaults
+                to ().
+            truncate (Mapping[str, int]): Dotted field paths and limits to
+                truncate to. Optional, defaults to None.
+            max_bytes (int): Byte budget of each handler output. Defaults
+                to 1024.
+            max_workers (int): Number of worker processes. Optional, defaults
+                to None (number of processors).
+            executor (Executor): Executor to render with instead of a process
+                pool owned by the renderer. Optional, defaults to None.
+            timeout (float): Seconds to wait for a rendered payload. Defaults
+                to 10.0.
+        """
+        super().__init__(mask, drop, truncate, max_bytes)
+        self._max_workers = max_workers
+        self._executor = executor
+        self._owned = executor is None
+        self._timeout = timeout
+        self._failed = False
+        self._lock = threading.Lock()
+        self.request = _PayloadHandler(self, ("request",))
+        self.response = _PayloadHandler(self, ("response",))
+        self.payloads = _PayloadHandler(self, ("request", "response"))
+
+    def _get_executor(self) -> Executor:
+        """Return the executor, starting the process pool on first use."""
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(
+                        self._max_workers, multiprocessing.get_context("spawn")
+                    )
+
+        return self._executor
+
+    def submit(self, message: Any) -> "Optional[Future[str]]":
+        """Serialize a message and queue it for rendering.
+
+        Args:
+            message (Any): Message to render.
+
+        Returns:
+            Future[str]: Rendered message, or None for non protobuf values
+        """
+        if not isinstance(message, Message):
+            return None
+
+        return self._get_executor().submit(
+            render,
+            type(message).__module__,
+            message.DESCRIPTOR.full_name,
+            message.SerializeToString(),
+            self.policy,
+        )
+
+    def result(self, future: "Optional[Future[str]]") -> str:
+        """Wait for a rendered payload.
+
+        Args:
+            future (Future[str]): Rendered payload returned by ``submit``.
+
+        Returns:
+            str: Rendered payload, or "-" when unavailable
+        """
+        if future is None:
+            return "-"
+
+        try:
+            return future.result(self._timeout)
+        except Exception:
+            if not self._failed:
+                self._failed = True
+                _logger.exception("Rendering a payload failed")
+            return "-"
+
+    def close(self) -> None:
+        """Shut down the process pool owned by the renderer."""
+        if self._owned and self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+
+class _PayloadHandler:
+    """LogContext handler rendering messages of the RPC in a process pool."""
+
+    def __init__(self, renderer: PayloadRenderer, attributes: Tuple[str, ...]) -> None:
+        self._renderer = renderer
+        self._attributes = attributes
+        #: Messages kept for the handler, captured before deferral.
+        self.fields: FrozenSet[str] = frozenset(attributes)
+
+    def capture(self, context: LogContext) -> Callable[[], str]:
+        futures = [
+            self._renderer.submit(getattr(context, attribute))
+            for attribute in self._attributes
+        ]
+        renderer = self._renderer
+        max_bytes = renderer.policy.max_bytes
+        if len(futures) == 1:
+            return lambda: renderer.result(futures[0])
+
+        return lambda: _combine(
+            renderer.result(futures[0]), renderer.result(futures[1]), max_bytes
+        )
+
+    def __call__(self, context: LogContext) -> str:
+        return self.capture(context)()
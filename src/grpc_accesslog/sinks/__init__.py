@@ -0,0 +1,48 @@
+"""Access log sinks writing formatted lines without the logging module.
+
+Sinks are imported from their modules on first access.
+"""
+
+from typing import TYPE_CHECKING
+
+from .._lazy import attach
+
+
+if TYPE_CHECKING:  # pragma: no cover
+    from ._asyncio import AsyncFileSink
+    from ._asyncio import AsyncSink
+    from ._asyncio import TCPSink
+    from ._asyncio import UnixSink
+    from ._base import Sink
+    from ._buffered import ThreadBufferedSink
+    from ._compressed import CompressedFileSink
+    from ._compressed import read_lines
+    from ._datagram import SyslogSink
+
+
+#: Module of every public name.
+_EXPORTS = {
+    "AsyncFileSink": "._asyncio",
+    "AsyncSink": "._asyncio",
+    "CompressedFileSink": "._compressed",
+    "Sink": "._base",
+    "SyslogSink": "._datagram",
+    "TCPSink": "._asyncio",
+    "ThreadBufferedSink": "._buffered",
+    "UnixSink": "._asyncio",
+    "read_lines": "._compressed",
+}
+
+__all__ = [
+    "AsyncFileSink",
+    "AsyncSink",
+    "CompressedFileSink",
+    "Sink",
+    "SyslogSink",
+    "TCPSink",
+    "ThreadBufferedSink",
+    "UnixSink",
+    "read_lines",
+]
+
+__getattr__, __dir__ = attach(__name__, _EXPORTS, globals())
@@ -0,0 +1,429 @@
+"""Asyncio access log sinks with backpressure."""
+
+import abc
+import asyncio
+import logging
+import time
+from concurrent.futures import Executor
+from typing import Any
+from typing import BinaryIO
+from typing import List
+from typing import Optional
+from typing import cast
+
+
+_logger = logging.getLogger(__name__)
+
+
+def _running_loop() -> Optional[asyncio.AbstractEventLoop]:
+    """Return the event loop running in the current thread, if any."""
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+class AsyncSink(abc.ABC):
+    """Batching asyncio sink base class.
+
+    Lines written during one event loop iteration are joined into a single
+    write. The sink is saturated while the bytes waiting to be written, in
+    the sink and in the transport, exceed ``high_water``, until they drop
+    below ``low_water`` again. While saturated only every
+    ``sample_every``-th line is kept. Lines are also dropped when the
+    pending buffer would exceed ``max_pending`` bytes, e.g. while a
+    collector is unreachable.
+
+    Sinks are bound to the event loop running ``start``. ``write`` may be
+    called from other threads, e.g. the writer thread of a deferred access
+    logger, and hands the line over to the loop.
+    """
+
+    def __init__(
+        self,
+        high_water: int = 64 * 1024,
+        low_water: int = 16 * 1024,
+        sample_every: int = 10,
+        max_pending: int = 4 * 1024 * 1024,
+        retry_delay: float = 0.1,
+        max_retry_delay: float = 5.0,
+    ) -> None:
+        """Create a sink.
+
+        Args:
+            high_water (int): Backlog in bytes at which the sink starts
+                sampling. Defaults to 64 KiB.
+            low_water (int): Backlog in bytes at which the sink stops
+                sampling. Defaults to 16 KiB.
+            sample_every (int): Keep one of this many lines while saturated.
+                Defaults to 10.
+            max_pending (int): Maximum bytes buffered by the sink. Defaults
+                to 4 MiB.
+            retry_delay (float): Initial delay in seconds before retrying a
+                failed connection or write. Defaults to 0.1.
+            max_retry_delay (float): Maximum retry delay in seconds. Defaults
+                to 5.0.
+
+        Raises:
+            ValueError: Invalid water marks or sampling rate.
+        """
+        if not 0 <= low_water <= high_water:
+            raise ValueError("low_water must be between 0 and high_water")
+        if sample_every < 1:
+            raise ValueError("sample_every must be positive")
+
+        self._high_water = high_water
+        self._low_water = low_water
+        self._sample_every = sample_every
+        self._max_pending = max_pending
+        self._retry_delay = retry_delay
+        self._max_retry_delay = max_retry_delay
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending: List[bytes] = []
+        self._pending_bytes = 0
+        self._saturated = False
+        self._skipped = 0
+        self._scheduled = False
+        self._closed = False
+        #: Lines skipped by sampling while saturated.
+        self.sampled = 0
+        #: Lines dropped because the pending buffer was full.
+        self.dropped = 0
+
+    @property
+    def saturated(self) -> bool:
+        """Whether the sink currently samples lines."""
+        return self._saturated
+
+    async def start(self) -> None:
+        """Bind the sink to the running event loop and open it."""
+        self._loop = asyncio.get_running_loop()
+        await self._open()
+
+    def write(self, line: str) -> None:
+        """Queue a line for writing.
+
+        Args:
+            line (str): Access log line without a trailing newline.
+
+        Raises:
+            RuntimeError: The sink was not started.
+        """
+        loop = self._loop
+        if loop is None:
+            raise RuntimeError("Sink is not started")
+
+        if _running_loop() is not loop:
+            loop.call_soon_threadsafe(self.write, line)
+            return
+
+        if self._saturated:
+            self._skipped += 1
+            if self._skipped % self._sample_every:
+                self.sampled += 1
+                return
+
+        data = f"{line}\n".encode()
+        if self._closed or self._pending_bytes + len(data) > self._max_pending:
+            self.dropped += 1
+            return
+
+        self._pending.append(data)
+        self._pending_bytes += len(data)
+        self._update()
+        self._schedule()
+
+    async def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until all queued lines were handed to the operating system.
+
+        Args:
+            timeout (float): Maximum seconds to wait. Optional, defaults to
+                None (wait forever).
+
+        Returns:
+            bool: Whether the backlog was written before the timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._pending or self._buffered():
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+
+            await asyncio.sleep(0.005)
+
+        return True
+
+    async def close(self, timeout: Optional[float] = 5.0) -> None:
+        """Flush and close the sink.
+
+        Args:
+            timeout (float): Maximum seconds to wait for the backlog.
+                Optional, defaults to 5.0.
+        """
+        await self.flush(timeout)
+        self._closed = True
+        await self._close()
+
+    def _schedule(self, delay: float = 0.0) -> None:
+        """Schedule a drain of the pending buffer."""
+        if self._scheduled or self._loop is None:
+            return
+
+        self._scheduled = True
+        if delay:
+            self._loop.call_later(delay, self._drain)
+        else:
+            self._loop.call_soon(self._drain)
+
+    def _drain(self) -> None:
+        """Hand the pending lines to the sink as a single write."""
+        self._scheduled = False
+        if not self._pending or not self._ready():
+            return
+
+        data = b"".join(self._pending)
+        self._pending.clear()
+        self._pending_bytes = 0
+        self._send(data)
+        self._update()
+
+    def _requeue(self, data: bytes) -> None:
+        """Put back lines that failed to be written."""
+        self._pending.insert(0, data)
+        self._pending_bytes += len(data)
+        self._update()
+
+    def _update(self) -> None:
+        """Update the saturation state from the backlog."""
+        backlog = self._pending_bytes + self._buffered()
+        if backlog >= self._high_water:
+            self._saturated = True
+        elif backlog <= self._low_water:
+            self._saturated = False
+
+    async def _open(self) -> None:  # noqa: B027
+        """Open the sink, nothing by default."""
+
+    @abc.abstractmethod
+    def _ready(self) -> bool:
+        """Return whether the sink accepts a write."""
+
+    @abc.abstractmethod
+    def _send(self, data: bytes) -> None:
+        """Write a batch of lines."""
+
+    @abc.abstractmethod
+    def _buffered(self) -> int:
+        """Return the number of bytes written but not yet flushed."""
+
+    async def _close(self) -> None:  # noqa: B027
+        """Release the sink resources, nothing by default."""
+
+
+class _SinkProtocol(asyncio.Protocol):
+    """Stream protocol reporting connection and flow control events."""
+
+    def __init__(self, sink: "_StreamSink") -> None:
+        self._sink = sink
+
+    def connection_made(self, transport: asyncio.BaseTransport) -> None:
+        self._sink._connected(transport)  # type: ignore[arg-type]
+
+    def connection_lost(self, exc: Optional[Exception]) -> None:
+        self._sink._disconnected(exc)
+
+    def pause_writing(self) -> None:
+        self._sink._paused = True
+
+    def resume_writing(self) -> None:
+        self._sink._paused = False
+        self._sink._schedule()
+
+
+class _StreamSink(AsyncSink):
+    """Sink writing to a stream connection, reconnecting when it is lost.
+
+    The transport write buffer limits are set to the sink water marks, so
+    the transport pauses the sink while the collector does not keep up.
+    Lines not yet handed to the transport are kept and sent after
+    reconnecting. Lines buffered by a lost transport are lost with it.
+    """
+
+    def __init__(self, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self._transport: Optional[asyncio.WriteTransport] = None
+        self._paused = False
+        self._reconnecting: Optional["asyncio.Task[None]"] = None
+
+    @abc.abstractmethod
+    async def _create_connection(self) -> None:
+        """Connect to the collector."""
+
+    async def _open(self) -> None:
+        """Connect in the background, buffering lines until connected."""
+        self._reconnect()
+
+    def _reconnect(self) -> None:
+        """Start reconnecting unless already reconnecting."""
+        if self._reconnecting is None or self._reconnecting.done():
+            loop = asyncio.get_running_loop()
+            self._reconnecting = loop.create_task(self._reconnect_loop())
+
+    async def _reconnect_loop(self) -> None:
+        """Connect, retrying with exponential backoff."""
+        delay = 0.0
+        while not self._closed and self._transport is None:
+            await asyncio.sleep(delay)
+            try:
+                await self._create_connection()
+            except OSError as error:
+                if not delay:
+                    _logger.warning("Access log collector unavailable: %s", error)
+                delay = min(delay * 2 or self._retry_delay, self._max_retry_delay)
+
+    def _connected(self, transport: asyncio.WriteTransport) -> None:
+        """Use a new connection."""
+        transport.set_write_buffer_limits(self._high_water, self._low_water)
+        self._transport = transport
+        self._paused = False
+        self._schedule()
+
+    def _disconnected(self, exc: Optional[Exception]) -> None:
+        """Forget a lost connection and reconnect."""
+        self._transport = None
+        self._paused = False
+        if not self._closed:
+            _logger.warning("Access log collector connection lost: %s", exc)
+            self._reconnect()
+
+    def _ready(self) -> bool:
+        transport = self._transport
+        return transport is not None and not self._paused
+
+    def _send(self, data: bytes) -> None:
+        if self._transport is not None:
+            self._transport.write(data)
+
+    def _buffered(self) -> int:
+        if self._transport is None:
+            return 0
+
+        return self._transport.get_write_buffer_size()
+
+    async def _close(self) -> None:
+        if self._reconnecting is not None:
+            self._reconnecting.cancel()
+        if self._transport is not None:
+            self._transport.close()
+
+
+class UnixSink(_StreamSink):
+    """Write access log lines to a Unix domain stream socket."""
+
+    def __init__(self, path: str, **kwargs: Any) -> None:
+        """Create a Unix domain socket sink.
+
+        Args:
+            path (str): Socket path of the collector.
+            **kwargs (Any): ``AsyncSink`` keyword arguments.
+        """
+        super().__init__(**kwargs)
+        self._path = path
+
+    async def _create_connection(self) -> None:
+        await asyncio.get_running_loop().create_unix_connection(
+            lambda: _SinkProtocol(self), self._path
+        )
+
+
+class TCPSink(_StreamSink):
+    """Write access log lines to a TCP collector."""
+
+    def __init__(self, host: str, port: int, **kwargs: Any) -> None:
+        """Create a TCP sink.
+
+        Args:
+            host (str): Collector host.
+            port (int): Collector port.
+            **kwargs (Any): ``AsyncSink`` keyword arguments.
+        """
+        super().__init__(**kwargs)
+        self._host = host
+        self._port = port
+
+    async def _create_connection(self) -> None:
+        await asyncio.get_running_loop().create_connection(
+            lambda: _SinkProtocol(self), self._host, self._port
+        )
+
+
+class AsyncFileSink(AsyncSink):
+    """Append access log lines to a file from an executor thread.
+
+    File writes block, so batches are written by an executor thread, one at
+    a time to keep lines in order. The batch being written counts towards
+    the backlog. Failed writes are retried with exponential backoff.
+    """
+
+    def __init__(
+        self, path: str, executor: Optional[Executor] = None, **kwargs: Any
+    ) -> None:
+        """Create a file sink.
+
+        Args:
+            path (str): File to append to.
+            executor (Executor): Executor writing the file. Optional,
+                defaults to None (the event loop default executor).
+            **kwargs (Any): ``AsyncSink`` keyword arguments.
+        """
+        super().__init__(**kwargs)
+        self._path = path
+        self._executor = executor
+        self._file: Optional[BinaryIO] = None
+        self._writing = 0
+        self._delay = self._retry_delay
+
+    async def _open(self) -> None:
+        self._file = await asyncio.get_running_loop().run_in_executor(
+            self._executor, open, self._path, "ab"
+        )
+
+    def _ready(self) -> bool:
+        return self._file is not None and not self._writing
+
+    def _send(self, data: bytes) -> None:
+        self._writing = len(data)
+        future = asyncio.get_running_loop().run_in_executor(
+            self._executor, self._write_file, data
+        )
+        future.add_done_callback(lambda future: self._written(data, future))
+
+    def _write_file(self, data: bytes) -> None:
+        """Write and flush a batch on the executor thread."""
+        file = cast(BinaryIO, self._file)
+        file.write(data)
+        file.flush()
+
+    def _written(self, data: bytes, future: "asyncio.Future[None]") -> None:
+        """Continue with the next batch once a write completed."""
+        self._writing = 0
+        error = future.exception()
+        if error is not None:
+            _logger.warning("Failed to write access log file: %s", error)
+            self._requeue(data)
+            self._schedule(self._delay)
+            self._delay = min(self._delay * 2, self._max_retry_delay)
+            return
+
+        self._delay = self._retry_delay
+        self._update()
+        self._schedule()
+
+    def _buffered(self) -> int:
+        return self._writing
+
+    async def _close(self) -> None:
+        if self._file is not None:
+            await asyncio.get_running_loop().run_in_executor(
+                self._executor, self._file.close
+            )
+            self._file = None
@@ -0,0 +1,14 @@
+"""Access log sink interface."""
+
+from typing import Protocol
+
+
+class Sink(Protocol):
+    """Destination of formatted access log lines.
+
+    An access logger created with a sink writes each formatted line to it
+    instead of its ``logging.Logger``.
+    """
+
+    def write(self, line: str) -> None:
+        """Write a single access log line without a trailing newline."""
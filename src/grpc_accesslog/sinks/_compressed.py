@@ -0,0 +1,343 @@
+"""Streaming compressed file sink with rotation.
+
+zstd compression requires the ``zstandard`` package.
+"""
+
+import glob
+import os
+import time
+import zlib
+from typing import Any
+from typing import BinaryIO
+from typing import Callable
+from typing import Iterator
+from typing import List
+from typing import NamedTuple
+from typing import Optional
+from typing import Protocol
+from typing import Union
+from typing import cast
+
+from .._deferred import DeferredWriter
+
+
+class _Compressor(Protocol):
+    """Streaming compressor of a single compressed segment."""
+
+    def compress(self, data: bytes) -> bytes:
+        """Compress data, returning compressed output available so far."""
+
+    def flush(self) -> bytes:
+        """Return output making all data written so far decompressible."""
+
+    def finish(self) -> bytes:
+        """Return the output ending the compressed stream."""
+
+
+class _Decompressor(Protocol):
+    """Streaming decompressor of a single compressed segment."""
+
+    def decompress(self, data: bytes) -> bytes:
+        """Decompress data, returning decompressed output available so far."""
+
+
+class _GzipCompressor:
+    """Streaming gzip compressor."""
+
+    def __init__(self, level: int) -> None:
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class _ZstdCompressor:
+    """Streaming zstd compressor."""
+
+    def __init__(self, level: int) -> None:
+        import zstandard
+
+        self._zstandard = zstandard
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(self._zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(self._zstandard.COMPRESSOBJ_FLUSH_FINISH)
+
+
+def _gzip_decompressor() -> _Decompressor:
+    return zlib.decompressobj(31)
+
+
+def _zstd_decompressor() -> _Decompressor:
+    import zstandard
+
+    return zstandard.ZstdDecompressor().decompressobj()  # type: ignore[no-any-return]
+
+
+#: Queue marker requesting a compressor flush.
+_FLUSH = object()
+
+
+class _Codec(NamedTuple):
+    """Compression format of segments."""
+
+    suffix: str
+    level: int
+    compressor: Callable[[int], _Compressor]
+    decompressor: Callable[[], _Decompressor]
+
+
+CODECS = {
+    "gzip": _Codec(".gz", 6, _GzipCompressor, _gzip_decompressor),
+    "zstd": _Codec(".zst", 3, _ZstdCompressor, _zstd_decompressor),
+}
+
+
+class CompressedFileSink:
+    """Write access log lines to rotating compressed files.
+
+    Lines are queued and compressed by a background writer thread, so the
+    thread writing a line only pays for a queue insert. Each segment is a
+    single compressed stream named ``<path>.<UTC time>.<sequence><suffix>``,
+    e.g. ``access.log.20211003T120000.0000.gz``, so segments sort in write
+    order. A segment is finished and a new one started once its compressed
+    size reaches ``max_bytes`` or it is older than ``max_age`` seconds.
+
+    The compressor is flushed every ``flush_interval`` seconds, so readers
+    of the current segment see lines at most that old. The writer thread
+    also wakes up while no lines are written, to flush the last lines and
+    to finish a segment reaching ``max_age``; the next line then starts a
+    new segment.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, "os.PathLike[str]"],
+        codec: str = "gzip",
+        level: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        max_age: Optional[float] = None,
+        flush_interval: float = 1.0,
+    ) -> None:
+        """Create a compressed file sink.
+
+        Args:
+            path (Union[str, os.PathLike[str]]): Segment path prefix.
+            codec (str): "gzip" or "zstd". Defaults to "gzip".
+            level (int): Compression level. Optional, defaults to None
+                (6 for gzip, 3 for zstd).
+            max_bytes (int): Compressed segment size triggering rotation.
+                Optional, defaults to None (no size limit).
+            max_age (float): Segment age in seconds triggering rotation.
+                Optional, defaults to None (no age limit).
+            flush_interval (float): Seconds between compressor flushes.
+                Defaults to 1.0.
+
+        Raises:
+            ValueError: Unknown codec.
+        """
+        if codec not in CODECS:
+            raise ValueError(f"Unknown codec: {codec}")
+
+        self._codec = CODECS[codec]
+        self._level = self._codec.level if level is None else level
+        # Fail early, e.g. when zstandard is not installed.
+        self._codec.compressor(self._level)
+
+        self._path = os.fspath(path)
+        self._max_bytes = max_bytes
+        self._max_age = max_age
+        self._flush_interval = flush_interval
+        self._file: Optional[BinaryIO] = None
+        self._compressor: Optional[_Compressor] = None
+        self._opened = 0.0
+        self._flushed = 0.0
+        self._size = 0
+        self._dirty = False
+        intervals = [interval for interval in (flush_interval, max_age) if interval]
+        self._writer: DeferredWriter[Any] = DeferredWriter(
+            self._write,
+            f"{os.path.basename(self._path)}-compressor",
+            self._idle,
+            min(intervals) if intervals else None,
+        )
+
+    def write(self, line: str) -> None:
+        """Queue a line for compression.
+
+        Args:
+            line (str): Access log line without a trailing newline.
+        """
+        self._writer.submit(line)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Compress and write all queued lines to the current segment.
+
+        Args:
+            timeout (float): Maximum seconds to wait. Optional, defaults to
+                None (wait forever).
+
+        Returns:
+            bool: Whether all lines were written before the timeout
+        """
+        self._writer.submit(_FLUSH)
+        return self._writer.flush(timeout)
+
+    def close(self) -> None:
+        """Write all queued lines and finish the current segment."""
+        self._writer.close()
+        self._finish()
+
+    def segments(self) -> List[str]:
+        """Return the segment paths in write order.
+
+        Returns:
+            List[str]: Segment paths
+        """
+        return segments(self._path, self._codec.suffix)
+
+    def _write(self, line: Any) -> None:
+        """Compress a line on the writer thread."""
+        now = time.monotonic()
+        if line is _FLUSH:
+            self._sync(now)
+            return
+
+        if self._file is None or self._expired(now):
+            self._rotate(now)
+
+        compressor = cast(_Compressor, self._compressor)
+        self._output(compressor.compress(f"{line}\n".encode()))
+        self._dirty = True
+        if now - self._flushed >= self._flush_interval:
+            self._sync(now)
+
+    def _idle(self) -> None:
+        """Flush or finish the current segment while no lines are written."""
+        now = time.monotonic()
+        if self._file is not None and self._expired(now):
+            self._finish()
+        elif now - self._flushed >= self._flush_interval:
+            self._sync(now)
+
+    def _expired(self, now: float) -> bool:
+        """Return whether the current segment should be rotated."""
+        return (self._max_bytes is not None and self._size >= self._max_bytes) or (
+            self._max_age is not None and now - self._opened >= self._max_age
+        )
+
+    def _output(self, data: bytes) -> None:
+        """Append compressed output to the current segment."""
+        if data and self._file is not None:
+            self._file.write(data)
+            self._size += len(data)
+
+    def _sync(self, now: float) -> None:
+        """Flush the compressor and the file."""
+        self._flushed = now
+        if self._dirty and self._compressor is not None and self._file is not None:
+            self._output(self._compressor.flush())
+            self._file.flush()
+            self._dirty = False
+
+    def _rotate(self, now: float) -> None:
+        """Finish the current segment and start a new one."""
+        self._finish()
+        stamp = time.strftime("%Y%m%dT%H%M%S", time.gmtime())
+        sequence = 0
+        while self._file is None:
+            try:
+                self._file = open(
+                    f"{self._path}.{stamp}.{sequence:04d}{self._codec.suffix}", "xb"
+                )
+            except FileExistsError:
+                sequence += 1
+
+        self._compressor = self._codec.compressor(self._level)
+        self._opened = self._flushed = now
+        self._size = 0
+
+    def _finish(self) -> None:
+        """End the compressed stream of the current segment and close it."""
+        if self._file is None or self._compressor is None:
+            return
+
+        self._output(self._compressor.finish())
+        self._file.close()
+        self._file = None
+        self._compressor = None
+        self._dirty = False
+
+
+def segments(path: Union[str, "os.PathLike[str]"], suffix: str = "") -> List[str]:
+    """Return the compressed segments of a sink path in write order.
+
+    Args:
+        path (Union[str, os.PathLike[str]]): Segment path prefix.
+        suffix (str): Only return segments with this suffix. Defaults to ""
+            (all codecs).
+
+    Returns:
+        List[str]: Segment paths
+    """
+    prefix = glob.escape(os.fspath(path))
+    suffixes = [suffix] if suffix else [codec.suffix for codec in CODECS.values()]
+    return sorted(
+        match
+        for candidate in suffixes
+        for match in glob.glob(f"{prefix}.*.*{candidate}")
+    )
+
+
+def _decompressor(path: str) -> _Decompressor:
+    """Return a decompressor matching a segment suffix."""
+    for codec in CODECS.values():
+        if path.endswith(codec.suffix):
+            return codec.decompressor()
+
+    raise ValueError(f"Unknown segment suffix: {path}")
+
+
+def read_lines(
+    path: Union[str, "os.PathLike[str]"], chunk_size: int = 64 * 1024
+) -> Iterator[str]:
+    """Stream the lines of compressed segments.
+
+    ``path`` is either a single segment or the path prefix of a sink, in
+    which case all its segments are read in write order. Segments still
+    being written are read up to their last flush.
+
+    Args:
+        path (Union[str, os.PathLike[str]]): Segment or segment path prefix.
+        chunk_size (int): Compressed bytes read at once. Defaults to 64 KiB.
+
+    Yields:
+        str: Access log lines without trailing newlines
+    """
+    path = os.fspath(path)
+    paths = [path] if os.path.isfile(path) else segments(path)
+    for segment in paths:
+        decompressor = _decompressor(segment)
+        pending = b""
+        with open(segment, "rb") as file:
+            while True:
+                chunk = file.read(chunk_size)
+                if not chunk:
+                    break
+
+                data = pending + decompressor.decompress(chunk)
+                *lines, pending = data.split(b"\n")
+                for line in lines:
+                    yield line.decode()
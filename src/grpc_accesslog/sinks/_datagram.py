@@ -0,0 +1,219 @@
+"""Batched UDP syslog emission."""
+
+import abc
+import logging
+import os
+import socket
+import threading
+import time
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import Optional
+
+
+_logger = logging.getLogger(__name__)
+
+#: UDP payload fitting an Ethernet frame without IP fragmentation.
+DEFAULT_MTU = 1472
+
+
+def truncate(data: bytes, max_bytes: int) -> bytes:
+    """Cut UTF-8 data to at most ``max_bytes`` without splitting a character.
+
+    Args:
+        data (bytes): UTF-8 encoded data.
+        max_bytes (int): Maximum size in bytes.
+
+    Returns:
+        bytes: Data, or its longest prefix of whole characters that fits
+    """
+    if len(data) <= max_bytes:
+        return data
+
+    cut = max_bytes
+    while cut and data[cut] & 0xC0 == 0x80:
+        cut -= 1
+    return data[:cut]
+
+
+def pack(records: Iterable[bytes], mtu: int) -> Iterator[bytes]:
+    """Pack newline separated records into datagrams of at most ``mtu`` bytes.
+
+    Records longer than ``mtu`` are truncated at a character boundary and
+    sent alone.
+
+    Args:
+        records (Iterable[bytes]): Encoded records without separators.
+        mtu (int): Maximum datagram size in bytes.
+
+    Yields:
+        bytes: Datagram payloads
+    """
+    batch: List[bytes] = []
+    size = -1
+    for record in records:
+        record = truncate(record, mtu)
+        if batch and size + 1 + len(record) > mtu:
+            yield b"\n".join(batch)
+            batch = []
+            size = -1
+        batch.append(record)
+        size += 1 + len(record)
+
+    if batch:
+        yield b"\n".join(batch)
+
+
+class _Flusher:
+    """Daemon thread flushing a sink periodically."""
+
+    def __init__(self, sink: "_DatagramSender", interval: float, name: str) -> None:
+        self._sink = sink
+        self._interval = interval
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self._interval):
+            self._sink.flush()
+
+
+class _DatagramSender(abc.ABC):
+    """UDP sender packing buffered records into datagrams.
+
+    Shared by ``SyslogSink`` and ``StatsdReporter``.
+    """
+
+    def __init__(self, host: str, port: int, mtu: int) -> None:
+        self._address = (host, port)
+        self._mtu = mtu
+        family = socket.AF_INET6 if ":" in host else socket.AF_INET
+        self._socket = socket.socket(family, socket.SOCK_DGRAM)
+        self._lock = threading.Lock()
+        self._flusher: Optional[_Flusher] = None
+        #: Datagrams sent.
+        self.sent = 0
+        #: Datagrams which could not be sent.
+        self.dropped = 0
+
+    def _start_flusher(self, interval: float, name: str) -> None:
+        """Start flushing periodically unless the interval is 0."""
+        if interval > 0:
+            self._flusher = _Flusher(self, interval, name)
+
+    def _send(self, datagrams: Iterable[bytes]) -> None:
+        """Send datagrams, counting failures instead of raising."""
+        for datagram in datagrams:
+            try:
+                self._socket.sendto(datagram, self._address)
+                self.sent += 1
+            except OSError as error:
+                self.dropped += 1
+                _logger.debug("Failed to send access log datagram: %s", error)
+
+    @abc.abstractmethod
+    def flush(self) -> None:
+        """Send all buffered records."""
+
+    def close(self) -> None:
+        """Stop the flusher thread, send buffered records and close the socket."""
+        if self._flusher is not None:
+            self._flusher.stop()
+            self._flusher = None
+        self.flush()
+        self._socket.close()
+
+
+class SyslogSink(_DatagramSender):
+    """Send access log lines as RFC 5424 syslog messages over UDP.
+
+    Lines are buffered and several messages are packed into each datagram,
+    separated by newlines, up to the MTU. A datagram is sent as soon as the
+    next message would not fit, and buffered messages are sent every
+    ``flush_interval`` seconds by a background thread.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 514,
+        facility: int = 16,
+        severity: int = 6,
+        app_name: str = "grpc-accesslog",
+        hostname: Optional[str] = None,
+        msg_id: str = "access",
+        mtu: int = DEFAULT_MTU,
+        flush_interval: float = 1.0,
+    ) -> None:
+        """Create a syslog sink.
+
+        Args:
+            host (str): Syslog receiver host. Defaults to "127.0.0.1".
+            port (int): Syslog receiver port. Defaults to 514.
+            facility (int): Syslog facility. Defaults to 16 (local0).
+            severity (int): Syslog severity. Defaults to 6 (informational).
+            app_name (str): RFC 5424 APP-NAME. Defaults to "grpc-accesslog".
+            hostname (str): RFC 5424 HOSTNAME. Optional, defaults to None
+                (``socket.gethostname()``).
+            msg_id (str): RFC 5424 MSGID. Defaults to "access".
+            mtu (int): Maximum datagram size in bytes. Defaults to 1472.
+            flush_interval (float): Seconds between background flushes, 0 to
+                only flush on demand. Defaults to 1.0.
+        """
+        super().__init__(host, port, mtu)
+        hostname = hostname or socket.gethostname() or "-"
+        self._pri = f"<{facility * 8 + severity}>1 ".encode()
+        self._header = f" {hostname} {app_name} {os.getpid()} {msg_id} - ".encode()
+        self._second = -1
+        self._timestamp = b""
+        self._buffer: List[bytes] = []
+        self._size = -1
+        self._start_flusher(flush_interval, "syslog-flusher")
+
+    def _time(self) -> bytes:
+        """Return the current RFC 3339 timestamp, formatting seconds once."""
+        now = time.time()
+        second = int(now)
+        if second != self._second:
+            self._second = second
+            self._timestamp = time.strftime(
+                "%Y-%m-%dT%H:%M:%S", time.gmtime(second)
+            ).encode()
+
+        return b"%s.%06dZ" % (self._timestamp, int((now - second) * 1e6))
+
+    def write(self, line: str) -> None:
+        """Buffer a line, sending a datagram when the next would be full.
+
+        Args:
+            line (str): Access log line.
+        """
+        with self._lock:
+            message = b"".join((self._pri, self._time(), self._header, line.encode()))
+            message = truncate(message, self._mtu)
+            full = None
+            if self._buffer and self._size + 1 + len(message) > self._mtu:
+                full = b"\n".join(self._buffer)
+                self._buffer = []
+                self._size = -1
+            self._buffer.append(message)
+            self._size += 1 + len(message)
+
+        if full is not None:
+            self._send((full,))
+
+    def flush(self) -> None:
+        """Send all buffered messages."""
+        with self._lock:
+            buffer = self._buffer
+            self._buffer = []
+            self._size = -1
+
+        if buffer:
+            self._send((b"\n".join(buffer),))
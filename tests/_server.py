@@ -16,6 +16,15 @@ from tests.proto.test_service_pb2_grpc import TestServiceServicer
 class Servicer(TestServiceServicer):
     """Servicer implementation."""
 
+    def __init__(self, delay: float = 0.1) -> None:
+        """Create a servicer.
+
+        Args:
+            delay (float): Seconds to sleep after each streamed response.
+                Defaults to 0.1.
+        """
+        self.delay = delay
+
     def UnaryUnary(  # noqa: N802
         self, request: Request, context: grpc.ServicerContext
     ) -> Response:
@@ -28,7 +37,7 @@ class Servicer(TestServiceServicer):
         """Handle a UnaryStream request."""
         for char in request.data:
             yield Response(data=char)
-            time.sleep(0.1)
+            time.sleep(self.delay)
 
     def StreamUnary(  # noqa: N802
         self, request_iterator: Iterator[Request], context: grpc.ServicerContext
@@ -42,12 +51,21 @@ class Servicer(TestServiceServicer):
         """Handle a StreamStream request."""
         for request in request_iterator:
             yield Response(data=request.data)
-            time.sleep(0.1)
+            time.sleep(self.delay)
 
 
 class AsyncServicer(TestServiceServicer):
     """Servicer implementation."""
 
+    def __init__(self, delay: float = 0.1) -> None:
+        """Create a servicer.
+
+        Args:
+            delay (float): Seconds to sleep after each streamed response.
+                Defaults to 0.1.
+        """
+        self.delay = delay
+
     async def UnaryUnary(  # noqa: N802
         self, request: Request, context: grpc.ServicerContext
     ) -> Response:
@@ -60,7 +78,7 @@ class AsyncServicer(TestServiceServicer):
         """Handle a UnaryStream request."""
         for char in request.data:
             yield Response(data=char)
-            time.sleep(0.1)
+            time.sleep(self.delay)
 
     async def StreamUnary(  # noqa: N802
         self, request_iterator: AsyncIterator[Request], context: grpc.ServicerContext
@@ -76,4 +94,4 @@ class AsyncServicer(TestServiceServicer):
         """Handle a StreamStream request."""
         async for request in request_iterator:
             yield Response(data=request.data)
-            time.sleep(0.1)
+            time.sleep(self.delay)
@@ -0,0 +1,47 @@
+# Generated by the protocol buffer compiler.  DO NOT EDIT!
+# source: tests/proto/otlp_logs.proto
+"""Generated protocol buffer code."""
+
+from google.protobuf import descriptor as _descriptor
+from google.protobuf import descriptor_pool as _descriptor_pool
+from google.protobuf import symbol_database as _symbol_database
+from google.protobuf.internal import builder as _builder
+
+
+# @@protoc_insertion_point(imports)
+
+_sym_db = _symbol_database.Default()
+
+
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(
+    b'\n\x1btests/proto/otlp_logs.proto\x12%opentelemetry.proto.collector.logs.v1"f\n\x18\x45xportLogsServiceRequest\x12J\n\rresource_logs\x18\x01 \x03(\x0b\x32\x33.opentelemetry.proto.collector.logs.v1.ResourceLogs"\x1b\n\x19\x45xportLogsServiceResponse"\x97\x01\n\x0cResourceLogs\x12\x41\n\x08resource\x18\x01 \x01(\x0b\x32/.opentelemetry.proto.collector.logs.v1.Resource\x12\x44\n\nscope_logs\x18\x02 \x03(\x0b\x32\x30.opentelemetry.proto.collector.logs.v1.ScopeLogs"O\n\x08Resource\x12\x43\n\nattributes\x18\x01 \x03(\x0b\x32/.opentelemetry.proto.collector.logs.v1.KeyValue"\x9e\x01\n\tScopeLogs\x12J\n\x05scope\x18\x01 \x01(\x0b\x32;.opentelemetry.proto.collector.logs.v1.InstrumentationScope\x12\x45\n\x0blog_records\x18\x02 \x03(\x0b\x32\x30.opentelemetry.proto.collector.logs.v1.LogRecord"5\n\x14InstrumentationScope\x12\x0c\n\x04name\x18\x01 \x01(\t\x12\x0f\n\x07version\x18\x02 \x01(\t"\xaa\x02\n\tLogRecord\x12\x16\n\x0etime_unix_nano\x18\x01 \x01(\x06\x12\x17\n\x0fseverity_number\x18\x02 \x01(\x05\x12\x15\n\rseverity_text\x18\x03 \x01(\t\x12=\n\x04\x62ody\x18\x05 \x01(\x0b\x32/.opentelemetry.proto.collector.logs.v1.AnyValue\x12\x43\n\nattributes\x18\x06 \x03(\x0b\x32/.opentelemetry.proto.collector.logs.v1.KeyValue\x12\r\n\x05\x66lags\x18\x08 \x01(\x07\x12\x10\n\x08trace_id\x18\t \x01(\x0c\x12\x0f\n\x07span_id\x18\n \x01(\x0c\x12\x1f\n\x17observed_time_unix_nano\x18\x0b \x01(\x06"W\n\x08KeyValue\x12\x0b\n\x03key\x18\x01 \x01(\t\x12>\n\x05value\x18\x02 \x01(\x0b\x32/.opentelemetry.proto.collector.logs.v1.AnyValue"\x85\x01\n\x08\x41nyValue\x12\x16\n\x0cstring_value\x18\x01 \x01(\tH\x00\x12\x14\n\nbool_value\x18\x02 \x01(\x08H\x00\x12\x13\n\tint_value\x18\x03 \x01(\x03H\x00\x12\x16\n\x0c\x64ouble_value\x18\x04 \x01(\x01H\x00\x12\x15\n\x0b\x62ytes_value\x18\x07 \x01(\x0cH\x00\x42\x07\n\x05value2\x9b\x01\n\x0bLogsService\x12\x8b\x01\n\x06\x45xport\x12?.opentelemetry.proto.collector.logs.v1.ExportLogsServiceRequest\x1a@.opentelemetry.proto.collector.logs.v1.ExportLogsServiceResponseb\x06proto3'
+)
+
+_globals = globals()
+_builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
+_builder.BuildTopDescriptorsAndMessages(
+    DESCRIPTOR, "tests.proto.otlp_logs_pb2", _globals
+)
+if not _descriptor._USE_C_DESCRIPTORS:
+    DESCRIPTOR._loaded_options = None
+    _globals["_EXPORTLOGSSERVICEREQUEST"]._serialized_start = 70
+    _globals["_EXPORTLOGSSERVICEREQUEST"]._serialized_end = 172
+    _globals["_EXPORTLOGSSERVICERESPONSE"]._serialized_start = 174
+    _globals["_EXPORTLOGSSERVICERESPONSE"]._serialized_end = 201
+    _globals["_RESOURCELOGS"]._serialized_start = 204
+    _globals["_RESOURCELOGS"]._serialized_end = 355
+    _globals["_RESOURCE"]._serialized_start = 357
+    _globals["_RESOURCE"]._serialized_end = 436
+    _globals["_SCOPELOGS"]._serialized_start = 439
+    _globals["_SCOPELOGS"]._serialized_end = 597
+    _globals["_INSTRUMENTATIONSCOPE"]._serialized_start = 599
+    _globals["_INSTRUMENTATIONSCOPE"]._serialized_end = 652
+    _globals["_LOGRECORD"]._serialized_start = 655
+    _globals["_LOGRECORD"]._serialized_end = 953
+    _globals["_KEYVALUE"]._serialized_start = 955
+    _globals["_KEYVALUE"]._serialized_end = 1042
+    _globals["_ANYVALUE"]._serialized_start = 1045
+    _globals["_ANYVALUE"]._serialized_end = 1178
+    _globals["_LOGSSERVICE"]._serialized_start = 1181
+    _globals["_LOGSSERVICE"]._serialized_end = 1336
+# @@protoc_insertion_point(module_scope)
@@ -0,0 +1,147 @@
+from collections.abc import Iterable as _Iterable
+from collections.abc import Mapping as _Mapping
+from typing import ClassVar as _ClassVar
+from typing import Optional as _Optional
+from typing import Union as _Union
+
+from google.protobuf import descriptor as _descriptor
+from google.protobuf import message as _message
+from google.protobuf.internal import containers as _containers
+
+DESCRIPTOR: _descriptor.FileDescriptor
+
+class ExportLogsServiceRequest(_message.Message):
+    __slots__ = ("resource_logs",)
+    RESOURCE_LOGS_FIELD_NUMBER: _ClassVar[int]
+    resource_logs: _containers.RepeatedCompositeFieldContainer[ResourceLogs]
+    def __init__(
+        self, resource_logs: _Optional[_Iterable[_Union[ResourceLogs, _Mapping]]] = ...
+    ) -> None: ...
+
+class ExportLogsServiceResponse(_message.Message):
+    __slots__ = ()
+    def __init__(self) -> None: ...
+
+class ResourceLogs(_message.Message):
+    __slots__ = ("resource", "scope_logs")
+    RESOURCE_FIELD_NUMBER: _ClassVar[int]
+    SCOPE_LOGS_FIELD_NUMBER: _ClassVar[int]
+    resource: Resource
+    scope_logs: _containers.RepeatedCompositeFieldContainer[ScopeLogs]
+    def __init__(
+        self,
+        resource: _Optional[_Union[Resource, _Mapping]] = ...,
+        scope_logs: _Optional[_Iterable[_Union[ScopeLogs, _Mapping]]] = ...,
+    ) -> None: ...
+
+class Resource(_message.Message):
+    __slots__ = ("attributes",)
+    ATTRIBUTES_FIELD_NUMBER: _ClassVar[int]
+    attributes: _containers.RepeatedCompositeFieldContainer[KeyValue]
+    def __init__(
+        self, attributes: _Optional[_Iterable[_Union[KeyValue, _Mapping]]] = ...
+    ) -> None: ...
+
+class ScopeLogs(_message.Message):
+    __slots__ = ("scope", "log_records")
+    SCOPE_FIELD_NUMBER: _ClassVar[int]
+    LOG_RECORDS_FIELD_NUMBER: _ClassVar[int]
+    scope: InstrumentationScope
+    log_records: _containers.RepeatedCompositeFieldContainer[LogRecord]
+    def __init__(
+        self,
+        scope: _Optional[_Union[InstrumentationScope, _Mapping]] = ...,
+        log_records: _Optional[_Iterable[_Union[LogRecord, _Mapping]]] = ...,
+    ) -> None: ...
+
+class InstrumentationScope(_message.Message):
+    __slots__ = ("name", "version")
+    NAME_FIELD_NUMBER: _ClassVar[int]
+    VERSION_FIELD_NUMBER: _ClassVar[int]
+    name: str
+    version: str
+    def __init__(
+        self, name: _Optional[str] = ..., version: _Optional[str] = ...
+    ) -> None: ...
+
+class LogRecord(_message.Message):
+    __slots__ = (
+        "time_unix_nano",
+        "severity_number",
+        "severity_text",
+        "body",
+        "attributes",
+        "flags",
+        "trace_id",
+        "span_id",
+        "observed_time_unix_nano",
+    )
+    TIME_UNIX_NANO_FIELD_NUMBER: _ClassVar[int]
+    SEVERITY_NUMBER_FIELD_NUMBER: _ClassVar[int]
+    SEVERITY_TEXT_FIELD_NUMBER: _ClassVar[int]
+    BODY_FIELD_NUMBER: _ClassVar[int]
+    ATTRIBUTES_FIELD_NUMBER: _ClassVar[int]
+    FLAGS_FIELD_NUMBER: _ClassVar[int]
+    TRACE_ID_FIELD_NUMBER: _ClassVar[int]
+    SPAN_ID_FIELD_NUMBER: _ClassVar[int]
+    OBSERVED_TIME_UNIX_NANO_FIELD_NUMBER: _ClassVar[int]
+    time_unix_nano: int
+    severity_number: int
+    severity_text: str
+    body: AnyValue
+    attributes: _containers.RepeatedCompositeFieldContainer[KeyValue]
+    flags: int
+    trace_id: bytes
+    span_id: bytes
+    observed_time_unix_nano: int
+    def __init__(
+        self,
+        time_unix_nano: _Optional[int] = ...,
+        severity_number: _Optional[int] = ...,
+        severity_text: _Optional[str] = ...,
+        body: _Optional[_Union[AnyValue, _Mapping]] = ...,
+        attributes: _Optional[_Iterable[_Union[KeyValue, _Mapping]]] = ...,
+        flags: _Optional[int] = ...,
+        trace_id: _Optional[bytes] = ...,
+        span_id: _Optional[bytes] = ...,
+        observed_time_unix_nano: _Optional[int] = ...,
+    ) -> None: ...
+
+class KeyValue(_message.Message):
+    __slots__ = ("key", "value")
+    KEY_FIELD_NUMBER: _ClassVar[int]
+    VALUE_FIELD_NUMBER: _ClassVar[int]
+    key: str
+    value: AnyValue
+    def __init__(
+        self,
+        key: _Optional[str] = ...,
+        value: _Optional[_Union[AnyValue, _Mapping]] = ...,
+    ) -> None: ...
+
+class AnyValue(_message.Message):
+    __slots__ = (
+        "string_value",
+        "bool_value",
+        "int_value",
+        "double_value",
+        "bytes_value",
+    )
+    STRING_VALUE_FIELD_NUMBER: _ClassVar[int]
+    BOOL_VALUE_FIELD_NUMBER: _ClassVar[int]
+    INT_VALUE_FIELD_NUMBER: _ClassVar[int]
+    DOUBLE_VALUE_FIELD_NUMBER: _ClassVar[int]
+    BYTES_VALUE_FIELD_NUMBER: _ClassVar[int]
+    string_value: str
+    bool_value: bool
+    int_value: int
+    double_value: float
+    bytes_value: bytes
+    def __init__(
+        self,
+        string_value: _Optional[str] = ...,
+        bool_value: _Optional[bool] = ...,
+        int_value: _Optional[int] = ...,
+        double_value: _Optional[float] = ...,
+        bytes_value: _Optional[bytes] = ...,
+    ) -> None: ...
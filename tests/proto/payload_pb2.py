@@ -0,0 +1,35 @@
+# Generated by the protocol buffer compiler.  DO NOT EDIT!
+# source: tests/proto/payload.proto
+"""Generated protocol buffer code."""
+
+from google.protobuf import descriptor as _descriptor
+from google.protobuf import descriptor_pool as _descriptor_pool
+from google.protobuf import symbol_database as _symbol_database
+from google.protobuf.internal import builder as _builder
+
+
+# @@protoc_insertion_point(imports)
+
+_sym_db = _symbol_database.Default()
+
+
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(
+    b'\n\x19tests/proto/payload.proto"&\n\x04\x43\x61rd\x12\x0e\n\x06number\x18\x01 \x01(\t\x12\x0e\n\x06holder\x18\x02 \x01(\t"0\n\x04Item\x12\x0c\n\x04name\x18\x01 \x01(\t\x12\x0c\n\x04\x62lob\x18\x02 \x01(\x0c\x12\x0c\n\x04tags\x18\x03 \x03(\t"\xcb\x01\n\x05Order\x12\n\n\x02id\x18\x01 \x01(\t\x12\x10\n\x08password\x18\x02 \x01(\t\x12\x13\n\x04\x63\x61rd\x18\x03 \x01(\x0b\x32\x05.Card\x12\x14\n\x05items\x18\x04 \x03(\x0b\x32\x05.Item\x12"\n\x06labels\x18\x05 \x03(\x0b\x32\x12.Order.LabelsEntry\x12\x16\n\x06parent\x18\x06 \x01(\x0b\x32\x06.Order\x12\x0e\n\x06\x61mount\x18\x07 \x01(\x03\x1a-\n\x0bLabelsEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\t:\x02\x38\x01\x62\x06proto3'
+)
+
+_globals = globals()
+_builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
+_builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, "tests.proto.payload_pb2", _globals)
+if _descriptor._USE_C_DESCRIPTORS == False:
+    DESCRIPTOR._options = None
+    _globals["_ORDER_LABELSENTRY"]._options = None
+    _globals["_ORDER_LABELSENTRY"]._serialized_options = b"8\001"
+    _globals["_CARD"]._serialized_start = 29
+    _globals["_CARD"]._serialized_end = 67
+    _globals["_ITEM"]._serialized_start = 69
+    _globals["_ITEM"]._serialized_end = 117
+    _globals["_ORDER"]._serialized_start = 120
+    _globals["_ORDER"]._serialized_end = 323
+    _globals["_ORDER_LABELSENTRY"]._serialized_start = 278
+    _globals["_ORDER_LABELSENTRY"]._serialized_end = 323
+# @@protoc_insertion_point(module_scope)
@@ -0,0 +1,74 @@
+from collections.abc import Iterable as _Iterable
+from collections.abc import Mapping as _Mapping
+from typing import ClassVar as _ClassVar
+from typing import Optional as _Optional
+from typing import Union as _Union
+
+from google.protobuf import descriptor as _descriptor
+from google.protobuf import message as _message
+from google.protobuf.internal import containers as _containers
+
+DESCRIPTOR: _descriptor.FileDescriptor
+
+class Card(_message.Message):
+    __slots__ = ("number", "holder")
+    NUMBER_FIELD_NUMBER: _ClassVar[int]
+    HOLDER_FIELD_NUMBER: _ClassVar[int]
+    number: str
+    holder: str
+    def __init__(
+        self, number: _Optional[str] = ..., holder: _Optional[str] = ...
+    ) -> None: ...
+
+class Item(_message.Message):
+    __slots__ = ("name", "blob", "tags")
+    NAME_FIELD_NUMBER: _ClassVar[int]
+    BLOB_FIELD_NUMBER: _ClassVar[int]
+    TAGS_FIELD_NUMBER: _ClassVar[int]
+    name: str
+    blob: bytes
+    tags: _containers.RepeatedScalarFieldContainer[str]
+    def __init__(
+        self,
+        name: _Optional[str] = ...,
+        blob: _Optional[bytes] = ...,
+        tags: _Optional[_Iterable[str]] = ...,
+    ) -> None: ...
+
+class Order(_message.Message):
+    __slots__ = ("id", "password", "card", "items", "labels", "parent", "amount")
+
+    class LabelsEntry(_message.Message):
+        __slots__ = ("key", "value")
+        KEY_FIELD_NUMBER: _ClassVar[int]
+        VALUE_FIELD_NUMBER: _ClassVar[int]
+        key: str
+        value: str
+        def __init__(
+            self, key: _Optional[str] = ..., value: _Optional[str] = ...
+        ) -> None: ...
+
+    ID_FIELD_NUMBER: _ClassVar[int]
+    PASSWORD_FIELD_NUMBER: _ClassVar[int]
+    CARD_FIELD_NUMBER: _ClassVar[int]
+    ITEMS_FIELD_NUMBER: _ClassVar[int]
+    LABELS_FIELD_NUMBER: _ClassVar[int]
+    PARENT_FIELD_NUMBER: _ClassVar[int]
+    AMOUNT_FIELD_NUMBER: _ClassVar[int]
+    id: str
+    password: str
+    card: Card
+    items: _containers.RepeatedCompositeFieldContainer[Item]
+    labels: _containers.ScalarMap[str, str]
+    parent: Order
+    amount: int
+    def __init__(
+        self,
+        id: _Optional[str] = ...,
+        password: _Optional[str] = ...,
+        card: _Optional[_Union[Card, _Mapping]] = ...,
+        items: _Optional[_Iterable[_Union[Item, _Mapping]]] = ...,
+        labels: _Optional[_Mapping[str, str]] = ...,
+        parent: _Optional[_Union[Order, _Mapping]] = ...,
+        amount: _Optional[int] = ...,
+    ) -> None: ...
@@ -0,0 +1,354 @@
+"""Allocation sampling tests."""
+
+import logging
+import time
+import tracemalloc
+from concurrent import futures
+from datetime import datetime
+from datetime import timezone
+from typing import Any
+from typing import Iterator
+from typing import List
+from typing import Tuple
+from unittest import mock
+
+import grpc
+import pytest
+
+from grpc_accesslog import AccessLogInterceptor
+from grpc_accesslog import Allocation
+from grpc_accesslog import AllocationSampler
+from grpc_accesslog import AsyncAccessLogInterceptor
+from grpc_accesslog import LogContext
+from grpc_accesslog import Plugin
+from grpc_accesslog import compile_format
+from grpc_accesslog import handlers
+from grpc_accesslog._allocations import take_allocation
+
+from ._server import Servicer
+from .proto import test_service_pb2
+from .proto import test_service_pb2_grpc
+
+
+MB = 1 << 20
+
+#: Buffers kept alive by the servicers.
+retained: List[bytearray] = []
+
+
+@pytest.fixture(autouse=True)
+def release() -> Iterator[None]:
+    """Release the retained buffers and allocation after each test."""
+    yield
+    retained.clear()
+    take_allocation()
+
+
+def retaining(request: Any, context: Any) -> str:
+    """Allocate 1 MB and keep it."""
+    retained.append(bytearray(MB))
+    return "ok"
+
+
+def temporary(request: Any, context: Any) -> str:
+    """Allocate 5 MB and free it."""
+    buffer = bytearray(5 * MB)
+    del buffer
+    return "ok"
+
+
+def test_retained() -> None:
+    """Test live bytes of an RPC are traced and tracing is stopped."""
+    sampler = AllocationSampler(interval=0)
+
+    assert sampler.traced(retaining, "/svc/A", False)("request", None) == "ok"
+    allocation = take_allocation()
+    assert not tracemalloc.is_tracing()
+    assert allocation is not None
+    assert MB <= allocation.net_bytes < MB + 64 * 1024
+    assert allocation.peak_bytes >= allocation.net_bytes
+    assert take_allocation() is None
+
+
+def test_peak() -> None:
+    """Test freed temporaries count towards the peak only."""
+    sampler = AllocationSampler(interval=0)
+
+    sampler.traced(temporary, "/svc/A", False)("request", None)
+    allocation = take_allocation()
+    assert allocation is not None
+    assert allocation.net_bytes < 64 * 1024
+    assert 5 * MB <= allocation.peak_bytes < 5 * MB + 64 * 1024
+
+
+def test_already_tracing() -> None:
+    """Test tracing started by the application is kept running with its peak."""
+    sampler = AllocationSampler(interval=0)
+    tracemalloc.start()
+    try:
+        sampler.traced(temporary, "/svc/A", False)("request", None)
+        above = take_allocation()
+        # A peak before the RPC is not attributed to it.
+        bytearray(10 * MB)
+        sampler.traced(temporary, "/svc/A", False)("request", None)
+        below = take_allocation()
+        assert tracemalloc.is_tracing()
+        assert tracemalloc.get_traced_memory()[1] >= 10 * MB
+    finally:
+        tracemalloc.stop()
+
+    assert above is not None and below is not None
+    assert 5 * MB <= above.peak_bytes < 6 * MB
+    assert below.peak_bytes == below.net_bytes < 64 * 1024
+
+
+def test_stream() -> None:
+    """Test streams are traced until the generator finishes, also on errors."""
+    sampler = AllocationSampler(interval=0)
+
+    def behavior(request: Any, context: Any) -> Iterator[int]:
+        for index in range(3):
+            retaining(request, context)
+            yield index
+        if request == "fail":
+            raise RuntimeError(request)
+
+    responses = sampler.traced(behavior, "/svc/A", True)("request", mock.Mock())
+    assert next(responses) == 0
+    assert tracemalloc.is_tracing()
+    assert list(responses) == [1, 2]
+    allocation = take_allocation()
+    assert allocation is not None
+    assert 3 * MB <= allocation.net_bytes < 3 * MB + 64 * 1024
+
+    with pytest.raises(RuntimeError):
+        list(sampler.traced(behavior, "/svc/A", True)("fail", mock.Mock()))
+    assert not tracemalloc.is_tracing()
+    assert sampler.snapshot()["/svc/A"].samples == 2
+
+
+def test_stream_abandoned() -> None:
+    """Test tracing of an abandoned stream ends with the RPC."""
+    sampler = AllocationSampler(interval=0)
+    context = mock.Mock()
+
+    responses = sampler.traced(lambda request, context: iter("ab"), "/svc/A", True)(
+        "request", context
+    )
+    assert next(responses) == "a"
+    (end,), _ = context.add_callback.call_args
+    end()
+    assert not tracemalloc.is_tracing()
+    sampler.traced(retaining, "/svc/B", False)("request", None)
+    assert take_allocation() is not None
+
+    responses.close()
+    assert take_allocation() is None
+    assert list(sampler.snapshot()) == ["/svc/B"]
+
+
+def test_concurrent_skipped() -> None:
+    """Test an RPC sampled while another one is traced is not traced."""
+    sampler = AllocationSampler(interval=0)
+    nested = sampler.traced(retaining, "/svc/B", False)
+
+    def outer(request: Any, context: Any) -> Any:
+        assert take_allocation() is None
+        nested(request, context)
+        assert take_allocation() is None
+        return retaining(request, context)
+
+    sampler.traced(outer, "/svc/A", False)("request", None)
+    allocation = take_allocation()
+    assert allocation is not None
+    assert allocation.net_bytes >= 2 * MB
+    assert list(sampler.snapshot()) == ["/svc/A"]
+
+
+def test_sampled() -> None:
+    """Test one RPC of every ``sample_every`` is sampled per method."""
+    sampler = AllocationSampler(sample_every=3, interval=0)
+
+    assert [sampler.sampled("/svc/A") for _ in range(7)] == [
+        True,
+        False,
+        False,
+        True,
+        False,
+        False,
+        True,
+    ]
+    assert sampler.sampled("/svc/B")
+    with pytest.raises(ValueError):
+        AllocationSampler(sample_every=0)
+
+
+def serve(interceptor: AccessLogInterceptor) -> Tuple[grpc.Server, str]:
+    """Start a server with an interceptor."""
+    server = grpc.server(
+        futures.ThreadPoolExecutor(max_workers=1), interceptors=[interceptor]
+    )
+    port = server.add_insecure_port("localhost:0")
+    test_service_pb2_grpc.add_TestServiceServicer_to_server(
+        RetainingServicer(0), server
+    )
+    server.start()
+    return server, f"localhost:{port}"
+
+
+class RetainingServicer(Servicer):
+    """Servicer keeping 1 MB per RPC."""
+
+    def UnaryUnary(  # noqa: N802
+        self, request: test_service_pb2.Request, context: grpc.ServicerContext
+    ) -> test_service_pb2.Response:
+        """Retain a buffer, then respond."""
+        retaining(request, context)
+        return super().UnaryUnary(request, context)
+
+    def UnaryStream(  # noqa: N802
+        self, request: test_service_pb2.Request, context: grpc.ServicerContext
+    ) -> Iterator[test_service_pb2.Response]:
+        """Retain a buffer for every response."""
+        for response in super().UnaryStream(request, context):
+            retaining(request, context)
+            yield response
+
+
+class Ender(Plugin):
+    """Plugin recording the finished RPCs."""
+
+    fields = frozenset(("allocation",))
+
+    def __init__(self) -> None:
+        """Create a plugin."""
+        self.contexts: List[LogContext] = []
+
+    def on_end(self, state: Any, log_context: LogContext) -> None:
+        """Record the finished RPC."""
+        self.contexts.append(log_context)
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [{}, {"deferred": True}, {"plugins": [Ender()]}],
+    ids=["sync", "deferred", "plugins"],
+)
+def test_interceptor(caplog: pytest.LogCaptureFixture, kwargs) -> None:
+    """Test sampled RPCs log their allocations and others log "-"."""
+    sampler = AllocationSampler(sample_every=2, interval=0)
+    interceptor = AccessLogInterceptor(
+        handlers=[handlers.request, compile_format("$alloc_bytes $alloc_peak")],
+        logger=logging.getLogger("test_allocations"),
+        allocations=sampler,
+        **kwargs,
+    )
+    server, address = serve(interceptor)
+    with caplog.at_level(logging.INFO, "test_allocations"):
+        with grpc.insecure_channel(address) as channel:
+            stub = test_service_pb2_grpc.TestServiceStub(channel)
+            for _ in range(2):
+                stub.UnaryUnary(test_service_pb2.Request(data="ab"))
+                list(stub.UnaryStream(test_service_pb2.Request(data="ab")))
+        interceptor.close()
+    server.stop(grace=0)
+
+    lines = [
+        record.getMessage().split()
+        for record in caplog.records
+        if record.name == "test_allocations"
+    ]
+    assert [line[0] for line in lines] == [
+        "/TestService/UnaryUnary",
+        "/TestService/UnaryStream",
+    ] * 2
+    assert [line[1:] for line in lines[2:]] == [["-", "-"], ["-", "-"]]
+    assert MB <= int(lines[0][1]) <= int(lines[0][2])
+    assert 2 * MB <= int(lines[1][1]) <= int(lines[1][2])
+
+    totals = sampler.snapshot()
+    assert totals["/TestService/UnaryStream"].samples == 1
+    assert totals["/TestService/UnaryStream"].max_net_bytes == int(lines[1][1])
+    for plugin in kwargs.get("plugins", ()):
+        assert [context.allocation is not None for context in plugin.contexts] == [
+            True,
+            True,
+            False,
+            False,
+        ]
+
+
+def test_not_configured() -> None:
+    """Test tracemalloc is never touched without a sampler."""
+    interceptor = AccessLogInterceptor(handlers=[handlers.alloc_bytes])
+    async_interceptor = AsyncAccessLogInterceptor(
+        handlers=[handlers.request], allocations=AllocationSampler(interval=0)
+    )
+
+    assert not interceptor._inputs.alloc
+    assert not async_interceptor._inputs.alloc
+    with mock.patch("grpc_accesslog._allocations.tracemalloc") as traced:
+        server, address = serve(interceptor)
+        with grpc.insecure_channel(address) as channel:
+            stub = test_service_pb2_grpc.TestServiceStub(channel)
+            stub.UnaryUnary(test_service_pb2.Request(data="ab"))
+        server.stop(grace=0)
+    assert not traced.mock_calls
+
+
+def test_handlers() -> None:
+    """Test the handler output of traced and untraced RPCs."""
+    now = datetime.now(timezone.utc)
+    context = LogContext(mock.Mock(), "/svc/Method", None, None, now, now)
+    traced = context._replace(allocation=Allocation(1024, 4096))
+
+    assert (handlers.alloc_bytes(context), handlers.alloc_peak(context)) == ("-", "-")
+    assert (handlers.alloc_bytes(traced), handlers.alloc_peak(traced)) == (
+        "1024",
+        "4096",
+    )
+
+
+def test_totals(caplog: pytest.LogCaptureFixture) -> None:
+    """Test per-method totals and their windows."""
+    sampler = AllocationSampler()
+    sampler.record("/svc/B", Allocation(300, 900))
+    sampler.record("/svc/A", Allocation(100, 200))
+    sampler.record("/svc/A", Allocation(400, 100))
+
+    snapshot = sampler.snapshot()
+    assert {
+        method: (
+            totals.samples,
+            totals.net_bytes,
+            totals.max_net_bytes,
+            totals.max_peak_bytes,
+        )
+        for method, totals in snapshot.items()
+    } == {"/svc/A": (2, 500, 400, 200), "/svc/B": (1, 300, 300, 900)}
+
+    with caplog.at_level(logging.INFO, "grpc_accesslog._allocations"):
+        sampler.close()
+        sampler.emit()
+    assert [record.getMessage() for record in caplog.records][-2:] == [
+        "allocations /svc/A samples=2 mean_bytes=250 max_bytes=400"
+        " max_peak_bytes=200",
+        "allocations /svc/B samples=1 mean_bytes=300 max_bytes=300"
+        " max_peak_bytes=900",
+    ]
+
+
+def test_totals_interval(caplog: pytest.LogCaptureFixture) -> None:
+    """Test the background thread emits a window every interval."""
+    with caplog.at_level(logging.INFO, "grpc_accesslog._allocations"):
+        sampler = AllocationSampler(interval=0.01)
+        sampler.record("/svc/A", Allocation(10, 20))
+        deadline = time.monotonic() + 5
+        while not caplog.records:
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+        sampler.close()
+
+    assert caplog.records[0].getMessage() == (
+        "allocations /svc/A samples=1 mean_bytes=10 max_bytes=10 max_peak_bytes=20"
+    )
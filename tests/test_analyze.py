@@ -0,0 +1,219 @@
+"""Access log analyzer tests."""
+
+import gzip
+import json
+import random
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+from pathlib import Path
+from unittest import mock
+
+import grpc
+import pytest
+
+from grpc_accesslog import LogContext
+from grpc_accesslog import compile_format
+from grpc_accesslog import handlers
+from grpc_accesslog.__main__ import main
+from grpc_accesslog._analyze import DEFAULT_FORMAT
+from grpc_accesslog._analyze import Analysis
+from grpc_accesslog._analyze import Histogram
+from grpc_accesslog._analyze import _parts
+from grpc_accesslog._analyze import _read_range
+from grpc_accesslog._analyze import analyze
+from grpc_accesslog._analyze import compile_pattern
+from grpc_accesslog._analyze import report
+from grpc_accesslog._context import Metadatum
+from tests.proto import test_service_pb2
+
+
+START = datetime(2021, 4, 3, 0, 0, 0, 0, timezone.utc)
+RTT_FORMAT = '$remote_addr "$method" $status $request_bytes $rtt_us "$http_x_a" $$'
+
+
+def log_context(index: int) -> LogContext:
+    """Build the LogContext of the nth RPC."""
+    server_context = mock.Mock(
+        peer=mock.Mock(return_value=f"ipv4:10.0.0.{index % 7}:50000"),
+        code=mock.Mock(
+            return_value=grpc.StatusCode.NOT_FOUND if index % 4 == 0 else None
+        ),
+        invocation_metadata=mock.Mock(
+            return_value=(
+                Metadatum("user-agent", "grpc-python/1.0 (linux; chttp2)"),
+                Metadatum("x-a", f"a b {index}"),
+            )
+        ),
+    )
+    return LogContext(
+        server_context,
+        "/pkg.Svc/Get" if index % 2 else "/pkg.Svc/Put",
+        test_service_pb2.Request(data="x" * (index % 5)),
+        test_service_pb2.Response(data="y" * (index % 3)),
+        START,
+        START + timedelta(microseconds=100 * (index % 10)),
+    )
+
+
+def write_default(path: Path, count: int) -> None:
+    """Write lines rendered by the default handlers."""
+    with open(path, "w") as file:
+        for index in range(count):
+            context = log_context(index)
+            line = " ".join(handler(context) for handler in handlers.DEFAULT_HANDLERS)
+            file.write(f"{line}\n")
+
+
+def test_default_format(tmp_path: Path) -> None:
+    """Test lines of the default handlers are parsed."""
+    path = tmp_path / "access.log"
+    write_default(path, 100)
+
+    analysis = analyze([str(path)])
+
+    assert analysis.skipped == 0
+    get = analysis.methods["/pkg.Svc/Get"]
+    put = analysis.methods["/pkg.Svc/Put"]
+    assert (get.count, get.errors, put.count, put.errors) == (50, 0, 50, 25)
+    assert put.statuses == {"NOT_FOUND": 25, "OK": 25}
+    assert get.response_bytes + put.response_bytes == sum(
+        2 + index % 3 if index % 3 else 0 for index in range(100)
+    )
+    assert get.latency.count == 0
+
+
+def test_format_string(tmp_path: Path) -> None:
+    """Test lines of a log format string are parsed with its fields."""
+    render = compile_format(RTT_FORMAT)
+    path = tmp_path / "access.log"
+    path.write_text(
+        "".join(f"{render(log_context(index))}\n" for index in range(100))
+        + "not an access log line\n"
+    )
+
+    analysis = analyze([str(path)], RTT_FORMAT)
+
+    assert analysis.skipped == 1
+    put = analysis.methods["/pkg.Svc/Put"]
+    assert put.request_bytes == sum(
+        2 + index % 5 for index in range(0, 100, 2) if index % 5
+    )
+    assert put.latency.count == 50
+    assert put.latency.max == 0.8
+    assert put.latency.percentile(50) == pytest.approx(0.4, rel=0.02)
+
+
+def test_pattern() -> None:
+    """Test variables without fields and repeated fields."""
+    pattern = compile_pattern("$peer [$time_local] $method $custom|$method $rtt_ms")
+
+    match = pattern.fullmatch("1.2.3.4 [03/Apr/2021:00:00:00 +0000] /a x y|/b 12")
+
+    assert match is not None
+    assert match.group("method", "rtt_ms", "status") == ("/a", "12", "")
+
+
+def test_missing_fields() -> None:
+    """Test formats without method and status."""
+    analysis = Analysis()
+    analysis.add_lines(["1 x", "- y"], compile_pattern("$rtt_ms $peer"))
+
+    stats = analysis.methods[""]
+    assert (stats.count, stats.errors, stats.statuses) == (2, 0, {})
+    assert stats.latency.count == 1
+    assert report(analysis).splitlines()[1].split()[:3] == ["-", "2", "0"]
+
+
+def test_histogram() -> None:
+    """Test percentiles are within the bucket width of exact values."""
+    rng = random.Random(0)
+    values = sorted(rng.lognormvariate(0, 2) for _ in range(10000))
+    values[:100] = [0.0] * 100
+    first = Histogram()
+    second = Histogram()
+    for index, value in enumerate(values):
+        (first if index % 2 else second).add(value)
+    first.merge(second)
+
+    assert first.count == 10000
+    assert first.percentile(0.5) == 0.0
+    for percent in (1, 50, 90, 99, 99.9):
+        exact = values[int(len(values) * percent / 100) - 1]
+        assert first.percentile(percent) == pytest.approx(exact, rel=0.021)
+    assert first.percentile(100) == values[-1]
+    assert Histogram().percentile(50) == 0.0
+
+
+def test_processes(tmp_path: Path) -> None:
+    """Test byte ranges of several processes count every line once."""
+    path = tmp_path / "access.log"
+    write_default(path, 1000)
+    segment = tmp_path / "access.log.20210403T000000.000001.gz"
+    with gzip.open(segment, "wt") as file:
+        file.write(path.read_text())
+    (tmp_path / "empty.log").write_text("")
+
+    paths = [str(path), str(segment), str(tmp_path / "empty.log")]
+    expected = report(analyze(paths))
+    assert expected.splitlines()[1].split()[:3] == ["/pkg.Svc/Get", "1000", "0"]
+    assert report(analyze(paths, processes=3)) == expected
+
+
+@pytest.mark.parametrize("parts", [1, 2, 3, 7, 64])
+def test_ranges(tmp_path: Path, parts: int) -> None:
+    """Test lines starting at a range boundary are read by one range."""
+    path = tmp_path / "access.log"
+    path.write_text("".join(f"{'x' * (index % 4)}\n" for index in range(50)))
+
+    lines = [
+        line
+        for start, end in _parts(str(path), parts)
+        for line in _read_range(str(path), start, end)
+    ]
+
+    assert lines == path.read_text().splitlines(keepends=True)
+    # A file truncated while it is read ends the range early.
+    assert list(_read_range(str(path), 0, 1000)) == lines
+
+
+def test_main(tmp_path: Path, capsys: pytest.CaptureFixture) -> None:
+    """Test the analyze command prints a table or JSON."""
+    path = tmp_path / "access.log"
+    path.write_text(
+        "".join(
+            f"{compile_format(RTT_FORMAT)(log_context(index))}\n" for index in range(4)
+        )
+    )
+
+    main(["analyze", "-f", RTT_FORMAT, str(path)])
+    assert capsys.readouterr().out.splitlines() == [
+        "method        requests  errors  req_bytes  resp_bytes  p50_ms  p90_ms  "
+        "p99_ms  max_ms",
+        "/pkg.Svc/Get         2       0          8           0   0.101   0.300   "
+        "0.300   0.300",
+        "    OK=2",
+        "/pkg.Svc/Put         2       1          4           0   0.000   0.200   "
+        "0.200   0.200",
+        "    NOT_FOUND=1 OK=1",
+    ]
+
+    main(["analyze", "--json", "--format", RTT_FORMAT, str(path)])
+    output = json.loads(capsys.readouterr().out)
+    assert output["skipped"] == 0
+    assert output["methods"]["/pkg.Svc/Put"]["latency_ms"]["max"] == 0.2
+
+    path.write_text("x\n")
+    main(["analyze", str(path)])
+    assert capsys.readouterr().out.splitlines()[-1] == "unmatched lines: 1"
+    main(["analyze", "--json", str(path)])
+    assert json.loads(capsys.readouterr().out) == {"methods": {}, "skipped": 1}
+
+
+def test_default_format_handlers() -> None:
+    """Test the default format renders like the default handlers."""
+    context = log_context(3)
+
+    assert compile_format(DEFAULT_FORMAT)(context) == " ".join(
+        handler(context) for handler in handlers.DEFAULT_HANDLERS
+    )
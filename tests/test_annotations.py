@@ -0,0 +1,186 @@
+"""Request scoped annotation tests."""
+
+import contextvars
+import logging
+from concurrent import futures
+from typing import AsyncIterator
+from typing import Iterator
+from typing import List
+from unittest import mock
+
+import grpc
+import pytest
+
+from grpc_accesslog import AccessLogInterceptor
+from grpc_accesslog import AsyncAccessLogInterceptor
+from grpc_accesslog import Plugin
+from grpc_accesslog import annotate
+from grpc_accesslog import compile_format
+from grpc_accesslog import handlers
+from grpc_accesslog._annotations import take_annotations
+from grpc_accesslog._server import AccessLogger
+
+from ._server import AsyncServicer
+from ._server import Servicer
+from .proto import test_service_pb2
+from .proto import test_service_pb2_grpc
+from .proto.test_service_pb2 import Request
+from .proto.test_service_pb2 import Response
+
+
+class AnnotatingServicer(Servicer):
+    """Servicer annotating requests with data "tenant"."""
+
+    def UnaryUnary(  # noqa: N802
+        self, request: Request, context: grpc.ServicerContext
+    ) -> Response:
+        """Annotate the tenant and cache result."""
+        if request.data == "tenant":
+            annotate(tenant="acme")
+            annotate(cache="hit", shard=3)
+        return Response(data=request.data)
+
+    def UnaryStream(  # noqa: N802
+        self, request: Request, context: grpc.ServicerContext
+    ) -> Iterator[Response]:
+        """Annotate while streaming."""
+        for char in request.data:
+            annotate(last=char)
+            yield Response(data=char)
+
+
+class AsyncAnnotatingServicer(AsyncServicer):
+    """Asyncio servicer annotating requests."""
+
+    async def UnaryUnary(  # noqa: N802
+        self, request: Request, context: grpc.ServicerContext
+    ) -> Response:
+        """Annotate the tenant."""
+        if request.data == "tenant":
+            annotate(tenant="acme")
+        return Response(data=request.data)
+
+    async def UnaryStream(  # noqa: N802
+        self, request: Request, context: grpc.ServicerContext
+    ) -> AsyncIterator[Response]:
+        """Annotate while streaming."""
+        for char in request.data:
+            annotate(last=char)
+            yield Response(data=char)
+
+
+def logged_lines(interceptor: AccessLogInterceptor, data: List[str]) -> List[str]:
+    """Return the access log lines of unary and streamed RPCs."""
+    logger = mock.Mock()
+    interceptor._logger = logger
+    server = grpc.server(
+        futures.ThreadPoolExecutor(max_workers=1), interceptors=[interceptor]
+    )
+    port = server.add_insecure_port("localhost:0")
+    test_service_pb2_grpc.add_TestServiceServicer_to_server(
+        AnnotatingServicer(0), server
+    )
+    server.start()
+    with grpc.insecure_channel(f"localhost:{port}") as channel:
+        stub = test_service_pb2_grpc.TestServiceStub(channel)
+        for value in data:
+            stub.UnaryUnary(test_service_pb2.Request(data=value))
+        list(stub.UnaryStream(test_service_pb2.Request(data="ab")))
+    server.stop(grace=0)
+    interceptor.close()
+
+    return [call.args[1] % call.args[2:] for call in logger.log.call_args_list]
+
+
+@pytest.mark.parametrize("deferred", [False, True])
+def test_annotations(deferred: bool) -> None:
+    """Test annotations render in the record of their RPC only."""
+    interceptor = AccessLogInterceptor(
+        handlers=[
+            handlers.request,
+            handlers.annotations,
+            handlers.annotation("tenant"),
+        ],
+        deferred=deferred,
+    )
+
+    assert logged_lines(interceptor, ["tenant", "other"]) == [
+        "/TestService/UnaryUnary tenant=acme,cache=hit,shard=3 acme",
+        "/TestService/UnaryUnary - -",
+        "/TestService/UnaryStream last=b -",
+    ]
+
+
+def test_format_variables() -> None:
+    """Test the annotation format variables."""
+    interceptor = AccessLogInterceptor(
+        log_format="$method $annotation_shard [$annotations]"
+    )
+
+    assert logged_lines(interceptor, ["tenant"]) == [
+        "/TestService/UnaryUnary 3 [tenant=acme,cache=hit,shard=3]",
+        "/TestService/UnaryStream - [last=b]",
+    ]
+    assert handlers.handler_fields(compile_format("$annotations")) == {"annotations"}
+
+
+def test_plugins() -> None:
+    """Test plugins receive the annotations."""
+    plugin = Plugin()
+    plugin.on_end = mock.Mock()  # type: ignore[method-assign]
+    interceptor = AccessLogInterceptor(
+        handlers=[handlers.annotations], plugins=[plugin]
+    )
+
+    assert logged_lines(interceptor, ["tenant"]) == [
+        "tenant=acme,cache=hit,shard=3",
+        "last=b",
+    ]
+    assert [call.args[1].annotations for call in plugin.on_end.call_args_list] == [
+        {"tenant": "acme", "cache": "hit", "shard": 3},
+        {"last": "b"},
+    ]
+
+
+def test_client_keeps_annotations() -> None:
+    """Test client access loggers leave the annotations of the server RPC."""
+
+    def log_outbound() -> None:
+        annotate(tenant="acme")
+        logger = mock.Mock()
+        AccessLogger(logger=logger, handlers=[handlers.annotations]).log(
+            mock.Mock(), "/svc/Method", None, None, mock.Mock(), mock.Mock()
+        )
+        logger.log.assert_called_once_with(logging.INFO, "%s", "-")
+        assert take_annotations() == {"tenant": "acme"}
+        assert take_annotations() is None
+
+    contextvars.copy_context().run(log_outbound)
+
+
+@pytest.mark.asyncio
+async def test_async_annotations() -> None:
+    """Test annotations of the asyncio interceptor."""
+    logger = mock.Mock()
+    interceptor = AsyncAccessLogInterceptor(
+        handlers=[handlers.request, handlers.annotations], logger=logger
+    )
+    server = grpc.aio.server(interceptors=[interceptor])
+    port = server.add_insecure_port("localhost:0")
+    test_service_pb2_grpc.add_TestServiceServicer_to_server(
+        AsyncAnnotatingServicer(0), server
+    )
+    await server.start()
+    async with grpc.aio.insecure_channel(f"localhost:{port}") as channel:
+        stub = test_service_pb2_grpc.TestServiceStub(channel)
+        await stub.UnaryUnary(test_service_pb2.Request(data="tenant"))
+        await stub.UnaryUnary(test_service_pb2.Request(data="other"))
+        async for _ in stub.UnaryStream(test_service_pb2.Request(data="ab")):
+            ...
+    await server.stop(grace=0)
+
+    assert [call.args[2:] for call in logger.log.call_args_list] == [
+        ("/TestService/UnaryUnary", "tenant=acme"),
+        ("/TestService/UnaryUnary", "-"),
+        ("/TestService/UnaryStream", "last=b"),
+    ]
@@ -0,0 +1,191 @@
+"""Async client interceptor tests."""
+
+import contextlib
+import logging
+from concurrent import futures
+from typing import AsyncContextManager
+from typing import Callable
+
+import grpc
+import pytest
+from pytest import LogCaptureFixture
+
+from grpc_accesslog import AsyncAccessLogClientInterceptor
+from grpc_accesslog import handlers
+
+from ._server import AsyncServicer
+from .proto import test_service_pb2
+from .proto import test_service_pb2_grpc
+
+
+@pytest.fixture
+def aio_client_interceptor():
+    """Provide a configured client interceptor."""
+    interceptor = AsyncAccessLogClientInterceptor(
+        name="root",
+        propagate=True,
+        target="test-target",
+    )
+
+    return interceptor
+
+
+@pytest.fixture
+def aio_client_stub(aio_client_interceptor):
+    """Provide a gRPC client stub with an intercepted channel."""
+
+    @contextlib.asynccontextmanager
+    async def inner():
+        server = grpc.aio.server(futures.ThreadPoolExecutor(max_workers=1))
+        port = server.add_insecure_port("localhost:0")
+        servicer = AsyncServicer()
+
+        test_service_pb2_grpc.add_TestServiceServicer_to_server(servicer, server)
+
+        await server.start()
+
+        async with grpc.aio.insecure_channel(
+            f"localhost:{port}", interceptors=aio_client_interceptor.interceptors()
+        ) as channel:
+            stub = test_service_pb2_grpc.TestServiceStub(channel)
+            yield stub
+
+        await server.stop(grace=0)
+
+    return inner
+
+
+@pytest.mark.asyncio
+async def test_aio_intercept_unaryunary(
+    caplog: LogCaptureFixture,
+    aio_client_interceptor: AsyncAccessLogClientInterceptor,
+    aio_client_stub: Callable[
+        [], AsyncContextManager[test_service_pb2_grpc.TestServiceStub]
+    ],
+) -> None:
+    """Test client interceptor logs unary calls with default-style handlers."""
+    caplog.set_level(logging.INFO, logger="root")
+
+    aio_client_interceptor._handlers = [
+        handlers.peer,
+        handlers.request,
+        handlers.status,
+        handlers.response_size,
+    ]
+
+    async with aio_client_stub() as stub:
+        response = await stub.UnaryUnary(test_service_pb2.Request(data="data"))
+
+        assert response.data == "data"
+        assert "test-target /TestService/UnaryUnary OK 6" in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_aio_intercept_unarystream(
+    caplog: LogCaptureFixture,
+    aio_client_interceptor: AsyncAccessLogClientInterceptor,
+    aio_client_stub: Callable[
+        [], AsyncContextManager[test_service_pb2_grpc.TestServiceStub]
+    ],
+) -> None:
+    """Test client interceptor."""
+    caplog.set_level(logging.INFO, logger="root")
+
+    aio_client_interceptor._handlers = [handlers.request, handlers.status]
+
+    async with aio_client_stub() as stub:
+        responses = [
+            response.data
+            async for response in stub.UnaryStream(
+                test_service_pb2.Request(data="data")
+            )
+        ]
+
+        assert responses == ["d", "a", "t", "a"]
+        assert caplog.text.count("/TestService/UnaryStream OK") == 1
+
+
+@pytest.mark.asyncio
+async def test_aio_intercept_streamunary(
+    caplog: LogCaptureFixture,
+    aio_client_interceptor: AsyncAccessLogClientInterceptor,
+    aio_client_stub: Callable[
+        [], AsyncContextManager[test_service_pb2_grpc.TestServiceStub]
+    ],
+) -> None:
+    """Test client interceptor."""
+    caplog.set_level(logging.INFO, logger="root")
+
+    aio_client_interceptor._handlers = (lambda _: "this", lambda _: "that")  # type: ignore
+
+    async with aio_client_stub() as stub:
+        await stub.StreamUnary(
+            iter(
+                (
+                    test_service_pb2.Request(data="data"),
+                    test_service_pb2.Request(data="data"),
+                )
+            )
+        )
+
+        assert "this that" in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_aio_intercept_streamstream(
+    caplog: LogCaptureFixture,
+    aio_client_interceptor: AsyncAccessLogClientInterceptor,
+    aio_client_stub: Callable[
+        [], AsyncContextManager[test_service_pb2_grpc.TestServiceStub]
+    ],
+) -> None:
+    """Test client interceptor."""
+    caplog.set_level(logging.INFO, logger="root")
+
+    aio_client_interceptor._handlers = (lambda _: "this", lambda _: "that")  # type: ignore
+
+    async with aio_client_stub() as stub:
+        async for _ in stub.StreamStream(
+            iter(
+                (
+                    test_service_pb2.Request(data="data"),
+                    test_service_pb2.Request(data="data"),
+                )
+            )
+        ):
+            ...
+
+        assert caplog.text.count("this that") == 1
+
+
+@pytest.mark.asyncio
+async def test_aio_intercept_error(
+    caplog: LogCaptureFixture,
+    aio_client_interceptor: AsyncAccessLogClientInterceptor,
+) -> None:
+    """Test client interceptor logs the status of failed calls."""
+    caplog.set_level(logging.INFO, logger="root")
+
+    aio_client_interceptor._handlers = [handlers.request, handlers.status]
+
+    async with grpc.aio.insecure_channel(
+        "localhost:1", interceptors=aio_client_interceptor.interceptors()
+    ) as channel:
+        stub = test_service_pb2_grpc.TestServiceStub(channel)
+        with pytest.raises(grpc.aio.AioRpcError):
+            await stub.UnaryUnary(test_service_pb2.Request(data="data"), timeout=1)
+
+        with pytest.raises(grpc.aio.AioRpcError):
+            async for _ in stub.UnaryStream(
+                test_service_pb2.Request(data="data"), timeout=1
+            ):
+                ...
+
+    assert "/TestService/UnaryUnary UNAVAILABLE" in caplog.text
+    assert "/TestService/UnaryStream UNAVAILABLE" in caplog.text
+
+
+def test_aio_client_echo_request_id() -> None:
+    """Test request ID echo is rejected for client interceptors."""
+    with pytest.raises(ValueError):
+        AsyncAccessLogClientInterceptor(echo_request_id=True)
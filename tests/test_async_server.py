@@ -12,6 +12,9 @@ from pytest import LogCaptureFixture
 
 from grpc_accesslog import AccessLogInterceptor
 from grpc_accesslog import AsyncAccessLogInterceptor
+from grpc_accesslog import LogContext
+from grpc_accesslog import handlers
+from grpc_accesslog._server import _UNTIMED
 
 from ._server import AsyncServicer
 from .proto import test_service_pb2
@@ -147,3 +150,80 @@ async def test_aio_intercept_streamstream(
             ...
 
         assert caplog.text.count("this that") == 1
+
+
+@pytest.mark.asyncio
+async def test_aio_intercept_detail(
+    caplog: LogCaptureFixture,
+    aio_interceptor: AsyncAccessLogInterceptor,
+    aio_client_stub: Callable[
+        [], AsyncContextManager[test_service_pb2_grpc.TestServiceStub]
+    ],
+) -> None:
+    """Test messages are counted while details are enabled."""
+    caplog.set_level(logging.INFO, logger="root")
+
+    aio_interceptor._handlers = [handlers.request]
+    aio_interceptor._detail_handlers = [handlers.message_counts]
+    aio_interceptor._detail_status = frozenset([grpc.StatusCode.OK])
+    aio_interceptor._inputs = aio_interceptor._required_inputs()
+
+    async with aio_client_stub() as stub:
+        await stub.UnaryUnary(test_service_pb2.Request(data="data"))
+        await stub.StreamUnary(iter((test_service_pb2.Request(data="data"),) * 2))
+        async for _ in stub.StreamStream(
+            iter((test_service_pb2.Request(data="data"),) * 3)
+        ):
+            ...
+
+    assert "/TestService/UnaryUnary 1/1" in caplog.text
+    assert "/TestService/StreamUnary 2/1" in caplog.text
+    assert "/TestService/StreamStream 3/3" in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_aio_intercept_lean(
+    aio_interceptor: AsyncAccessLogInterceptor,
+    aio_client_stub: Callable[
+        [], AsyncContextManager[test_service_pb2_grpc.TestServiceStub]
+    ],
+) -> None:
+    """Test only the inputs declared by the handlers are captured."""
+    contexts = []
+
+    @handlers.requires("status")
+    def record(context: LogContext) -> str:
+        contexts.append(context)
+        return "-"
+
+    aio_interceptor._handlers = [record]
+    aio_interceptor._inputs = aio_interceptor._required_inputs()
+
+    async with aio_client_stub() as stub:
+        await stub.UnaryUnary(test_service_pb2.Request(data="data"))
+        async for _ in stub.UnaryStream(test_service_pb2.Request(data="data")):
+            ...
+
+    assert [(c.request, c.response, c.start, c.end) for c in contexts] == [
+        (None, None, _UNTIMED, _UNTIMED)
+    ] * 2
+
+
+@pytest.mark.asyncio
+async def test_aio_intercept_echo_request_id(
+    caplog: LogCaptureFixture,
+    aio_interceptor: AsyncAccessLogInterceptor,
+    aio_client_stub: Callable[[], AsyncContextManager],
+) -> None:
+    """Test generated request IDs are sent in trailing metadata."""
+    caplog.set_level(logging.INFO, logger="root")
+
+    aio_interceptor._handlers = [handlers.request_id]
+    aio_interceptor._echo_request_id = True
+
+    async with aio_client_stub() as stub:
+        call = stub.UnaryUnary(test_service_pb2.Request(data="data"))
+        await call
+        trailing = dict(await call.trailing_metadata())
+
+    assert trailing["x-request-id"] in caplog.text
@@ -0,0 +1,92 @@
+"""Thread buffered sink tests."""
+
+import threading
+import time
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from grpc_accesslog import sinks
+
+
+def test_max_records(tmp_path: Path) -> None:
+    """Test a thread writes its buffer once it is full."""
+    path = tmp_path / "access.log"
+    sink = sinks.ThreadBufferedSink(path, max_records=2, flush_interval=0)
+
+    for index in range(3):
+        sink.write(f"line {index}")
+    sink._file.flush()
+    assert path.read_text().splitlines() == ["0 line 0", "1 line 1"]
+
+    sink.flush()
+    assert path.read_text().splitlines() == ["0 line 0", "1 line 1", "2 line 2"]
+    sink.close()
+
+
+def test_threads(tmp_path: Path) -> None:
+    """Test lines keep per-thread order and merge by sequence number."""
+    path = tmp_path / "access.log"
+    sink = sinks.ThreadBufferedSink(path, max_records=7, flush_interval=0)
+
+    def worker(name: int) -> None:
+        for index in range(100):
+            sink.write(f"{name} {index}")
+
+    threads = [threading.Thread(target=worker, args=(name,)) for name in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    sink.close()
+
+    lines = [line.split() for line in path.read_text().splitlines()]
+    assert sorted(int(sequence) for sequence, _, _ in lines) == list(range(800))
+    for name in range(8):
+        indexes = [int(index) for _, thread, index in lines if thread == str(name)]
+        assert indexes == list(range(100))
+    assert sink._buffers == []
+
+
+def test_flusher(tmp_path: Path) -> None:
+    """Test buffered lines are written by the flusher thread."""
+    path = tmp_path / "access.log"
+    sink = sinks.ThreadBufferedSink(path, flush_interval=0.01, sequence=False)
+
+    sink.write("line")
+    for _ in range(500):
+        if path.read_text():
+            break
+        time.sleep(0.01)
+
+    assert path.read_text() == "line\n"
+    sink.close()
+
+
+def test_thread_buffers(tmp_path: Path) -> None:
+    """Test each thread registers one buffer, dropped once it finished."""
+    sink = sinks.ThreadBufferedSink(tmp_path / "access.log", flush_interval=0)
+    buffers: List[object] = []
+
+    def worker() -> None:
+        sink.write("first")
+        sink.write("second")
+        buffers.append(sink._local.buffer)
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    thread.join()
+    sink.write("main")
+
+    assert len(sink._buffers) == 2
+    sink.flush()
+    assert sink._buffers == [sink._local.buffer]
+    assert buffers[0] is not sink._local.buffer
+    sink.close()
+
+
+def test_invalid_max_records(tmp_path: Path) -> None:
+    """Test the buffer size is validated."""
+    with pytest.raises(ValueError):
+        sinks.ThreadBufferedSink(tmp_path / "access.log", max_records=0)
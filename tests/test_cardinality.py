@@ -0,0 +1,157 @@
+"""Distinct client estimation tests."""
+
+import logging
+import time
+from concurrent import futures
+from unittest import mock
+
+import grpc
+import pytest
+
+from grpc_accesslog import AccessLogInterceptor
+from grpc_accesslog import CardinalityTracker
+from grpc_accesslog import HyperLogLog
+from grpc_accesslog import LogContext
+from grpc_accesslog import MethodSettings
+from grpc_accesslog import RuntimeConfig
+from grpc_accesslog._context import Metadatum
+
+from ._server import Servicer
+from .proto import test_service_pb2
+from .proto import test_service_pb2_grpc
+
+
+@pytest.mark.parametrize("precision", [10, 12, 14])
+@pytest.mark.parametrize("cardinality", [0, 1, 10, 1000, 20000, 100000])
+def test_accuracy(precision: int, cardinality: int) -> None:
+    """Test estimates stay within four standard errors."""
+    estimator = HyperLogLog(precision)
+    for index in range(cardinality):
+        estimator.add(f"10.{index >> 16}.{(index >> 8) & 255}.{index & 255}")
+        estimator.add(f"10.{index >> 16}.{(index >> 8) & 255}.{index & 255}")
+
+    error = 1.04 / (1 << precision) ** 0.5
+    assert estimator.estimate() == pytest.approx(cardinality, rel=4 * error, abs=0.5)
+
+
+def test_merge() -> None:
+    """Test merged estimators count the union of their values."""
+    first = HyperLogLog()
+    second = HyperLogLog()
+    for index in range(3000):
+        first.add(str(index))
+    for index in range(2000, 5000):
+        second.add(str(index))
+
+    union = first.copy()
+    union.merge(second)
+    assert union.estimate() == pytest.approx(5000, rel=0.05)
+    assert first.estimate() == pytest.approx(3000, rel=0.05)
+
+    with pytest.raises(ValueError):
+        first.merge(HyperLogLog(10))
+
+
+def test_serialization() -> None:
+    """Test registers round trip through bytes."""
+    estimator = HyperLogLog(8)
+    for index in range(100):
+        estimator.add(str(index))
+
+    data = estimator.to_bytes()
+    assert len(data) == 257
+    assert HyperLogLog.from_bytes(data).estimate() == estimator.estimate()
+
+    for invalid in (b"", data[:-1], b"\x03" + bytes(8)):
+        with pytest.raises(ValueError):
+            HyperLogLog.from_bytes(invalid)
+
+
+def test_precision() -> None:
+    """Test the precision is validated."""
+    with pytest.raises(ValueError):
+        HyperLogLog(17)
+    with pytest.raises(ValueError):
+        CardinalityTracker(precision=3)
+
+
+def log_context(method: str, peer: str, agent: str) -> LogContext:
+    """Build a LogContext of a client."""
+    server_context = mock.Mock(
+        peer=mock.Mock(return_value=f"ipv4:{peer}:50000"),
+        invocation_metadata=mock.Mock(return_value=(Metadatum("user-agent", agent),)),
+    )
+    return LogContext(server_context, method, None, None, None, None)  # type: ignore
+
+
+def test_tracker(caplog: pytest.LogCaptureFixture) -> None:
+    """Test the plugin records clients per method and windows are emitted."""
+    caplog.set_level(logging.INFO, "grpc_accesslog._cardinality")
+    tracker = CardinalityTracker(interval=0)
+
+    tracker.on_end(None, log_context("/pkg.Svc/Get", "10.0.0.1", "a"))
+    for index in range(10):
+        tracker.on_end(None, log_context("/pkg.Svc/Get", f"10.0.1.{index}", "b"))
+    tracker.on_end(None, log_context("/pkg.Svc/Put", "10.0.0.1", "a"))
+    assert tracker.fields == frozenset(("peer", "metadata"))
+
+    snapshot = tracker.snapshot()
+    assert round(snapshot["/pkg.Svc/Get"].peers.estimate()) == 11
+    snapshot["/pkg.Svc/Get"].peers.merge(snapshot["/pkg.Svc/Put"].peers)
+    assert round(tracker.snapshot()["/pkg.Svc/Get"].user_agents.estimate()) == 2
+
+    tracker.close()
+    assert caplog.messages == [
+        "distinct /pkg.Svc/Get peers=11 user_agents=2",
+        "distinct /pkg.Svc/Put peers=1 user_agents=1",
+    ]
+    assert tracker.snapshot() == {}
+
+
+def test_tracker_sampled() -> None:
+    """Test RPCs left out of the access log by sampling are counted."""
+    logger = mock.Mock()
+    tracker = CardinalityTracker(interval=0)
+    interceptor = AccessLogInterceptor(
+        logger=logger,
+        plugins=[tracker],
+        config=RuntimeConfig(
+            {"/TestService/UnaryUnary": MethodSettings(sample_every=0)}
+        ),
+    )
+    server = grpc.server(
+        futures.ThreadPoolExecutor(max_workers=1), interceptors=[interceptor]
+    )
+    port = server.add_insecure_port("localhost:0")
+    test_service_pb2_grpc.add_TestServiceServicer_to_server(Servicer(0), server)
+    server.start()
+    try:
+        with grpc.insecure_channel(f"localhost:{port}") as channel:
+            stub = test_service_pb2_grpc.TestServiceStub(channel)
+            stub.UnaryUnary(test_service_pb2.Request(data="a"))
+    finally:
+        server.stop(None)
+
+    logger.log.assert_not_called()
+    estimators = tracker.snapshot()["/TestService/UnaryUnary"]
+    assert round(estimators.peers.estimate()) == 1
+    assert round(estimators.user_agents.estimate()) == 1
+    interceptor.close()
+    tracker.close()
+
+
+def test_tracker_thread() -> None:
+    """Test windows are emitted by the background thread."""
+    logger = mock.Mock(spec=logging.Logger)
+    tracker = CardinalityTracker(interval=0.01, logger=logger)
+    tracker.record("/pkg.Svc/Get", "10.0.0.1", "test")
+
+    for _ in range(500):
+        if logger.info.called:
+            break
+        time.sleep(0.01)
+
+    tracker.close()
+    logger.info.assert_called_once_with(
+        "distinct %s peers=%d user_agents=%d", "/pkg.Svc/Get", 1, 1
+    )
@@ -0,0 +1,221 @@
+"""Client interceptor tests."""
+
+import logging
+import time
+from concurrent import futures
+from unittest import mock
+
+import grpc
+import pytest
+from pytest import LogCaptureFixture
+
+from grpc_accesslog import AccessLogClientInterceptor
+from grpc_accesslog import ClientContext
+from grpc_accesslog import handlers
+
+from ._server import Servicer
+from .proto import test_service_pb2
+from .proto import test_service_pb2_grpc
+
+
+def wait_for_log(caplog: LogCaptureFixture, text: str) -> None:
+    """Wait for a log message written from a call done callback.
+
+    Done callbacks of futures and response streams run on the channel thread
+    after waiters have been released.
+    """
+    deadline = time.monotonic() + 5
+    while text not in caplog.text and time.monotonic() < deadline:
+        time.sleep(0.01)  # pragma: no cover
+
+
+@pytest.fixture
+def client_interceptor():
+    """Provide a configured client interceptor."""
+    interceptor = AccessLogClientInterceptor(
+        name="root",
+        propagate=True,
+        target="test-target",
+    )
+
+    return interceptor
+
+
+@pytest.fixture
+def client_stub(client_interceptor):
+    """Provide a gRPC client stub with an intercepted channel."""
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=1))
+    port = server.add_insecure_port("localhost:0")
+    servicer = Servicer()
+
+    test_service_pb2_grpc.add_TestServiceServicer_to_server(servicer, server)
+
+    server.start()
+
+    with grpc.insecure_channel(f"localhost:{port}") as channel:
+        intercepted = grpc.intercept_channel(channel, client_interceptor)
+        stub = test_service_pb2_grpc.TestServiceStub(intercepted)
+        yield stub
+
+    server.stop(grace=0)
+
+
+def test_intercept_unaryunary(
+    caplog: LogCaptureFixture,
+    client_interceptor: AccessLogClientInterceptor,
+    client_stub: test_service_pb2_grpc.TestServiceStub,
+) -> None:
+    """Test client interceptor logs unary calls with default-style handlers."""
+    caplog.set_level(logging.INFO, logger="root")
+
+    client_interceptor._handlers = [
+        handlers.peer,
+        handlers.request,
+        handlers.status,
+        handlers.request_size,
+        handlers.response_size,
+    ]
+
+    client_stub.UnaryUnary(test_service_pb2.Request(data="data"))
+
+    assert "test-target /TestService/UnaryUnary OK 6 6" in caplog.text
+
+
+def test_intercept_unaryunary_future(
+    caplog: LogCaptureFixture,
+    client_interceptor: AccessLogClientInterceptor,
+    client_stub: test_service_pb2_grpc.TestServiceStub,
+) -> None:
+    """Test client interceptor logs future calls once they complete."""
+    caplog.set_level(logging.INFO, logger="root")
+
+    client_interceptor._handlers = (lambda _: "this", lambda _: "that")  # type: ignore
+
+    future = client_stub.UnaryUnary.future(test_service_pb2.Request(data="data"))
+    future.result()
+
+    wait_for_log(caplog, "this that")
+
+    assert "this that" in caplog.text
+
+
+def test_intercept_unarystream(
+    caplog: LogCaptureFixture,
+    client_interceptor: AccessLogClientInterceptor,
+    client_stub: test_service_pb2_grpc.TestServiceStub,
+) -> None:
+    """Test client interceptor logs once the response stream terminates."""
+    caplog.set_level(logging.INFO, logger="root")
+
+    client_interceptor._handlers = (lambda _: "this", lambda _: "that")  # type: ignore
+
+    response = client_stub.UnaryStream(test_service_pb2.Request(data="data"))
+    for _ in range(0, 4):
+        assert "this that" not in caplog.text
+        next(response)
+
+    with pytest.raises(StopIteration):
+        next(response)
+
+    wait_for_log(caplog, "this that")
+    assert caplog.text.count("this that") == 1
+
+
+def test_intercept_streamunary(
+    caplog: LogCaptureFixture,
+    client_interceptor: AccessLogClientInterceptor,
+    client_stub: test_service_pb2_grpc.TestServiceStub,
+) -> None:
+    """Test client interceptor."""
+    caplog.set_level(logging.INFO, logger="root")
+
+    client_interceptor._handlers = (lambda _: "this", lambda _: "that")  # type: ignore
+
+    client_stub.StreamUnary(
+        iter(
+            (
+                test_service_pb2.Request(data="data"),
+                test_service_pb2.Request(data="data"),
+            )
+        )
+    )
+
+    assert "this that" in caplog.text
+
+
+def test_intercept_streamstream(
+    caplog: LogCaptureFixture,
+    client_interceptor: AccessLogClientInterceptor,
+    client_stub: test_service_pb2_grpc.TestServiceStub,
+) -> None:
+    """Test client interceptor."""
+    caplog.set_level(logging.INFO, logger="root")
+
+    client_interceptor._handlers = (lambda _: "this", lambda _: "that")  # type: ignore
+
+    for _ in client_stub.StreamStream(
+        iter(
+            (
+                test_service_pb2.Request(data="data"),
+                test_service_pb2.Request(data="data"),
+            )
+        )
+    ):
+        ...
+
+    wait_for_log(caplog, "this that")
+    assert caplog.text.count("this that") == 1
+
+
+def test_intercept_error(
+    caplog: LogCaptureFixture,
+    client_interceptor: AccessLogClientInterceptor,
+) -> None:
+    """Test client interceptor logs the status of failed calls."""
+    caplog.set_level(logging.INFO, logger="root")
+
+    client_interceptor._handlers = [handlers.request, handlers.status]
+
+    with grpc.insecure_channel("localhost:1") as channel:
+        intercepted = grpc.intercept_channel(channel, client_interceptor)
+        stub = test_service_pb2_grpc.TestServiceStub(intercepted)
+        with pytest.raises(grpc.RpcError):
+            stub.UnaryUnary(test_service_pb2.Request(data="data"), timeout=1)
+
+    assert "/TestService/UnaryUnary UNAVAILABLE" in caplog.text
+
+
+def test_method_name_bytes() -> None:
+    """Test byte encoded method names are decoded."""
+    logger = mock.Mock()
+    interceptor = AccessLogClientInterceptor(logger=logger)
+    interceptor._handlers = [handlers.request]
+    details = mock.Mock(method=b"/TestService/UnaryUnary", metadata=None)
+    call = mock.Mock(code=mock.Mock(return_value=grpc.StatusCode.OK))
+    call.add_done_callback = lambda callback: callback(call)
+
+    interceptor.intercept_unary_unary(mock.Mock(return_value=call), details, None)
+
+    logger.log.assert_called_once_with(logging.INFO, "%s", "/TestService/UnaryUnary")
+
+
+def test_client_context() -> None:
+    """Test client context exposes the servicer context interface."""
+    context = ClientContext(
+        "localhost:50051",
+        grpc.StatusCode.OK,
+        "details",
+        (("user-agent", "test"),),
+    )
+
+    assert context.peer() == "localhost:50051"
+    assert context.code() == grpc.StatusCode.OK
+    assert context.details() == "details"
+    assert context.invocation_metadata()[0].key == "user-agent"
+    assert ClientContext("target", None).invocation_metadata() == ()
+
+
+def test_client_echo_request_id() -> None:
+    """Test request ID echo is rejected for client interceptors."""
+    with pytest.raises(ValueError):
+        AccessLogClientInterceptor(echo_request_id=True)
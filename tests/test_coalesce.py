@@ -0,0 +1,246 @@
+"""Coalescer tests."""
+
+import logging
+import time
+from datetime import datetime
+from datetime import timezone
+from typing import Iterator
+from typing import List
+from unittest import mock
+
+import grpc
+import pytest
+
+from grpc_accesslog import Coalescer
+from grpc_accesslog import handlers
+from grpc_accesslog._server import AccessLogger
+
+
+class Clock:
+    """Manually advanced Unix clock."""
+
+    def __init__(self) -> None:
+        """Start at 2021-04-03T00:00:00Z."""
+        self.now = 1617408000.0
+
+    def time(self) -> float:
+        """Return the current time."""
+        return self.now
+
+
+@pytest.fixture
+def clock() -> Iterator[Clock]:
+    """Replace the coalescer clock."""
+    clock = Clock()
+    with mock.patch("grpc_accesslog._coalesce.time", clock):
+        yield clock
+
+
+HANDLERS = [handlers.time_received(), handlers.request]
+
+
+def line(request: str, time: str = "t") -> List[str]:
+    """Return the handler output of a line."""
+    return [time, request]
+
+
+def summary(request: str, repeats: int, first: str, last: str) -> List[str]:
+    """Return a summary line of the first occurrence at time ``t``."""
+    return [
+        "t",
+        request,
+        f"repeated {repeats} times between 2021-04-03T00:00:{first}+00:00"
+        f" and 2021-04-03T00:00:{last}+00:00",
+    ]
+
+
+def test_repeats(clock: Clock) -> None:
+    """Test repeats are counted and summarized once the window closes."""
+    coalescer = Coalescer(window=1.0)
+
+    assert coalescer.admit(HANDLERS, line("/a")) == [line("/a")]
+    clock.now += 0.25
+    assert coalescer.admit(HANDLERS, line("/a", "u")) == []
+    clock.now += 0.5
+    assert coalescer.admit(HANDLERS, line("/a", "v")) == []
+    assert coalescer.admit(HANDLERS, line("/b")) == [line("/b")]
+    assert coalescer.coalesced == 2
+
+    clock.now += 0.25
+    assert coalescer.admit(HANDLERS, line("/a", "w")) == [
+        summary("/a", 2, "00.000", "00.750"),
+        line("/a", "w"),
+    ]
+    assert coalescer.drain() == []
+
+
+def test_single_occurrence(clock: Clock) -> None:
+    """Test a line without repeats has no summary."""
+    coalescer = Coalescer(window=1.0)
+
+    assert coalescer.admit(HANDLERS, line("/a")) == [line("/a")]
+    clock.now += 1.0
+    assert coalescer.admit(HANDLERS, line("/b")) == [line("/b")]
+    assert coalescer.drain() == []
+
+
+def test_ordering(clock: Clock) -> None:
+    """Test summaries follow the order of their windows and first lines."""
+    coalescer = Coalescer(window=1.0)
+
+    for request in ("/a", "/b", "/c"):
+        coalescer.admit(HANDLERS, line(request))
+        clock.now += 0.125
+    for request in ("/c", "/b", "/a"):
+        coalescer.admit(HANDLERS, line(request))
+
+    clock.now += 0.75
+    assert coalescer.admit(HANDLERS, line("/d")) == [
+        summary("/a", 1, "00.000", "00.375"),
+        summary("/b", 1, "00.125", "00.375"),
+        line("/d"),
+    ]
+    assert coalescer.drain() == [summary("/c", 1, "00.250", "00.375")]
+    assert coalescer.drain() == []
+
+
+def test_detail_output_keyed(clock: Clock) -> None:
+    """Test output beyond the handlers is part of the key."""
+    coalescer = Coalescer()
+
+    assert coalescer.admit(HANDLERS, line("/a")) == [line("/a")]
+    assert coalescer.admit(HANDLERS, [*line("/a"), "x"]) == [[*line("/a"), "x"]]
+    assert coalescer.admit(HANDLERS, [*line("/a", "u"), "x"]) == []
+
+
+def test_lru_eviction(clock: Clock) -> None:
+    """Test the least recently repeated key is evicted with its summary."""
+    coalescer = Coalescer(window=10.0, max_keys=2)
+
+    coalescer.admit(HANDLERS, line("/a"))
+    coalescer.admit(HANDLERS, line("/b"))
+    clock.now += 1.0
+    coalescer.admit(HANDLERS, line("/a"))
+    assert coalescer.admit(HANDLERS, line("/c")) == [line("/c")]
+    assert coalescer.admit(HANDLERS, line("/b")) == [
+        summary("/a", 1, "00.000", "01.000"),
+        line("/b"),
+    ]
+
+    # The stale deadline of the evicted /b entry must not close the new one.
+    clock.now += 9.5
+    coalescer.admit(HANDLERS, line("/b"))
+    assert coalescer.admit(HANDLERS, line("/c")) == []
+    assert coalescer.drain() == [
+        summary("/c", 1, "01.000", "10.500"),
+        summary("/b", 1, "01.000", "10.500"),
+    ]
+
+
+def test_bounded(clock: Clock) -> None:
+    """Test a flood of distinct lines keeps the tables bounded."""
+    coalescer = Coalescer(window=60.0, max_keys=4)
+
+    for index in range(100):
+        assert coalescer.admit(HANDLERS, line(str(index))) == [line(str(index))]
+
+    assert len(coalescer._entries) == 4
+    assert len(coalescer._deadlines) <= 8
+    clock.now += 60.0
+    assert coalescer.admit(HANDLERS, line("96", "u")) == [line("96", "u")]
+
+
+def test_handler_lists(clock: Clock) -> None:
+    """Test key positions follow the handlers, not the list identity."""
+    coalescer = Coalescer()
+
+    for index in range(100):
+        # Freed lists are often reallocated at the same address.
+        listed = [handlers.request] if index % 2 else list(HANDLERS)
+        output = [str(index)] if index % 2 else line(str(index))
+        assert coalescer.admit(listed, output) == [output]
+
+    assert len(coalescer._keyed) == 2
+    for index in range(100):
+        coalescer.admit([handlers.request] * (index + 1), ["/a"] * (index + 1))
+    assert len(coalescer._keyed) <= 64
+
+
+@pytest.mark.parametrize("kwargs", [{"window": 0}, {"max_keys": 0}])
+def test_invalid(kwargs) -> None:
+    """Test argument validation."""
+    with pytest.raises(ValueError):
+        Coalescer(**kwargs)
+
+
+def context(code=None) -> mock.Mock:
+    """Return a servicer context stand-in."""
+    return mock.Mock(
+        peer=mock.Mock(return_value="ipv4:127.0.0.1:1"),
+        code=mock.Mock(return_value=code),
+        invocation_metadata=mock.Mock(return_value=()),
+    )
+
+
+@pytest.mark.parametrize("deferred", [False, True])
+def test_access_logger(
+    clock: Clock, caplog: pytest.LogCaptureFixture, deferred: bool
+) -> None:
+    """Test the access logger coalesces lines and flushes them on close."""
+    logger = AccessLogger(
+        handlers=[handlers.time_received("%S"), handlers.request, handlers.status],
+        detail_handlers=[handlers.peer],
+        detail_status=[grpc.StatusCode.INTERNAL],
+        deferred=deferred,
+        coalesce=Coalescer(window=1.0),
+        logger=logging.getLogger("test_coalesce"),
+    )
+
+    def log(second: int, code=None) -> None:
+        start = datetime(2021, 4, 3, 0, 0, second, tzinfo=timezone.utc)
+        logger.log(context(code), "/svc/Method", None, None, start, start)
+        logger.flush()
+
+    with caplog.at_level(logging.INFO, "test_coalesce"):
+        for second in range(3):
+            log(second, grpc.StatusCode.INTERNAL)
+        log(3)
+        log(4)
+        logger.close()
+
+    assert [
+        record.getMessage()
+        for record in caplog.records
+        if record.name == "test_coalesce"
+    ] == [
+        "00 /svc/Method INTERNAL 127.0.0.1",
+        "03 /svc/Method OK",
+        "00 /svc/Method INTERNAL 127.0.0.1 repeated 2 times between"
+        " 2021-04-03T00:00:00.000+00:00 and 2021-04-03T00:00:00.000+00:00",
+        "03 /svc/Method OK repeated 1 times between"
+        " 2021-04-03T00:00:00.000+00:00 and 2021-04-03T00:00:00.000+00:00",
+    ]
+
+
+@pytest.mark.parametrize("deferred", [False, True])
+def test_access_logger_timer(deferred: bool) -> None:
+    """Test summaries are written without a following line."""
+    logger = mock.Mock(spec=logging.Logger)
+    access_logger = AccessLogger(
+        handlers=[handlers.request],
+        deferred=deferred,
+        coalesce=Coalescer(window=0.05),
+        logger=logger,
+    )
+    start = datetime(2021, 4, 3, tzinfo=timezone.utc)
+    for _ in range(2):
+        access_logger.log(context(), "/svc/Method", None, None, start, start)
+
+    for _ in range(500):
+        if logger.log.call_count == 2:
+            break
+        time.sleep(0.01)
+
+    assert logger.log.call_count == 2
+    assert logger.log.call_args[0][-1].startswith("repeated 1 times between")
+    access_logger.close()
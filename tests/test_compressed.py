@@ -0,0 +1,237 @@
+"""Compressed file sink tests."""
+
+import gzip
+import threading
+import time
+from pathlib import Path
+from typing import Callable
+from typing import List
+from unittest import mock
+
+import pytest
+import zstandard
+
+from grpc_accesslog import sinks
+from grpc_accesslog.sinks import _compressed
+
+
+def lines(count: int) -> List[str]:
+    """Return distinct access log lines."""
+    return [f"127.0.0.1 /svc/Method OK {index}" for index in range(count)]
+
+
+@pytest.mark.parametrize("codec", ["gzip", "zstd"])
+def test_round_trip(tmp_path: Path, codec: str) -> None:
+    """Test lines written to a single segment are read back."""
+    sink = sinks.CompressedFileSink(tmp_path / "access.log", codec=codec, level=1)
+
+    for line in lines(100):
+        sink.write(line)
+    sink.close()
+
+    (segment,) = sink.segments()
+    assert segment.endswith(_compressed.CODECS[codec].suffix)
+    assert list(sinks.read_lines(segment)) == lines(100)
+    assert list(sinks.read_lines(tmp_path / "access.log")) == lines(100)
+
+
+def test_gzip_compatible(tmp_path: Path) -> None:
+    """Test segments are standard gzip files."""
+    sink = sinks.CompressedFileSink(tmp_path / "access.log")
+    sink.write("line")
+    sink.close()
+
+    assert gzip.decompress(Path(sink.segments()[0]).read_bytes()) == b"line\n"
+
+
+def test_zstd_compatible(tmp_path: Path) -> None:
+    """Test segments are standard zstd frames."""
+    sink = sinks.CompressedFileSink(tmp_path / "access.log", codec="zstd")
+    sink.write("line")
+    sink.close()
+
+    data = Path(sink.segments()[0]).read_bytes()
+    assert zstandard.ZstdDecompressor().decompressobj().decompress(data) == b"line\n"
+
+
+def test_unknown_codec(tmp_path: Path) -> None:
+    """Test unknown codecs are rejected."""
+    with pytest.raises(ValueError):
+        sinks.CompressedFileSink(tmp_path / "access.log", codec="lz4")
+
+
+def test_rotate_size(tmp_path: Path) -> None:
+    """Test segments are rotated once their compressed size is reached."""
+    sink = sinks.CompressedFileSink(
+        tmp_path / "access.log", level=0, max_bytes=1000, flush_interval=0
+    )
+
+    for line in lines(200):
+        sink.write(line)
+    sink.close()
+
+    segments = sink.segments()
+    assert len(segments) > 2
+    assert all(Path(segment).stat().st_size < 2000 for segment in segments)
+    assert list(sinks.read_lines(tmp_path / "access.log")) == lines(200)
+
+
+def test_rotate_age(tmp_path: Path) -> None:
+    """Test segments are rotated once they are older than max_age."""
+    sink = sinks.CompressedFileSink(
+        tmp_path / "access.log", max_age=60, flush_interval=3600
+    )
+
+    with mock.patch.object(_compressed, "time", wraps=time) as clock:
+        clock.monotonic.side_effect = [0.0, 30.0, 60.0, 61.0, 62.0]
+        for line in lines(4):
+            sink.write(line)
+        sink.flush()
+    sink.close()
+
+    segments = sink.segments()
+    assert len(segments) == 2
+    assert list(sinks.read_lines(segments[0])) == lines(2)
+    assert list(sinks.read_lines(segments[1])) == lines(4)[2:]
+
+
+def test_flush(tmp_path: Path) -> None:
+    """Test flushed lines are readable from the active segment."""
+    sink = sinks.CompressedFileSink(
+        tmp_path / "access.log", codec="zstd", flush_interval=3600
+    )
+
+    sink.write("first")
+    assert sink.flush(timeout=5)
+    sink.write("unflushed")
+    sink._writer.flush()
+
+    assert list(sinks.read_lines(tmp_path / "access.log", chunk_size=4)) == ["first"]
+    sink.close()
+    assert list(sinks.read_lines(tmp_path / "access.log")) == ["first", "unflushed"]
+
+
+def test_flush_idle(tmp_path: Path) -> None:
+    """Test flushing without writes creates no segment."""
+    sink = sinks.CompressedFileSink(tmp_path / "access.log")
+
+    assert sink.flush()
+    sink.close()
+
+    assert sink.segments() == []
+
+
+def until(condition: Callable[[], bool]) -> None:
+    """Wait up to 5 seconds for a condition."""
+    deadline = time.monotonic() + 5
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_flush_interval_idle(tmp_path: Path) -> None:
+    """Test the last lines are flushed while no further lines are written."""
+    sink = sinks.CompressedFileSink(tmp_path / "access.log", flush_interval=0.05)
+
+    sink.write("first")
+    sink.write("second")
+    until(lambda: len(list(sinks.read_lines(tmp_path / "access.log"))) == 2)
+    sink.close()
+
+
+def test_rotate_age_idle(tmp_path: Path) -> None:
+    """Test an idle segment is finished once older than max_age."""
+    sink = sinks.CompressedFileSink(
+        tmp_path / "access.log", max_age=0.05, flush_interval=3600
+    )
+
+    sink.write("first")
+    assert sink.flush(timeout=5)
+    until(lambda: sink._file is None)
+    (finished,) = sink.segments()
+    assert gzip.decompress(Path(finished).read_bytes()) == b"first\n"
+
+    sink.write("second")
+    sink.close()
+    assert len(sink.segments()) == 2
+    assert list(sinks.read_lines(tmp_path / "access.log")) == ["first", "second"]
+
+
+def test_idle_error(tmp_path: Path, caplog: pytest.LogCaptureFixture) -> None:
+    """Test failing idle work is logged and the writer keeps running."""
+    sink = sinks.CompressedFileSink(tmp_path / "access.log", flush_interval=0.01)
+
+    with mock.patch.object(_compressed, "time", wraps=time) as clock:
+        clock.monotonic.side_effect = RuntimeError("clock")
+        until(lambda: bool(caplog.records))
+    sink.write("line")
+    sink.close()
+
+    assert "idle" in caplog.records[0].getMessage()
+    assert list(sinks.read_lines(tmp_path / "access.log")) == ["line"]
+
+
+def test_writer_thread(tmp_path: Path) -> None:
+    """Test lines are compressed on the sink writer thread."""
+    sink = sinks.CompressedFileSink(tmp_path / "access.log")
+    threads: List[str] = []
+    compressor = _compressed._GzipCompressor
+
+    class Recording(compressor):  # type: ignore[valid-type,misc]
+        def compress(self, data: bytes) -> bytes:
+            threads.append(threading.current_thread().name)
+            return super().compress(data)
+
+    with mock.patch.object(sink, "_codec", sink._codec._replace(compressor=Recording)):
+        sink.write("line")
+        sink.close()
+
+    assert threads == ["access.log-compressor"]
+
+
+def test_name_collision(tmp_path: Path) -> None:
+    """Test segments started within the same second get a new sequence."""
+    sink = sinks.CompressedFileSink(
+        tmp_path / "access.log", max_bytes=1, flush_interval=0
+    )
+
+    with mock.patch.object(_compressed, "time", wraps=time) as clock:
+        clock.gmtime.return_value = (2021, 4, 3, 0, 0, 0, 5, 93, 0)
+        for line in lines(3):
+            sink.write(line)
+        sink.close()
+
+    assert [Path(segment).name for segment in sink.segments()] == [
+        "access.log.20210403T000000.0000.gz",
+        "access.log.20210403T000000.0001.gz",
+        "access.log.20210403T000000.0002.gz",
+    ]
+
+
+def test_segments(tmp_path: Path) -> None:
+    """Test segments of all codecs are listed in name order."""
+    for name in (
+        "access.log.2.0000.zst",
+        "access.log.1.0000.gz",
+        "access.log",
+        "other.log.0.0000.gz",
+    ):
+        (tmp_path / name).touch()
+
+    segments = _compressed.segments(tmp_path / "access.log")
+    assert [Path(segment).name for segment in segments] == [
+        "access.log.1.0000.gz",
+        "access.log.2.0000.zst",
+    ]
+    assert _compressed.segments(tmp_path / "access.log", ".gz") == [
+        str(tmp_path / "access.log.1.0000.gz")
+    ]
+
+
+def test_unknown_suffix(tmp_path: Path) -> None:
+    """Test reading a file without a codec suffix fails."""
+    path = tmp_path / "access.log"
+    path.write_text("line\n")
+
+    with pytest.raises(ValueError):
+        list(sinks.read_lines(path))
@@ -0,0 +1,126 @@
+"""Correlation identifier tests."""
+
+from datetime import datetime
+from datetime import timezone
+from typing import Optional
+from typing import Tuple
+from unittest import mock
+
+import grpc
+import pytest
+
+from grpc_accesslog import _correlation
+from grpc_accesslog import handlers
+from grpc_accesslog._context import Metadatum
+from grpc_accesslog._server import AccessLogger
+
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+SPAN_ID = "00f067aa0ba902b7"
+TRACEPARENT = f"00-{TRACE_ID}-{SPAN_ID}-01"
+
+
+@pytest.mark.parametrize(
+    ("value", "expected"),
+    [
+        pytest.param(TRACEPARENT, (TRACE_ID, SPAN_ID, True), id="sampled"),
+        pytest.param(
+            f"00-{TRACE_ID}-{SPAN_ID}-02", (TRACE_ID, SPAN_ID, False), id="unsampled"
+        ),
+        pytest.param(
+            f"01-{TRACE_ID}-{SPAN_ID}-01-extra",
+            (TRACE_ID, SPAN_ID, True),
+            id="future-version",
+        ),
+        pytest.param(f"00-{TRACE_ID}-{SPAN_ID}-01-extra", None, id="v00-extra"),
+        pytest.param(f"01-{TRACE_ID}-{SPAN_ID}-01x", None, id="future-no-dash"),
+        pytest.param(f"ff-{TRACE_ID}-{SPAN_ID}-01", None, id="version-ff"),
+        pytest.param(f"0g-{TRACE_ID}-{SPAN_ID}-01", None, id="version-hex"),
+        pytest.param(f"00-{TRACE_ID.upper()}-{SPAN_ID}-01", None, id="uppercase"),
+        pytest.param(f"00-{'0' * 32}-{SPAN_ID}-01", None, id="zero-trace"),
+        pytest.param(f"00-{TRACE_ID}-{'0' * 16}-01", None, id="zero-span"),
+        pytest.param(f"00-{TRACE_ID}-{SPAN_ID[:-1]}x-01", None, id="span-hex"),
+        pytest.param(f"00-{TRACE_ID}-{SPAN_ID}-0z", None, id="flags-hex"),
+        pytest.param(f"00_{TRACE_ID}-{SPAN_ID}-01", None, id="separator"),
+        pytest.param(TRACEPARENT[:-1], None, id="short"),
+        pytest.param("", None, id="empty"),
+    ],
+)
+def test_parse_traceparent(
+    value: str, expected: Optional[Tuple[str, str, bool]]
+) -> None:
+    """Test strict traceparent validation."""
+    assert _correlation.parse_traceparent(value) == expected
+
+
+def test_correlate() -> None:
+    """Test extracting identifiers from metadata."""
+    result = _correlation.correlate(
+        [
+            Metadatum("user-agent", "test"),
+            Metadatum("traceparent", TRACEPARENT),
+            Metadatum("x-request-id", "abc"),
+            Metadatum("traceparent", "ignored"),
+        ]
+    )
+
+    assert result == _correlation.Correlation(TRACE_ID, SPAN_ID, True, "abc", False)
+
+
+@pytest.mark.parametrize(
+    "metadata",
+    [
+        pytest.param(None, id="none"),
+        pytest.param([("traceparent", "invalid")], id="invalid"),
+        pytest.param([("x-request-id", "")], id="empty-request-id"),
+        pytest.param([("traceparent", b"bytes")], id="bytes"),
+    ],
+)
+def test_correlate_generated(metadata) -> None:
+    """Test request IDs are generated when absent."""
+    result = _correlation.correlate(metadata)
+
+    assert result.trace_id is None
+    assert result.sampled is None
+    assert result.generated
+    assert len(result.request_id) == 32
+    assert result.request_id != _correlation.correlate(metadata).request_id
+
+
+def test_echo_request_id() -> None:
+    """Test generated request IDs are appended to trailing metadata."""
+    context = mock.Mock(
+        grpc.ServicerContext,
+        invocation_metadata=mock.Mock(return_value=()),
+        trailing_metadata=mock.Mock(return_value=(("key", "value"),)),
+    )
+
+    result = _correlation.echo_request_id(context)
+
+    context.set_trailing_metadata.assert_called_once_with(
+        (("key", "value"), ("x-request-id", result.request_id))
+    )
+
+
+def test_echo_request_id_present() -> None:
+    """Test request IDs received from the client are not echoed."""
+    context = mock.Mock(
+        grpc.ServicerContext,
+        invocation_metadata=mock.Mock(return_value=(("x-request-id", "abc"),)),
+    )
+
+    assert _correlation.echo_request_id(context).request_id == "abc"
+    context.set_trailing_metadata.assert_not_called()
+
+
+def test_undeclared_handlers_not_correlated() -> None:
+    """Test correlation is parsed only for handlers declaring it."""
+    undeclared = AccessLogger(handlers=[lambda context: context.method_name])
+    declared = AccessLogger(handlers=[handlers.request_id])
+    start = datetime(2021, 4, 3, tzinfo=timezone.utc)
+
+    assert not undeclared._inputs.correlation
+    assert declared._inputs.correlation
+    with mock.patch("grpc_accesslog._server.correlate") as correlate:
+        undeclared.log(mock.Mock(), "/svc/Method", None, None, start, start)
+    correlate.assert_not_called()
@@ -0,0 +1,268 @@
+"""CPU time accounting tests."""
+
+import logging
+import time
+from concurrent import futures
+from datetime import datetime
+from datetime import timezone
+from typing import Any
+from typing import Iterator
+from typing import List
+from typing import Tuple
+from unittest import mock
+
+import grpc
+import pytest
+
+from grpc_accesslog import AccessLogInterceptor
+from grpc_accesslog import AsyncAccessLogInterceptor
+from grpc_accesslog import CpuTracker
+from grpc_accesslog import LogContext
+from grpc_accesslog import Plugin
+from grpc_accesslog import compile_format
+from grpc_accesslog import handlers
+from grpc_accesslog._cpu import cpu_timed
+from grpc_accesslog._cpu import take_cpu_ns
+
+from ._server import Servicer
+from .proto import test_service_pb2
+from .proto import test_service_pb2_grpc
+
+
+class Clock:
+    """Manually advanced thread CPU clock."""
+
+    def __init__(self) -> None:
+        """Start at 0."""
+        self.now = 0
+
+    def thread_time_ns(self) -> int:
+        """Return the current time."""
+        return self.now
+
+
+@pytest.fixture
+def clock() -> Iterator[Clock]:
+    """Replace the thread CPU clock."""
+    clock = Clock()
+    with mock.patch("grpc_accesslog._cpu.time", clock):
+        yield clock
+
+
+def test_unary(clock: Clock) -> None:
+    """Test the CPU time of a unary behavior is accounted, also on errors."""
+
+    def behavior(request: Any, context: Any) -> Any:
+        clock.now += 300
+        if request == "fail":
+            raise RuntimeError(request)
+        return request
+
+    timed = cpu_timed(behavior, False)
+    assert timed("ok", None) == "ok"
+    clock.now += 1000
+    assert take_cpu_ns() == 300
+    assert take_cpu_ns() is None
+
+    with pytest.raises(RuntimeError):
+        timed("fail", None)
+    assert take_cpu_ns() == 300
+
+
+def test_stream_resumptions(clock: Clock) -> None:
+    """Test only generator resumptions are accounted, not the consumer."""
+
+    def behavior(request: Any, context: Any) -> Iterator[int]:
+        for index in range(3):
+            clock.now += 10
+            yield index
+        clock.now += 5
+
+    clock.now += 7
+    responses = cpu_timed(behavior, True)("request", None)
+    for _ in responses:
+        clock.now += 1000
+    assert take_cpu_ns() == 35
+
+
+def test_stream_setup_and_close(clock: Clock) -> None:
+    """Test the behavior call is accounted and an abandoned stream keeps it."""
+
+    def behavior(request: Any, context: Any) -> Iterator[int]:
+        clock.now += 100
+        return iter(range(5))
+
+    responses = cpu_timed(behavior, True)("request", None)
+    assert next(responses) == 0
+    responses.close()
+    assert take_cpu_ns() == 100
+
+
+class BurningServicer(Servicer):
+    """Servicer spending CPU time in every method."""
+
+    def UnaryUnary(  # noqa: N802
+        self, request: test_service_pb2.Request, context: grpc.ServicerContext
+    ) -> test_service_pb2.Response:
+        """Burn CPU time, then respond."""
+        burn(0.02)
+        return super().UnaryUnary(request, context)
+
+    def UnaryStream(  # noqa: N802
+        self, request: test_service_pb2.Request, context: grpc.ServicerContext
+    ) -> Iterator[test_service_pb2.Response]:
+        """Burn CPU time for every response, then sleep."""
+        for response in super().UnaryStream(request, context):
+            burn(0.01)
+            yield response
+
+
+def burn(seconds: float) -> None:
+    """Spend CPU time on the calling thread."""
+    deadline = time.thread_time() + seconds
+    while time.thread_time() < deadline:
+        pass
+
+
+def serve(interceptor: AccessLogInterceptor) -> Tuple[grpc.Server, str]:
+    """Start a server with an interceptor."""
+    server = grpc.server(
+        futures.ThreadPoolExecutor(max_workers=1), interceptors=[interceptor]
+    )
+    port = server.add_insecure_port("localhost:0")
+    test_service_pb2_grpc.add_TestServiceServicer_to_server(
+        BurningServicer(0.05), server
+    )
+    server.start()
+    return server, f"localhost:{port}"
+
+
+def call(address: str) -> None:
+    """Call a unary and a response streaming method."""
+    with grpc.insecure_channel(address) as channel:
+        stub = test_service_pb2_grpc.TestServiceStub(channel)
+        stub.UnaryUnary(test_service_pb2.Request(data="ab"))
+        list(stub.UnaryStream(test_service_pb2.Request(data="ab")))
+
+
+class Ender(Plugin):
+    """Plugin recording the finished RPCs."""
+
+    fields = frozenset(("cpu",))
+
+    def __init__(self) -> None:
+        """Create a plugin."""
+        self.contexts: List[LogContext] = []
+
+    def on_end(self, state: Any, log_context: LogContext) -> None:
+        """Record the finished RPC."""
+        self.contexts.append(log_context)
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [{}, {"deferred": True}, {"plugins": [Ender()]}],
+    ids=["sync", "deferred", "plugins"],
+)
+def test_interceptor(caplog: pytest.LogCaptureFixture, kwargs) -> None:
+    """Test the interceptor logs the servicer CPU time, excluding sleeps."""
+    tracker = CpuTracker(interval=0)
+    interceptor = AccessLogInterceptor(
+        handlers=[handlers.request, compile_format("$rtt_ms"), tracker.cpu_us],
+        logger=logging.getLogger("test_cpu"),
+        **kwargs,
+    )
+    server, address = serve(interceptor)
+    with caplog.at_level(logging.INFO, "test_cpu"):
+        call(address)
+        interceptor.close()
+    server.stop(grace=0)
+
+    lines = [
+        record.getMessage().split()
+        for record in caplog.records
+        if record.name == "test_cpu"
+    ]
+    assert [line[0] for line in lines] == [
+        "/TestService/UnaryUnary",
+        "/TestService/UnaryStream",
+    ]
+    unary_cpu, stream_cpu = (int(line[2]) for line in lines)
+    assert unary_cpu >= 20000
+    # Two 10 ms bursts, while the servicer sleeps 100 ms.
+    assert 20000 <= stream_cpu < 90000 < int(lines[1][1]) * 1000
+
+    totals = tracker.snapshot()
+    assert totals["/TestService/UnaryStream"].total_ns // 1000 == stream_cpu
+    assert totals["/TestService/UnaryStream"].max_ns // 1000 == stream_cpu
+    for plugin in kwargs.get("plugins", ()):
+        assert [context.cpu_ns is not None for context in plugin.contexts] == [
+            True,
+            True,
+        ]
+
+
+@pytest.mark.parametrize(
+    "handler",
+    [handlers.request, lambda context: context.method_name],
+    ids=["declared", "undeclared"],
+)
+def test_not_configured(handler: handlers.THandler) -> None:
+    """Test the CPU clock is not read without a handler declaring it."""
+    interceptor = AccessLogInterceptor(handlers=[handler])
+    async_interceptor = AsyncAccessLogInterceptor(handlers=[handlers.cpu_us])
+
+    assert not interceptor._inputs.cpu
+    assert not async_interceptor._inputs.cpu
+    with mock.patch("grpc_accesslog._cpu.time") as clock:
+        server, address = serve(interceptor)
+        call(address)
+        server.stop(grace=0)
+    clock.thread_time_ns.assert_not_called()
+
+
+def test_cpu_us() -> None:
+    """Test the handler output of unmeasured RPCs."""
+    now = datetime.now(timezone.utc)
+    context = LogContext(mock.Mock(), "/svc/Method", None, None, now, now)
+
+    assert handlers.cpu_us(context) == "-"
+    assert handlers.cpu_us(context._replace(cpu_ns=1234567)) == "1234"
+
+
+def test_tracker(caplog: pytest.LogCaptureFixture) -> None:
+    """Test per-method totals and their windows."""
+    tracker = CpuTracker()
+    tracker.record("/svc/B", 3000)
+    tracker.record("/svc/A", 1000)
+    tracker.record("/svc/A", 4000)
+
+    snapshot = tracker.snapshot()
+    assert {
+        method: (totals.count, totals.total_ns, totals.max_ns)
+        for method, totals in snapshot.items()
+    } == {"/svc/A": (2, 5000, 4000), "/svc/B": (1, 3000, 3000)}
+
+    with caplog.at_level(logging.INFO, "grpc_accesslog._cpu"):
+        tracker.close()
+        tracker.emit()
+    assert [record.getMessage() for record in caplog.records][-2:] == [
+        "cpu /svc/A count=2 total_ms=0.005 mean_us=2 max_us=4",
+        "cpu /svc/B count=1 total_ms=0.003 mean_us=3 max_us=3",
+    ]
+
+
+def test_tracker_interval(caplog: pytest.LogCaptureFixture) -> None:
+    """Test the background thread emits a window every interval."""
+    with caplog.at_level(logging.INFO, "grpc_accesslog._cpu"):
+        tracker = CpuTracker(interval=0.01)
+        tracker.record("/svc/A", 1000)
+        deadline = time.monotonic() + 5
+        while not caplog.records:
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+        tracker.close()
+
+    assert caplog.records[0].getMessage() == (
+        "cpu /svc/A count=1 total_ms=0.001 mean_us=1 max_us=1"
+    )
@@ -0,0 +1,157 @@
+"""UDP syslog sink tests."""
+
+import re
+import socket
+from typing import Iterator
+from typing import List
+
+import pytest
+
+from grpc_accesslog import sinks
+from grpc_accesslog.sinks._datagram import _DatagramSender
+from grpc_accesslog.sinks._datagram import pack
+from grpc_accesslog.sinks._datagram import truncate
+
+
+MESSAGE = re.compile(
+    rb"<134>1 \d{4}-\d\d-\d\dT\d\d:\d\d:\d\d\.\d{6}Z host app \d+ access - (.*)"
+)
+
+
+class Receiver:
+    """Local stand-in for a UDP daemon."""
+
+    def __init__(self) -> None:
+        """Bind to a free local port."""
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 20)
+        self.socket.bind(("127.0.0.1", 0))
+        self.socket.settimeout(2)
+        self.port = int(self.socket.getsockname()[1])
+
+    def datagrams(self, count: int) -> List[bytes]:
+        """Receive a number of datagrams."""
+        return [self.socket.recv(65536) for _ in range(count)]
+
+
+@pytest.fixture
+def receiver() -> Iterator[Receiver]:
+    """Provide a UDP receiver."""
+    receiver = Receiver()
+    yield receiver
+    receiver.socket.close()
+
+
+def syslog(receiver: Receiver, **kwargs) -> sinks.SyslogSink:
+    """Create a syslog sink sending to the receiver."""
+    kwargs.setdefault("flush_interval", 0)
+    return sinks.SyslogSink(
+        port=receiver.port, hostname="host", app_name="app", **kwargs
+    )
+
+
+def test_pack() -> None:
+    """Test records are packed up to the MTU and truncated."""
+    datagrams = list(pack([b"aaaa", b"bbbb", b"cc", b"d" * 20, b"e"], 10))
+
+    assert datagrams == [b"aaaa\nbbbb", b"cc", b"dddddddddd", b"e"]
+
+
+def test_truncate() -> None:
+    """Test truncation never splits a UTF-8 character."""
+    data = "aé€😀".encode()
+
+    assert [truncate(data, size).decode() for size in range(11)] == [
+        "",
+        "a",
+        "a",
+        "aé",
+        "aé",
+        "aé",
+        "aé€",
+        "aé€",
+        "aé€",
+        "aé€",
+        "aé€😀",
+    ]
+
+
+def test_incomplete_subclass() -> None:
+    """Test datagram sinks without ``flush`` cannot be created."""
+    with pytest.raises(TypeError, match="flush"):
+        _DatagramSender("127.0.0.1", 1, 1472)  # type: ignore[abstract]
+
+
+def test_syslog(receiver: Receiver) -> None:
+    """Test lines are framed as RFC 5424 messages in a single datagram."""
+    sink = syslog(receiver)
+
+    for index in range(3):
+        sink.write(f"line {index}")
+    sink.close()
+
+    (datagram,) = receiver.datagrams(1)
+    messages = [MESSAGE.fullmatch(message) for message in datagram.split(b"\n")]
+    assert [match.group(1) for match in messages if match] == [
+        b"line 0",
+        b"line 1",
+        b"line 2",
+    ]
+    assert sink.sent == 1
+
+
+def test_syslog_mtu(receiver: Receiver) -> None:
+    """Test messages are packed into full datagrams without loss."""
+    sink = syslog(receiver, mtu=300)
+
+    for index in range(100):
+        sink.write(f"line {index:03}")
+    sink.flush()
+
+    datagrams = receiver.datagrams(sink.sent)
+    messages = [message for datagram in datagrams for message in datagram.split(b"\n")]
+    assert all(len(datagram) <= 300 for datagram in datagrams)
+    assert len(datagrams) <= 100 // 4
+    assert [MESSAGE.fullmatch(message).group(1) for message in messages] == [  # type: ignore
+        f"line {index:03}".encode() for index in range(100)
+    ]
+    sink.close()
+
+
+def test_syslog_truncated(receiver: Receiver) -> None:
+    """Test messages longer than the MTU are truncated between characters."""
+    sink = syslog(receiver, mtu=100)
+
+    sink.write("x" * 200)
+    sink.close()
+
+    sink = syslog(receiver, mtu=100)
+    sink.write("é" * 100)
+    sink.close()
+
+    datagram, multibyte = receiver.datagrams(2)
+    assert len(datagram) == 100
+    assert 99 <= len(multibyte) <= 100
+    assert multibyte.decode().endswith("é")
+
+
+def test_syslog_flusher(receiver: Receiver) -> None:
+    """Test buffered messages are sent by the background thread."""
+    sink = syslog(receiver, flush_interval=0.01)
+
+    sink.write("line")
+
+    (datagram,) = receiver.datagrams(1)
+    assert datagram.endswith(b" line")
+    sink.close()
+
+
+def test_send_error(receiver: Receiver) -> None:
+    """Test failed sends are counted instead of raised."""
+    sink = syslog(receiver)
+    sink._socket.close()
+
+    sink.write("line")
+    sink.flush()
+
+    assert (sink.sent, sink.dropped) == (0, 1)
@@ -0,0 +1,218 @@
+"""Deferred formatting tests."""
+
+import gc
+import logging
+import threading
+import time
+import weakref
+from datetime import datetime
+from datetime import timezone
+from typing import List
+from unittest import mock
+
+import grpc
+import pytest
+
+from grpc_accesslog import handlers
+from grpc_accesslog._deferred import Capture
+from grpc_accesslog._deferred import DeferredWriter
+from grpc_accesslog._server import AccessLogger
+
+
+START = datetime(2021, 4, 3, 0, 0, 0, 0, timezone.utc)
+END = datetime(2021, 4, 3, 0, 1, 0, 0, timezone.utc)
+
+
+class Message:
+    """Weak referenceable message stand-in."""
+
+    def ByteSize(self) -> int:  # noqa: N802
+        """Return a fixed message size."""
+        return 10
+
+
+@pytest.fixture
+def servicer_context() -> mock.Mock:
+    """Mock gRPC servicer context."""
+    return mock.Mock(
+        grpc.ServicerContext,
+        peer=mock.Mock(return_value="ipv4:192.168.0.1:58111"),
+        code=mock.Mock(return_value=grpc.StatusCode.NOT_FOUND),
+        invocation_metadata=mock.Mock(
+            return_value=(mock.Mock(key="user-agent", value="test"),)
+        ),
+    )
+
+
+def test_capture_declared_fields(servicer_context: mock.Mock) -> None:
+    """Test only declared fields are captured."""
+    capture = Capture(frozenset({"peer", "response_size"}))
+    request, response = Message(), Message()
+
+    record = capture(
+        servicer_context, "/svc/Method", request, response, START, END, 1, 1
+    )
+    log_context = record.log_context()
+
+    servicer_context.code.assert_not_called()
+    servicer_context.invocation_metadata.assert_not_called()
+    assert record.request is None
+    assert record.request_count is None
+    assert log_context.server_context.peer() == "ipv4:192.168.0.1:58111"
+    assert log_context.server_context.code() is None
+    assert handlers.response_size(log_context) == "10"
+    assert log_context.response is not response
+
+
+def test_capture_all_fields(servicer_context: mock.Mock) -> None:
+    """Test capturing every field."""
+    capture = Capture(handlers.FIELDS)
+    request, response = Message(), Message()
+
+    log_context = capture(
+        servicer_context, "/svc/Method", request, response, START, END, 2, 3
+    ).log_context()
+
+    assert log_context.request is request
+    assert log_context.response is response
+    assert handlers.status(log_context) == "NOT_FOUND"
+    assert handlers.user_agent(log_context) == "test"
+    assert handlers.message_counts(log_context) == "2/3"
+    assert handlers.rtt_ms(log_context) == "60000"
+
+
+def test_capture_sizes_release_messages(servicer_context: mock.Mock) -> None:
+    """Test size-only captures do not keep messages alive."""
+    capture = Capture(frozenset({"request_size", "response_size"}))
+    request = Message()
+    reference = weakref.ref(request)
+
+    record = capture(
+        servicer_context, "/svc/Method", request, iter(()), START, END, None, None
+    )
+    del request
+    gc.collect()
+
+    assert reference() is None
+    assert handlers.request_size(record.log_context()) == "10"
+    assert handlers.response_size(record.log_context()) == "0"
+
+
+def test_writer_flush_and_close() -> None:
+    """Test writer writes records in order and drains on close."""
+    written: List[int] = []
+    writer = DeferredWriter(written.append, "test-writer")  # type: ignore[arg-type]
+
+    for index in range(100):
+        writer.submit(index)  # type: ignore[arg-type]
+
+    assert writer.flush(5)
+    assert written == list(range(100))
+
+    writer.submit(100)  # type: ignore[arg-type]
+    writer.close()
+
+    assert written[-1] == 100
+    assert writer.flush()
+    writer.close()
+
+
+def test_writer_bound() -> None:
+    """Test records beyond the bound or after close are dropped."""
+    written: List[int] = []
+    release = threading.Event()
+
+    def write(record: int) -> None:
+        release.wait(5)
+        written.append(record)
+
+    writer = DeferredWriter(write, "test-writer", max_pending=2)  # type: ignore
+    writer.submit(0)  # type: ignore[arg-type]
+    while writer.depth():
+        time.sleep(0.001)
+    for index in range(1, 5):
+        writer.submit(index)  # type: ignore[arg-type]
+
+    assert writer.dropped == 2
+    assert not writer.flush(0.01)
+    release.set()
+    writer.close()
+    writer.submit(5)  # type: ignore[arg-type]
+
+    assert written == [0, 1, 2]
+    assert writer.dropped == 3
+    with pytest.raises(ValueError):
+        DeferredWriter(write, "test-writer", max_pending=0)  # type: ignore
+
+
+def test_writer_error(caplog: pytest.LogCaptureFixture) -> None:
+    """Test write errors are logged and do not stop the writer."""
+    written: List[int] = []
+
+    def write(record: int) -> None:
+        if record == 0:
+            raise RuntimeError("broken")
+        written.append(record)
+
+    writer = DeferredWriter(write, "test-writer")  # type: ignore[arg-type]
+    writer.submit(0)  # type: ignore[arg-type]
+    writer.submit(1)  # type: ignore[arg-type]
+    writer.close()
+
+    assert written == [1]
+    assert "Failed to write deferred access log record" in caplog.text
+
+
+def test_deferred_logger(servicer_context: mock.Mock) -> None:
+    """Test deferred logger calls handlers on the writer thread."""
+    logger = mock.Mock()
+    threads = []
+
+    @handlers.requires("status")
+    def thread_name(context) -> str:
+        import threading
+
+        threads.append(threading.current_thread().name)
+        return handlers.status(context)
+
+    access_logger = AccessLogger(
+        name="access",
+        logger=logger,
+        handlers=[handlers.request, thread_name],
+        deferred=True,
+    )
+    access_logger.log(servicer_context, "/svc/Method", None, None, START, END)
+    assert access_logger.flush(5)
+    access_logger.close()
+
+    logger.log.assert_called_once_with(
+        logging.INFO, "%s %s", "/svc/Method", "NOT_FOUND"
+    )
+    assert threads == ["access-writer"]
+    assert access_logger.dropped == 0
+
+
+def test_deferred_logger_fields() -> None:
+    """Test captured fields include detail handlers and detail status."""
+    access_logger = AccessLogger(
+        logger=mock.Mock(),
+        handlers=[handlers.request],
+        detail_handlers=[handlers.peer],
+        detail_status=[grpc.StatusCode.INTERNAL],
+    )
+
+    assert access_logger._captured_fields() == {"peer", "status"}
+    assert access_logger.dropped == 0
+    assert access_logger.flush()
+    access_logger.close()
+
+
+def test_deferred_logger_no_handlers(servicer_context: mock.Mock) -> None:
+    """Test nothing is queued without handlers."""
+    logger = mock.Mock()
+    access_logger = AccessLogger(logger=logger, handlers=[], deferred=True)
+
+    access_logger.log(servicer_context, "/svc/Method", None, None, START, END)
+    access_logger.close()
+
+    logger.log.assert_not_called()
@@ -0,0 +1,76 @@
+"""Detail threshold tests."""
+
+import math
+
+import pytest
+
+from grpc_accesslog import AdaptiveThreshold
+from grpc_accesslog import StaticThreshold
+
+
+def test_static_threshold() -> None:
+    """Test default and per-method static thresholds."""
+    threshold = StaticThreshold(100.0, {"/svc/Fast": 10.0})
+
+    assert threshold("/svc/Other", 100.0)
+    assert not threshold("/svc/Other", 99.9)
+    assert threshold("/svc/Fast", 10.0)
+    assert not threshold("/svc/Fast", 9.9)
+    assert not StaticThreshold()("/svc/Other", 1e9)
+
+
+def test_adaptive_threshold() -> None:
+    """Test adaptive threshold follows the running percentile per method."""
+    threshold = AdaptiveThreshold(
+        percentile=0.9, window=100, min_samples=10, update_every=10
+    )
+
+    assert threshold.threshold("/svc/Method") == math.inf
+    for duration in range(1, 101):
+        threshold("/svc/Method", float(duration))
+
+    assert threshold.threshold("/svc/Method") == 90.0
+    assert threshold("/svc/Method", 95.0)
+    assert threshold("/svc/Method", 90.0)
+    assert not threshold("/svc/Method", 89.9)
+    assert not threshold("/svc/Method", 50.0)
+    assert threshold.threshold("/svc/Other") == math.inf
+    assert not threshold("/svc/Other", 1000.0)
+
+
+def test_adaptive_threshold_window() -> None:
+    """Test adaptive threshold forgets samples outside of the window."""
+    threshold = AdaptiveThreshold(
+        percentile=0.5, window=10, min_samples=10, update_every=10
+    )
+
+    for _ in range(10):
+        threshold("/svc/Method", 100.0)
+    for _ in range(10):
+        threshold("/svc/Method", 1.0)
+
+    assert threshold.threshold("/svc/Method") == 1.0
+
+
+def test_adaptive_threshold_floor() -> None:
+    """Test adaptive threshold lower bound."""
+    threshold = AdaptiveThreshold(min_samples=1, update_every=1, floor_ms=5.0)
+
+    threshold("/svc/Method", 1.0)
+
+    assert threshold.threshold("/svc/Method") == 5.0
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {"percentile": 0.0},
+        {"percentile": 1.5},
+        {"window": 0},
+        {"update_every": 0},
+    ],
+)
+def test_adaptive_threshold_invalid(kwargs) -> None:
+    """Test adaptive threshold argument validation."""
+    with pytest.raises(ValueError):
+        AdaptiveThreshold(**kwargs)
@@ -0,0 +1,112 @@
+"""Log format compilation tests."""
+
+import logging
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+from unittest import mock
+
+import grpc
+import pytest
+
+from grpc_accesslog import LogContext
+from grpc_accesslog import compile_format
+from grpc_accesslog import handlers
+from grpc_accesslog._context import Metadatum
+from grpc_accesslog._server import AccessLogger
+from tests.proto import test_service_pb2
+
+
+START = datetime(2021, 4, 3, 0, 0, 0, 0, timezone.utc)
+
+
+def log_context() -> LogContext:
+    """Build a LogContext with every input set."""
+    server_context = mock.Mock(
+        peer=mock.Mock(return_value="ipv4:127.0.0.1:50000"),
+        code=mock.Mock(return_value=grpc.StatusCode.NOT_FOUND),
+        invocation_metadata=mock.Mock(
+            return_value=(
+                Metadatum("user-agent", "test"),
+                Metadatum("x-tenant-id", "acme"),
+            )
+        ),
+    )
+    return LogContext(
+        server_context,
+        "/pkg.Svc/Get",
+        test_service_pb2.Request(data="data"),
+        test_service_pb2.Response(data="response"),
+        START,
+        START + timedelta(microseconds=1500),
+        1,
+        1,
+    )
+
+
+def test_compile_format() -> None:
+    """Test variables are rendered like the built-in handlers."""
+    handler = compile_format(
+        '$peer [$time_local] "$method" $status $response_bytes $rtt_us '
+        '"$http_user_agent"'
+    )
+
+    assert handler(log_context()) == (
+        '127.0.0.1 [03/Apr/2021:00:00:00 +0000] "/pkg.Svc/Get" NOT_FOUND 10 1500 '
+        '"test"'
+    )
+
+
+def test_variables() -> None:
+    """Test the remaining variables and syntax."""
+    handler = compile_format(
+        "${rtt_ms}ms $$ $time_iso8601 $remote_addr $request_bytes "
+        "$message_counts $http_x_tenant_id $http_x_missing {}\\\t$"
+    )
+
+    assert handler(log_context()) == (
+        "2ms $ 2021-04-03T00:00:00+00:00 127.0.0.1 6 1/1 acme - {}\\\t$"
+    )
+
+
+def test_custom_variables() -> None:
+    """Test custom variables extend and override the built-in ones."""
+    handler = compile_format(
+        "$method $tenant",
+        {"method": handlers.status, "tenant": lambda context: "acme"},
+    )
+
+    assert handler(log_context()) == "NOT_FOUND acme"
+    assert handlers.handler_fields(handler) == handlers.DEFAULT_FIELDS
+
+
+def test_fields() -> None:
+    """Test the compiled handler declares the union of the variable fields."""
+    handler = compile_format("$method $status $rtt_us $http_user_agent")
+
+    assert handler.fields == frozenset(  # type: ignore[attr-defined]
+        ("status", "time", "metadata")
+    )
+
+
+def test_unknown_variable() -> None:
+    """Test unknown variables fail at compilation."""
+    with pytest.raises(ValueError, match=r"\$upstream_addr"):
+        compile_format("$peer $upstream_addr")
+
+
+def test_access_logger(caplog: pytest.LogCaptureFixture) -> None:
+    """Test a log format replaces the access logger handlers."""
+    logger = AccessLogger(
+        log_format="$method $status",
+        deferred=True,
+        logger=logging.getLogger("test_format"),
+    )
+
+    with caplog.at_level(logging.INFO, "test_format"):
+        context = log_context()
+        logger.log(context.server_context, "/pkg.Svc/Get", None, None, START, START)
+        logger.close()
+
+    assert caplog.messages == ["/pkg.Svc/Get NOT_FOUND"]
+    assert logger._captured_fields() == frozenset(("status",))
@@ -7,6 +7,7 @@ from unittest.mock import Mock
 import grpc
 import pytest
 
+from grpc_accesslog import Correlation
 from grpc_accesslog import LogContext
 from grpc_accesslog import handlers
 
@@ -39,6 +40,14 @@ def log_context(servicer_context: Mock) -> LogContext:
     return context
 
 
+@pytest.fixture
+def sized_log_context(log_context: LogContext) -> LogContext:
+    """Mock LogContext with a sized request."""
+    return log_context._replace(
+        request=Mock(name="Request", ByteSize=Mock(return_value=4))
+    )
+
+
 @pytest.mark.parametrize(
     ("format", "expected"),
     [
@@ -89,6 +98,11 @@ def test_peer(log_context: LogContext) -> None:
     assert handlers.peer(log_context) == "192.168.0.1"
 
 
+def test_request_size(sized_log_context: LogContext) -> None:
+    """Test returning gRPC request byte size."""
+    assert handlers.request_size(sized_log_context) == "4"
+
+
 def test_response_size(log_context: LogContext) -> None:
     """Test returning gRPC response byte size."""
     assert handlers.response_size(log_context) == "10"
@@ -107,3 +121,96 @@ def test_user_agent(metadata: Mock, expected: str, log_context: LogContext) -> N
 
     log_context.server_context.invocation_metadata = mock_metadata  # type: ignore
     assert handlers.user_agent(log_context) == expected
+
+
+def test_request_excerpt(log_context: LogContext) -> None:
+    """Test rendering a truncated single line request excerpt."""
+    request = Mock(ByteSize=Mock(return_value=4))
+    request.__str__ = Mock(return_value='data: "abcdef"\nnum: 1\n')  # type: ignore
+    log_context = log_context._replace(request=request)
+
+    assert handlers.request_excerpt()(log_context) == '{data: "abcdef" num: 1}'
+    assert handlers.request_excerpt(5)(log_context) == "{data:...}"
+    assert handlers.request_excerpt()(log_context._replace(request=iter(()))) == "-"
+
+
+def test_metadata(log_context: LogContext) -> None:
+    """Test rendering invocation metadata."""
+    log_context.server_context.invocation_metadata = Mock(  # type: ignore
+        return_value=(
+            Mock(key="User-Agent", value="test"),
+            Mock(key="trace-bin", value=b"\x00\x01"),
+        )
+    )
+
+    assert handlers.metadata()(log_context) == "user-agent=test,trace-bin=<2 bytes>"
+    assert handlers.metadata(["trace-bin"])(log_context) == "trace-bin=<2 bytes>"
+    assert handlers.metadata(["other"])(log_context) == "-"
+    assert handlers.metadata_value("user-agent")(log_context) == "test"
+    assert handlers.metadata_value("Trace-Bin")(log_context) == "<2 bytes>"
+    assert handlers.metadata_value("other")(log_context) == "-"
+
+
+def test_message_counts(log_context: LogContext) -> None:
+    """Test rendering message counts."""
+    assert handlers.message_counts(log_context) == "-"
+    assert (
+        handlers.message_counts(log_context._replace(request_count=3, response_count=1))
+        == "3/1"
+    )
+
+
+def test_requires(log_context: LogContext) -> None:
+    """Test handler field declarations."""
+
+    @handlers.requires("peer", "status")
+    def handler(context: LogContext) -> str:
+        return "handler"
+
+    assert handler(log_context) == "handler"
+    assert handlers.handler_fields(handler) == {"peer", "status"}
+    assert handlers.handler_fields(lambda context: "") == handlers.DEFAULT_FIELDS
+    assert handlers.handler_fields(handlers.request) == frozenset()
+    assert handlers.handler_fields(handlers.time_received()) == {"time"}
+
+
+def test_requires_unknown() -> None:
+    """Test unknown handler fields are rejected."""
+    with pytest.raises(ValueError, match="Unknown handler fields: nope"):
+        handlers.requires("nope")
+
+
+def test_correlation_handlers(log_context: LogContext) -> None:
+    """Test trace context handlers parse the metadata of a record."""
+    log_context.server_context.invocation_metadata.return_value = (
+        ("traceparent", "00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-00"),
+    )
+
+    assert handlers.trace_id(log_context) == "4bf92f3577b34da6a3ce929d0e0e4736"
+    assert handlers.span_id(log_context) == "00f067aa0ba902b7"
+    assert handlers.trace_sampled(log_context) == "0"
+    assert handlers.request_id(log_context) != handlers.request_id(log_context)
+    assert handlers.handler_fields(handlers.request_id) == {"metadata", "correlation"}
+
+
+def test_correlation_handlers_missing(log_context: LogContext) -> None:
+    """Test placeholders without a traceparent header."""
+    log_context.server_context.invocation_metadata.return_value = (
+        ("x-request-id", "abc"),
+    )
+
+    assert handlers.trace_id(log_context) == "-"
+    assert handlers.span_id(log_context) == "-"
+    assert handlers.trace_sampled(log_context) == "-"
+    assert handlers.request_id(log_context) == "abc"
+
+
+def test_correlation_precomputed(log_context: LogContext) -> None:
+    """Test identifiers computed by the interceptor are used."""
+    context = log_context._replace(
+        correlation=Correlation("a" * 32, "b" * 16, True, "id", True)
+    )
+
+    assert handlers.trace_sampled(context) == "1"
+    assert handlers.request_id(context) == "id"
+    log_context.server_context.invocation_metadata.assert_not_called()
@@ -0,0 +1,183 @@
+"""Heavy hitter tracking tests."""
+
+import collections
+import logging
+import random
+import time
+from concurrent import futures
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+from unittest import mock
+
+import grpc
+import pytest
+
+from grpc_accesslog import AccessLogInterceptor
+from grpc_accesslog import HeavyHitter
+from grpc_accesslog import HeavyHitterTracker
+from grpc_accesslog import LogContext
+from grpc_accesslog import OverloadController
+from grpc_accesslog import OverloadMode
+from grpc_accesslog import SpaceSaving
+from grpc_accesslog._context import Metadatum
+
+from ._server import Servicer
+from .proto import test_service_pb2
+from .proto import test_service_pb2_grpc
+
+
+START = datetime(2021, 4, 3, 0, 0, 0, 0, timezone.utc)
+
+
+def zipf_stream(length: int, keys: int, seed: int = 0) -> list:
+    """Return a Zipf distributed stream of integer keys."""
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) for rank in range(keys)]
+    return rng.choices(range(keys), weights, k=length)
+
+
+@pytest.mark.parametrize("capacity", [10, 50, 200])
+def test_space_saving_bounds(capacity: int) -> None:
+    """Test the Space-Saving count guarantees on a skewed stream."""
+    stream = zipf_stream(20000, 5000)
+    exact = collections.Counter(stream)
+    summary: SpaceSaving[int] = SpaceSaving(capacity)
+    for key in stream:
+        summary.add(key)
+
+    bound = len(stream) / capacity
+    hitters = summary.top()
+    assert len(hitters) == capacity
+    assert summary.total == len(stream)
+    assert sum(hitter.requests for hitter in hitters) == len(stream)
+    for hitter in hitters:
+        assert hitter.requests - hitter.overestimate <= exact[hitter.key]
+        assert exact[hitter.key] <= hitter.requests
+        assert hitter.overestimate <= bound
+
+    monitored = {hitter.key for hitter in hitters}
+    assert {key for key, count in exact.items() if count > bound} <= monitored
+
+    assert [hitter.key for hitter in summary.top(1)] == [0]
+
+
+def test_space_saving_totals() -> None:
+    """Test errors and latency accumulate while a key is monitored."""
+    summary: SpaceSaving[str] = SpaceSaving(2)
+    summary.add("a", True, 1.5)
+    summary.add("a", False, 2.0)
+    summary.add("b", True, 3.0)
+    summary.add("b")
+    summary.add("b")
+    summary.add("c", True, 4.0)
+
+    assert summary.top() == [
+        HeavyHitter("b", 3, 0, 1, 3.0),
+        HeavyHitter("c", 3, 2, 1, 4.0),
+    ]
+
+
+def test_space_saving_capacity() -> None:
+    """Test the capacity is validated."""
+    with pytest.raises(ValueError):
+        SpaceSaving(0)
+
+
+def log_context(peer: str, code: grpc.StatusCode) -> LogContext:
+    """Build a LogContext of a 2ms RPC."""
+    server_context = mock.Mock(
+        peer=mock.Mock(return_value=f"ipv4:{peer}:50000"),
+        code=mock.Mock(return_value=code),
+        invocation_metadata=mock.Mock(return_value=(Metadatum("user-agent", "test"),)),
+    )
+    return LogContext(
+        server_context,
+        "/pkg.Svc/Get",
+        None,
+        None,
+        START,
+        START + timedelta(milliseconds=2),
+    )
+
+
+def test_tracker(caplog: pytest.LogCaptureFixture) -> None:
+    """Test the plugin records RPCs and windows are emitted."""
+    caplog.set_level(logging.INFO, "grpc_accesslog._heavy_hitters")
+    tracker = HeavyHitterTracker(capacity=4, top=1, interval=0)
+
+    tracker.on_end(None, log_context("10.0.0.1", None))
+    tracker.on_end(None, log_context("10.0.0.1", grpc.StatusCode.INTERNAL))
+    tracker.on_end(None, log_context("10.0.0.2", grpc.StatusCode.OK))
+
+    assert tracker.top("peer") == [HeavyHitter("10.0.0.1", 2, 0, 1, 4.0)]
+    assert tracker.top("peer_method", 5) == [
+        HeavyHitter(("10.0.0.1", "/pkg.Svc/Get"), 2, 0, 1, 4.0),
+        HeavyHitter(("10.0.0.2", "/pkg.Svc/Get"), 1, 0, 0, 2.0),
+    ]
+    assert tracker.fields == frozenset(("time", "peer", "status", "metadata"))
+    snapshot = tracker.snapshot()
+    snapshot["peer"].add("10.0.0.3")
+    assert snapshot["peer"].total == 4
+    assert len(tracker.top("peer", 5)) == 2
+
+    tracker.close()
+    assert caplog.messages == [
+        "top peer #1 10.0.0.1 requests=2 (+0) errors=1 latency_ms=4.0 total=3",
+        "top peer_method #1 10.0.0.1 /pkg.Svc/Get requests=2 (+0) errors=1 "
+        "latency_ms=4.0 total=3",
+        "top user_agent #1 test requests=3 (+0) errors=1 latency_ms=6.0 total=3",
+    ]
+    assert tracker.top("peer") == []
+
+
+def test_tracker_overload() -> None:
+    """Test RPCs left out of the access log by overload control are counted."""
+    logger = mock.Mock()
+    tracker = HeavyHitterTracker(interval=0)
+    controller = OverloadController()
+    controller._mode = OverloadMode.AGGREGATE
+    interceptor = AccessLogInterceptor(
+        logger=logger, overload=controller, plugins=[tracker]
+    )
+    server = grpc.server(
+        futures.ThreadPoolExecutor(max_workers=1), interceptors=[interceptor]
+    )
+    port = server.add_insecure_port("localhost:0")
+    test_service_pb2_grpc.add_TestServiceServicer_to_server(Servicer(0), server)
+    server.start()
+    try:
+        with grpc.insecure_channel(f"localhost:{port}") as channel:
+            stub = test_service_pb2_grpc.TestServiceStub(channel)
+            for _ in range(3):
+                stub.UnaryUnary(test_service_pb2.Request(data="a"))
+    finally:
+        server.stop(None)
+
+    logger.log.assert_not_called()
+    (hitter,) = tracker.top("peer_method")
+    assert hitter.key[1] == "/TestService/UnaryUnary"  # type: ignore[index]
+    assert (hitter.requests, hitter.errors) == (3, 0)
+    interceptor.close()
+    tracker.close()
+
+
+def test_tracker_thread() -> None:
+    """Test windows are emitted by the background thread."""
+    logger = mock.Mock(spec=logging.Logger)
+    tracker = HeavyHitterTracker(interval=0.01, logger=logger)
+    tracker.record("10.0.0.1", "/pkg.Svc/Get", "test", False, 1.0)
+
+    for _ in range(500):
+        if logger.info.called:
+            break
+        time.sleep(0.01)
+
+    tracker.close()
+    assert logger.info.call_count == 3
+
+
+def test_tracker_capacity() -> None:
+    """Test the capacity is validated."""
+    with pytest.raises(ValueError):
+        HeavyHitterTracker(capacity=0)
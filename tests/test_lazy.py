@@ -0,0 +1,63 @@
+"""Lazy package attribute tests."""
+
+import subprocess  # nosec
+import sys
+import types
+from typing import List
+
+import pytest
+
+import grpc_accesslog
+from grpc_accesslog import sinks
+
+
+def loaded_modules(statement: str) -> List[str]:
+    """Return the grpc_accesslog modules loaded by a fresh interpreter."""
+    script = (
+        "import sys\n"
+        f"{statement}\n"
+        "print(' '.join(sorted(m for m in sys.modules if 'grpc_accesslog' in m)))"
+    )
+    return subprocess.run(  # nosec
+        [sys.executable, "-c", script], check=True, capture_output=True, text=True
+    ).stdout.split()
+
+
+def test_import_is_lazy() -> None:
+    """Test importing the package loads no feature modules."""
+    assert loaded_modules("import grpc_accesslog") == [
+        "grpc_accesslog",
+        "grpc_accesslog._lazy",
+    ]
+
+    modules = loaded_modules("from grpc_accesslog import AccessLogInterceptor")
+    assert "grpc_accesslog._server" in modules
+    assert "grpc_accesslog._async_server" not in modules
+    assert "grpc_accesslog.sinks._asyncio" not in modules
+    assert "grpc_accesslog.sinks._compressed" not in modules
+    for optional in ("_allocations", "_coalesce", "_cpu", "_runtime"):
+        assert f"grpc_accesslog.{optional}" not in modules
+
+
+def test_options_import_features() -> None:
+    """Test enabled measurements import their modules."""
+    modules = loaded_modules(
+        "from grpc_accesslog import AccessLogInterceptor, handlers\n"
+        "AccessLogInterceptor(handlers=[handlers.cpu_us])"
+    )
+    assert "grpc_accesslog._cpu" in modules
+    assert "grpc_accesslog._allocations" not in modules
+
+
+def test_attributes() -> None:
+    """Test exported names resolve to their module objects."""
+    from grpc_accesslog._otlp import OtlpLogExporter
+
+    assert grpc_accesslog.OtlpLogExporter is OtlpLogExporter
+    assert isinstance(grpc_accesslog.handlers, types.ModuleType)
+    assert sinks.read_lines.__module__ == "grpc_accesslog.sinks._compressed"
+    assert set(grpc_accesslog.__all__) <= set(dir(grpc_accesslog))
+    assert set(sinks.__all__) <= set(dir(sinks))
+
+    with pytest.raises(AttributeError, match="no attribute 'Missing'"):
+        grpc_accesslog.Missing  # noqa: B018
@@ -0,0 +1,288 @@
+"""OTLP log record exporter tests."""
+
+import logging
+import threading
+from concurrent import futures
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+from pathlib import Path
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+from unittest import mock
+
+import grpc
+import pytest
+from google.protobuf.message import Message
+from google.protobuf.unknown_fields import UnknownFieldSet
+
+from grpc_accesslog import AccessLogInterceptor
+from grpc_accesslog import LogContext
+from grpc_accesslog import OtlpFileTarget
+from grpc_accesslog import OtlpGrpcTarget
+from grpc_accesslog import OtlpLogExporter
+from grpc_accesslog._context import Metadatum
+
+from ._server import Servicer
+from .proto import otlp_logs_pb2
+from .proto import otlp_logs_pb2_grpc
+from .proto import test_service_pb2
+from .proto import test_service_pb2_grpc
+
+
+TRACEPARENT = "00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01"
+
+
+class Collector(otlp_logs_pb2_grpc.LogsServiceServicer):
+    """Stand-in OTLP/gRPC collector."""
+
+    def __init__(self) -> None:
+        """Create a collector."""
+        self.requests: List[otlp_logs_pb2.ExportLogsServiceRequest] = []
+
+    def Export(  # noqa: N802
+        self,
+        request: otlp_logs_pb2.ExportLogsServiceRequest,
+        context: grpc.ServicerContext,
+    ) -> otlp_logs_pb2.ExportLogsServiceResponse:
+        """Store an export."""
+        self.requests.append(request)
+        return otlp_logs_pb2.ExportLogsServiceResponse()
+
+
+class ListTarget:
+    """Target storing batches in memory."""
+
+    def __init__(self, fail: bool = False) -> None:
+        """Create a target."""
+        self.batches: List[bytes] = []
+        self.exported = threading.Event()
+        self.closed = False
+        self.fail = fail
+
+    def export(self, batch: bytes) -> None:
+        """Store a batch."""
+        if self.fail:
+            raise ConnectionError("collector unavailable")
+        self.batches.append(batch)
+        self.exported.set()
+
+    def close(self) -> None:
+        """Mark the target closed."""
+        self.closed = True
+
+
+class StalledTarget(ListTarget):
+    """Failing target blocking exports until released."""
+
+    def __init__(self) -> None:
+        """Create a target."""
+        super().__init__(fail=True)
+        self.entered = threading.Event()
+        self.release = threading.Event()
+
+    def export(self, batch: bytes) -> None:
+        """Wait for the release and fail."""
+        self.entered.set()
+        self.release.wait(5)
+        super().export(batch)
+
+
+def attributes(message: Any) -> Dict[str, object]:
+    """Return the attributes of a record or resource as a dict."""
+    return {
+        attribute.key: getattr(attribute.value, attribute.value.WhichOneof("value"))
+        for attribute in message.attributes
+    }
+
+
+def assert_known(message: Message) -> None:
+    """Assert a decoded message and its submessages have no unknown fields."""
+    assert not len(UnknownFieldSet(message))
+    for field, value in message.ListFields():
+        if field.type != field.TYPE_MESSAGE:
+            continue
+        for item in [value] if isinstance(value, Message) else value:
+            assert_known(item)
+
+
+def records(batch: bytes) -> List[otlp_logs_pb2.LogRecord]:
+    """Parse the records of an exported batch."""
+    request = otlp_logs_pb2.ExportLogsServiceRequest.FromString(batch)
+    return list(request.resource_logs[0].scope_logs[0].log_records)
+
+
+def log_context(
+    code: Optional[grpc.StatusCode] = None, traceparent: Optional[str] = None
+) -> LogContext:
+    """Return the context of a finished RPC."""
+    metadata = [Metadatum("user-agent", "test-agent")]
+    if traceparent:
+        metadata.append(Metadatum("traceparent", traceparent))
+    context = mock.Mock()
+    context.peer.return_value = "ipv4:10.0.0.1:5000"
+    context.code.return_value = code
+    context.invocation_metadata.return_value = metadata
+    start = datetime(2024, 1, 2, 3, 4, 5, 6000, tzinfo=timezone.utc)
+    return LogContext(
+        context,
+        "/pkg.Service/Method",
+        None,
+        None,
+        start,
+        start + timedelta(milliseconds=250),
+    )
+
+
+def test_record() -> None:
+    """Test LogContext fields map to OTLP record fields and attributes."""
+    target = ListTarget()
+    exporter = OtlpLogExporter(
+        target,
+        service_name="orders",
+        resource={"replica": 3, "canary": True, "weight": 0.5, "offset": -1},
+        interval=0,
+    )
+    exporter.on_end(None, log_context(traceparent=TRACEPARENT))
+    exporter.on_end(None, log_context(code=grpc.StatusCode.NOT_FOUND))
+    exporter.close()
+
+    assert target.closed
+    request = otlp_logs_pb2.ExportLogsServiceRequest.FromString(target.batches[0])
+    resource_logs = request.resource_logs[0]
+    assert attributes(resource_logs.resource) == {
+        "service.name": "orders",
+        "replica": 3,
+        "canary": True,
+        "weight": 0.5,
+        "offset": -1,
+    }
+    assert resource_logs.scope_logs[0].scope.name == "grpc_accesslog"
+
+    assert_known(request)
+    traced, failed = resource_logs.scope_logs[0].log_records
+    assert traced.time_unix_nano == 1704164645006000000
+    assert traced.observed_time_unix_nano == 1704164645256000000
+    assert traced.severity_number == 9
+    assert traced.body.string_value == "/pkg.Service/Method"
+    assert attributes(traced) == {
+        "rpc.system": "grpc",
+        "rpc.service": "pkg.Service",
+        "rpc.method": "Method",
+        "rpc.grpc.status_code": 0,
+        "network.peer.address": "10.0.0.1",
+        "user_agent.original": "test-agent",
+    }
+    assert traced.trace_id.hex() == "4bf92f3577b34da6a3ce929d0e0e4736"
+    assert traced.span_id.hex() == "00f067aa0ba902b7"
+    assert traced.flags == 1
+
+    assert failed.severity_number == 17
+    assert attributes(failed)["rpc.grpc.status_code"] == 5
+    assert failed.trace_id == failed.span_id == b""
+
+
+def test_batches(tmp_path: Path) -> None:
+    """Test full batches are exported as they fill and the rest on flush."""
+    path = str(tmp_path / "logs.otlp")
+    exporter = OtlpLogExporter(OtlpFileTarget(path), max_records=4, interval=0)
+    for _ in range(10):
+        exporter.on_end(None, log_context())
+    assert [len(records(batch)) for batch in OtlpFileTarget.read(path)] == [4, 4]
+
+    exporter.close()
+    assert [len(records(batch)) for batch in OtlpFileTarget.read(path)] == [4, 4, 2]
+
+
+def test_background() -> None:
+    """Test the background thread exports as soon as a batch is full."""
+    target = ListTarget()
+    exporter = OtlpLogExporter(target, max_records=2, interval=60)
+    exporter.on_end(None, log_context())
+    assert not target.exported.wait(0.05)
+
+    exporter.on_end(None, log_context())
+    assert target.exported.wait(5)
+    exporter.on_end(None, log_context())
+    exporter.close()
+
+    assert [len(records(batch)) for batch in target.batches] == [2, 1]
+
+
+def test_dropped(caplog: pytest.LogCaptureFixture) -> None:
+    """Test records beyond the queue and of failed exports are dropped."""
+    target = StalledTarget()
+    exporter = OtlpLogExporter(target, max_records=2, max_queue=2, interval=60)
+    for _ in range(2):
+        exporter.on_end(None, log_context())
+    assert target.entered.wait(5)
+    for _ in range(3):
+        exporter.on_end(None, log_context())
+    assert exporter.dropped == 1
+
+    target.release.set()
+    with caplog.at_level(logging.ERROR, "grpc_accesslog._otlp"):
+        exporter.close()
+    assert exporter.dropped == 5
+    assert "OTLP export of 2 records failed" in caplog.text
+
+    with pytest.raises(ValueError):
+        OtlpLogExporter(target, max_records=0)
+    with pytest.raises(ValueError):
+        OtlpLogExporter(target, max_records=4, max_queue=2)
+
+
+def test_grpc_collector() -> None:
+    """Test RPCs of an intercepted server reach a stand-in collector."""
+    collector = Collector()
+    collector_server = grpc.server(futures.ThreadPoolExecutor(max_workers=1))
+    otlp_logs_pb2_grpc.add_LogsServiceServicer_to_server(collector, collector_server)
+    collector_port = collector_server.add_insecure_port("localhost:0")
+    collector_server.start()
+
+    exporter = OtlpLogExporter(
+        OtlpGrpcTarget(f"localhost:{collector_port}"), max_records=2, interval=0
+    )
+    server = grpc.server(
+        futures.ThreadPoolExecutor(max_workers=1),
+        interceptors=[AccessLogInterceptor(plugins=[exporter])],
+    )
+    test_service_pb2_grpc.add_TestServiceServicer_to_server(Servicer(0), server)
+    port = server.add_insecure_port("localhost:0")
+    server.start()
+    with grpc.insecure_channel(f"localhost:{port}") as channel:
+        stub = test_service_pb2_grpc.TestServiceStub(channel)
+        for _ in range(3):
+            stub.UnaryUnary(
+                test_service_pb2.Request(data="a"),
+                metadata=[("traceparent", TRACEPARENT)],
+            )
+    server.stop(grace=0)
+    exporter.close()
+    collector_server.stop(grace=0)
+
+    exported = [
+        record
+        for request in collector.requests
+        for record in request.resource_logs[0].scope_logs[0].log_records
+    ]
+    assert [
+        len(request.resource_logs[0].scope_logs[0].log_records)
+        for request in collector.requests
+    ] == [2, 1]
+    assert {record.body.string_value for record in exported} == {
+        "/TestService/UnaryUnary"
+    }
+    assert {record.trace_id.hex() for record in exported} == {
+        "4bf92f3577b34da6a3ce929d0e0e4736"
+    }
+
+
+def test_secure_channel() -> None:
+    """Test a target with credentials creates a secure channel."""
+    with mock.patch("grpc.secure_channel") as secure_channel:
+        credentials = mock.Mock()
+        OtlpGrpcTarget("collector:4317", credentials=credentials)
+    secure_channel.assert_called_once_with("collector:4317", credentials)
@@ -0,0 +1,331 @@
+"""Overload controller tests."""
+
+import logging
+import threading
+from datetime import datetime
+from datetime import timezone
+from typing import Iterator
+from typing import List
+from typing import Tuple
+from unittest import mock
+
+import grpc
+import pytest
+
+from grpc_accesslog import Coalescer
+from grpc_accesslog import OverloadController
+from grpc_accesslog import OverloadMode
+from grpc_accesslog import handlers
+from grpc_accesslog._overload import REDUCED_HANDLERS
+from grpc_accesslog._server import AccessLogger
+from grpc_accesslog.sinks import Sink
+
+
+class Clock:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self) -> None:
+        """Start at 0."""
+        self.now = 0.0
+
+    def monotonic(self) -> float:
+        """Return the current time."""
+        return self.now
+
+
+@pytest.fixture
+def clock() -> Iterator[Clock]:
+    """Replace the controller clock."""
+    clock = Clock()
+    with mock.patch("grpc_accesslog._overload.time", clock):
+        yield clock
+
+
+def load(
+    controller: OverloadController,
+    clock: Clock,
+    rate: float,
+    seconds: float,
+    busy: float = 0.0,
+    depth: int = 0,
+) -> List[List[str]]:
+    """Generate synthetic load: ``rate`` records per second taking ``busy`` s/s."""
+    lines = []
+    start = clock.now
+    for index in range(round(rate * seconds)):
+        clock.now = start + (index + 1) / rate
+        lines.extend(controller.observe(busy / rate, depth))
+
+    return lines
+
+
+def test_step_down(clock: Clock, caplog: pytest.LogCaptureFixture) -> None:
+    """Test the mode steps down one level per overloaded window."""
+    controller = OverloadController(max_rate=100, interval=1.0)
+
+    modes = []
+    for _ in range(5):
+        load(controller, clock, 200, 1)
+        modes.append(controller.mode)
+
+    assert modes == [
+        OverloadMode.REDUCED,
+        OverloadMode.SAMPLED,
+        OverloadMode.AGGREGATE,
+        OverloadMode.AGGREGATE,
+        OverloadMode.AGGREGATE,
+    ]
+    assert [record.levelno for record in caplog.records] == [logging.WARNING] * 3
+    assert "FULL -> REDUCED" in caplog.records[0].getMessage()
+
+
+def test_hysteresis(clock: Clock, caplog: pytest.LogCaptureFixture) -> None:
+    """Test the mode only steps up after consecutive calm windows."""
+    caplog.set_level(logging.INFO, "grpc_accesslog._overload")
+    controller = OverloadController(
+        max_rate=100, recover_ratio=0.5, recover_windows=2, interval=1.0
+    )
+    modes = []
+    for rate, seconds in (
+        (200, 2),
+        (80, 5),
+        (20, 1),
+        (80, 1),
+        (20, 1),
+        (20, 2),
+        (20, 2),
+        (20, 2),
+    ):
+        load(controller, clock, rate, seconds)
+        modes.append(controller.mode)
+
+    assert modes == [
+        OverloadMode.SAMPLED,
+        OverloadMode.SAMPLED,
+        OverloadMode.SAMPLED,
+        OverloadMode.SAMPLED,
+        OverloadMode.SAMPLED,
+        OverloadMode.REDUCED,
+        OverloadMode.FULL,
+        OverloadMode.FULL,
+    ]
+    assert [record.levelno for record in caplog.records][-2:] == [logging.INFO] * 2
+
+
+@pytest.mark.parametrize(
+    "kwargs,busy,depth",
+    [
+        ({"max_busy": 0.1}, 0.2, 0),
+        ({"max_queue": 50}, 0.0, 60),
+    ],
+)
+def test_signals(clock: Clock, kwargs, busy: float, depth: int) -> None:
+    """Test busy time and queue depth signals."""
+    controller = OverloadController(**kwargs)
+
+    load(controller, clock, 10, 0.9, busy, depth)
+    assert controller.mode is OverloadMode.FULL
+    load(controller, clock, 10, 0.2, busy, depth)
+    assert controller.mode is OverloadMode.REDUCED
+
+
+def test_disabled_signals(clock: Clock) -> None:
+    """Test the mode never changes without limits."""
+    controller = OverloadController(max_queue=None, max_busy=None)
+
+    load(controller, clock, 1000, 3, busy=10, depth=10**6)
+
+    assert controller.mode is OverloadMode.FULL
+
+
+def test_admit(clock: Clock) -> None:
+    """Test RPCs admitted as lines in each mode."""
+    controller = OverloadController(sample_every=4)
+
+    assert all(controller.admit() for _ in range(8))
+    controller._mode = OverloadMode.SAMPLED
+    assert [controller.admit() for _ in range(8)] == [False, False, False, True] * 2
+    controller._mode = OverloadMode.AGGREGATE
+    assert not any(controller.admit() for _ in range(8))
+
+
+def test_aggregate(clock: Clock) -> None:
+    """Test aggregates are emitted when a window closes."""
+    controller = OverloadController(max_busy=None)
+    controller.aggregate("/svc/A", None)
+    controller.aggregate("/svc/A", grpc.StatusCode.OK)
+    controller.aggregate("/svc/A", grpc.StatusCode.INTERNAL)
+
+    assert load(controller, clock, 10, 0.5) == []
+    assert load(controller, clock, 10, 0.5) == [
+        ["/svc/A", "OK", "count=2"],
+        ["/svc/A", "INTERNAL", "count=1"],
+    ]
+    controller.aggregate("/svc/B", None)
+    assert controller.drain() == [["/svc/B", "OK", "count=1"]]
+    assert controller.drain() == []
+
+
+def test_concurrent_window(clock: Clock) -> None:
+    """Test a window is only closed by one thread."""
+    controller = OverloadController(max_queue=1)
+    clock.now = 2.0
+
+    with controller._lock:
+        assert controller.observe(0, 10) == []
+
+    class Racing:
+        def acquire(self, blocking: bool) -> bool:
+            controller._window_start = clock.now
+            return True
+
+        def release(self) -> None:
+            pass
+
+    controller._lock = Racing()  # type: ignore[assignment]
+    assert controller.observe(0, 10) == []
+    assert controller.mode is OverloadMode.FULL
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {"recover_ratio": 0.0},
+        {"recover_ratio": 1.0},
+        {"recover_windows": 0},
+        {"sample_every": 0},
+        {"interval": 0},
+    ],
+)
+def test_invalid(kwargs) -> None:
+    """Test argument validation."""
+    with pytest.raises(ValueError):
+        OverloadController(**kwargs)
+
+
+def context(code=None) -> mock.Mock:
+    """Return a servicer context stand-in."""
+    return mock.Mock(
+        peer=mock.Mock(return_value="ipv4:127.0.0.1:1"),
+        code=mock.Mock(return_value=code),
+        invocation_metadata=mock.Mock(return_value=()),
+    )
+
+
+@pytest.mark.parametrize("deferred", [False, True])
+def test_access_logger(
+    clock: Clock, caplog: pytest.LogCaptureFixture, deferred: bool
+) -> None:
+    """Test the access logger applies the controller mode."""
+    controller = OverloadController(sample_every=2)
+    logger = AccessLogger(
+        handlers=[handlers.peer, handlers.request],
+        detail_handlers=[handlers.user_agent],
+        detail_threshold=0,
+        deferred=deferred,
+        overload=controller,
+        logger=logging.getLogger("test_overload"),
+    )
+    start = datetime(2021, 4, 3, tzinfo=timezone.utc)
+
+    def log(code=None) -> None:
+        logger.log(context(code), "/svc/Method", None, None, start, start)
+        logger.flush()
+
+    with caplog.at_level(logging.INFO, "test_overload"):
+        controller.handlers = [handlers.request, handlers.status]
+        logger._reduced_handlers = controller.handlers
+        log()
+        controller._mode = OverloadMode.REDUCED
+        log()
+        controller._mode = OverloadMode.SAMPLED
+        log()
+        log(grpc.StatusCode.INTERNAL)
+        controller._mode = OverloadMode.AGGREGATE
+        clock.now = 5.0
+        log()
+        log()
+        logger.close()
+
+    assert [
+        record.getMessage()
+        for record in caplog.records
+        if record.name == "test_overload"
+    ] == [
+        "127.0.0.1 /svc/Method -",
+        "/svc/Method OK",
+        "/svc/Method INTERNAL",
+        "/svc/Method OK count=2",
+        "/svc/Method OK count=1",
+    ]
+
+
+def test_aggregate_path(clock: Clock) -> None:
+    """Test aggregate lines are written by the writer thread and coalesced."""
+    written: List[Tuple[str, str]] = []
+    sink = mock.Mock(spec=Sink)
+    sink.write.side_effect = lambda line: written.append(
+        (threading.current_thread().name, line)
+    )
+    controller = OverloadController()
+    logger = AccessLogger(
+        name="access",
+        handlers=[handlers.request],
+        deferred=True,
+        overload=controller,
+        coalesce=Coalescer(window=60),
+        sink=sink,
+    )
+    controller._mode = OverloadMode.AGGREGATE
+    start = datetime(2021, 4, 3, tzinfo=timezone.utc)
+
+    for now in (0.0, 5.0, 5.5, 10.0):
+        clock.now = now
+        logger.log(context(), "/svc/Method", None, None, start, start)
+    assert logger.flush(5)
+    logger.close()
+
+    assert written[0] == ("access-writer", "/svc/Method OK count=2")
+    assert len(written) == 2
+    assert written[1][1].startswith("/svc/Method OK count=2 repeated 1 times")
+
+
+@pytest.mark.parametrize("mode", [OverloadMode.SAMPLED, OverloadMode.AGGREGATE])
+def test_echo_request_id_shed(clock: Clock, mode: OverloadMode) -> None:
+    """Test generated request IDs are echoed also for RPCs not logged."""
+    controller = OverloadController(sample_every=1000)
+    logger = AccessLogger(
+        handlers=[handlers.request, handlers.request_id],
+        overload=controller,
+        echo_request_id=True,
+        logger=logging.getLogger("test_overload"),
+    )
+    start = datetime(2021, 4, 3, tzinfo=timezone.utc)
+    controller._mode = mode
+
+    rpc = context()
+    rpc.trailing_metadata.return_value = None
+    logger.log(rpc, "/svc/Method", None, None, start, start)
+    logger.close()
+
+    (metadata,), _ = rpc.set_trailing_metadata.call_args
+    assert [key for key, _ in metadata] == ["x-request-id"]
+
+
+def test_reduced_handlers_captured(clock: Clock) -> None:
+    """Test deferred capture includes the reduced handler inputs."""
+    controller = OverloadController()
+    logger = AccessLogger(
+        handlers=[handlers.request, handlers.rtt_ms],
+        deferred=True,
+        overload=controller,
+        logger=logging.getLogger("test_overload"),
+    )
+
+    assert logger._all_handlers() == [handlers.request, handlers.rtt_ms] + [
+        handler
+        for handler in REDUCED_HANDLERS
+        if handler not in (handlers.request, handlers.rtt_ms)
+    ]
+    assert logger._captured_fields() == frozenset(("time", "status"))
+    logger.close()
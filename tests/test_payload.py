@@ -0,0 +1,356 @@
+"""Payload rendering tests."""
+
+import json
+import logging
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from datetime import timezone
+from unittest import mock
+
+import grpc
+import pytest
+
+from grpc_accesslog import AccessLogInterceptor
+from grpc_accesslog import LogContext
+from grpc_accesslog import handlers
+from grpc_accesslog import payload
+from grpc_accesslog._server import AccessLogger
+
+from ._server import Servicer
+from .proto import test_service_pb2_grpc
+from .proto.payload_pb2 import Card
+from .proto.payload_pb2 import Item
+from .proto.payload_pb2 import Order
+from .proto.test_service_pb2 import Request
+
+
+START = datetime(2021, 4, 3, 0, 0, 0, 0, timezone.utc)
+
+
+@pytest.fixture
+def order() -> Order:
+    """Provide a populated message."""
+    return Order(
+        id="1",
+        password="secret",
+        card=Card(number="4111", holder="Holder"),
+        items=[Item(name="a", blob=b"x", tags=["t"]), Item(name="b")],
+        labels={"k": "v"},
+        amount=10,
+    )
+
+
+@pytest.fixture
+def renderer():
+    """Provide a renderer using a thread pool."""
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        yield payload.PayloadRenderer(
+            mask=["password", "card.number", "items.blob"], executor=executor
+        )
+
+
+def log_context(request, response=None) -> LogContext:
+    """Build a LogContext for payload handlers."""
+    return LogContext(mock.Mock(), "/svc/Method", request, response, START, START)
+
+
+def test_render_masked(order: Order) -> None:
+    """Test rendering a serialized message with masked fields."""
+    result = payload.render(
+        Order.__module__,
+        Order.DESCRIPTOR.full_name,
+        order.SerializeToString(),
+        payload.PayloadPolicy(
+            mask=("amount", "card.number", "items.blob", "labels", "password")
+        ),
+    )
+
+    assert json.loads(result) == {
+        "id": "1",
+        "password": payload.MASK,
+        "card": {"number": payload.MASK, "holder": "Holder"},
+        "items": [{"name": "a", "tags": ["t"]}, {"name": "b"}],
+    }
+    assert "\n" not in result
+
+
+def test_render_truncated(order: Order) -> None:
+    """Test rendered payloads are truncated to the byte budget."""
+    result = payload.render(
+        Order.__module__,
+        Order.DESCRIPTOR.full_name,
+        order.SerializeToString(),
+        payload.PayloadPolicy(max_bytes=10),
+    )
+
+    assert result == '{"id": ...'
+
+
+@pytest.mark.parametrize(
+    "text, max_bytes, expected",
+    [
+        ("short", 100, "short"),
+        ("abcdef", 6, "abcdef"),
+        ("abcdef", 5, "ab..."),
+        ("\u00e9\u00e9\u00e9", 5, "\u00e9..."),
+        ("\u00e9\u00e9\u00e9", 4, "..."),
+        ("abcd", 2, ""),
+        ("abc", -1, ""),
+    ],
+)
+def test_fit(text: str, max_bytes: int, expected: str) -> None:
+    """Test truncating text to a UTF-8 byte budget."""
+    assert payload.fit(text, max_bytes) == expected
+
+
+@pytest.mark.parametrize("max_bytes", [1, 3, 4, 5, 10, 17, 21, 22, 30, 45, 80])
+def test_budget(max_bytes: int) -> None:
+    """Test request, response and combined renderings stay within budget."""
+    formatter = payload.PayloadFormatter(max_bytes=max_bytes)
+    context = log_context(Request(data="\u00e9t\u00e9" * 8), Request(data="z" * 40))
+
+    for handler in (formatter.request, formatter.response, formatter.payloads):
+        output = handler(context)
+        assert len(output.encode()) <= max_bytes
+
+
+def test_compile_plan() -> None:
+    """Test compiling field paths for a message type."""
+    plan = payload.compile_plan(
+        Order.DESCRIPTOR,  # type: ignore[arg-type]
+        mask=[
+            "card.number",
+            "card.missing",
+            "missing",
+            "labels.key",
+            "id.nested",
+            "parent.parent.id",
+            "password",
+        ],
+        drop=["password", "parent.card"],
+        truncate=[("items", 3), ("items", 2), ("card", 1), ("labels", 1)],
+    )
+
+    assert [(field.name, action) for field, action, _, _ in plan] == [
+        ("card", payload.NESTED),
+        ("items", payload.TRUNCATE),
+        ("parent", payload.NESTED),
+        ("password", payload.DROP),
+    ]
+    assert plan[1][2] == 2
+    card_plan = plan[0][3]
+    assert card_plan is not None
+    assert [field.name for field, _, _, _ in card_plan] == ["number"]
+    parent_plan = plan[2][3]
+    assert parent_plan is not None
+    assert [(field.name, action) for field, action, _, _ in parent_plan] == [
+        ("card", payload.DROP),
+        ("parent", payload.NESTED),
+    ]
+
+
+def test_apply_plan_nested_unset() -> None:
+    """Test masking skips unset fields."""
+    order = Order(id="1", parent=Order(card=Card(holder="x")))
+    payload.apply_plan(
+        order,
+        payload.compile_plan(
+            Order.DESCRIPTOR,  # type: ignore[arg-type]
+            ["card.number", "password", "parent.card.holder"],
+        ),
+    )
+
+    assert order == Order(id="1", parent=Order(card=Card(holder=payload.MASK)))
+
+
+def test_apply_plan_truncate(order: Order) -> None:
+    """Test truncating repeated, string and bytes fields."""
+    order.items[0].blob = b"xyz"
+    order.items[0].tags.extend(["u", "v"])
+    payload.apply_plan(
+        order,
+        payload.compile_plan(
+            Order.DESCRIPTOR,  # type: ignore[arg-type]
+            truncate=[
+                ("items", 1),
+                ("items.blob", 2),
+                ("items.tags", 2),
+                ("card.holder", 3),
+                ("id", 5),
+            ],
+        ),
+    )
+
+    assert list(order.items) == [Item(name="a", blob=b"xy", tags=["t", "u"])]
+    assert order.card.holder == "Hol"
+    assert order.id == "1"
+
+
+def test_plan_cached() -> None:
+    """Test plans are compiled once per descriptor and policy."""
+    with mock.patch.object(
+        payload, "compile_plan", wraps=payload.compile_plan
+    ) as compile_plan:
+        for _ in range(3):
+            payload.render(
+                Request.__module__,
+                Request.DESCRIPTOR.full_name,
+                b"",
+                payload.PayloadPolicy(mask=("cached",)),
+            )
+
+    compile_plan.assert_called_once()
+
+
+def test_formatter(order: Order) -> None:
+    """Test formatting payloads on the calling thread."""
+    formatter = payload.PayloadFormatter(
+        mask=["card.number"],
+        drop=["password", "labels"],
+        truncate={"items": 1},
+        max_bytes=200,
+    )
+    context = log_context(order, Request(data="data"))
+
+    assert json.loads(formatter.request(context)) == {
+        "id": "1",
+        "card": {"number": payload.MASK, "holder": "Holder"},
+        "items": [{"name": "a", "blob": "eA==", "tags": ["t"]}],
+        "amount": "10",
+    }
+    assert formatter.response(context) == '{"data": "data"}'
+    assert formatter.format(None) == "-"
+    assert order.password == "secret"
+    assert len(order.items) == 2
+    assert formatter.request.fields == frozenset(("request",))  # type: ignore
+
+
+def test_formatter_payloads_budget(order: Order) -> None:
+    """Test request and response share the byte budget of a record."""
+    formatter = payload.PayloadFormatter(max_bytes=30)
+    result = formatter.payloads(log_context(Request(data="data"), order))
+
+    assert result == '{"data": "data"} {"id": "1"...'
+    assert formatter.payloads.fields == frozenset(  # type: ignore
+        ("request", "response")
+    )
+
+
+def test_handlers(renderer: payload.PayloadRenderer, order: Order) -> None:
+    """Test request and response handlers."""
+    context = log_context(order, iter(()))
+
+    assert json.loads(renderer.request(context))["password"] == payload.MASK
+    assert renderer.response(context) == "-"
+
+
+def test_handler_payloads(renderer: payload.PayloadRenderer) -> None:
+    """Test rendering request and response within one budget."""
+    context = log_context(Request(data="data"), Request(data="more"))
+
+    assert renderer.payloads(context) == '{"data": "data"} {"data": "more"}'
+
+
+def test_handler_error(
+    renderer: payload.PayloadRenderer, caplog: pytest.LogCaptureFixture
+) -> None:
+    """Test rendering errors produce a placeholder and are logged once."""
+    with mock.patch.object(payload, "render", side_effect=RuntimeError):
+        assert renderer.request(log_context(Request(data="data"))) == "-"
+        assert renderer.request(log_context(Request(data="data"))) == "-"
+
+    assert [record.getMessage() for record in caplog.records] == [
+        "Rendering a payload failed"
+    ]
+
+
+def test_handler_timeout() -> None:
+    """Test payloads not rendered in time produce a placeholder."""
+    executor = mock.Mock(submit=mock.Mock(return_value=Future()))
+    renderer = payload.PayloadRenderer(executor=executor, timeout=0.01)
+
+    assert renderer.request(log_context(Request(data="data"))) == "-"
+
+
+def test_deferred_capture(renderer: payload.PayloadRenderer, order: Order) -> None:
+    """Test payloads are serialized on the RPC thread and written in order."""
+    logger = mock.Mock()
+    access_logger = AccessLogger(
+        logger=logger,
+        handlers=[handlers.request, renderer.request],
+        detail_handlers=[renderer.response],
+        detail_status=[grpc.StatusCode.INTERNAL],
+        deferred=True,
+    )
+    context = mock.Mock(code=mock.Mock(return_value=grpc.StatusCode.INTERNAL))
+
+    with mock.patch.object(
+        Order, "SerializeToString", wraps=order.SerializeToString
+    ) as serialize:
+        access_logger.log(context, "/svc/Method", order, order, START, START)
+        assert serialize.call_count == 2
+
+    order.id = "changed"
+    context.code.return_value = grpc.StatusCode.OK
+    access_logger.log(context, "/svc/Other", Request(data="x"), order, START, START)
+    access_logger.close()
+
+    first, second = [call.args for call in logger.log.call_args_list]
+    assert first[0] == logging.INFO
+    assert first[2] == "/svc/Method"
+    assert json.loads(first[3])["id"] == "1"
+    assert json.loads(first[4])["id"] == "1"
+    assert second[2:] == ("/svc/Other", '{"data": "x"}')
+
+
+@pytest.mark.parametrize("deferred", [False, True])
+def test_interceptor(renderer: payload.PayloadRenderer, deferred: bool) -> None:
+    """Test the interceptor keeps the messages read by the payload handlers."""
+    check_interceptor(renderer, deferred)
+
+
+def test_interceptor_process_pool() -> None:
+    """Test the owned pool starts inside a running server."""
+    renderer = payload.PayloadRenderer(max_workers=1)
+    try:
+        check_interceptor(renderer, True)
+        executor = renderer._get_executor()
+        assert executor._mp_context.get_start_method() == "spawn"  # type: ignore
+    finally:
+        renderer.close()
+
+
+def check_interceptor(renderer: payload.PayloadRenderer, deferred: bool) -> None:
+    """Log an RPC of a running server with payload handlers."""
+    logger = mock.Mock()
+    interceptor = AccessLogInterceptor(
+        logger=logger,
+        handlers=[handlers.request, renderer.request, renderer.response],
+        deferred=deferred,
+    )
+    server = grpc.server(ThreadPoolExecutor(max_workers=1), interceptors=[interceptor])
+    port = server.add_insecure_port("localhost:0")
+    test_service_pb2_grpc.add_TestServiceServicer_to_server(Servicer(0), server)
+    server.start()
+    with grpc.insecure_channel(f"localhost:{port}") as channel:
+        stub = test_service_pb2_grpc.TestServiceStub(channel)
+        stub.UnaryUnary(Request(data="ab"))
+    interceptor.close()
+    server.stop(grace=0)
+
+    ((args, _),) = logger.log.call_args_list
+    assert args[2:] == ("/TestService/UnaryUnary", '{"data": "ab"}', '{"data": "ab"}')
+
+
+def test_process_pool(order: Order) -> None:
+    """Test rendering in the owned process pool."""
+    renderer = payload.PayloadRenderer(mask=["password"], max_workers=1)
+
+    try:
+        result = renderer.request(log_context(order))
+    finally:
+        renderer.close()
+        renderer.close()
+
+    assert json.loads(result)["password"] == payload.MASK
@@ -0,0 +1,281 @@
+"""Plugin hook tests."""
+
+import logging
+from concurrent import futures
+from typing import Any
+from typing import Iterator
+from typing import List
+from typing import Tuple
+from unittest import mock
+
+import grpc
+import pytest
+
+from grpc_accesslog import AccessLogInterceptor
+from grpc_accesslog import AsyncAccessLogInterceptor
+from grpc_accesslog import LogContext
+from grpc_accesslog import Plugin
+from grpc_accesslog import handlers
+from grpc_accesslog._server import _UNTIMED
+
+from ._server import AsyncServicer
+from ._server import Servicer
+from .proto import test_service_pb2
+from .proto import test_service_pb2_grpc
+
+
+class Recorder(Plugin):
+    """Plugin recording every message."""
+
+    fields = frozenset(("counts",))
+
+    def __init__(self) -> None:
+        """Create a recorder."""
+        self.rpcs: List[Tuple[List[Any], LogContext]] = []
+
+    def on_start(self, method_name: str, context: grpc.ServicerContext) -> Any:
+        """Start the event list of an RPC."""
+        return [method_name]
+
+    def on_message(self, state: Any, message: Any, received: bool) -> None:
+        """Record a message."""
+        state.append(("received" if received else "sent", message.data))
+
+    def on_end(self, state: Any, log_context: LogContext) -> None:
+        """Record the finished RPC."""
+        self.rpcs.append((state, log_context))
+
+
+class Ender(Plugin):
+    """Plugin only observing the end of RPCs."""
+
+    fields = frozenset(("status",))
+
+    def __init__(self) -> None:
+        """Create a plugin."""
+        self.contexts: List[LogContext] = []
+
+    def on_end(self, state: Any, log_context: LogContext) -> None:
+        """Record the finished RPC."""
+        self.contexts.append(log_context)
+
+
+class Broken(Plugin):
+    """Plugin raising from a hook."""
+
+    def __init__(self, hook: str) -> None:
+        """Create a plugin failing in a hook."""
+        self.hook = hook
+
+    def on_start(self, method_name: str, context: grpc.ServicerContext) -> Any:
+        """Fail or start an RPC."""
+        if self.hook == "on_start":
+            raise RuntimeError("broken")
+
+    def on_message(self, state: Any, message: Any, received: bool) -> None:
+        """Fail or observe a message."""
+        if self.hook in ("on_start", "on_message"):
+            raise RuntimeError("broken")
+
+    def on_end(self, state: Any, log_context: LogContext) -> None:
+        """Fail or end an RPC."""
+        if self.hook in ("on_start", "on_end"):
+            raise RuntimeError("broken")
+
+
+EXPECTED = [
+    (["/TestService/UnaryUnary", ("received", "ab"), ("sent", "ab")], 1, 1),
+    (
+        ["/TestService/UnaryStream", ("received", "ab"), ("sent", "a"), ("sent", "b")],
+        1,
+        2,
+    ),
+    (
+        [
+            "/TestService/StreamUnary",
+            ("received", "a"),
+            ("received", "b"),
+            ("sent", "ab"),
+        ],
+        2,
+        1,
+    ),
+    (
+        [
+            "/TestService/StreamStream",
+            ("received", "a"),
+            ("sent", "a"),
+            ("received", "b"),
+            ("sent", "b"),
+        ],
+        2,
+        2,
+    ),
+]
+
+
+def requests() -> Iterator[test_service_pb2.Request]:
+    """Return two streamed requests."""
+    return iter(
+        [test_service_pb2.Request(data="a"), test_service_pb2.Request(data="b")]
+    )
+
+
+def serve(interceptor: AccessLogInterceptor) -> Tuple[grpc.Server, str]:
+    """Start a server with an interceptor."""
+    server = grpc.server(
+        futures.ThreadPoolExecutor(max_workers=1), interceptors=[interceptor]
+    )
+    port = server.add_insecure_port("localhost:0")
+    test_service_pb2_grpc.add_TestServiceServicer_to_server(Servicer(0), server)
+    server.start()
+    return server, f"localhost:{port}"
+
+
+def test_hooks() -> None:
+    """Test plugins share the wrapper and LogContext of every RPC shape."""
+    recorder = Recorder()
+    ender = Ender()
+    contexts: List[LogContext] = []
+
+    @handlers.requires("status")
+    def handler(context: LogContext) -> str:
+        contexts.append(context)
+        return "-"
+
+    interceptor = AccessLogInterceptor(
+        handlers=[handler], logger=logging.getLogger(), plugins=[recorder, ender]
+    )
+    server, address = serve(interceptor)
+    with grpc.insecure_channel(address) as channel:
+        stub = test_service_pb2_grpc.TestServiceStub(channel)
+        stub.UnaryUnary(test_service_pb2.Request(data="ab"))
+        list(stub.UnaryStream(test_service_pb2.Request(data="ab")))
+        stub.StreamUnary(requests())
+        list(stub.StreamStream(requests()))
+    server.stop(grace=0)
+
+    assert [
+        (events, context.request_count, context.response_count)
+        for events, context in recorder.rpcs
+    ] == EXPECTED
+    assert len(contexts) == len(ender.contexts) == 4
+    assert all(ender.contexts[i] is contexts[i] for i in range(4))
+    assert {context.start for context in contexts} == {_UNTIMED}
+
+
+def test_lean() -> None:
+    """Test plugins without message hooks do not wrap requests."""
+    ender = Ender()
+    interceptor = AccessLogInterceptor(handlers=[], plugins=[ender])
+    server, address = serve(interceptor)
+    with grpc.insecure_channel(address) as channel:
+        stub = test_service_pb2_grpc.TestServiceStub(channel)
+        stub.UnaryUnary(test_service_pb2.Request(data="ab"))
+        stub.StreamUnary(requests())
+    server.stop(grace=0)
+
+    assert [
+        (context.request, context.response, context.request_count)
+        for context in ender.contexts
+    ] == [(None, None, None)] * 2
+
+
+def test_overload() -> None:
+    """Test plugins see RPCs the overload controller does not log."""
+    ender = Ender()
+    overload = mock.Mock(handlers=[], observe=mock.Mock(return_value=[]))
+    overload.admit.return_value = False
+    interceptor = AccessLogInterceptor(overload=overload, plugins=[ender])
+    server, address = serve(interceptor)
+    with grpc.insecure_channel(address) as channel:
+        test_service_pb2_grpc.TestServiceStub(channel).UnaryUnary(
+            test_service_pb2.Request(data="ab")
+        )
+    server.stop(grace=0)
+
+    assert len(ender.contexts) == 1
+    overload.aggregate.assert_called_once_with(
+        "/TestService/UnaryUnary", ender.contexts[0].server_context.code()
+    )
+
+
+@pytest.mark.parametrize("hook", ["on_start", "on_message", "on_end"])
+def test_broken(hook: str, caplog: pytest.LogCaptureFixture) -> None:
+    """Test plugin exceptions are logged and do not fail the RPC."""
+    logger = mock.Mock()
+    ender = Ender()
+    interceptor = AccessLogInterceptor(
+        handlers=[handlers.request], logger=logger, plugins=[Broken(hook), ender]
+    )
+    server, address = serve(interceptor)
+    with grpc.insecure_channel(address) as channel:
+        stub = test_service_pb2_grpc.TestServiceStub(channel)
+        response = stub.UnaryUnary(test_service_pb2.Request(data="ab"))
+    server.stop(grace=0)
+
+    assert response.data == "ab"
+    assert len(ender.contexts) == 1
+    logger.log.assert_called_once_with(logging.INFO, "%s", "/TestService/UnaryUnary")
+    assert len(caplog.records) == (2 if hook == "on_message" else 1)
+    assert caplog.records[0].name == "grpc_accesslog._plugins"
+    assert caplog.records[0].exc_info is not None
+
+
+def test_base_plugin() -> None:
+    """Test the base plugin hooks do nothing."""
+    plugin = Plugin()
+
+    assert plugin.on_start("/svc/Method", mock.Mock()) is None
+    plugin.on_message(None, "message", True)
+    plugin.on_end(None, mock.Mock())
+
+
+@pytest.mark.asyncio
+async def test_async_hooks() -> None:
+    """Test plugins of the asyncio interceptor."""
+    recorder = Recorder()
+    ender = Ender()
+    interceptor = AsyncAccessLogInterceptor(handlers=[], plugins=[recorder, ender])
+    server = grpc.aio.server(interceptors=[interceptor])
+    port = server.add_insecure_port("localhost:0")
+    test_service_pb2_grpc.add_TestServiceServicer_to_server(AsyncServicer(0), server)
+    await server.start()
+
+    async with grpc.aio.insecure_channel(f"localhost:{port}") as channel:
+        stub = test_service_pb2_grpc.TestServiceStub(channel)
+        await stub.UnaryUnary(test_service_pb2.Request(data="ab"))
+        async for _ in stub.UnaryStream(test_service_pb2.Request(data="ab")):
+            ...
+        await stub.StreamUnary(requests())
+        async for _ in stub.StreamStream(requests()):
+            ...
+    await server.stop(grace=0)
+
+    assert [
+        (events, context.request_count, context.response_count)
+        for events, context in recorder.rpcs
+    ] == EXPECTED
+    assert len(ender.contexts) == 4
+
+
+@pytest.mark.asyncio
+async def test_async_broken(caplog: pytest.LogCaptureFixture) -> None:
+    """Test plugin exceptions do not fail asyncio RPCs."""
+    logger = mock.Mock()
+    interceptor = AsyncAccessLogInterceptor(
+        handlers=[handlers.request], logger=logger, plugins=[Broken("on_end")]
+    )
+    server = grpc.aio.server(interceptors=[interceptor])
+    port = server.add_insecure_port("localhost:0")
+    test_service_pb2_grpc.add_TestServiceServicer_to_server(AsyncServicer(0), server)
+    await server.start()
+
+    async with grpc.aio.insecure_channel(f"localhost:{port}") as channel:
+        stub = test_service_pb2_grpc.TestServiceStub(channel)
+        response = await stub.UnaryUnary(test_service_pb2.Request(data="ab"))
+    await server.stop(grace=0)
+
+    assert response.data == "ab"
+    logger.log.assert_called_once_with(logging.INFO, "%s", "/TestService/UnaryUnary")
+    assert "Plugin" in caplog.text
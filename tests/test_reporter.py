@@ -0,0 +1,56 @@
+"""Window reporter tests."""
+
+import logging
+import time
+from typing import Dict
+from typing import List
+from unittest import mock
+
+from grpc_accesslog._reporter import WindowReporter
+
+
+class Counter(WindowReporter[List[int]]):
+    """Reporter of the values added per key."""
+
+    def add(self, key: str, value: int) -> None:
+        """Add a value."""
+        with self._lock:
+            self._window.setdefault(key, []).append(value)
+
+    def _log(self, window: Dict[str, List[int]]) -> None:
+        for key, values in sorted(window.items()):
+            self._logger.info("%s %s", key, values)
+
+
+def test_window() -> None:
+    """Test snapshots copy the window and emitting starts a new one."""
+    logger = mock.Mock(spec=logging.Logger)
+    counter = Counter(0, logger, "counter")
+    counter.add("b", 2)
+    counter.add("a", 1)
+
+    snapshot = counter.snapshot()
+    snapshot["a"].append(3)
+    assert counter.snapshot() == {"a": [1], "b": [2]}
+
+    counter.close()
+    assert logger.info.call_args_list == [
+        mock.call("%s %s", "a", [1]),
+        mock.call("%s %s", "b", [2]),
+    ]
+    assert counter.snapshot() == {}
+
+
+def test_thread() -> None:
+    """Test windows are emitted by the background thread."""
+    logger = mock.Mock(spec=logging.Logger)
+    counter = Counter(0.01, logger, "counter")
+    counter.add("a", 1)
+
+    for _ in range(500):
+        if logger.info.called:
+            break
+        time.sleep(0.01)
+
+    counter.close()
+    logger.info.assert_called_once_with("%s %s", "a", [1])
@@ -0,0 +1,307 @@
+"""Runtime configuration tests."""
+
+import json
+import logging
+import os
+import signal
+import time
+from concurrent import futures
+from datetime import datetime
+from datetime import timezone
+from pathlib import Path
+from typing import Callable
+from typing import List
+from unittest import mock
+
+import grpc
+import pytest
+
+from grpc_accesslog import AccessLogInterceptor
+from grpc_accesslog import AsyncAccessLogInterceptor
+from grpc_accesslog import LogContext
+from grpc_accesslog import MethodSettings
+from grpc_accesslog import RuntimeConfig
+from grpc_accesslog import compile_format
+from grpc_accesslog import handlers
+from grpc_accesslog._runtime import parse_settings
+from grpc_accesslog._server import _UNTIMED
+from grpc_accesslog._server import AccessLogger
+
+from ._server import AsyncServicer
+from ._server import Servicer
+from .proto import test_service_pb2
+from .proto import test_service_pb2_grpc
+
+
+METHOD = "/TestService/UnaryUnary"
+
+
+def messages(caplog: pytest.LogCaptureFixture) -> List[str]:
+    """Return the access log messages and clear them."""
+    lines = [
+        record.getMessage()
+        for record in caplog.records
+        if record.name == "test_runtime"
+    ]
+    caplog.clear()
+    return lines
+
+
+def until(condition: Callable[[], bool]) -> None:
+    """Wait up to 5 seconds for a condition."""
+    deadline = time.monotonic() + 5
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_switch(caplog: pytest.LogCaptureFixture) -> None:
+    """Test method handlers and inputs follow configuration changes."""
+    starts: List[datetime] = []
+
+    @handlers.requires("time")
+    def start(context: LogContext) -> str:
+        starts.append(context.start)
+        return "timed"
+
+    config = RuntimeConfig()
+    interceptor = AccessLogInterceptor(
+        handlers=[handlers.request, handlers.status],
+        logger=logging.getLogger("test_runtime"),
+        config=config,
+    )
+    server = grpc.server(
+        futures.ThreadPoolExecutor(max_workers=1), interceptors=[interceptor]
+    )
+    port = server.add_insecure_port("localhost:0")
+    test_service_pb2_grpc.add_TestServiceServicer_to_server(Servicer(0), server)
+    server.start()
+
+    with caplog.at_level(logging.INFO, "test_runtime"):
+        with grpc.insecure_channel(f"localhost:{port}") as channel:
+            stub = test_service_pb2_grpc.TestServiceStub(channel)
+
+            def call() -> None:
+                stub.UnaryUnary(test_service_pb2.Request(data="ab"))
+                stub.StreamUnary(iter([test_service_pb2.Request(data="a")]))
+
+            call()
+            assert messages(caplog) == [f"{METHOD} OK", "/TestService/StreamUnary OK"]
+
+            config.update({METHOD: MethodSettings([handlers.request, start])})
+            call()
+            assert messages(caplog) == [
+                f"{METHOD} timed",
+                "/TestService/StreamUnary OK",
+            ]
+            assert starts[0] != _UNTIMED
+
+            config.update({METHOD: None})
+            call()
+            assert messages(caplog) == [f"{METHOD} OK", "/TestService/StreamUnary OK"]
+
+    server.stop(grace=0)
+    assert interceptor._inputs.clock() == _UNTIMED
+
+
+def context(code=None) -> mock.Mock:
+    """Return a servicer context stand-in."""
+    return mock.Mock(
+        peer=mock.Mock(return_value="ipv4:127.0.0.1:1"),
+        code=mock.Mock(return_value=code),
+        invocation_metadata=mock.Mock(return_value=()),
+    )
+
+
+@pytest.mark.parametrize("deferred", [False, True])
+def test_sample_and_filter(caplog: pytest.LogCaptureFixture, deferred: bool) -> None:
+    """Test per-method sampling and filters."""
+    config = RuntimeConfig(
+        {
+            "/svc/Sampled": MethodSettings(sample_every=2),
+            "/svc/Off": MethodSettings(sample_every=0),
+            **parse_settings({"/svc/Errors": {"status": ["INTERNAL"]}}),
+            "/svc/Format": MethodSettings([compile_format("$method!")]),
+        }
+    )
+    logger = AccessLogger(
+        handlers=[handlers.request, handlers.status],
+        logger=logging.getLogger("test_runtime"),
+        deferred=deferred,
+        config=config,
+    )
+    start = datetime(2021, 4, 3, tzinfo=timezone.utc)
+
+    def log(method_name: str, code=None) -> None:
+        logger.log(context(code), method_name, None, None, start, start)
+
+    with caplog.at_level(logging.INFO, "test_runtime"):
+        for _ in range(3):
+            log("/svc/Sampled")
+            log("/svc/Off")
+        log("/svc/Errors")
+        log("/svc/Errors", grpc.StatusCode.INTERNAL)
+        log("/svc/Format")
+        log("/svc/Other")
+        logger.close()
+
+    lines = messages(caplog)
+    expected = [
+        "/svc/Sampled OK",
+        "/svc/Sampled OK",
+        "/svc/Errors INTERNAL",
+        "/svc/Format!",
+        "/svc/Other OK",
+    ]
+    if deferred:
+        # Overridden handlers are formatted on the RPC thread, ahead of the queue.
+        lines.sort()
+        expected.sort()
+    assert lines == expected
+
+
+def test_echo_request_id_sampled_out() -> None:
+    """Test generated request IDs are echoed for RPCs sampled out."""
+    logger = AccessLogger(
+        handlers=[handlers.request],
+        logger=logging.getLogger("test_runtime"),
+        echo_request_id=True,
+        config=RuntimeConfig({"/svc/Off": MethodSettings(sample_every=0)}),
+    )
+    rpc = context()
+    rpc.trailing_metadata.return_value = None
+    start = datetime(2021, 4, 3, tzinfo=timezone.utc)
+
+    logger.log(rpc, "/svc/Off", None, None, start, start)
+
+    (metadata,), _ = rpc.set_trailing_metadata.call_args
+    assert [key for key, _ in metadata] == ["x-request-id"]
+
+
+def test_parse_settings() -> None:
+    """Test settings decoded from JSON."""
+    settings = parse_settings(
+        {
+            "/svc/A": {"log_format": "$method $rtt_ms", "sample_every": "10"},
+            "/svc/B": {},
+        }
+    )
+
+    assert settings["/svc/A"].sample_every == 10
+    assert settings["/svc/A"].fields() == frozenset(("time",))
+    assert settings["/svc/B"] == MethodSettings()
+    assert (
+        MethodSettings(filter=lambda context: True).fields() == handlers.DEFAULT_FIELDS
+    )
+
+
+@pytest.mark.parametrize(
+    "data",
+    [{"/svc/A": {"level": "debug"}}, {"/svc/A": {"status": ["BROKEN"]}}],
+)
+def test_parse_invalid(data) -> None:
+    """Test invalid settings are rejected."""
+    with pytest.raises(ValueError):
+        parse_settings(data)
+
+
+def test_update_and_load(tmp_path: Path) -> None:
+    """Test updates and loads swap the settings and bump the version."""
+    config = RuntimeConfig({"/svc/A": MethodSettings(sample_every=2)})
+    methods = config.methods
+
+    config.update({"/svc/B": MethodSettings(), "/svc/C": None})
+    assert (config.version, sorted(config.methods)) == (1, ["/svc/A", "/svc/B"])
+    assert list(methods) == ["/svc/A"]
+    assert config.fields() == frozenset()
+
+    path = tmp_path / "access_log.json"
+    path.write_text(json.dumps({"/svc/C": {"status": ["OK"]}}))
+    config.load(str(path))
+    assert (config.version, list(config.methods)) == (2, ["/svc/C"])
+    assert config.fields() == frozenset(("status",))
+
+    path.unlink()
+    config.load(str(path))
+    assert (config.version, dict(config.methods)) == (3, {})
+
+
+def test_watch(tmp_path: Path, caplog: pytest.LogCaptureFixture) -> None:
+    """Test the watched file is reloaded when it changes or disappears."""
+    path = tmp_path / "access_log.json"
+    config = RuntimeConfig()
+    config.watch(str(path), interval=0.01)
+    until(lambda: config.version == 1)
+    with pytest.raises(RuntimeError):
+        config.watch(str(path))
+
+    path.write_text(json.dumps({"/svc/A": {"sample_every": 5}}))
+    until(lambda: "/svc/A" in config.methods)
+
+    with caplog.at_level(logging.ERROR, "grpc_accesslog._runtime"):
+        path.write_text("{")
+        os.utime(path, ns=(0, 1))
+        until(lambda: len(caplog.records) == 1)
+    assert "/svc/A" in config.methods
+
+    path.unlink()
+    until(lambda: not config.methods)
+    config.close()
+    config.close()
+
+
+def test_reload_unchanged(tmp_path: Path) -> None:
+    """Test an unchanged file is not loaded again."""
+    path = tmp_path / "access_log.json"
+    path.write_text(json.dumps({"/svc/A": {}}))
+    config = RuntimeConfig()
+
+    loaded = config._reload(str(path), None)
+    assert config._reload(str(path), loaded) == loaded
+    assert config.version == 1
+
+
+def test_watch_signal(tmp_path: Path) -> None:
+    """Test a signal reloads the file at once."""
+    path = tmp_path / "access_log.json"
+    path.write_text(json.dumps({"/svc/A": {}}))
+    config = RuntimeConfig()
+    config.watch(str(path), interval=60, signum=signal.SIGUSR1)
+    until(lambda: config.version == 1)
+
+    # Same modification time, only the signal triggers the reload.
+    stat = os.stat(path)
+    path.write_text(json.dumps({"/svc/B": {}}))
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    os.kill(os.getpid(), signal.SIGUSR1)
+    until(lambda: "/svc/B" in config.methods)
+
+    config.close()
+    assert signal.getsignal(signal.SIGUSR1) == signal.SIG_DFL
+
+
+@pytest.mark.asyncio
+async def test_async_switch(caplog: pytest.LogCaptureFixture) -> None:
+    """Test the asyncio interceptor follows configuration changes."""
+    config = RuntimeConfig()
+    interceptor = AsyncAccessLogInterceptor(
+        handlers=[handlers.request, handlers.status],
+        logger=logging.getLogger("test_runtime"),
+        config=config,
+    )
+    server = grpc.aio.server(interceptors=[interceptor])
+    port = server.add_insecure_port("localhost:0")
+    test_service_pb2_grpc.add_TestServiceServicer_to_server(AsyncServicer(0), server)
+    await server.start()
+
+    with caplog.at_level(logging.INFO, "test_runtime"):
+        async with grpc.aio.insecure_channel(f"localhost:{port}") as channel:
+            stub = test_service_pb2_grpc.TestServiceStub(channel)
+            config.update({METHOD: MethodSettings([compile_format("$rtt_ms")])})
+            await stub.UnaryUnary(test_service_pb2.Request(data="ab"))
+
+    await server.stop(grace=None)
+    assert interceptor._config_version == 1
+    assert interceptor._inputs.clock() != _UNTIMED
+    [line] = messages(caplog)
+    assert line.isdigit()
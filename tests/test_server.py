@@ -9,6 +9,9 @@ import pytest
 from pytest import LogCaptureFixture
 
 from grpc_accesslog import AccessLogInterceptor
+from grpc_accesslog import LogContext
+from grpc_accesslog import handlers
+from grpc_accesslog._server import _UNTIMED
 from grpc_accesslog._server import _wrap_rpc_behavior
 
 from ._server import Servicer
@@ -159,6 +162,121 @@ def test_intercept_no_handlers(
     assert not caplog.text
 
 
+@pytest.mark.parametrize(
+    "kwargs,detailed",
+    [
+        ({"detail_threshold": 0.0}, True),
+        ({"detail_threshold": 60000.0}, False),
+        ({"detail_threshold": {"/TestService/StreamStream": 0.0}}, True),
+        ({"detail_threshold": {"/TestService/UnaryUnary": 0.0}}, False),
+        ({"detail_status": [grpc.StatusCode.OK]}, True),
+        ({"detail_status": [grpc.StatusCode.INTERNAL]}, False),
+    ],
+)
+def test_intercept_detail(
+    caplog: LogCaptureFixture,
+    kwargs,
+    detailed: bool,
+) -> None:
+    """Test detail handlers only run for slow or failed RPCs."""
+    caplog.set_level(logging.INFO, logger="root")
+
+    interceptor = AccessLogInterceptor(
+        name="root",
+        propagate=True,
+        handlers=[handlers.request],
+        detail_handlers=[handlers.message_counts],
+        **kwargs,
+    )
+    server = grpc.server(
+        futures.ThreadPoolExecutor(max_workers=1), interceptors=[interceptor]
+    )
+    port = server.add_insecure_port("localhost:0")
+    test_service_pb2_grpc.add_TestServiceServicer_to_server(Servicer(), server)
+    server.start()
+
+    with grpc.insecure_channel(f"localhost:{port}") as channel:
+        stub = test_service_pb2_grpc.TestServiceStub(channel)
+        for _ in stub.StreamStream(iter((test_service_pb2.Request(data="data"),) * 3)):
+            ...
+
+    server.stop(grace=0)
+
+    assert ("/TestService/StreamStream 3/3" in caplog.text) is detailed
+    assert "/TestService/StreamStream" in caplog.text
+
+
+def test_intercept_detail_unary(
+    caplog: LogCaptureFixture,
+    interceptor: AccessLogInterceptor,
+    client_stub: test_service_pb2_grpc.TestServiceStub,
+) -> None:
+    """Test messages of unary RPCs are counted while details are enabled."""
+    caplog.set_level(logging.INFO, logger="root")
+
+    interceptor._handlers = [handlers.request]
+    interceptor._detail_handlers = [handlers.message_counts]
+    interceptor._detail_threshold = lambda method, duration: True
+    interceptor._inputs = interceptor._required_inputs()
+
+    client_stub.UnaryUnary(test_service_pb2.Request(data="data"))
+    client_stub.StreamUnary(iter((test_service_pb2.Request(data="data"),) * 2))
+
+    assert "/TestService/UnaryUnary 1/1" in caplog.text
+    assert "/TestService/StreamUnary 2/1" in caplog.text
+
+
+def test_intercept_lean(
+    interceptor: AccessLogInterceptor,
+    client_stub: test_service_pb2_grpc.TestServiceStub,
+) -> None:
+    """Test only the inputs declared by the handlers are captured."""
+    contexts = []
+
+    @handlers.requires("status")
+    def record(context: LogContext) -> str:
+        contexts.append(context)
+        return "-"
+
+    interceptor._handlers = [record]
+    interceptor._inputs = interceptor._required_inputs()
+
+    client_stub.UnaryUnary(test_service_pb2.Request(data="data"))
+    for _ in client_stub.UnaryStream(test_service_pb2.Request(data="data")):
+        ...
+
+    assert [(c.request, c.response, c.start, c.end) for c in contexts] == [
+        (None, None, _UNTIMED, _UNTIMED)
+    ] * 2
+
+
+def test_intercept_deferred(caplog: LogCaptureFixture) -> None:
+    """Test deferred interceptor writes from the writer thread."""
+    caplog.set_level(logging.INFO, logger="root")
+
+    interceptor = AccessLogInterceptor(
+        name="root",
+        propagate=True,
+        handlers=[handlers.request, handlers.status, handlers.response_size],
+        deferred=True,
+    )
+    server = grpc.server(
+        futures.ThreadPoolExecutor(max_workers=1), interceptors=[interceptor]
+    )
+    port = server.add_insecure_port("localhost:0")
+    test_service_pb2_grpc.add_TestServiceServicer_to_server(Servicer(), server)
+    server.start()
+
+    with grpc.insecure_channel(f"localhost:{port}") as channel:
+        stub = test_service_pb2_grpc.TestServiceStub(channel)
+        stub.UnaryUnary(test_service_pb2.Request(data="data"))
+
+    server.stop(grace=0)
+    interceptor.close()
+
+    assert "/TestService/UnaryUnary OK 6" in caplog.text
+
+
 def test_custom_logger() -> None:
     """Test setting custom logger."""
     logger = mock.Mock()
@@ -218,3 +336,71 @@ def test_wrapper(
 def test_wrapper_none_handler():
     """Test handling when provided handler is None."""
     assert _wrap_rpc_behavior(None, mock.Mock()) is None
+
+
+@pytest.mark.parametrize("deferred", [False, True])
+def test_intercept_echo_request_id(caplog: LogCaptureFixture, deferred: bool) -> None:
+    """Test generated request IDs are logged and sent in trailing metadata."""
+    caplog.set_level(logging.INFO, logger="root")
+
+    interceptor = AccessLogInterceptor(
+        name="root",
+        propagate=True,
+        handlers=[handlers.request, handlers.request_id],
+        deferred=deferred,
+        echo_request_id=True,
+    )
+    server = grpc.server(
+        futures.ThreadPoolExecutor(max_workers=1), interceptors=[interceptor]
+    )
+    port = server.add_insecure_port("localhost:0")
+    test_service_pb2_grpc.add_TestServiceServicer_to_server(Servicer(), server)
+    server.start()
+
+    with grpc.insecure_channel(f"localhost:{port}") as channel:
+        stub = test_service_pb2_grpc.TestServiceStub(channel)
+        _, call = stub.UnaryUnary.with_call(test_service_pb2.Request(data="data"))
+        _, echoed = stub.UnaryUnary.with_call(
+            test_service_pb2.Request(data="data"),
+            metadata=(("x-request-id", "client-id"),),
+        )
+
+    server.stop(grace=0)
+    interceptor.close()
+
+    trailing = dict(call.trailing_metadata())
+    assert f"/TestService/UnaryUnary {trailing['x-request-id']}" in caplog.text
+    assert "/TestService/UnaryUnary client-id" in caplog.text
+    assert "x-request-id" not in dict(echoed.trailing_metadata())
+
+
+@pytest.mark.parametrize("deferred", [False, True])
+def test_intercept_correlation_once(caplog: LogCaptureFixture, deferred: bool) -> None:
+    """Test all handlers of a record share one generated request ID."""
+    caplog.set_level(logging.INFO, logger="root")
+
+    interceptor = AccessLogInterceptor(
+        name="root",
+        propagate=True,
+        handlers=[handlers.request_id, handlers.trace_id, handlers.request_id],
+        deferred=deferred,
+    )
+    server = grpc.server(
+        futures.ThreadPoolExecutor(max_workers=1), interceptors=[interceptor]
+    )
+    port = server.add_insecure_port("localhost:0")
+    test_service_pb2_grpc.add_TestServiceServicer_to_server(Servicer(), server)
+    server.start()
+
+    with grpc.insecure_channel(f"localhost:{port}") as channel:
+        stub = test_service_pb2_grpc.TestServiceStub(channel)
+        stub.UnaryUnary(test_service_pb2.Request(data="data"))
+
+    server.stop(grace=0)
+    interceptor.close()
+
+    assert interceptor._inputs.correlation
+    [record] = [r for r in caplog.records if r.name == "root"]
+    first, trace, second = record.getMessage().split()
+    assert first == second
+    assert trace == "-"
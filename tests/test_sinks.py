@@ -0,0 +1,274 @@
+"""Asyncio sink tests."""
+
+import asyncio
+import logging
+import socket
+from pathlib import Path
+from typing import List
+from unittest import mock
+
+import pytest
+
+from grpc_accesslog import AccessLogInterceptor
+from grpc_accesslog import handlers
+from grpc_accesslog import sinks
+
+
+class Collector:
+    """Local stand-in for a line collector."""
+
+    def __init__(self) -> None:
+        """Create a collector."""
+        self.data = b""
+        self.server: asyncio.AbstractServer
+        self.writers: List[asyncio.StreamWriter] = []
+
+    async def handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Collect the data of a connection."""
+        self.writers.append(writer)
+        while True:
+            chunk = await reader.read(65536)
+            if not chunk:
+                break
+            self.data += chunk
+
+    async def serve_tcp(self, port: int = 0) -> int:
+        """Listen on a local TCP port."""
+        self.server = await asyncio.start_server(self.handle, "127.0.0.1", port)
+        return int(self.server.sockets[0].getsockname()[1])
+
+    async def serve_unix(self, path: str) -> None:
+        """Listen on a Unix domain socket."""
+        self.server = await asyncio.start_unix_server(self.handle, path)
+
+    async def stop(self) -> None:
+        """Stop listening and drop the open connections."""
+        self.server.close()
+        for writer in self.writers:
+            writer.close()
+        self.writers.clear()
+        await self.server.wait_closed()
+
+    async def lines(self, count: int) -> List[str]:
+        """Wait for a number of lines."""
+        for _ in range(500):
+            if self.data.count(b"\n") >= count:
+                break
+            await asyncio.sleep(0.01)
+
+        return self.data.decode().splitlines()
+
+
+def free_port() -> int:
+    """Return a currently unused local TCP port."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return int(sock.getsockname()[1])
+
+
+def test_invalid_arguments() -> None:
+    """Test water marks and sampling rate are validated."""
+    with pytest.raises(ValueError):
+        sinks.TCPSink("localhost", 1, high_water=1, low_water=2)
+    with pytest.raises(ValueError):
+        sinks.TCPSink("localhost", 1, sample_every=0)
+
+
+def test_incomplete_subclass() -> None:
+    """Test sinks missing a transport method cannot be created."""
+
+    class Incomplete(sinks.AsyncSink):
+        """Sink without ``_ready`` and ``_buffered``."""
+
+        def _send(self, data: bytes) -> None:
+            """Discard the data."""
+
+    with pytest.raises(TypeError, match="_buffered"):
+        Incomplete()  # type: ignore[abstract]
+
+
+def test_not_started() -> None:
+    """Test writing requires a started sink."""
+    with pytest.raises(RuntimeError):
+        sinks.TCPSink("localhost", 1).write("line")
+
+
+@pytest.mark.asyncio
+async def test_tcp_sink() -> None:
+    """Test batched lines reach a TCP collector."""
+    collector = Collector()
+    port = await collector.serve_tcp()
+    sink = sinks.TCPSink("127.0.0.1", port)
+    await sink.start()
+
+    for index in range(3):
+        sink.write(f"line {index}")
+
+    assert await sink.flush(timeout=5)
+    assert await collector.lines(3) == ["line 0", "line 1", "line 2"]
+
+    await sink.close()
+    await collector.stop()
+
+
+@pytest.mark.asyncio
+async def test_unix_sink(tmp_path: Path) -> None:
+    """Test lines reach a Unix domain socket collector."""
+    path = str(tmp_path / "collector.sock")
+    collector = Collector()
+    await collector.serve_unix(path)
+    sink = sinks.UnixSink(path)
+    await sink.start()
+
+    sink.write("line")
+
+    assert await collector.lines(1) == ["line"]
+    await sink.close()
+    await collector.stop()
+
+
+@pytest.mark.asyncio
+async def test_reconnect(caplog: pytest.LogCaptureFixture) -> None:
+    """Test buffered lines are sent once the collector is back."""
+    port = free_port()
+    sink = sinks.TCPSink("127.0.0.1", port, retry_delay=0.01, max_retry_delay=0.02)
+    await sink.start()
+    sink.write("buffered")
+    await asyncio.sleep(0.05)
+
+    assert "collector unavailable" in caplog.text
+    assert not await sink.flush(timeout=0.01)
+
+    collector = Collector()
+    await collector.serve_tcp(port)
+    assert await sink.flush(timeout=5)
+    assert await collector.lines(1) == ["buffered"]
+
+    await collector.stop()
+    await asyncio.sleep(0.05)
+    sink.write("after restart")
+    assert "connection lost" in caplog.text
+
+    restarted = Collector()
+    await restarted.serve_tcp(port)
+    assert await restarted.lines(1) == ["after restart"]
+
+    await sink.close()
+    await restarted.stop()
+
+
+@pytest.mark.asyncio
+async def test_backpressure() -> None:
+    """Test the sink samples lines while the transport is paused."""
+    sink = sinks.TCPSink("127.0.0.1", 1, high_water=100, low_water=10, sample_every=4)
+    await sink.start()
+    transport = mock.Mock(asyncio.WriteTransport)
+    transport.get_write_buffer_size.return_value = 0
+    protocol = sinks._asyncio._SinkProtocol(sink)
+    protocol.connection_made(transport)
+    transport.set_write_buffer_limits.assert_called_once_with(100, 10)
+
+    protocol.pause_writing()
+    for _ in range(20):
+        sink.write("x" * 9)
+
+    assert (sink.saturated, sink.sampled) == (True, 8)
+    await asyncio.sleep(0)
+    transport.write.assert_not_called()
+
+    transport.get_write_buffer_size.return_value = 5
+    protocol.resume_writing()
+    await asyncio.sleep(0)
+
+    transport.write.assert_called_once_with(b"xxxxxxxxx\n" * 12)
+    assert not sink.saturated
+
+    protocol.connection_lost(None)
+    await sink.close(timeout=0)
+
+
+@pytest.mark.asyncio
+async def test_max_pending() -> None:
+    """Test lines are dropped while the pending buffer is full."""
+    sink = sinks.TCPSink(
+        "127.0.0.1",
+        free_port(),
+        max_pending=20,
+        high_water=1000,
+        low_water=100,
+        retry_delay=10,
+    )
+    await sink.start()
+
+    sink.write("x" * 9)
+    sink.write("x" * 9)
+    sink.write("x" * 9)
+
+    assert sink.dropped == 1
+    await sink.close(timeout=0)
+    sink.write("closed")
+    assert sink.dropped == 2
+
+
+@pytest.mark.asyncio
+async def test_file_sink(tmp_path: Path) -> None:
+    """Test lines are appended to a file from an executor thread."""
+    path = tmp_path / "access.log"
+    sink = sinks.AsyncFileSink(str(path))
+    await sink.start()
+
+    for index in range(3):
+        sink.write(f"line {index}")
+        await asyncio.sleep(0)
+
+    await sink.close()
+
+    assert path.read_text().splitlines() == ["line 0", "line 1", "line 2"]
+
+
+@pytest.mark.asyncio
+async def test_file_sink_retry(
+    tmp_path: Path, caplog: pytest.LogCaptureFixture
+) -> None:
+    """Test failed file writes are retried."""
+    path = tmp_path / "access.log"
+    sink = sinks.AsyncFileSink(str(path), retry_delay=0.01)
+    await sink.start()
+    write_file = sink._write_file
+    calls: List[bytes] = []
+
+    def flaky(data: bytes) -> None:
+        calls.append(data)
+        if len(calls) == 1:
+            raise OSError("full")
+        write_file(data)
+
+    with mock.patch.object(sink, "_write_file", side_effect=flaky):
+        sink.write("line")
+        assert await sink.flush(timeout=5)
+
+    assert path.read_text() == "line\n"
+    assert "Failed to write access log file" in caplog.text
+    await sink.close()
+
+
+@pytest.mark.asyncio
+async def test_access_logger_sink(tmp_path: Path) -> None:
+    """Test a deferred access logger writes to a sink from its writer thread."""
+    path = tmp_path / "access.log"
+    sink = sinks.AsyncFileSink(str(path))
+    await sink.start()
+    interceptor = AccessLogInterceptor(
+        handlers=[handlers.request],
+        deferred=True,
+        sink=sink,
+        logger=logging.getLogger(),
+    )
+
+    interceptor.log(mock.Mock(), "/svc/Method", None, None, mock.Mock(), mock.Mock())
+    await asyncio.get_running_loop().run_in_executor(None, interceptor.close)
+    await sink.close()
+
+    assert path.read_text() == "/svc/Method\n"
@@ -0,0 +1,121 @@
+"""Statsd reporter tests."""
+
+import socket
+from concurrent import futures
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+from typing import Iterator
+from unittest import mock
+
+import grpc
+import pytest
+
+from grpc_accesslog import AccessLogInterceptor
+from grpc_accesslog import LogContext
+from grpc_accesslog import MethodSettings
+from grpc_accesslog import RuntimeConfig
+from grpc_accesslog import StatsdReporter
+
+from ._server import Servicer
+from .proto import test_service_pb2
+from .proto import test_service_pb2_grpc
+
+
+START = datetime(2021, 4, 3, 0, 0, 0, 0, timezone.utc)
+
+
+@pytest.fixture
+def receiver() -> Iterator[socket.socket]:
+    """Provide a UDP socket standing in for the statsd daemon."""
+    receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    receiver.bind(("127.0.0.1", 0))
+    receiver.settimeout(2)
+    yield receiver
+    receiver.close()
+
+
+def log_context(method: str, code, duration_ms: float) -> LogContext:
+    """Build the LogContext of a finished RPC."""
+    return LogContext(
+        mock.Mock(code=mock.Mock(return_value=code)),
+        method,
+        None,
+        None,
+        START,
+        START + timedelta(milliseconds=duration_ms),
+    )
+
+
+def reporter(receiver: socket.socket, **kwargs) -> StatsdReporter:
+    """Create a reporter sending to the receiver."""
+    return StatsdReporter(port=receiver.getsockname()[1], flush_interval=0, **kwargs)
+
+
+def test_statsd(receiver: socket.socket) -> None:
+    """Test counters and timers are aggregated before sending."""
+    statsd = reporter(receiver, prefix="app")
+
+    statsd.on_end(None, log_context("/pkg.Svc/Get", None, 1.4))
+    statsd.on_end(None, log_context("/pkg.Svc/Get", grpc.StatusCode.OK, 2))
+    statsd.on_end(None, log_context("/pkg.Svc/Get", grpc.StatusCode.NOT_FOUND, 3))
+    statsd.increment("app.custom", 5)
+    statsd.close()
+
+    assert sorted(receiver.recv(65536).split(b"\n")) == [
+        b"app.custom:5|c",
+        b"app.pkg_Svc.Get.NOT_FOUND:1|c",
+        b"app.pkg_Svc.Get.NOT_FOUND:3.000|ms",
+        b"app.pkg_Svc.Get.OK:1.400|ms",
+        b"app.pkg_Svc.Get.OK:2.000|ms",
+        b"app.pkg_Svc.Get.OK:2|c",
+    ]
+    assert statsd.fields == frozenset(("time", "status"))
+
+
+def test_statsd_sampled(receiver: socket.socket) -> None:
+    """Test timer samples beyond the reservoir are sent with a sample rate."""
+    statsd = reporter(receiver, max_samples=2)
+
+    with mock.patch("random.randrange", side_effect=[0, 5, 1, 5, 5, 5, 5, 5]):
+        for value in range(10):
+            statsd.timing("timer", value)
+    statsd.flush()
+    statsd.flush()
+
+    assert receiver.recv(65536).split(b"\n") == [
+        b"timer:2.000|ms|@0.2",
+        b"timer:4.000|ms|@0.2",
+    ]
+    statsd.close()
+    assert statsd.sent == 1
+
+
+def test_statsd_unlogged_rpcs(receiver: socket.socket) -> None:
+    """Test RPCs left out of the access log are still counted."""
+    statsd = reporter(receiver)
+    interceptor = AccessLogInterceptor(
+        logger=mock.Mock(),
+        plugins=[statsd],
+        config=RuntimeConfig(
+            {"/TestService/UnaryUnary": MethodSettings(sample_every=0)}
+        ),
+    )
+    server = grpc.server(
+        futures.ThreadPoolExecutor(max_workers=1), interceptors=[interceptor]
+    )
+    port = server.add_insecure_port("localhost:0")
+    test_service_pb2_grpc.add_TestServiceServicer_to_server(Servicer(0), server)
+    server.start()
+    try:
+        with grpc.insecure_channel(f"localhost:{port}") as channel:
+            stub = test_service_pb2_grpc.TestServiceStub(channel)
+            for _ in range(3):
+                stub.UnaryUnary(test_service_pb2.Request(data="a"))
+    finally:
+        server.stop(None)
+    statsd.close()
+
+    interceptor._logger.log.assert_not_called()  # type: ignore[attr-defined]
+    lines = receiver.recv(65536).split(b"\n")
+    assert b"grpc.TestService.UnaryUnary.OK:3|c" in lines